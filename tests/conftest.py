@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import types
+
+""" Makes the plugin's library modules importable without enigma2.
+
+    The package __init__ files of the plugin pull in enigma2 components,
+    so the two packages are registered here by path only and the modules
+    are imported as WiFiManager.modules.<name>. Only modules that don't
+    need enigma2 themselves can be tested this way.
+
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLUGIN_DIR = os.path.join(ROOT, 'usr', 'lib', 'enigma2', 'python', 'Plugins',
+                          'Extensions', 'WiFiManager')
+FIXTURES_DIR = os.path.join(ROOT, 'tests', 'fixtures')
+
+
+def _package(name, path):
+    package = sys.modules.get(name)
+    if package is None:
+        package = types.ModuleType(name)
+        package.__path__ = [path]
+        sys.modules[name] = package
+    return package
+
+
+# the plugin translates through gettext, tests see the English text
+_package('WiFiManager', PLUGIN_DIR)._ = lambda text: text
+_package('WiFiManager.modules',
+         os.path.join(PLUGIN_DIR, 'modules'))._ = lambda text: text
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
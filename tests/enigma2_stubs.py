@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import types
+
+""" Just enough of enigma2's Screens and Components for the plugin's
+    screen modules to import, and for key handlers to run on a screen
+    built without its __init__. Nothing here draws anything.
+
+"""
+
+
+class Screen(dict):
+
+    def __init__(self, session):
+        dict.__init__(self)
+        self.session = session
+        self.onShow = []
+        self.onHide = []
+        self.onClose = []
+
+    def setTitle(self, title):
+        self.title = title
+
+    def close(self, *result):
+        self.closed = result
+
+
+class Label(object):
+
+    def __init__(self, text=""):
+        self.text = text
+
+    def setText(self, text):
+        self.text = text
+
+    def getText(self):
+        return self.text
+
+
+class ScrollLabel(Label):
+
+    def pageUp(self):
+        pass
+
+    def pageDown(self):
+        pass
+
+
+class MenuList(object):
+    """ Selection moves and wraps like enigma2's list, a page is 5 rows """
+
+    PAGE = 5
+
+    def __init__(self, items):
+        self.items = list(items)
+        self.index = 0
+
+    def setList(self, items):
+        self.items = list(items)
+        self.index = 0
+
+    def getSelectionIndex(self):
+        return self.index
+
+    def move(self, step):
+        if self.items:
+            self.index = (self.index + step) % len(self.items)
+
+    def up(self):
+        self.move(-1)
+
+    def down(self):
+        self.move(1)
+
+    def pageUp(self):
+        self.move(-self.PAGE)
+
+    def pageDown(self):
+        self.move(self.PAGE)
+
+
+class _Anything(object):
+    """ Stands in for classes whose behaviour the tests don't need """
+
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        self.value = kwargs.get('default')
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+def install():
+    """ Registers the stub modules; a real enigma2 is left alone """
+    if 'Screens.Screen' in sys.modules:
+        return
+    _module('enigma', eTimer=_Anything)
+    _module('Screens')
+    _module('Components')
+    _module('Screens.Screen', Screen=Screen)
+    _module('Screens.MessageBox', MessageBox=type(
+        'MessageBox', (_Anything,), dict(TYPE_YESNO=0, TYPE_INFO=1,
+                                         TYPE_WARNING=2, TYPE_ERROR=3)))
+    _module('Screens.ChoiceBox', ChoiceBox=_Anything)
+    _module('Screens.InputBox', InputBox=_Anything)
+    _module('Components.ActionMap', ActionMap=_Anything)
+    _module('Components.Button', Button=Label)
+    _module('Components.ConfigList', ConfigListScreen=_Anything)
+    _module('Components.Label', Label=Label)
+    _module('Components.MenuList', MenuList=MenuList)
+    _module('Components.Pixmap', Pixmap=_Anything)
+    _module('Components.ScrollLabel', ScrollLabel=ScrollLabel)
+    _module('Components.config', getConfigListEntry=lambda *args: args,
+            **dict((name, _Anything) for name in (
+                'ConfigEnableDisable', 'ConfigIP', 'ConfigPassword',
+                'ConfigSelection', 'ConfigSubsection', 'ConfigText',
+                'ConfigYesNo')))
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+import os
+import select
+import socket
+import threading
+
+from WiFiManager.modules.wpa_ctrl import (
+    EVENT_CONNECTED,
+    EVENT_DISCONNECTED,
+    EVENT_SCAN_RESULTS,
+    EVENT_SSID_TEMP_DISABLED
+)
+
+""" A wpa_supplicant control socket for the tests, no WiFi device needed.
+
+"""
+
+
+class FakeWpaSupplicant(object):
+    """Control socket server answering like wpa_supplicant
+
+    networks is a list of configured SSIDs; scan_results a list of
+    (bssid, frequency, signal, flags, ssid). SELECT_NETWORK reports
+    CTRL-EVENT-CONNECTED to attached clients after connect_delay
+    seconds, or CTRL-EVENT-SSID-TEMP-DISABLED for SSIDs in reject.
+    Without a bssid= of the network that is in scan_results, a full
+    scan_delay passes first; a pinned bssid that isn't there never
+    connects. RECONFIGURE drops what SET_NETWORK changed.
+    """
+
+    def __init__(self, path, networks=(), scan_results=(),
+                 connect_delay=0.05, reject=(), scan_delay=0.0):
+        self.path = path
+        self.networks = [{'ssid': ssid, 'fields': {}} for ssid in networks]
+        self.scan_results = list(scan_results)
+        self.connect_delay = connect_delay
+        self.scan_delay = scan_delay
+        self.reject = set(reject)
+        self.bssid = None
+        self.freq = None
+        self.attached = set()
+        self.state = 'DISCONNECTED'
+        self.current = None
+        self.requests = []
+        self.sock = None
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(self.path)
+        self.running = True
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(1.0)
+        self.sock.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def serve(self):
+        while self.running:
+            if not select.select([self.sock], [], [], 0.05)[0]:
+                continue
+            try:
+                data, client = self.sock.recvfrom(4096)
+            except OSError:
+                return
+            command = data.decode('utf-8')
+            self.requests.append(command)
+            self.send(client, self.answer(command, client))
+
+    def send(self, client, text):
+        try:
+            self.sock.sendto(text.encode('utf-8'), client)
+        except OSError:
+            self.attached.discard(client)
+
+    def event(self, text):
+        for client in list(self.attached):
+            self.send(client, "<3>" + text)
+
+    def answer(self, command, client):
+        words = command.split(' ', 3)
+        name = words[0]
+        if name == 'PING':
+            return "PONG\n"
+        if name == 'ATTACH':
+            self.attached.add(client)
+            return "OK\n"
+        if name == 'DETACH':
+            self.attached.discard(client)
+            return "OK\n"
+        if name == 'STATUS':
+            status = "wpa_state={}\n".format(self.state)
+            if self.current is not None:
+                status += "bssid={}\nfreq={}\nssid={}\nid={}\n" \
+                    "key_mgmt=WPA2-PSK\n".format(
+                        self.bssid, self.freq,
+                        self.networks[self.current]['ssid'], self.current)
+            return status
+        if name == 'SCAN':
+            threading.Timer(self.connect_delay, self.event,
+                            (EVENT_SCAN_RESULTS,)).start()
+            return "OK\n"
+        if name == 'SCAN_RESULTS':
+            lines = ["bssid / frequency / signal level / flags / ssid"]
+            lines.extend("\t".join(str(v) for v in row)
+                         for row in self.scan_results)
+            return "\n".join(lines) + "\n"
+        if name == 'LIST_NETWORKS':
+            lines = ["network id / ssid / bssid / flags"]
+            for i, network in enumerate(self.networks):
+                flags = "[CURRENT]" if i == self.current else ""
+                lines.append("{}\t{}\tany\t{}".format(
+                    i, network['ssid'], flags))
+            return "\n".join(lines) + "\n"
+        if name == 'ADD_NETWORK':
+            self.networks.append({'ssid': '', 'fields': {}})
+            return "{}\n".format(len(self.networks) - 1)
+        if name == 'SET_NETWORK' and len(words) == 4:
+            network = self._network(words[1])
+            if network is None:
+                return "FAIL\n"
+            network['fields'][words[2]] = words[3]
+            if words[2] == 'ssid':
+                network['ssid'] = words[3].strip('"')
+            return "OK\n"
+        if name in ('SELECT_NETWORK', 'ENABLE_NETWORK', 'REMOVE_NETWORK'):
+            if len(words) < 2 or self._network(words[1]) is None:
+                return "FAIL\n"
+            if name == 'SELECT_NETWORK':
+                self._select(int(words[1]))
+            elif name == 'REMOVE_NETWORK':
+                self.networks[int(words[1])] = {'ssid': None, 'fields': {}}
+            return "OK\n"
+        if name == 'RECONFIGURE':
+            for network in self.networks:
+                network['fields'] = {}
+            return "OK\n"
+        if name in ('SAVE_CONFIG', 'RECONNECT'):
+            return "OK\n"
+        if name == 'DISCONNECT':
+            self.state = 'DISCONNECTED'
+            self.current = None
+            self.event(EVENT_DISCONNECTED + " bssid=00:00:00:00:00:00 "
+                       "reason=3 locally_generated=1")
+            return "OK\n"
+        return "UNKNOWN COMMAND\n"
+
+    def _network(self, value):
+        try:
+            network = self.networks[int(value)]
+        except (ValueError, IndexError):
+            return None
+        return network if network['ssid'] is not None else None
+
+    def _select(self, network_id):
+        ssid = self.networks[network_id]['ssid']
+        pinned = self.networks[network_id]['fields'].get('bssid', 'any')
+        found = [row for row in self.scan_results if row[4] == ssid and
+                 pinned in ('any', row[0])]
+        self.state = 'SCANNING'
+        if pinned != 'any' and not found:
+            return
+        delay = self.connect_delay
+        if pinned == 'any':
+            delay += self.scan_delay
+        bssid, freq = (found[0][0], found[0][1]) if found else \
+            ('00:11:22:33:44:55', 2437)
+
+        def done():
+            if ssid in self.reject:
+                self.state = 'DISCONNECTED'
+                self.event(EVENT_SSID_TEMP_DISABLED + ' id={} ssid="{}" '
+                           'auth_failures=1 duration=10 reason=WRONG_KEY'
+                           .format(network_id, ssid))
+            else:
+                self.state = 'COMPLETED'
+                self.current = network_id
+                self.bssid = bssid
+                self.freq = freq
+                self.event(EVENT_CONNECTED + " - Connection to "
+                           "{} completed [id={} id_str=]"
+                           .format(bssid, network_id))
+        threading.Timer(delay, done).start()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+import struct
+
+from WiFiManager.modules.flags import (
+    IWEVCUSTOM,
+    IWEVGENIE,
+    IWEVQUAL,
+    SIOCGIWAP,
+    SIOCGIWESSID,
+    SIOCGIWFREQ,
+    SIOCGIWMODE,
+    SIOCGIWRATE
+)
+from WiFiManager.modules.iwlibs import IW_FREQ
+
+""" SIOCGIWSCAN event streams for the tests, built the way the kernel
+    writes them (iwe_stream_add_event/_point, no pointer in point events).
+
+"""
+
+# RSN IE: WPA2, CCMP group and pairwise cipher, PSK
+RSN_IE = bytes.fromhex('30140100000fac040100000fac040100000fac020c00')
+
+
+def event(cmd, payload, offset):
+    """ One struct iw_event as the kernel streams it: len, cmd, the
+        padding of 64 bit kernels, then the payload. """
+    return struct.pack('HH', offset + len(payload), cmd) + \
+        b'\0' * (offset - 4) + payload
+
+
+def point(data):
+    """ Payload of a point event: iw_point length and flags, no pointer. """
+    return struct.pack('HH', len(data), 0) + data
+
+
+def cell(offset, mac, essid, m, e, ies=(), custom=(), updated=7):
+    """ The events of one access point; updated is the iw_quality flags
+        byte (IW_QUAL_DBM for levels in dBm). """
+    events = [
+        event(SIOCGIWAP, b'\x01\x00' + bytes.fromhex(mac.replace(':', '')) +
+              b'\0' * 8, offset),
+        event(SIOCGIWESSID, point(essid.encode('utf-8')), offset),
+        event(SIOCGIWMODE, struct.pack('I', 3), offset),
+        event(SIOCGIWFREQ, IW_FREQ.pack(m, e, 0, 0), offset),
+        event(IWEVQUAL, struct.pack('4B', 50, 190, 160, updated), offset),
+        event(SIOCGIWRATE, b''.join(IW_FREQ.pack(rate, 6, 0, 0)
+                                    for rate in (1, 11, 54)), offset),
+    ]
+    events.extend(event(IWEVGENIE, point(ie), offset) for ie in ies)
+    events.extend(event(IWEVCUSTOM, point(text), offset) for text in custom)
+    return b''.join(events)
+
+
+def buildScanStream(offset):
+    """ Three cells: with IEs and custom text, on 5 GHz, hidden on a
+        channel number. """
+    return b''.join([
+        cell(offset, '00:1A:2B:3C:4D:01', 'HomeNetwork', 2437, 6,
+             ies=[RSN_IE], custom=[b'tsf=0000001a2b3c4d5e']),
+        cell(offset, '00:1A:2B:3C:4D:02', 'Cafe Guest', 518, 7),
+        # a driver reporting the channel instead of the frequency
+        cell(offset, '00:1A:2B:3C:4D:03', '', 11, 0),
+    ])
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+import errno
+import os
+import struct
+
+from conftest import FIXTURES_DIR
+
+""" Recorded netlink traffic for the tests.
+
+    Fixtures are hex dumps under tests/fixtures, one file per request or
+    session: '#' starts a comment, a blank line ends a datagram, every
+    other line holds hex bytes. The frames are in the byte order and
+    struct layout of a little endian 64 bit host.
+
+"""
+
+NLMSGHDR = struct.Struct('IHHII')
+
+# frame layout of the fixtures, see above
+FIXTURE_LAYOUT = struct.pack('=H', 1) == b'\x01\x00' and \
+    struct.calcsize('P') == 8
+
+
+def loadFrames(name):
+    """ Returns the datagrams of tests/fixtures/<name>.hex as bytes. """
+    frames = []
+    current = []
+    with open(os.path.join(FIXTURES_DIR, name + '.hex')) as f:
+        for line in f.read().splitlines() + ['']:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                current.append(bytes(bytearray.fromhex(line)))
+            elif current:
+                frames.append(b''.join(current))
+                current = []
+    return frames
+
+
+def withSeq(data, seq):
+    """ Returns datagram data with every message's sequence number set
+        to seq. """
+    data = bytearray(data)
+    offset = 0
+    while offset + NLMSGHDR.size <= len(data):
+        length, msg_type, flags, old, pid = NLMSGHDR.unpack_from(data, offset)
+        if length < NLMSGHDR.size:
+            break
+        NLMSGHDR.pack_into(data, offset, length, msg_type, flags, seq, pid)
+        offset += (length + 3) & ~3
+    return bytes(data)
+
+
+class ReplaySocket(object):
+    """ Stands in for a netlink socket and answers each send() with the
+        next recorded reply (one list of datagrams per request).
+
+        The replies get the sequence number of the request they answer,
+        so fixtures can be recorded once and replayed in any order of
+        client use.
+
+    """
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.sent = []
+        self.pending = []
+
+    def send(self, data):
+        self.sent.append(bytes(data))
+        seq = NLMSGHDR.unpack_from(data)[3]
+        if self.replies:
+            self.pending.extend(withSeq(datagram, seq)
+                                for datagram in self.replies.pop(0))
+        return len(data)
+
+    def recv_into(self, buff, nbytes=0):
+        if not self.pending:
+            raise IOError(errno.EAGAIN, os.strerror(errno.EAGAIN))
+        data = self.pending.pop(0)
+        buff[:len(data)] = data
+        return len(data)
+
+    def fileno(self):
+        return -1
+
+    def setsockopt(self, *args):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import time
+
+import pytest
+
+import enigma2_stubs
+
+enigma2_stubs.install()
+
+from WiFiManager.modules import connect  # noqa: E402
+from WiFiManager.modules.connection_state import ConnectionState  # noqa: E402
+from WiFiManager.modules.saved_networks import SavedNetworkStore  # noqa: E402
+
+PRESSES = 100
+
+
+@pytest.fixture
+def launches(monkeypatch):
+    """ Every process started while the test runs """
+    started = []
+
+    def launch(*args, **kwargs):
+        started.append(args[0] if args else kwargs.get('args'))
+        raise AssertionError("process started: {}".format(started[-1]))
+
+    monkeypatch.setattr(subprocess, 'Popen', launch)
+    monkeypatch.setattr(os, 'system', launch)
+    monkeypatch.setattr(os, 'popen', launch)
+    return started
+
+
+@pytest.fixture
+def screen(tmp_path):
+    """ WiFiConnectZ after a scan, without its __init__: no interface
+        lookup, no scan, no timers """
+    networks = [{'essid': 'Network%02d' % i, 'signal': -40 - i,
+                 'encryption': bool(i % 3)} for i in range(30)]
+    store = SavedNetworkStore(str(tmp_path / 'networks.json'))
+    store.put('Network01', {'password': 'secret', 'encryption': 'WPA2'})
+
+    state = ConnectionState('wlan0')
+    state.essid = 'Network00'
+    state.ip = '192.168.1.10'
+
+    screen = connect.WiFiConnectZ.__new__(connect.WiFiConnectZ)
+    enigma2_stubs.Screen.__init__(screen, None)
+    screen.interface = 'wlan0'
+    screen.networks = networks
+    screen.current_network = networks[0]
+    screen.saved_networks = store
+    screen.connection = state
+    screen["network_list"] = enigma2_stubs.MenuList(
+        [network['essid'] for network in networks])
+    screen["status"] = enigma2_stubs.Label()
+    return screen
+
+
+def press(screen, keys):
+    texts = []
+    for key in keys:
+        key(screen)
+        texts.append((screen.current_network['essid'],
+                      screen["status"].getText()))
+    return texts
+
+
+def test_keypresses_start_no_process(screen, launches):
+    handlers = (connect.WiFiConnectZ.keyDown, connect.WiFiConnectZ.keyUp,
+                connect.WiFiConnectZ.keyRight, connect.WiFiConnectZ.keyLeft)
+    start = time.time()
+    press(screen, [handlers[i % 4] for i in range(PRESSES)])
+    elapsed = time.time() - start
+    assert launches == []
+    print("{} keypresses, {:.1f} us each".format(
+        PRESSES, elapsed * 1e6 / PRESSES))
+
+
+def test_status_follows_the_selection(screen, launches):
+    down = connect.WiFiConnectZ.keyDown
+    up = connect.WiFiConnectZ.keyUp
+    right = connect.WiFiConnectZ.keyRight
+    texts = dict(press(screen, [down, down, right, up]))
+    assert "Password saved" in texts['Network01']
+    assert "Open network" in texts['Network06']
+    assert "Password required" in texts['Network07']
+    connected = dict(press(screen, [connect.WiFiConnectZ.keyLeft, up]))
+    assert "CONNECTED to: Network00" in connected['Network00']
+    assert "192.168.1.10" in connected['Network00']
+    assert launches == []
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+import subprocess
+import time
+
+import pytest
+
+from fake_wpa_supplicant import FakeWpaSupplicant
+from WiFiManager.modules import connect_machine
+from WiFiManager.modules.connect_machine import ConnectMachine
+from WiFiManager.modules.connect_profile import ProfileRing, recordAttempt
+from WiFiManager.modules.wpa_ctrl import WpaCtrl
+
+BSSID = '00:11:22:33:44:55'
+
+
+@pytest.fixture
+def supplicant(tmp_path):
+    server = FakeWpaSupplicant(
+        str(tmp_path / 'wlan0'), ['HomeNetwork'],
+        scan_results=[(BSSID, 2437, -48, '[WPA2-PSK-CCMP][ESS]',
+                       'HomeNetwork')],
+        connect_delay=0.02, scan_delay=0.3).start()
+    yield server
+    server.stop()
+
+
+def machine(supplicant, hint, hint_timeout=1.0):
+    m = ConnectMachine('wlan0', 'HomeNetwork', use_hints=False,
+                       hint_timeout=hint_timeout)
+    m.hint = hint
+    m.ctrl = WpaCtrl(None, path=supplicant.path)
+    m.ctrl.attach()
+    return m
+
+
+def test_hinted_association_releases_the_pin(supplicant):
+    m = machine(supplicant, {'bssid': BSSID, 'frequency': 2437})
+    try:
+        m.associate(time.time() + 2.0)
+        assert m.hinted
+        fields = supplicant.networks[m.network_id]['fields']
+        assert fields['bssid'] == BSSID
+        m.authenticate(time.time() + 2.0)
+    finally:
+        m.ctrl.close()
+    assert fields['bssid'] == 'any'
+    assert fields['scan_freq'] == ''
+
+
+def test_hint_skips_the_full_scan(supplicant):
+    # the fake takes scan_delay (0.3 s) to find an unpinned network
+    times = {}
+    for mode, hint in (('hinted', {'bssid': BSSID, 'frequency': 2437}),
+                       ('full', None)):
+        m = machine(supplicant, hint)
+        start = time.time()
+        try:
+            m.associate(time.time() + 2.0)
+        finally:
+            m.ctrl.close()
+        times[mode] = time.time() - start
+        assert m.hinted == (mode == 'hinted')
+    assert times['hinted'] < 0.2 <= times['full']
+
+
+def test_stale_hint_falls_back_within_hint_timeout(supplicant):
+    m = machine(supplicant, {'bssid': '00:11:22:33:44:66',
+                             'frequency': 2437}, hint_timeout=0.1)
+    start = time.time()
+    try:
+        m.associate(time.time() + 3.0)
+        m.authenticate(time.time() + 2.0)
+    finally:
+        m.ctrl.close()
+    assert not m.hinted
+    assert time.time() - start < 1.0
+    assert 'bssid' not in supplicant.networks[m.network_id]['fields']
+
+
+def test_killall_is_timed_as_kill(supplicant, tmp_path, monkeypatch):
+    def run_command(command, timeout=None):
+        if command[0] == 'killall':
+            time.sleep(0.1)
+        return subprocess.CompletedProcess(command, 0, '', '')
+
+    monkeypatch.setattr(connect_machine, 'isRunning', lambda ifname: False)
+    monkeypatch.setattr(connect_machine, 'run_command', run_command)
+    monkeypatch.setattr(connect_machine, 'waitForSocket',
+                        lambda ifname, timeout: True)
+    monkeypatch.setattr(connect_machine, 'WpaCtrl',
+                        lambda ifname: WpaCtrl(None, path=supplicant.path))
+    m = ConnectMachine('wlan0', 'HomeNetwork', use_hints=False)
+    try:
+        m.openSupplicant(time.time() + 2.0)
+    finally:
+        m.ctrl.close()
+    assert m.phases['kill'] >= 0.1
+    assert m.phases['supplicant'] < 0.1
+
+    record = recordAttempt(m, kill_seconds=0.5,
+                           ring=ProfileRing(str(tmp_path / 'ring')))
+    assert record['phases']['kill'] == pytest.approx(m.phases['kill'] + 0.5)
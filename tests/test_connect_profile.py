@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from WiFiManager.modules.connect_profile import (
+    HEADER, MAGIC, RECORD, ProfileRing, formatPhaseStats, percentile)
+
+
+def attempt(i, **phases):
+    return {'timestamp': 1000.0 + i, 'essid': 'Net%d' % i, 'connected': True,
+            'phases': phases or {'total': float(i)}}
+
+
+@pytest.fixture
+def ring(tmp_path):
+    return ProfileRing(str(tmp_path / 'connect.ring'), capacity=4)
+
+
+def test_records_round_trip(ring):
+    ring.append({'timestamp': 5.5, 'essid': 'Home', 'connected': True,
+                 'hinted': True, 'secured': False,
+                 'phases': {'associate': 0.25, 'dhcp_udhcpc': 1.5}})
+
+    record, = ring.records()
+    assert record == {'timestamp': 5.5, 'essid': 'Home', 'connected': True,
+                      'hinted': True, 'secured': False,
+                      'phases': {'associate': 0.25, 'dhcp_udhcpc': 1.5}}
+
+
+def test_missing_file_has_no_records(ring):
+    assert ring.records() == []
+
+
+@pytest.mark.parametrize('count', [3, 4, 5, 9])
+def test_ring_wraps_oldest_first(ring, count):
+    for i in range(count):
+        ring.append(attempt(i))
+
+    essids = [record['essid'] for record in ring.records()]
+    assert essids == ['Net%d' % i for i in range(max(0, count - 4), count)]
+
+
+def test_file_never_grows_past_capacity(ring):
+    for i in range(10):
+        ring.append(attempt(i))
+
+    with open(ring.path, 'rb') as f:
+        assert len(f.read()) == HEADER.size + 4 * RECORD.size
+
+
+@pytest.mark.parametrize('header', [
+    HEADER.pack(b'XXXX', 1, RECORD.size, 4, 2),
+    HEADER.pack(MAGIC, 99, RECORD.size, 4, 2),
+    HEADER.pack(MAGIC, 1, RECORD.size + 4, 4, 2),
+    HEADER.pack(MAGIC, 1, RECORD.size, 8, 2),
+    b'WMC',
+])
+def test_other_layout_is_started_over(ring, header):
+    with open(ring.path, 'wb') as f:
+        f.write(header + b'\xff' * (3 * RECORD.size))
+
+    assert ring.records() == []
+    ring.append(attempt(7))
+
+    assert [record['essid'] for record in ring.records()] == ['Net7']
+    with open(ring.path, 'rb') as f:
+        assert len(f.read()) == HEADER.size + RECORD.size
+
+
+def test_other_capacity_is_started_over(tmp_path):
+    path = str(tmp_path / 'connect.ring')
+    small = ProfileRing(path, capacity=2)
+    small.append(attempt(0))
+    small.append(attempt(1))
+
+    large = ProfileRing(path, capacity=8)
+    assert large.records() == []
+    large.append(attempt(2))
+    assert [record['essid'] for record in large.records()] == ['Net2']
+
+
+@pytest.mark.parametrize('fraction, expected', [
+    (0.0, 1), (0.1, 1), (0.5, 5), (0.51, 6), (0.95, 10), (1.0, 10),
+])
+def test_percentile_nearest_rank(fraction, expected):
+    assert percentile(list(range(1, 11)), fraction) == expected
+
+
+def test_percentile_small_samples():
+    assert percentile([], 0.5) is None
+    assert percentile([3.0], 0.95) == 3.0
+    assert percentile([1.0, 2.0], 0.5) == 1.0
+    assert percentile([1.0, 2.0], 0.95) == 2.0
+
+
+def test_phase_stats_only_counts_phases_that_ran(ring):
+    for i in range(1, 5):
+        ring.append(attempt(i, associate=i / 10.0, total=float(i)))
+    ring.append(attempt(9, kill=0.5))
+
+    stats = ring.phaseStats()
+    assert set(stats) == {'kill', 'associate', 'total'}
+    assert stats['associate'] == (3, 0.3, 0.4)
+    assert stats['kill'] == (1, 0.5, 0.5)
+
+
+def test_format_phase_stats_keeps_phase_order():
+    text = formatPhaseStats({'total': (2, 3.0, 4.0),
+                             'kill': (2, 0.25, 0.5)}, 2)
+    lines = text.split("\n")
+
+    assert lines[0] == "Attempts: 2"
+    assert lines[3].startswith("Stop old daemons")
+    assert lines[3].endswith("0.25s     0.50s")
+    assert lines[4].startswith("Total")
+    assert len(lines) == 5
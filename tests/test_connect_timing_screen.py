@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+import enigma2_stubs
+
+enigma2_stubs.install()
+
+from WiFiManager.modules import iwlist_tools  # noqa: E402
+from WiFiManager.modules.connect_profile import ProfileRing  # noqa: E402
+
+
+class Session(object):
+    """ Remembers the screens opened on it instead of showing them """
+
+    def __init__(self):
+        self.opened = []
+
+    def open(self, screen, *args, **kwargs):
+        self.opened.append((screen, args))
+
+    def openWithCallback(self, callback, screen, *args, **kwargs):
+        self.opened.append((screen, args))
+
+
+@pytest.fixture
+def ring(tmp_path):
+    ring = ProfileRing(str(tmp_path / 'connect.ring'), capacity=4)
+    for i in range(3):
+        ring.append({'timestamp': 1000.0 + i, 'essid': 'Home',
+                     'connected': True,
+                     'phases': {'associate': 0.5 + i, 'total': 2.0 + i}})
+    return ring
+
+
+@pytest.fixture
+def tools(monkeypatch, ring):
+    monkeypatch.setattr(iwlist_tools, 'getProfileRing', lambda: ring)
+    tools = iwlist_tools.IWListTools.__new__(iwlist_tools.IWListTools)
+    enigma2_stubs.Screen.__init__(tools, Session())
+    tools.show_working_message = lambda text: None
+    return tools
+
+
+def test_viewing_does_not_export(tools, monkeypatch, ring):
+    def export(path=None):
+        raise AssertionError("exported while viewing")
+
+    monkeypatch.setattr(ring, 'exportJson', export)
+    tools.show_connect_timing()
+
+    screen, args = tools.session.opened[-1]
+    assert screen is iwlist_tools.ConnectTimingScreen
+    assert "Attempts: 3" in args[0]
+    assert "Press GREEN" in args[0]
+
+
+def test_green_exports(tmp_path, ring):
+    path = str(tmp_path / 'timing.json')
+    session = Session()
+    screen = iwlist_tools.ConnectTimingScreen(session, "text", ring, path)
+    assert not (tmp_path / 'timing.json').exists()
+
+    screen.export()
+
+    with open(path) as f:
+        assert len(json.load(f)['records']) == 3
+    box, args = session.opened[-1]
+    assert args[0] == "Exported 3 records to %s" % path
+    assert args[1] == box.TYPE_INFO
+
+
+def test_export_error_is_shown(tmp_path, ring):
+    session = Session()
+    screen = iwlist_tools.ConnectTimingScreen(
+        session, "text", ring, str(tmp_path / 'missing' / 'timing.json'))
+
+    screen.export()
+
+    box, args = session.opened[-1]
+    assert args[0].startswith("Error exporting connection timings")
+    assert args[1] == box.TYPE_ERROR
+
+
+def test_nothing_recorded_opens_plain_results(tools, tmp_path, monkeypatch):
+    empty = ProfileRing(str(tmp_path / 'empty.ring'))
+    monkeypatch.setattr(iwlist_tools, 'getProfileRing', lambda: empty)
+    tools.show_connect_timing()
+
+    screen, args = tools.session.opened[-1]
+    assert screen is iwlist_tools.ResultsScreen
+    assert "No connection attempts recorded yet" in args[1]
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+from WiFiManager.modules import dhcp
+from WiFiManager.modules.dhcp import (
+    CLIENT_TIMEOUT, LATENCY_BUCKETS, DhcpBackend, formatHistogram)
+
+
+class Clock(object):
+    """ Stands in for the time module; commands advance it """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class Runs(list):
+    """ The commands run, with the outcome each client should have """
+
+    def __init__(self):
+        list.__init__(self)
+        self.outcomes = {}
+
+
+class Result(object):
+
+    def __init__(self, returncode):
+        self.returncode = returncode
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(dhcp, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def installed(monkeypatch):
+    """ Clients find_executable() reports; all three unless changed """
+    names = ['dhcpcd', 'udhcpc', 'dhclient']
+    monkeypatch.setattr(dhcp, 'find_executable', lambda name: name in names)
+    return names
+
+
+@pytest.fixture
+def commands(monkeypatch, clock):
+    """ Every client run as (argv, timeout); a client's outcome is set by
+        name as (returncode, seconds) or an exception to raise """
+    runs = Runs()
+
+    def run(args, timeout=None):
+        runs.append((args, timeout))
+        outcome = runs.outcomes.get(args[0], (1, 1.0))
+        if isinstance(outcome, Exception):
+            raise outcome
+        returncode, seconds = outcome
+        clock.now += seconds
+        return Result(returncode)
+
+    monkeypatch.setattr(dhcp, 'run_command', run)
+    return runs
+
+
+@pytest.fixture
+def backend(tmp_path, installed):
+    return DhcpBackend(str(tmp_path / 'dhcp.json'))
+
+
+def test_untried_clients_keep_the_default_order(backend):
+    assert backend.order() == ['dhcpcd', 'udhcpc', 'dhclient']
+
+
+def test_missing_clients_are_left_out(backend, installed):
+    installed.remove('dhcpcd')
+    assert backend.order() == ['udhcpc', 'dhclient']
+
+
+def test_order_working_then_untried_then_failed(backend):
+    backend.record('dhcpcd', False, 15.0)
+    backend.record('dhclient', True, 4.0)
+
+    assert backend.order() == ['dhclient', 'udhcpc', 'dhcpcd']
+
+
+def test_working_clients_by_mean_latency(backend):
+    backend.record('dhcpcd', True, 1.0)
+    backend.record('dhcpcd', True, 5.0)
+    backend.record('udhcpc', True, 2.5)
+    backend.record('udhcpc', False, 15.0)
+
+    assert backend.order() == ['udhcpc', 'dhcpcd', 'dhclient']
+
+
+def test_a_success_lifts_a_client_that_also_failed(backend):
+    backend.record('dhcpcd', False, 15.0)
+    backend.record('dhcpcd', False, 15.0)
+    backend.record('dhclient', False, 15.0)
+    backend.record('dhclient', True, 9.0)
+
+    assert backend.order() == ['dhclient', 'udhcpc', 'dhcpcd']
+
+
+@pytest.mark.parametrize('latency, bucket', [
+    (0.0, 0), (0.5, 0), (0.51, 1), (1.0, 1), (2.5, 3), (13.0, 6),
+    (13.01, 7), (60.0, 7),
+])
+def test_record_histogram_bucket(backend, latency, bucket):
+    backend.record('udhcpc', True, latency)
+
+    histogram = backend.getStats()['udhcpc']['histogram']
+    assert len(histogram) == len(LATENCY_BUCKETS) + 1
+    assert histogram == [int(i == bucket) for i in range(len(histogram))]
+
+
+def test_failures_stay_out_of_the_histogram(backend):
+    backend.record('udhcpc', False, 2.0)
+
+    stats = backend.getStats()['udhcpc']
+    assert stats['failures'] == 1
+    assert stats['mean_latency'] is None
+    assert sum(stats['histogram']) == 0
+
+
+def test_stats_are_saved_and_loaded(tmp_path, backend, installed):
+    backend.record('udhcpc', True, 1.5)
+    backend.record('udhcpc', True, 2.5)
+    backend.record('dhcpcd', False, 15.0)
+
+    loaded = DhcpBackend(backend.path)
+    stats = loaded.getStats()
+    assert stats['udhcpc']['mean_latency'] == 2.0
+    assert stats['udhcpc']['histogram'][2:4] == [1, 1]
+    assert loaded.order() == ['udhcpc', 'dhclient', 'dhcpcd']
+
+
+def test_histogram_of_another_layout_is_reset(tmp_path, installed):
+    path = tmp_path / 'dhcp.json'
+    path.write_text(json.dumps({'clients': {'udhcpc': {
+        'successes': 2, 'total_latency': 3.0, 'histogram': [1, 1]}}}))
+
+    stats = DhcpBackend(str(path)).getStats()['udhcpc']
+    assert stats['histogram'] == [0] * (len(LATENCY_BUCKETS) + 1)
+    assert stats['mean_latency'] == 1.5
+
+
+def test_unreadable_stats_start_empty(tmp_path, installed):
+    path = tmp_path / 'dhcp.json'
+    path.write_text('{"clients": ')
+
+    assert DhcpBackend(str(path)).getStats() == {}
+
+
+def test_obtain_lease_stops_at_the_first_success(backend, commands):
+    commands.outcomes['udhcpc'] = (0, 2.0)
+    attempts = []
+
+    name = backend.obtainLease('wlan0', requested='192.168.1.10',
+                               on_attempt=lambda *a: attempts.append(a))
+
+    assert name == 'udhcpc'
+    assert [args for args, timeout in commands] == [
+        ['dhcpcd', '-r', '192.168.1.10', 'wlan0'],
+        ['udhcpc', '-i', 'wlan0', '-t', '5', '-n', '-r', '192.168.1.10']]
+    assert attempts == [('dhcpcd', False, 1.0), ('udhcpc', True, 2.0)]
+    assert backend.order()[0] == 'udhcpc'
+
+
+def test_obtain_lease_stops_at_the_deadline(backend, commands, clock):
+    commands.outcomes['dhcpcd'] = (1, CLIENT_TIMEOUT)
+    commands.outcomes['udhcpc'] = (1, 5.0)
+
+    assert backend.obtainLease('wlan0', timeout=20.0) is None
+
+    # dhcpcd gets a whole client timeout, udhcpc only what is left and
+    # dhclient is never started
+    assert [(args[0], timeout) for args, timeout in commands] == [
+        ('dhcpcd', CLIENT_TIMEOUT), ('udhcpc', 5.0)]
+    assert 'dhclient' not in backend.getStats()
+
+
+def test_obtain_lease_counts_a_crashed_client_as_failed(backend, commands):
+    commands.outcomes['dhcpcd'] = OSError("exec format error")
+    commands.outcomes['udhcpc'] = (0, 1.0)
+
+    assert backend.obtainLease('wlan0') == 'udhcpc'
+    assert backend.getStats()['dhcpcd']['failures'] == 1
+
+
+def test_obtain_lease_without_clients(backend, installed, commands):
+    del installed[:]
+
+    assert backend.obtainLease('wlan0') is None
+    assert commands == []
+
+
+def test_format_histogram():
+    assert formatHistogram([1, 2, 0, 0, 0, 0, 0, 3]) == (
+        "<=0.5s:1 <=1s:2 <=2s:0 <=3s:0 <=5s:0 <=8s:0 <=13s:0 >13s:3")
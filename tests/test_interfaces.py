@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+from WiFiManager.modules import interfaces
+
+
+def test_fallback_result_is_kept_until_a_link_event(monkeypatch):
+    monkeypatch.setattr(interfaces, 'readSysfsInterfaces', lambda: [])
+    monkeypatch.setattr(interfaces, 'readProcWireless', lambda: [])
+    probes = []
+    registry = interfaces.InterfaceRegistry(
+        ttl=0.0, fallback=lambda: probes.append(1) or [])
+    # no rtnetlink subscription, the test delivers the event itself
+    registry.event_token = False
+
+    for i in range(5):
+        assert registry.getNames() == []
+    assert len(probes) == 1
+    assert registry.stats['refreshes'] == 5
+
+    registry._linkChanged(None)
+    assert registry.getNames() == []
+    assert len(probes) == 2
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from iw_scan_stream import RSN_IE, buildScanStream, event, point
+from WiFiManager.modules import iwlibs
+from WiFiManager.modules.flags import SIOCGIWAP, SIOCGIWESSID
+
+
+@pytest.mark.parametrize('offset', [8, 4], ids=['64bit', '32bit'])
+def test_parse_scan_stream(offset):
+    home, cafe, hidden = iwlibs.parseScanStream(buildScanStream(offset),
+                                                payload_offset=offset)
+
+    assert home.bssid == '00:1A:2B:3C:4D:01'
+    assert home.essid == 'HomeNetwork'
+    assert home.mode == 'Master'
+    assert (home.frequency.m, home.frequency.e) == (2437, 6)
+    assert home.frequency.getFrequency() == 2437000000
+    assert home.quality.quality == 50
+    assert home.quality.siglevel == 190
+    assert home.rate == [[1000000, 11000000, 54000000]]
+    assert home.ies == [RSN_IE]
+    assert home.custom == [b'tsf=0000001a2b3c4d5e']
+
+    assert cafe.essid == 'Cafe Guest'
+    assert cafe.frequency.getFrequency() == 5180000000
+    assert cafe.ies == [] and cafe.custom == []
+
+    assert hidden.essid == ''
+    assert hidden.frequency.getFrequency() == 11
+
+
+def test_host_layout_is_the_default():
+    stream = buildScanStream(iwlibs.IW_EV_PAYLOAD_OFFSET)
+    assert [result.essid for result in iwlibs.parseScanStream(stream)] == \
+        ['HomeNetwork', 'Cafe Guest', '']
+
+
+def test_truncated_final_event_ends_the_stream():
+    stream = buildScanStream(8) + event(SIOCGIWAP, b'\x01\x00' + b'\x02' * 6 +
+                                        b'\0' * 8, 8)[:12]
+    results = list(iwlibs.parseScanStream(stream, payload_offset=8))
+    assert [result.bssid for result in results] == [
+        '00:1A:2B:3C:4D:01', '00:1A:2B:3C:4D:02', '00:1A:2B:3C:4D:03']
+
+    # cut inside the last cell's rates: the cell keeps what came before
+    stream = buildScanStream(8)
+    last = list(iwlibs.parseScanStream(stream[:-10], payload_offset=8))[-1]
+    assert last.essid == ''
+    assert last.quality.quality == 50
+    assert last.rate == []
+
+
+def test_event_before_the_first_cell():
+    stream = event(SIOCGIWESSID, point(b'HomeNetwork'), 8)
+    with pytest.raises(RuntimeError):
+        list(iwlibs.parseScanStream(stream, payload_offset=8))
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+import errno
+import struct
+
+import pytest
+
+from netlink_replay import FIXTURE_LAYOUT, ReplaySocket, loadFrames
+from WiFiManager.modules import nl80211
+
+pytestmark = pytest.mark.skipif(not FIXTURE_LAYOUT,
+                                reason="fixtures are little endian, 64 bit")
+
+
+def client(*requests):
+    """ Nl80211 on a ReplaySocket answering the family lookup and then
+        the named requests in order. """
+    sock = ReplaySocket([loadFrames('nl80211/ctrl_getfamily')] +
+                        [loadFrames('nl80211/' + name) for name in requests])
+    return nl80211.Nl80211(sock=sock), sock
+
+
+def sentRequest(data):
+    """ (type, flags, cmd, attrs) of a request the client sent. """
+    msg_type, flags, seq, payload = next(nl80211.parseMessages(data))
+    return (msg_type, flags, payload[0],
+            nl80211.parseAttrs(payload[nl80211.GENLMSGHDR.size:]))
+
+
+@pytest.fixture
+def ifindex(monkeypatch):
+    monkeypatch.setattr(nl80211.socket, 'if_nametoindex',
+                        lambda ifname: {'wlan0': 3}[ifname])
+
+
+def test_family():
+    nl, sock = client()
+    assert nl.family_id == 0x1c
+    assert nl.mcast_groups['scan'] == 5
+    assert nl.mcast_groups['mlme'] == 7
+    assert len(sock.sent) == 1
+
+
+def test_get_interfaces():
+    nl, sock = client('get_interface')
+    interfaces = nl.getInterfaces()
+    assert interfaces == [nl80211.Nl80211Interface(
+        ifindex=3, ifname='wlan0', wiphy=0, wdev=1, iftype=2,
+        mac='00:0e:8e:5c:41:a2', ssid='HomeNet', frequency=2437,
+        channel_width=1, center_freq1=2437, txpower=20.0)]
+    msg_type, flags, cmd, attrs = sentRequest(sock.sent[-1])
+    assert msg_type == 0x1c
+    assert flags & nl80211.NLM_F_DUMP == nl80211.NLM_F_DUMP
+    assert cmd == nl80211.NL80211_CMD_GET_INTERFACE
+
+
+def test_get_stations(ifindex):
+    nl, sock = client('get_station')
+    station, = nl.getStations('wlan0')
+    assert station.mac == 'c8:3a:35:10:22:01'
+    assert station.signal == -52
+    assert station.signal_avg == -54
+    assert station.tx_bitrate == 130.0
+    assert station.rx_bitrate == 65.0
+    assert station.rx_bytes == 18234567
+    assert station.tx_bytes == 2345678
+    assert (station.rx_packets, station.tx_packets) == (40211, 21877)
+    assert (station.tx_retries, station.tx_failed) == (312, 4)
+    assert station.inactive_time == 340
+    assert station.connected_time == 5400
+    attrs = sentRequest(sock.sent[-1])[3]
+    assert struct.unpack('I', attrs[nl80211.NL80211_ATTR_IFINDEX])[0] == 3
+
+
+def test_get_scan(ifindex):
+    nl, sock = client('get_scan')
+    home, cafe, hidden = nl.getScan('wlan0')
+
+    assert home.bssid == 'c8:3a:35:10:22:01'
+    assert home.ssid == 'HomeNet'
+    assert (home.frequency, home.channel) == (2437, 6)
+    assert home.signal == -52.0
+    assert home.status == nl80211.NL80211_BSS_STATUS_ASSOCIATED
+    assert home.privacy and home.rsn and not home.wpa
+    assert home.beacon_interval == 100
+    assert home.seen_ms_ago == 120
+
+    # no DS parameter set on 5 GHz, the channel comes from the frequency
+    assert cafe.ssid == 'Cafe Guest'
+    assert (cafe.frequency, cafe.channel) == (5180, 36)
+    assert cafe.signal == -71.0
+    assert cafe.status is None
+    assert not (cafe.privacy or cafe.wpa or cafe.rsn)
+
+    assert hidden.ssid == ''
+    assert hidden.channel == 11
+    assert hidden.privacy and hidden.wpa and not hidden.rsn
+    assert hidden.signal == -83.0
+
+
+def test_get_wiphys():
+    nl, sock = client('get_wiphy')
+    wiphy, = nl.getWiphys()
+    assert wiphy.wiphy == 0
+    assert wiphy.name == 'phy0'
+    assert wiphy.max_scan_ssids == 4
+    assert wiphy.iftypes == [1, 2, 3, 6, 8, 9]
+    # disabled channels are left out
+    assert wiphy.frequencies == [2412, 2417, 2437, 2462, 5180, 5200, 5745]
+
+
+def test_replies_follow_the_request_seq():
+    nl, sock = client('get_interface', 'get_wiphy')
+    assert len(nl.getInterfaces()) == 1
+    assert len(nl.getWiphys()) == 1
+    seqs = [next(nl80211.parseMessages(data))[2] for data in sock.sent]
+    assert len(set(seqs)) == 3
+
+
+@pytest.fixture
+def unavailable(monkeypatch):
+    """ getNl80211() with fresh module state and a controllable Nl80211. """
+    monkeypatch.setattr(nl80211, '_nl_unavailable', [False, 0.0])
+    monkeypatch.setattr(nl80211, '_nl_local', nl80211.threading.local())
+    now = [1000.0]
+    monkeypatch.setattr(nl80211.time, 'time', lambda: now[0])
+    errors = []
+
+    def client():
+        if errors:
+            raise errors.pop(0)
+        return 'client'
+    monkeypatch.setattr(nl80211, 'Nl80211', client)
+    return errors, now
+
+
+@pytest.mark.parametrize('error', [errno.EPROTONOSUPPORT, errno.ENOENT])
+def test_missing_nl80211_is_remembered(unavailable, error):
+    errors, now = unavailable
+    errors.append(IOError(error, "no nl80211"))
+    assert nl80211.getNl80211() is None
+    now[0] += nl80211.NL_RETRY * 10
+    assert nl80211.getNl80211() is None
+    assert nl80211._nl_unavailable[0]
+
+
+def test_other_failures_are_retried(unavailable):
+    errors, now = unavailable
+    errors.append(IOError(errno.ENOBUFS, "no buffer space"))
+    assert nl80211.getNl80211() is None
+    now[0] += nl80211.NL_RETRY - 1
+    assert nl80211.getNl80211() is None
+    now[0] += 1
+    assert nl80211.getNl80211() == 'client'
+    # kept for the thread
+    errors.append(IOError(errno.ENOBUFS, "no buffer space"))
+    assert nl80211.getNl80211() == 'client'
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from twisted.internet.task import Clock
+
+from WiFiManager.modules import poll_scheduler as ps
+
+
+class Screen(object):
+    def __init__(self):
+        self.onShow = []
+        self.onHide = []
+        self.onClose = []
+
+    def fire(self, hooks):
+        for hook in list(hooks):
+            hook()
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def scheduler(clock):
+    return ps.PollScheduler(clock)
+
+
+def poller(readings):
+    """ Callback returning readings in turn, the last one forever. """
+    calls = []
+
+    def poll():
+        calls.append(len(calls))
+        return readings[min(len(calls), len(readings)) - 1]
+    return poll, calls
+
+
+def test_unchanged_readings_back_off_to_max_interval(scheduler, clock):
+    poll, calls = poller([1])
+    task = scheduler.register(poll, min_interval=1.0, max_interval=4.0)
+    intervals = []
+    for i in range(8):
+        clock.advance(task.due - clock.seconds())
+        intervals.append(task.interval)
+    assert intervals == [1.0, 1.5, 2.25, 3.375, 4.0, 4.0, 4.0, 4.0]
+    assert len(calls) == 8
+
+
+def test_changed_reading_drops_to_min_interval(scheduler, clock):
+    task = scheduler.register(lambda: None, min_interval=1.0,
+                              max_interval=8.0, tolerance=2)
+    for reading in (-60, -61, -59, -60):
+        task.adapt(reading)
+    assert task.interval == 3.375
+    task.adapt((-60, 54))
+    task.adapt((-60, 54))
+    assert task.interval == 1.0 * 1.5
+    task.adapt((-60, 54))
+    task.adapt((-55, 54))
+    assert task.interval == 1.0
+    # None is no reading at all, not a change
+    task.adapt(None)
+    assert task.reading == (-55, 54)
+
+
+def test_update_from_a_thread(scheduler, clock):
+    task = scheduler.register(lambda: None, min_interval=1.0,
+                              max_interval=8.0)
+    clock.advance(1.0)
+    assert task.runs == 1 and task.reading is None
+    task.update('a')
+    task.update('a')
+    assert task.interval == 1.5
+    assert task.due == clock.seconds() + 1.5
+
+
+def test_pause_resume_cancel(scheduler, clock):
+    screen = Screen()
+    poll, calls = poller([1])
+    task = scheduler.register(poll, min_interval=1.0, screen=screen)
+    clock.advance(1.0)
+    assert len(calls) == 1
+
+    screen.fire(screen.onHide)
+    assert task.paused
+    assert clock.getDelayedCalls() == []
+    clock.advance(30.0)
+    assert len(calls) == 1
+
+    # shown again: runs at once
+    screen.fire(screen.onShow)
+    clock.advance(0)
+    assert len(calls) == 2
+
+    screen.fire(screen.onClose)
+    assert task not in scheduler.tasks
+    assert clock.getDelayedCalls() == []
+    task.resume()
+    task.poke()
+    clock.advance(30.0)
+    assert len(calls) == 2
+
+
+def test_set_busy_is_counted(scheduler, clock):
+    poll, calls = poller([1])
+    task = scheduler.register(poll, interval=8.0, min_interval=1.0,
+                              max_interval=8.0)
+    scheduler.setBusy(True)
+    scheduler.setBusy(True)
+    assert task.due == 1.0
+    clock.advance(1.0)
+    assert len(calls) == 1 and task.due == 2.0
+
+    scheduler.setBusy(False)
+    assert scheduler.isBusy()
+    clock.advance(1.0)
+    assert len(calls) == 2
+
+    scheduler.setBusy(False)
+    scheduler.setBusy(False)
+    assert scheduler.busy == 0
+    # the run set up while busy still comes, then its own interval again
+    clock.advance(1.0)
+    assert len(calls) == 3
+    assert task.due == 3.0 + 8.0
+
+
+def test_tasks_due_together_share_a_wakeup(scheduler, clock):
+    first, first_calls = poller([1])
+    second, second_calls = poller([2])
+    scheduler.register(first, min_interval=1.0)
+    scheduler.register(second, min_interval=1.0 + ps.COALESCE / 2)
+    clock.advance(1.0)
+    assert (len(first_calls), len(second_calls)) == (1, 1)
+    assert scheduler.stats == {'wakeups': 1, 'runs': 2}
+    assert len(clock.getDelayedCalls()) == 1
+
+
+def test_failing_callback_keeps_polling(scheduler, clock):
+    def poll():
+        raise ValueError("no such device")
+    task = scheduler.register(poll, min_interval=1.0)
+    clock.advance(1.0)
+    clock.advance(1.0)
+    assert task.runs == 2
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+
+from WiFiManager.modules import saved_networks
+from WiFiManager.modules.saved_networks import (
+    SavedNetworkStore,
+    getSavedNetworkStore
+)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'networks.json')
+
+
+def journal(path):
+    with open(path + '.journal') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_changes_go_to_the_journal(path):
+    with open(path, 'w') as f:
+        json.dump({'HomeNet': {'password': 'old', 'encryption': 'WPA2'}}, f)
+    store = SavedNetworkStore(path)
+    store.put('HomeNet', {'password': 'new', 'bssid': 'C8:3A:35:10:22:01'})
+    store.put('Cafe', {'password': '', 'timestamp': 1.0})
+    assert store.forget('Cafe')
+    assert not store.forget('Cafe')
+
+    # the file is untouched until compaction
+    with open(path) as f:
+        assert json.load(f)['HomeNet']['password'] == 'old'
+    assert [(r['op'], r['essid']) for r in journal(path)] == [
+        ('put', 'HomeNet'), ('put', 'Cafe'), ('forget', 'Cafe')]
+    assert store.stats['writes'] == 3
+
+
+def test_journal_is_replayed_on_load(path):
+    store = SavedNetworkStore(path)
+    store.put('HomeNet', {'password': 'a', 'bssid': 'C8:3A:35:10:22:01'})
+    store.put('HomeNet', {'password': 'b', 'bssid': 'C8:3A:35:10:22:02'})
+    store.put('Cafe', {'password': 'c'})
+    store.forget('Cafe')
+
+    again = SavedNetworkStore(path)
+    assert again.essids() == ['HomeNet']
+    assert again.getPassword('HomeNet') == 'b'
+    assert again.journal_lines == 4
+    # the index follows the replayed entries only
+    assert again.getByBssid('c8:3a:35:10:22:02')[0] == 'HomeNet'
+    assert again.getByBssid('C8:3A:35:10:22:01') == (None, None)
+
+
+def test_compaction_folds_the_journal_into_the_file(path):
+    store = SavedNetworkStore(path, compact_after=3)
+    store.put('A', {'password': '1', 'timestamp': 1.0})
+    store.put('B', {'password': '2', 'timestamp': 2.0})
+    assert store.journal_lines == 2
+    store.put('C', {'password': '3', 'timestamp': 3.0})
+    assert store.journal_lines == 0
+    assert store.stats['compactions'] == 1
+    assert not os.path.exists(path + '.journal')
+    with open(path) as f:
+        assert json.load(f) == {'A': {'password': '1', 'timestamp': 1.0},
+                                'B': {'password': '2', 'timestamp': 2.0},
+                                'C': {'password': '3', 'timestamp': 3.0}}
+    store.forget('A')
+    assert SavedNetworkStore(path).essids() == ['B', 'C']
+
+
+def test_torn_last_line_is_repaired(path):
+    store = SavedNetworkStore(path)
+    store.put('A', {'password': '1', 'timestamp': 1.0})
+    # a power cut in the middle of the next append
+    with open(path + '.journal', 'a') as f:
+        f.write('{"op":"put","essid":"B","ent')
+
+    again = SavedNetworkStore(path)
+    assert again.essids() == ['A']
+    # compacted at once, so the next line doesn't continue the torn one
+    assert not os.path.exists(path + '.journal')
+    again.put('C', {'password': '3'})
+    assert sorted(SavedNetworkStore(path).essids()) == ['A', 'C']
+
+
+def test_unreadable_file_starts_empty(path):
+    with open(path, 'w') as f:
+        f.write('{not json')
+    store = SavedNetworkStore(path)
+    assert len(store) == 0
+    store.put('A', {'password': '1'})
+    assert 'A' in SavedNetworkStore(path)
+
+
+def test_one_shared_store_per_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(saved_networks, '_stores', {})
+    first = getSavedNetworkStore(str(tmp_path / 'a.json'))
+    assert getSavedNetworkStore(str(tmp_path / 'a.json')) is first
+    other = getSavedNetworkStore(str(tmp_path / 'b.json'))
+    assert other is not first
+    first.put('A', {'password': '1'})
+    assert 'A' not in other
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from conftest import FIXTURES_DIR
+from WiFiManager.modules.scan_parser import parseScan
+
+# Recorded `iwlist X scan` and `iw dev X scan` outputs of the dongles
+# found on receivers, with the addresses and names replaced.
+SCAN_DIR = os.path.join(FIXTURES_DIR, 'scan')
+
+# networks, first bssid, first essid
+EXPECTED = {
+    'iwlist_rt2800usb': (4, '00:1a:2b:3c:4d:01', 'HomeNetwork'),
+    'iwlist_rtl8188eu': (3, '00:1a:2b:3c:5e:01', 'Casa'),
+    'iwlist_rt73': (2, '00:1a:2b:3c:6f:01', 'Vodafone-A1B2'),
+    'iw_ath9k_htc': (3, '00:1a:2b:3c:7a:01', 'HomeNetwork'),
+    'iw_brcmfmac_5g': (2, '00:1a:2b:3c:8b:01', 'HomeNetwork_5G'),
+}
+
+
+def test_every_recording_is_checked():
+    assert sorted(name[:-len('.txt')] for name in os.listdir(SCAN_DIR)) == \
+        sorted(EXPECTED)
+
+
+@pytest.mark.parametrize('name', sorted(EXPECTED))
+def test_parse_recorded_scan(name):
+    with open(os.path.join(SCAN_DIR, name + '.txt')) as f:
+        networks = parseScan(f.read())
+    count, bssid, essid = EXPECTED[name]
+    assert len(networks) == count
+    assert networks[0]['bssid'] == bssid
+    assert networks[0]['essid'] == essid
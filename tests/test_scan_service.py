@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+from iw_scan_stream import cell
+from WiFiManager.modules.flags import IW_QUAL_DBM
+from WiFiManager.modules.iwlibs import IW_EV_PAYLOAD_OFFSET, parseScanStream
+from WiFiManager.modules.scan_parser import parseScan
+from WiFiManager.modules.scan_service import cellToNetwork
+
+IWLIST = """\
+wlan0     Scan completed :
+          Cell 01 - Address: 00:1A:2B:3C:4D:01
+                    Channel:6
+                    Frequency:2.437 GHz (Channel 6)
+                    Quality=50/100  Signal level=-66 dBm
+                    Encryption key:off
+                    ESSID:"HomeNetwork"
+                    Mode:Master
+"""
+
+
+def cells(*args, **kwargs):
+    return list(parseScanStream(cell(IW_EV_PAYLOAD_OFFSET, *args, **kwargs)))
+
+
+def test_same_record_as_the_iwlist_fallback():
+    result, = cells('00:1A:2B:3C:4D:01', 'HomeNetwork', 2437, 6,
+                    updated=7 | IW_QUAL_DBM)
+    network = cellToNetwork(result)
+    assert network == parseScan(IWLIST)[0]
+    assert network['bssid'] == '00:1a:2b:3c:4d:01'
+    assert network['signal'] == -66
+    assert (network['frequency'], network['channel']) == (2437, 6)
+
+
+def test_channel_only_and_no_dbm():
+    result, = cells('00:1A:2B:3C:4D:03', '\0\0\0\0', 11, 0)
+    network = cellToNetwork(result)
+    assert network['bssid'] == '00:1a:2b:3c:4d:03'
+    assert network['essid'] == ''
+    assert network['channel'] == 11
+    assert 'frequency' not in network and 'signal' not in network
+    # no range: the driver's quality as is
+    assert network['quality'] == network['quality_percent'] == 50.0
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+import math
+
+from WiFiManager.modules import signal_history as sh
+from WiFiManager.modules.signal_sampler import Sample
+
+
+def test_rollup_bucket_min_avg_max():
+    series = sh.RollupSeries(10.0, 4, metrics=('level', 'quality'))
+    series.add(100.0, {'level': -60.0, 'quality': 50.0})
+    series.add(104.0, {'level': -50.0, 'quality': sh.NAN})
+    series.add(109.9, {'level': -70.0})
+    series.add(110.0, {'level': -40.0, 'quality': 70.0})
+    assert series.points('level') == [(105.0, -70.0, -60.0, -50.0),
+                                      (115.0, -40.0, -40.0, -40.0)]
+    # NaN and missing values are not counted
+    assert series.points('quality') == [(105.0, 50.0, 50.0, 50.0),
+                                        (115.0, 70.0, 70.0, 70.0)]
+    assert series.points('level', since=110.0) == [
+        (115.0, -40.0, -40.0, -40.0)]
+
+
+def test_rollup_reuses_the_oldest_slot():
+    series = sh.RollupSeries(1.0, 3, metrics=('level',))
+    for t in range(5):
+        series.add(float(t), {'level': -50.0 - t})
+        series.add(t + 0.5, {'level': -60.0 - t})
+    points = series.points('level')
+    assert [point[0] for point in points] == [2.5, 3.5, 4.5]
+    # the reused slot starts from its new samples only
+    assert points[0] == (2.5, -62.0, -57.0, -52.0)
+    assert series.filled == 3
+    assert series.memoryBytes() == 3 * (8 + 4 + 4 + 8 + 2)
+
+
+def test_history_feeds_every_range():
+    history = sh.SignalHistory()
+    for i in range(600):
+        history.add(Sample(1000.0 + i, 60.0, -55.0, sh.NAN, 54e6))
+    now = 1600.0
+    assert len(history.points(0, 'level', now)) == 300
+    assert len(history.points(1, 'level', now)) == 60
+    assert history.points(1, 'bitrate', now)[0][2] == 54.0
+    assert history.points(2, 'noise', now) == []
+
+
+def test_lttb_keeps_endpoints_and_count():
+    points = [(float(t), 0.0, math.sin(t / 5.0) * 10 + (t % 7), 0.0)
+              for t in range(1000)]
+    sampled = sh.lttb(points, 100)
+    assert len(sampled) == 100
+    assert sampled[0] is points[0] and sampled[-1] is points[-1]
+    assert [p[0] for p in sampled] == sorted(p[0] for p in sampled)
+    # a spike survives downsampling
+    points[500] = (500.0, 0.0, 1000.0, 0.0)
+    assert points[500] in sh.lttb(points, 100)
+    # nothing to drop, or too few points asked for
+    assert sh.lttb(points[:50], 100) == points[:50]
+    assert sh.lttb(points, 2) == points
+
+
+def lines(rects):
+    return [rect for rect in rects if rect[4] == 'line']
+
+
+def test_graph_rects_do_not_join_across_gaps():
+    points = [(t, -60.0, -50.0, -40.0) for t in (0.0, 1.0, 2.0, 10.0, 11.0)]
+    rects = sh.graphRects(points, 200, 100, 0.0, 12.0, -100.0, 0.0, 3.0)
+    assert len([rect for rect in rects if rect[4] == 'band']) == 5
+    # a dot for the first point after a gap, a step (two rects) otherwise
+    assert len(lines(rects)) == 1 + 2 + 2 + 1 + 2
+    joined = sh.graphRects(points, 200, 100, 0.0, 12.0, -100.0, 0.0, 10.0)
+    assert len(lines(joined)) == 1 + 2 * 4
+
+
+def test_graph_rects_clip_and_scale():
+    points = [(0.0, -120.0, -50.0, 10.0), (5.0, -60.0, -50.0, -40.0),
+              (20.0, -60.0, -50.0, -40.0)]
+    rects = sh.graphRects(points, 101, 101, 0.0, 10.0, -100.0, 0.0, 30.0)
+    # out of range values are clipped to the axis, out of range times dropped
+    x, y, w, h, kind = rects[0]
+    assert (x, y, h, kind) == (0, 0, 101, 'band')
+    assert max(rect[0] for rect in rects) == 50
+    assert sh.graphRects([], 100, 100, 0.0, 10.0, 0.0, 1.0, 1.0) == []
+    assert sh.graphScale('level', points) == (-100.0, -20.0)
+    assert sh.graphScale('bitrate', points) == (-120.0, 10.0)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+import math
+import time
+
+import pytest
+
+from WiFiManager.modules import signal_sampler as ss
+
+PROC_NET_WIRELESS = """\
+Inter-| sta-|   Quality        |   Discarded packets               | Missed | WE
+ face | tus | link level noise |  nwid  crypt   frag  retry   misc | beacon | 22
+ wlan0: 0000   56.  -54.  -256        0      0      0      3      0        0
+  ra0: 0001   35.  200.  161.        0      0      0      0      0        0
+broken: 0000   xx.
+"""
+
+
+def test_parse_proc_wireless():
+    assert ss.parseProcWireless(PROC_NET_WIRELESS) == {
+        'wlan0': (0, 56.0, -54.0, -256.0),
+        'ra0': (1, 35.0, 200.0, 161.0),
+    }
+
+
+def test_proc_level_to_dbm():
+    assert math.isnan(ss.procLevelToDbm(-256.0))
+    assert ss.procLevelToDbm(-54.0) == -54.0
+    assert ss.procLevelToDbm(63.0) == 63.0
+    # unsigned 8 bit levels
+    assert ss.procLevelToDbm(200.0) == -56.0
+    assert ss.procLevelToDbm(161.0) == -95.0
+
+
+def sample(i):
+    return ss.Sample(1000.0 + i, float(i), -50.0 - i, ss.NAN, 54e6)
+
+
+def test_sample_ring_wraps_around_oldest_first():
+    ring = ss.SampleRing(capacity=4)
+    assert ring.latest() is None
+    for i in range(3):
+        ring.append(sample(i))
+    assert len(ring) == 3
+    assert ring.column('quality') == [0.0, 1.0, 2.0]
+
+    for i in range(3, 10):
+        ring.append(sample(i))
+    assert len(ring) == 4
+    assert ring.column('timestamp') == [1006.0, 1007.0, 1008.0, 1009.0]
+    assert ring.column('level', 2) == [-58.0, -59.0]
+    assert ring.latest()[:3] == sample(9)[:3]
+    assert ring.samples()[0].timestamp == 1006.0
+    assert math.isnan(ring.samples()[0].noise)
+
+    ring.clear()
+    assert len(ring) == 0 and ring.column('quality') == []
+
+
+def test_sample_once(tmp_path):
+    path = tmp_path / 'wireless'
+    path.write_text(PROC_NET_WIRELESS)
+    sampler = ss.SignalSampler(path=str(path), bitrate=False)
+    sampler.max_quality = {'wlan0': 70, 'ra0': 100}
+    sampler.sampleOnce(now=5.0)
+    wlan0 = sampler.ring('wlan0').latest()
+    assert wlan0.quality == 80.0
+    assert wlan0.level == -54.0
+    assert ss.isMissing(wlan0.noise) and ss.isMissing(wlan0.bitrate)
+    assert sampler.ring('ra0').latest().level == -56.0
+    assert sampler.samples == 1
+
+
+def test_thread_is_parked_not_restarted(tmp_path):
+    path = tmp_path / 'wireless'
+    path.write_text(PROC_NET_WIRELESS)
+    sampler = ss.SignalSampler(interval=0.01, path=str(path), bitrate=False)
+    sampler.max_quality = {'wlan0': 70, 'ra0': 100}
+    try:
+        sampler.acquire()
+        thread = sampler.thread
+        time.sleep(0.1)
+        sampler.release()
+        time.sleep(0.05)
+        parked = sampler.samples
+        assert parked > 0
+        time.sleep(0.05)
+        assert sampler.samples == parked
+        assert sampler.reader.handle is None
+
+        sampler.acquire()
+        assert sampler.thread is thread
+        time.sleep(0.05)
+        assert sampler.samples > parked
+    finally:
+        sampler.stop()
+    assert not thread.is_alive()
+
+
+@pytest.mark.parametrize('value, missing', [(ss.NAN, True), (0.0, False),
+                                            (-256.0, False)])
+def test_is_missing(value, missing):
+    assert ss.isMissing(value) is missing
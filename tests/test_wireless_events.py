@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from netlink_replay import FIXTURE_LAYOUT, loadFrames
+from WiFiManager.modules import wireless_events as we
+
+pytestmark = pytest.mark.skipif(not FIXTURE_LAYOUT,
+                                reason="fixtures are little endian, 64 bit")
+
+
+def decode(name, decoder=None):
+    """ (kind, ifname, ifindex, data) of every event in a fixture. """
+    decoder = decoder or we.LinkEventDecoder()
+    events = []
+    for frame in loadFrames(name):
+        events.extend((event.kind, event.ifname, event.ifindex, event.data)
+                      for event in decoder.feed(frame, timestamp=1.0))
+    return events
+
+
+def test_link_session():
+    assert decode('rtnetlink/link_veth') == [
+        (we.EVENT_LINK_ADDED, 'wlt1', 9, None),
+        (we.EVENT_LINK_ADDED, 'wlt0', 10, None),
+        (we.EVENT_LINK_UP, 'wlt0', 10, None),
+        (we.EVENT_LINK_UP, 'wlt1', 9, None),
+        (we.EVENT_CARRIER_ON, 'wlt1', 9, None),
+        (we.EVENT_CARRIER_ON, 'wlt0', 10, None),
+        (we.EVENT_LINK_DOWN, 'wlt1', 9, None),
+        (we.EVENT_CARRIER_OFF, 'wlt1', 9, None),
+        (we.EVENT_CARRIER_OFF, 'wlt0', 10, None),
+        (we.EVENT_LINK_DOWN, 'wlt0', 10, None),
+        (we.EVENT_LINK_REMOVED, 'wlt0', 10, None),
+        (we.EVENT_LINK_REMOVED, 'wlt1', 9, None),
+    ]
+
+
+def test_removed_link_is_forgotten():
+    decoder = we.LinkEventDecoder()
+    decode('rtnetlink/link_veth', decoder)
+    assert decoder.links == {}
+
+
+def test_wireless_events():
+    assert decode('rtnetlink/wext_wlan0') == [
+        (we.EVENT_SCAN_DONE, 'wlan0', 3, None),
+        (we.EVENT_CUSTOM, 'wlan0', 3, 'ASSOCINFO(ReqIEs=0000074d796e6574)'),
+        (we.EVENT_ASSOCIATED, 'wlan0', 3, 'C8:3A:35:10:22:01'),
+        (we.EVENT_ESSID, 'wlan0', 3, 'HomeNet'),
+        (we.EVENT_DISASSOCIATED, 'wlan0', 3, '00:00:00:00:00:00'),
+        (we.EVENT_STATION_ADDED, 'ap0', 4, '5C:CF:7F:01:02:03'),
+        (we.EVENT_STATION_REMOVED, 'ap0', 4, '5C:CF:7F:01:02:03'),
+    ]
+
+
+def test_publish_filters_by_kind_and_ifname():
+    events = we.WirelessEvents()
+    seen = []
+    # subscribe() would open the kernel socket, the fixture stands in
+    events.subscribers[1] = (seen.append,
+                             frozenset([we.EVENT_ASSOCIATED]), 'wlan0')
+    for frame in loadFrames('rtnetlink/wext_wlan0'):
+        for event in events.decoder.feed(frame):
+            events.publish(event)
+    assert [(event.kind, event.data) for event in seen] == [
+        (we.EVENT_ASSOCIATED, 'C8:3A:35:10:22:01')]
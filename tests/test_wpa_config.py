@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from WiFiManager.modules import wpa_config
+from WiFiManager.modules.saved_networks import SavedNetworkStore
+
+
+def test_psk_is_derived_once_per_password(tmp_path, monkeypatch):
+    store = SavedNetworkStore(str(tmp_path / 'networks.json'))
+    store.put('HomeNet', {'password': 'correct horse', 'encryption': 'WPA2'})
+    derived = []
+    compute = wpa_config.computePsk
+    monkeypatch.setattr(wpa_config, 'computePsk',
+                        lambda ssid, passphrase: derived.append(ssid) or
+                        compute(ssid, passphrase))
+
+    psk = wpa_config.cachedPsk(store, 'HomeNet', 'correct horse')
+    assert wpa_config.cachedPsk(store, 'HomeNet', 'correct horse') == psk
+    assert store.get('HomeNet')['psk'] == psk
+    assert derived == ['HomeNet']
+
+    # another password is derived again and not cached with the entry
+    other = wpa_config.cachedPsk(store, 'HomeNet', 'battery staple')
+    assert other != psk
+    assert store.get('HomeNet')['psk'] == psk
+    assert derived == ['HomeNet', 'HomeNet']
+
+
+def test_psk_of_the_ieee_test_vector():
+    assert wpa_config.computePsk('IEEE', 'password') == (
+        'f42c6fc52df0ebef9ebb4b90b38a5f902e83fe1b135a70e23aed762e9710a12e')
+    hex_psk = 'F42C6FC52DF0EBEF9EBB4B90B38A5F902E83FE1B135A70E23AED762E9710A12E'
+    assert wpa_config.computePsk('IEEE', hex_psk) == hex_psk.lower()
+
+
+@pytest.mark.parametrize('passphrase', [
+    'short', 'x' * 64,
+    # 8 characters, but not ASCII
+    'pässwörd',
+    # 63 characters, 64 bytes
+    'é' + 'x' * 62,
+    'tab\tinside',
+])
+def test_passphrase_is_8_to_63_printable_ascii(passphrase):
+    with pytest.raises(ValueError):
+        wpa_config.computePsk('HomeNet', passphrase)
+
+
+def test_rejected_passphrase_is_written_as_is(tmp_path, monkeypatch):
+    monkeypatch.setattr(wpa_config, 'WPA_CONF',
+                        str(tmp_path / 'wpa_supplicant.%s.conf'))
+    config = wpa_config.saveNetwork('wlan0', 'HomeNet', 'WPA2', 'pässwörd')
+    assert config.networks[0].getRaw('psk') == '"pässwörd"'
+    config = wpa_config.saveNetwork('wlan0', 'HomeNet', 'WPA2', 'password')
+    assert len(config.networks[0].getRaw('psk')) == 64
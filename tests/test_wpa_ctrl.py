@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+import pytest
+
+from fake_wpa_supplicant import FakeWpaSupplicant
+from WiFiManager.modules import wpa_ctrl
+from WiFiManager.modules.wpa_ctrl import WpaCtrl, WpaCtrlError
+
+BSSID = '00:11:22:33:44:55'
+
+
+@pytest.fixture
+def supplicant(tmp_path):
+    server = FakeWpaSupplicant(
+        str(tmp_path / 'wlan0'), ['HomeNetwork'],
+        scan_results=[(BSSID, 2437, -48, '[WPA2-PSK-CCMP][ESS]',
+                       'HomeNetwork')],
+        connect_delay=0.0).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def ctrl(supplicant):
+    with WpaCtrl(path=supplicant.path) as client:
+        yield client
+
+
+def test_ping_and_status(ctrl, supplicant):
+    assert ctrl.ping()
+    assert ctrl.status() == {'wpa_state': 'DISCONNECTED'}
+    assert not ctrl.isConnected()
+    assert supplicant.requests == ['PING', 'STATUS', 'STATUS']
+
+
+def test_networks(ctrl, supplicant):
+    assert ctrl.listNetworks() == [
+        {'id': 0, 'ssid': 'HomeNetwork', 'bssid': 'any', 'flags': ''}]
+    network_id = ctrl.addNetwork()
+    assert network_id == 1
+    ctrl.setNetworkFields(network_id, [('ssid', '"Cafe Guest"'),
+                                       ('key_mgmt', 'NONE')])
+    assert ctrl.findNetwork('Cafe Guest') == 1
+    assert ctrl.findNetwork('Neighbour') is None
+    assert supplicant.networks[1]['fields'] == {
+        'ssid': '"Cafe Guest"', 'key_mgmt': 'NONE'}
+    with pytest.raises(WpaCtrlError):
+        ctrl.setNetwork(7, 'ssid', '"Nowhere"')
+
+
+def test_events_are_queued_while_waiting_for_a_reply(ctrl):
+    ctrl.attach()
+    ctrl.scan()
+    # the scan results event is on the socket before the STATUS reply
+    time.sleep(0.1)
+    assert ctrl.status()['wpa_state'] == 'DISCONNECTED'
+    assert [event.name for event in ctrl.events] == [
+        wpa_ctrl.EVENT_SCAN_RESULTS]
+    event = ctrl.nextEvent()
+    assert event.level == 3
+    assert event.text == wpa_ctrl.EVENT_SCAN_RESULTS
+    assert ctrl.nextEvent() is None
+
+
+def test_connect_and_disconnect(supplicant, tmp_path):
+    ctrl_dir = str(tmp_path)
+    assert wpa_ctrl.connectNetwork('wlan0', 'HomeNetwork', timeout=2.0,
+                                   ctrl_dir=ctrl_dir)
+    assert supplicant.state == 'COMPLETED'
+    with WpaCtrl('wlan0', ctrl_dir) as ctrl:
+        ctrl.attach()
+        wpa_ctrl.disconnectNetwork('wlan0', ctrl_dir)
+        event = ctrl.waitEvent((wpa_ctrl.EVENT_DISCONNECTED,), 1.0)
+    assert event is not None
+    assert supplicant.state == 'DISCONNECTED'
+    assert supplicant.current is None
+
+
+def test_wait_for_socket(supplicant, tmp_path):
+    assert wpa_ctrl.waitForSocket('wlan0', 1.0, ctrl_dir=str(tmp_path))
+    start = time.time()
+    assert not wpa_ctrl.waitForSocket('wlan1', 0.2, ctrl_dir=str(tmp_path))
+    assert 0.2 <= time.time() - start < 1.0
@@ -371,6 +371,7 @@ class WiFiManagerMain(Screen):
             (_("Restart WiFi Interface"), "restart_wifi"),
             (_("Reload WiFi Modules"), "reload_modules"),
             (_("Check System Logs"), "check_logs"),
+            (_("Connection Timing"), "connect_timing"),
         ]
 
         self.session.openWithCallback(
@@ -426,6 +427,7 @@ class ToolsMenuScreen(Screen):
             (_("Restart WiFi Interface"), "restart_wifi", _("Restart wireless interface to reset connectivity")),
             (_("Reload WiFi Modules"), "reload_modules", _("Reload kernel WiFi modules to fix driver issues")),
             (_("Check System Logs"), "check_logs", _("Check system logs for WiFi errors and connection issues")),
+            (_("Connection Timing"), "connect_timing", _("Time spent in each phase of past connection attempts")),
         ]
 
         self["menu"] = MenuList([(item[0], item[1])
@@ -461,6 +463,7 @@ class ToolsMenuScreen(Screen):
             "restart_wifi": _("Restarts the WiFi interface:\n- Brings interface down/up\n- Reinitializes driver\n- Preserves configuration\n- Quick connectivity reset"),
             "reload_modules": _("Reloads WiFi kernel modules:\n- Unloads/loads drivers\n- Resets hardware\n- Fixes driver issues\n- Requires root access"),
             "check_logs": _("Checks system logs for WiFi errors:\n- Kernel messages (dmesg)\n- System logs\n- Driver errors\n- Connection issues"),
+            "connect_timing": _("Shows how long each connection phase took (median and 95th percentile):\n- Stopping old daemons, wpa_supplicant start\n- Association and 4-way handshake\n- DHCP, per client\n- Verification\nThe records are exported as JSON to /tmp"),
         }
         return help_texts.get(tool, _("No help available for this tool."))
 
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 
 import subprocess
+import time
 from re import search
+from twisted.internet import threads
 
 from Screens.MessageBox import MessageBox
 from Screens.Screen import Screen
@@ -12,6 +14,9 @@ from Components.Label import Label
 from Components.config import ConfigIP, ConfigSubsection, ConfigText, ConfigYesNo, ConfigPassword, ConfigSelection, getConfigListEntry, ConfigEnableDisable
 
 from . import _
+from .tools import run_command, STATUS_TTL
+from .saved_networks import getSavedNetworkStore
+from .wpa_config import saveNetwork, wpaConfigPath
 
 """
 #########################################################
@@ -67,6 +72,7 @@ class WiFiConfigScreen(Screen, ConfigListScreen):
 
         self.session = session
         self.iface = iface
+        self.saving = False
 
         self.network_info = network_info if network_info is not None else {}
 
@@ -254,8 +260,8 @@ class WiFiConfigScreen(Screen, ConfigListScreen):
             if not interfaces:
                 for iface in ['wlan0', 'wlan1', 'wlan2', 'wlp2s0', 'wlp3s0']:
                     try:
-                        result = subprocess.run(['ip', 'link', 'show', iface],
-                                                capture_output=True, text=True)
+                        result = run_command(['ip', 'link', 'show', iface],
+                                             ttl=STATUS_TTL)
                         if result.returncode == 0:
                             interfaces.append((iface, iface))
                     except Exception as e:
@@ -265,8 +271,7 @@ class WiFiConfigScreen(Screen, ConfigListScreen):
             # Method 3: Use iwconfig to find wireless interfaces
             if not interfaces:
                 try:
-                    result = subprocess.run(
-                        ['iwconfig'], capture_output=True, text=True)
+                    result = run_command(['iwconfig'], ttl=STATUS_TTL)
                     if result.returncode == 0:
                         for line in result.stdout.split('\n'):
                             if 'IEEE 802.11' in line and 'no wireless extensions' not in line:
@@ -291,8 +296,7 @@ class WiFiConfigScreen(Screen, ConfigListScreen):
             ifname = self.wifi_config.interface.value
 
             # Get current settings using iwconfig
-            result = subprocess.run(
-                ['iwconfig', ifname], capture_output=True, text=True)
+            result = run_command(['iwconfig', ifname], ttl=STATUS_TTL)
             if result.returncode != 0:
                 print(f"[WiFiConfig] Cannot get settings for {ifname}")
                 return
@@ -399,8 +403,8 @@ class WiFiConfigScreen(Screen, ConfigListScreen):
 
             for cmd in commands:
                 try:
-                    result = subprocess.run(
-                        cmd, shell=True, capture_output=True, text=True, timeout=10)
+                    # split like a shell would, but exec'd directly
+                    result = run_command(cmd, timeout=10)
                     if result.returncode == 0:
                         success_count += 1
                         print(
@@ -564,6 +568,9 @@ class WiFiConfigScreen(Screen, ConfigListScreen):
 
     def cancel(self):
         """Cancel configuration"""
+        if self.saving:
+            # config_written() closes the screen once the config is saved
+            return
         self.close(None)
 
     def save_and_connect(self):
@@ -584,9 +591,34 @@ class WiFiConfigScreen(Screen, ConfigListScreen):
                     MessageBox.TYPE_ERROR)
                 return
 
-            # Write wpa_supplicant configuration
-            self.write_wpa_supplicant_config()
+            if self.saving:
+                return
+            self.saving = True
+            self["key_green"].setText(_("Saving..."))
+
+            # the PSK derivation (PBKDF2) takes seconds on a slow box, it
+            # must not block the reactor
+            deferred = threads.deferToThread(
+                self.write_wpa_supplicant_config, *self.network_settings())
+            deferred.addCallbacks(self.config_written, self.config_failed)
 
+        except Exception as e:
+            print("Error saving configuration: " + str(e))
+
+    def network_settings(self):
+        """Values write_wpa_supplicant_config() needs, read on the
+        reactor thread"""
+        return (
+            self.iface,
+            self.wifi_config.essid.value,
+            self.wifi_config.encryption.value,
+            self.wifi_config.psk.value,
+            self.wifi_config.hiddenessid.value,
+            self.wifi_config.wepkeytype.value != "ASCII")
+
+    def config_written(self, result):
+        self.saving = False
+        try:
             # Write network configuration
             self.write_network_config()
 
@@ -600,6 +632,16 @@ class WiFiConfigScreen(Screen, ConfigListScreen):
         except Exception as e:
             print("Error saving configuration: " + str(e))
 
+    def config_failed(self, failure):
+        self.saving = False
+        self["key_green"].setText(_("Save & Connect"))
+        print("[WiFiConfig] Error writing wpa_supplicant config: {}".format(
+            failure.getErrorMessage()))
+        self.session.open(
+            MessageBox,
+            _("Error saving configuration: %s") % failure.getErrorMessage(),
+            MessageBox.TYPE_ERROR)
+
     def write_network_config(self):
         """Scrive configurazione network autonoma per Enigma2"""
         try:
@@ -629,61 +671,31 @@ class WiFiConfigScreen(Screen, ConfigListScreen):
             print(f"[WiFiConfig] Error writing network config: {e}")
             return False
 
-    def write_wpa_supplicant_config(self):
-        """Write wpa_supplicant configuration like Enigma2"""
-        config_file = f"/etc/wpa_supplicant.{self.iface}.conf"
-
-        lines = [
-            "# WiFi configuration for {}".format(self.wifi_config.essid.value),
-            "ctrl_interface=/var/run/wpa_supplicant",
-            "update_config=1",
-            "",
-            "network={",
-            '\tssid="{}"'.format(self.wifi_config.essid.value),
-        ]
-
-        if self.wifi_config.hiddenessid.value:
-            lines.append('\tscan_ssid=1')
-        else:
-            lines.append('\tscan_ssid=0')
-
-        encryption = self.wifi_config.encryption.value
-        if encryption in ("WPA", "WPA2", "WPA/WPA2"):
-            lines.append('\tkey_mgmt=WPA-PSK')
-            if encryption == "WPA":
-                lines.append('\tproto=WPA')
-                lines.append('\tpairwise=TKIP')
-                lines.append('\tgroup=TKIP')
-            elif encryption == "WPA2":
-                lines.append('\tproto=RSN')
-                lines.append('\tpairwise=CCMP')
-                lines.append('\tgroup=CCMP')
-            else:  # WPA/WPA2
-                lines.append('\tproto=WPA RSN')
-                lines.append('\tpairwise=CCMP TKIP')
-                lines.append('\tgroup=CCMP TKIP')
-            lines.append('\tpsk="{}"'.format(self.wifi_config.psk.value))
-
-        elif encryption == "WEP":
-            lines.append('\tkey_mgmt=NONE')
-            if self.wifi_config.wepkeytype.value == "ASCII":
-                lines.append(
-                    '\twep_key0="{}"'.format(
-                        self.wifi_config.psk.value))
-            else:
-                lines.append(
-                    '\twep_key0={}'.format(
-                        self.wifi_config.psk.value))
-        else:  # Unencrypted
-            lines.append('\tkey_mgmt=NONE')
-
-        lines.append("}")
-
-        # Write the file
-        with open(config_file, 'w') as f:
-            f.write('\n'.join(lines))
-
-        print(f"[WiFiConfig] Configuration saved to {config_file}")
+    def write_wpa_supplicant_config(self, iface, essid, encryption, password,
+                                    hidden, wep_hex):
+        """Add or update this network in the wpa_supplicant configuration,
+        keeping the other networks, and try it first. Runs in a thread:
+        the network is saved in the store first, so saveNetwork() caches
+        the PSK with it and the next save skips PBKDF2"""
+        store = getSavedNetworkStore()
+        if encryption != "Unencrypted" and password:
+            entry = dict(store.get(essid) or {})
+            if entry.get('password') != password:
+                entry.pop('psk', None)
+            entry.update(password=password, encryption=encryption,
+                         interface=iface, timestamp=time.time())
+            store.put(essid, entry)
+        saveNetwork(
+            iface,
+            essid,
+            encryption,
+            password,
+            hidden=hidden,
+            wep_hex=wep_hex,
+            store=store,
+            first=True)
+
+        print(f"[WiFiConfig] Configuration saved to {wpaConfigPath(iface)}")
 
     def set_defaults(self):
         """Reset all settings to defaults"""
@@ -2,12 +2,11 @@
 
 import time
 import traceback
-import subprocess
 
-from json import dump
 from os.path import exists
-from re import IGNORECASE, search, escape, sub, DOTALL
+from re import IGNORECASE, search
 from twisted.internet import reactor, threads
+from twisted.internet.defer import CancelledError
 
 from Screens.MessageBox import MessageBox
 from Screens.Screen import Screen
@@ -22,18 +21,31 @@ from Components.config import ConfigPassword, ConfigSubsection, ConfigYesNo
 from . import _
 from .tools import (
     # ensure_interface_up,
-    format_signal_quality,
-    get_current_connected_essid,
-    get_interface_info,
-    get_ip_address,
     get_wifi_interfaces,
     load_saved_networks,
+    run_command,
+    STATUS_TTL,
     # parse_iwlist_detailed,
-    scan_networks as tools_scan,
-    # scan_networks_simple,
+    # scan_networks as tools_scan,
     verify_connection,
 )
 from .config import WiFiConfigScreen
+from .connect_machine import (
+    ConnectMachine,
+    STATE_ASSOCIATING,
+    STATE_AUTHENTICATING,
+    STATE_DHCP,
+    STATE_VERIFYING
+)
+from .connect_profile import recordAttempt
+from .dhcp import getDhcpBackend
+from .connection_state import ConnectionState, network_status_text
+from .iwlibs import invalidateRange
+from .link_hints import forgetLink
+from .poll_scheduler import getPollScheduler
+from .wpa_config import saveNetwork, wpaConfigPath
+from .wpa_ctrl import disconnectNetwork, WpaCtrlError
+from .scan_service import getScanService
 
 """
 #########################################################
@@ -56,6 +68,13 @@ from .config import WiFiConfigScreen
 
 
 CONFIG_FILE = "/etc/wifi_saved_networks.json"
+
+CONNECT_STATE_MESSAGES = {
+    STATE_ASSOCIATING: _("Associating with %s..."),
+    STATE_AUTHENTICATING: _("Authenticating with %s..."),
+    STATE_DHCP: _("Obtaining IP address from %s..."),
+    STATE_VERIFYING: _("Verifying connection to %s..."),
+}
 MODE_LIST = ["WPA/WPA2", "WPA2", "WPA", "WEP", "Unencrypted"]
 WEP_LIST = ["ASCII", "HEX"]
 
@@ -85,7 +104,9 @@ class WiFiConnectZ(Screen):
         self.current_network = None
         self.interface = None
         self.is_scanning = False
+        self.scan_deferred = None
         self.is_connecting = False
+        self.last_connect = None
         self.helpList = []
 
         self.connect_config = ConfigSubsection()
@@ -123,7 +144,14 @@ class WiFiConnectZ(Screen):
 
         self.saved_networks = load_saved_networks(CONFIG_FILE, self.interface)
 
+        # Kept in memory and refreshed on wireless events or a timer, so
+        # moving through the list never touches the driver
+        self.connection = ConnectionState(self.interface)
+        self.connection.addListener(self.on_connection_changed)
+        self.connection.start(self)
         self.check_current_connection()
+        self.onClose.append(self.cancel_scan)
+        self.onClose.append(self.connection.stop)
         reactor.callLater(1, self.force_initial_scan)
         self["actions"] = self.normal_actions
 
@@ -189,33 +217,46 @@ class WiFiConnectZ(Screen):
         self["key_blue"].setText(_("Scanning..."))
         self["status"].setText(_("Scanning for networks..."))
 
-        def do_scan():
-            try:
-                return tools_scan(self.interface, detailed=True)
-            except Exception as e:
-                print(f"[DEBUG] Scan failed: {e}")
-                return []
-
         def scan_completed(networks):
+            self.scan_deferred = None
             self.is_scanning = False
             self["key_blue"].setText(_("Scan"))
             self.networks = networks
             self.update_display_after_scan()
 
+        def scan_progress(networks):
+            # iwlist path: fill the list while the scan runs
+            self.networks = networks
+            self.update_network_list()
+            self["status"].setText(
+                _("Scanning for networks... {} found").format(len(networks)))
+
         def scan_failed(failure):
+            self.scan_deferred = None
             self.is_scanning = False
+            if failure.check(CancelledError):
+                return
             self["key_blue"].setText(_("Scan"))
             self["status"].setText(_("Scan failed"))
             print(f"[DEBUG] Scan error: {failure}")
 
-        deferred = threads.deferToThread(do_scan)
-        deferred.addCallback(scan_completed)
-        deferred.addErrback(scan_failed)
+        # Driven from the reactor, shared with other screens scanning
+        self.scan_deferred = getScanService().scan(
+            self.interface, progress=scan_progress)
+        self.scan_deferred.addCallback(scan_completed)
+        self.scan_deferred.addErrback(scan_failed)
+
+    def cancel_scan(self):
+        """Stop waiting for a pending scan, e.g. when the screen closes"""
+        if self.scan_deferred is not None:
+            deferred = self.scan_deferred
+            self.scan_deferred = None
+            deferred.cancel()
 
     def update_network_list(self):
         """Update the network list display with connection indicators"""
         network_list = []
-        current_essid = get_current_connected_essid(self.interface)
+        current_essid = self.connection.essid
 
         print(f"[DEBUG] Current connected ESSID: {current_essid}")
 
@@ -279,12 +320,12 @@ class WiFiConnectZ(Screen):
             return
 
         essid = self.current_network.get('essid')
-        current_essid = get_current_connected_essid(self.interface)
+        current_essid = self.connection.essid
 
         print(
             f"[DEBUG] update_status_selection - Selected: {essid}, Connected: {current_essid}")
 
-        if current_essid == essid:
+        if self.connection.isConnectedTo(essid):
             # Already connected to this network
             self.update_status(
                 _("CONNECTED to: {} - Press OK for options").format(essid))
@@ -314,90 +355,15 @@ class WiFiConnectZ(Screen):
             return
 
         essid = self.current_network.get('essid')
-        current_essid = get_current_connected_essid(self.interface)
-        is_encrypted = self.current_network.get('encryption', False)
-        has_saved_password = self.get_saved_password(essid)
-        signal_strength = self.current_network.get('signal', 0)
-
-        signal_quality = format_signal_quality(signal_strength)
-
-        # IF CONNECTED TO THIS NETWORK
-        if current_essid == essid:
-            interface = get_wifi_interfaces()
-            ip = _("No IP")
-            if interface:
-                ip = get_ip_address(interface)
-
-            # Check if static IP is configured
-            network_type = _("DHCP")
-            try:
-                if exists("/etc/enigma2/network.conf"):
-                    with open("/etc/enigma2/network.conf", 'r') as f:
-                        for line in f:
-                            if line.startswith('connection_type='):
-                                network_type = _(
-                                    "Static") if "static" in line else _("DHCP")
-                                break
-            except Exception as e:
-                print(e)
-                pass
-
-            status_msg = _("CONNECTED to: {essid}\nIP: {ip} | Network: {network_type}\nSignal: {quality} ({strength} dBm)\nPress OK for options").format(
-                essid=essid, ip=ip or _("No IP"), network_type=network_type, quality=signal_quality, strength=signal_strength)
-
-        # PROTECTED NETWORK WITH SAVED PASSWORD
-        elif is_encrypted and has_saved_password:
-            status_msg = _("{essid} - Password saved\nSignal: {quality} ({strength} dBm)\nPress OK to connect or edit").format(
-                essid=essid, quality=signal_quality, strength=signal_strength)
-
-        # PROTECTED NETWORK WITHOUT PASSWORD
-        elif is_encrypted:
-            status_msg = _("{essid} - Password required\nSignal: {quality} ({strength} dBm)\nPress OK to enter password").format(
-                essid=essid, quality=signal_quality, strength=signal_strength)
-
-        # OPEN NETWORK
-        else:
-            status_msg = _("{essid} - Open network\nSignal: {quality} ({strength} dBm)\nPress OK to connect").format(
-                essid=essid, quality=signal_quality, strength=signal_strength)
-
-        self["status"].setText(status_msg)
+        self["status"].setText(network_status_text(
+            self.current_network, self.connection,
+            self.get_saved_password(essid)))
 
     def update_wpa_supplicant(self, essid, password, encryption):
         """Update wpa_supplicant configuration"""
         try:
-            wpa_file = "/etc/wpa_supplicant.%s.conf" % self.interface
-
-            # Read existing content
-            content = ""
-            if exists(wpa_file):
-                with open(wpa_file, 'r') as f:
-                    content = f.read()
-
-            # Remove existing network block for this ESSID
-            content = sub(
-                r'network=\{([^}]*ssid="%s"[^}]*)\}' %
-                escape(essid), '', content, flags=DOTALL)
-
-            # Add new network block
-            network_block = """
-                network={
-                    ssid="%s"
-                    scan_ssid=0
-                    key_mgmt=WPA-PSK
-                    proto=WPA RSN
-                    pairwise=CCMP TKIP
-                    group=CCMP TKIP
-                    psk="%s"
-                }
-                """ % (essid, password)
-
-            # Append new network block
-            content = content.rstrip() + network_block
-
-            # Write back to file
-            with open(wpa_file, 'w') as f:
-                f.write(content)
-
+            saveNetwork(self.interface, essid, encryption, password,
+                        store=self.saved_networks)
             print("[DEBUG] Updated wpa_supplicant for: " + essid)
 
         except Exception as e:
@@ -446,6 +412,7 @@ class WiFiConnectZ(Screen):
         print("[DEBUG] Refreshing GUI after connection change")
 
         # 1. Update current connection status
+        self.connection.refresh()
         self.check_current_connection()
 
         # 2. Refresh the network list (rebuild the entire list)
@@ -465,16 +432,19 @@ class WiFiConnectZ(Screen):
             print("[DEBUG] Saving network to both systems: " + essid)
 
             # Save to JSON
-            self.saved_networks[essid] = {
+            entry = {
                 'password': password,
                 'encryption': encryption,
                 'timestamp': time.time(),
                 'interface': self.interface
             }
-            with open(CONFIG_FILE, 'w') as f:
-                dump(self.saved_networks, f, indent=2)
+            if self.current_network and \
+                    self.current_network.get('essid') == essid and \
+                    self.current_network.get('bssid'):
+                entry['bssid'] = self.current_network['bssid']
+            self.saved_networks.put(essid, entry)
 
-            # Also update wpa_supplicant
+            # Also update wpa_supplicant (caches the PSK in the entry)
             self.update_wpa_supplicant(essid, password, encryption)
 
             print("[DEBUG] Network saved successfully")
@@ -484,15 +454,14 @@ class WiFiConnectZ(Screen):
 
     def get_saved_password(self, essid):
         """Get saved password for network"""
-        saved = self.saved_networks.get(essid, {})
-        password = saved.get('password', "")
+        password = self.saved_networks.getPassword(essid)
         print("[DEBUG] get_saved_password for '%s': '%s'" % (
             essid, "***" if password else "EMPTY"))
         return password
 
     def get_current_connected_essid(self):
-        """Semplificato - usa tools.py"""
-        return get_current_connected_essid(self.interface)
+        """Connected ESSID as last read by the connection state"""
+        return self.connection.essid
 
     def verify_connectionp(self, essid):
         """Semplificato - usa tools.py"""
@@ -509,141 +478,51 @@ class WiFiConnectZ(Screen):
             self.execute_connection_with_callback(None)
 
     def connect_to_open_network_thread(self):
-        try:
-            essid = self.current_network.get('essid')
-
-            # Disconnect first
-            subprocess.run(
-                "iwconfig {} essid off".format(self.interface),
-                shell=True,
-                capture_output=True,
-                timeout=5
-            )
-            time.sleep(1)
-
-            # Connect to open network
-            cmd = 'iwconfig {} essid "{}"'.format(self.interface, essid)
-            result = subprocess.run(
-                cmd,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-
-            if result.returncode == 0:
-                dhcp_success = False
-
-                for dhcp_client in ['dhcpcd', 'udhcpc', 'dhclient']:
-                    try:
-                        if dhcp_client == 'dhcpcd':
-                            result = subprocess.run(
-                                ['dhcpcd', self.interface],
-                                capture_output=True,
-                                text=True,
-                                timeout=15
-                            )
-                        elif dhcp_client == 'udhcpc':
-                            result = subprocess.run(
-                                ['udhcpc', '-i', self.interface, '-t', '5', '-n'],
-                                capture_output=True,
-                                text=True,
-                                timeout=15
-                            )
-                        elif dhcp_client == 'dhclient':
-                            result = subprocess.run(
-                                ['dhclient', self.interface, '-v'],
-                                capture_output=True,
-                                text=True,
-                                timeout=15
-                            )
-
-                        if result.returncode == 0:
-                            dhcp_success = True
-                            break
-                    except Exception as e:
-                        print(e)
-                        continue
-
-                time.sleep(3)
-                return self.verify_connectionp(essid) and dhcp_success
-            else:
-                return False
-
-        except Exception as e:
-            print("[DEBUG] Open network connection error: {}".format(e))
-            return False
+        essid = self.current_network.get('essid')
+        return self.run_connect_machine(essid, secured=False)
 
     def connect_with_saved_config_thread(self, essid, password=None):
         """Connect using saved configuration - IN THREAD"""
-        try:
-            # Stop any existing connections
-            subprocess.run(['killall', 'wpa_supplicant'],
-                           capture_output=True, timeout=5)
-            subprocess.run(['killall', 'dhclient'],
-                           capture_output=True, timeout=5)
-            subprocess.run(['killall', 'dhcpcd'],
-                           capture_output=True, timeout=5)
-            time.sleep(2)
-
-            # Start wpa_supplicant with saved config
-            config_file = f"/etc/wpa_supplicant.{self.interface}.conf"
-            if not exists(config_file):
-                return False
-
-            cmd = [
-                'wpa_supplicant',
-                '-B',
-                '-i',
-                self.interface,
-                '-c',
-                config_file]
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=10)
-
-            if result.returncode != 0:
-                return False
-
-            # Wait for association
-            time.sleep(3)
-
-            # Try multiple DHCP clients
-            dhcp_success = False
-            for dhcp_client in ['dhcpcd', 'udhcpc', 'dhclient']:
-                try:
-                    print("[DEBUG] Trying DHCP client: " + dhcp_client)
-                    if dhcp_client == 'dhcpcd':
-                        result = subprocess.run(
-                            ['dhcpcd', self.interface], capture_output=True, text=True, timeout=15)
-                    elif dhcp_client == 'udhcpc':
-                        result = subprocess.run(['udhcpc',
-                                                 '-i',
-                                                 self.interface,
-                                                 '-t',
-                                                 '5',
-                                                 '-n'],
-                                                capture_output=True,
-                                                text=True,
-                                                timeout=15)
-                    elif dhcp_client == 'dhclient':
-                        result = subprocess.run(
-                            ['dhclient', self.interface, '-v'], capture_output=True, text=True, timeout=15)
-
-                    if result.returncode == 0:
-                        dhcp_success = True
-                        break
-                except Exception as e:
-                    print(e)
-                    continue
+        if not exists(wpaConfigPath(self.interface)):
+            return False
+        return self.run_connect_machine(essid, secured=True)
 
-            # Verify connection
-            time.sleep(2)
-            return self.verify_connectionp(essid) and dhcp_success
+    def run_connect_machine(self, essid, secured):
+        """Drive one connection attempt - IN THREAD"""
+        try:
+            # Stop any existing DHCP client
+            start = time.time()
+            getDhcpBackend().stopClients()
+            kill_seconds = time.time() - start
+
+            machine = ConnectMachine(self.interface, essid, secured=secured,
+                                     on_state=self.on_connect_state)
+            self.last_connect = machine
+            connected = machine.run()
+            recordAttempt(machine, kill_seconds)
+            return connected
 
         except Exception as e:
             print(f"[DEBUG] Connection error: {e}")
             return False
 
+    def connected_message(self, essid):
+        message = _("Connected to %s") % essid
+        machine = self.last_connect
+        if machine is not None and machine.essid == essid:
+            message += "\n" + _("Connected in %.1f s (%s)") % (
+                machine.total(),
+                _("last known access point") if machine.hinted
+                else _("full scan"))
+        return message
+
+    def on_connect_state(self, machine, state):
+        """Connection attempt moved on (worker thread)"""
+        message = CONNECT_STATE_MESSAGES.get(state)
+        if message:
+            reactor.callFromThread(
+                self.update_status, message % machine.essid)
+
     def execute_connection(self):
         """Make connection in separate thread to avoid GUI freeze"""
         if self.is_connecting:
@@ -669,13 +548,21 @@ class WiFiConnectZ(Screen):
 
         def connect_callback(success):
             if success:
-                self["status"].setText(_("Connected to %s") % essid)
                 self.refresh_after_connection()
+                self["status"].setText(self.connected_message(essid))
             else:
                 self["status"].setText(_("Failed to connect to %s") % essid)
             self.update_button_labels()
 
-        threads.deferToThread(connect_thread).addCallback(connect_callback)
+        def not_busy(result):
+            getPollScheduler().setBusy(False)
+            return result
+
+        # status polling runs at its fastest while the attempt lasts
+        getPollScheduler().setBusy(True)
+        deferred = threads.deferToThread(connect_thread)
+        deferred.addBoth(not_busy)
+        deferred.addCallback(connect_callback)
 
     def execute_connection_with_callback(self, callback):
         """Execute connection with network configuration"""
@@ -805,12 +692,12 @@ class WiFiConnectZ(Screen):
                 gateway = config_data.get('gateway', '')
 
                 if ip and netmask:
-                    cmd = f"ifconfig {self.interface} {ip} netmask {netmask}"
-                    subprocess.run(cmd, shell=True, timeout=10)
+                    run_command(['ifconfig', self.interface, ip,
+                                 'netmask', netmask], timeout=10)
 
                 if gateway:
-                    cmd = f"route add default gw {gateway} {self.interface}"
-                    subprocess.run(cmd, shell=True, timeout=10)
+                    run_command(['route', 'add', 'default', 'gw', gateway,
+                                 self.interface], timeout=10)
 
                 # Applica DNS
                 dns1 = config_data.get('dns1', '')
@@ -828,11 +715,7 @@ class WiFiConnectZ(Screen):
                 print("[DEBUG] Static network configuration applied")
             else:
                 # DHCP - ottieni IP automaticamente
-                subprocess.run(
-                    "dhclient {}".format(self.interface),
-                    shell=True,
-                    timeout=15
-                )
+                getDhcpBackend().obtainLease(self.interface)
                 print("[DEBUG] DHCP configuration applied")
 
         except Exception as e:
@@ -842,36 +725,21 @@ class WiFiConnectZ(Screen):
         """Disconnect from current network - IN THREAD"""
         def disconnect_thread():
             try:
-                subprocess.run(
-                    "killall wpa_supplicant 2>/dev/null",
-                    shell=True,
-                    timeout=5
-                )
-
-                subprocess.run(
-                    "killall dhclient 2>/dev/null",
-                    shell=True,
-                    timeout=5
-                )
-
-                subprocess.run(
-                    "iwconfig {} essid off".format(self.interface),
-                    shell=True,
-                    timeout=5
-                )
+                try:
+                    # keep the daemon for a fast reconnect
+                    disconnectNetwork(self.interface)
+                except WpaCtrlError:
+                    run_command(['killall', 'wpa_supplicant'], timeout=5)
+                getDhcpBackend().stopClients()
+                run_command(['iwconfig', self.interface, 'essid', 'off'],
+                            timeout=5)
 
                 # Reset interface
-                subprocess.run(
-                    "ip link set {} down".format(self.interface),
-                    shell=True,
-                    timeout=5
-                )
-
-                subprocess.run(
-                    "ip link set {} up".format(self.interface),
-                    shell=True,
-                    timeout=5
-                )
+                run_command(['ip', 'link', 'set', self.interface, 'down'],
+                            timeout=5)
+                run_command(['ip', 'link', 'set', self.interface, 'up'],
+                            timeout=5)
+                invalidateRange(self.interface)
 
                 return True
 
@@ -911,10 +779,9 @@ class WiFiConnectZ(Screen):
 
         essid = self.current_network.get('essid')
         if essid in self.saved_networks:
-            del self.saved_networks[essid]  # Remove entire entry
             try:
-                with open(CONFIG_FILE, 'w') as f:
-                    dump(self.saved_networks, f, indent=2)
+                self.saved_networks.forget(essid)  # Remove entire entry
+                forgetLink(essid)
                 self.show_message(_("Forgotten network: {}").format(essid))
                 self.update_network_list()
             except Exception as e:
@@ -922,59 +789,22 @@ class WiFiConnectZ(Screen):
 
     def show_current_connection_status(self):
         """Show current connection status"""
-        try:
-            result = subprocess.run(
-                "iwconfig {}".format(self.interface),
-                shell=True,
-                capture_output=True,
-                text=True
+        if self.connection.isConnected():
+            signal = self.connection.signal
+            self["status"].setText(
+                _("Connected: {} | Signal: {} dBm | IP: {}").format(
+                    self.connection.essid,
+                    signal if signal is not None else "?",
+                    self.connection.ip or _("No IP")
+                )
             )
-
-            if 'ESSID:' in result.stdout:
-                essid_match = search(r'ESSID:"([^"]*)"', result.stdout)
-
-                if essid_match and essid_match.group(1):
-                    essid = essid_match.group(1)
-
-                    signal_match = search(
-                        r'Signal level=(-?\d+)', result.stdout)
-                    signal = signal_match.group(1) if signal_match else "?"
-
-                    # Get IP address
-                    ip_result = subprocess.run(
-                        "ip addr show {}".format(self.interface),
-                        shell=True,
-                        capture_output=True,
-                        text=True
-                    )
-
-                    ip_match = search(
-                        r'inet (\d+\.\d+\.\d+\.\d+)', ip_result.stdout)
-                    ip_addr = ip_match.group(1) if ip_match else _("No IP")
-
-                    self["status"].setText(
-                        _("Connected: {} | Signal: {} dBm | IP: {}").format(
-                            essid,
-                            signal,
-                            ip_addr
-                        )
-                    )
-                    return
-
+        else:
             self["status"].setText(_("Not connected to any network"))
 
-        except Exception as e:
-            self["status"].setText(_("Status check failed: {}".format(e)))
-
     def show_connection_details_with_callback(self, callback):
         """Show connection details in vertical format"""
         try:
-            result = subprocess.run(
-                "iwconfig {}".format(self.interface),
-                shell=True,
-                capture_output=True,
-                text=True
-            )
+            result = run_command(['iwconfig', self.interface], ttl=STATUS_TTL)
 
             if result.returncode == 0:
                 details = []
@@ -1056,12 +886,8 @@ class WiFiConnectZ(Screen):
 
                 # Add IP address information
                 try:
-                    ip_result = subprocess.run(
-                        "ip addr show {}".format(self.interface),
-                        shell=True,
-                        capture_output=True,
-                        text=True
-                    )
+                    ip_result = run_command(
+                        ['ip', 'addr', 'show', self.interface], ttl=STATUS_TTL)
 
                     ip_match = search(
                         r'inet (\d+\.\d+\.\d+\.\d+)',
@@ -1174,7 +1000,7 @@ class WiFiConnectZ(Screen):
         if current_index is not None and current_index < len(self.networks):
             self.current_network = self.networks[current_index]
             essid = self.current_network.get('essid')
-            current_essid = get_current_connected_essid(self.interface)
+            current_essid = self.connection.essid
 
             print("[DEBUG] Network for options: " + str(essid))
             print("[DEBUG] Current connected: " + str(current_essid))
@@ -1182,7 +1008,7 @@ class WiFiConnectZ(Screen):
             options = []
 
             # IF CONNECTED TO THIS NETWORK
-            if current_essid == essid:
+            if self.connection.isConnectedTo(essid):
                 print("[DEBUG] Already connected to this network")
                 options = [
                     (_("Disconnect"), "disconnect"),
@@ -1261,28 +1087,27 @@ class WiFiConnectZ(Screen):
             print("[DEBUG] No valid network selected")
             self["status"].setText(_("No network selected"))
 
-    def check_current_connection(self):
-        """Check current connection status using tools.py"""
-        if not self.interface:
+    def on_connection_changed(self, connection):
+        """Connection changed under us: refresh status and list markers"""
+        print(f"[DEBUG] Connection of {connection.ifname} now {connection.essid}")
+        if self.is_connecting:
             return
+        self.check_current_connection()
+        if self.networks:
+            self.update_network_list()
 
-        info = get_interface_info(self.interface)
-
-        if 'error' in info:
-            self["status"].setText(_("Not connected to any network"))
+    def check_current_connection(self):
+        """Show the connection status held by the connection state"""
+        if not self.interface:
             return
 
-        if info.get('essid') and info['essid'] != _("Not connected"):
-            essid = info['essid']
-            quality = info.get('quality', _('?'))
-            interface = get_wifi_interfaces()
-            ip_addr = _("No interface")
-            if interface:
-                ip_addr = get_ip_address(interface)
-
+        if self.connection.isConnected():
+            quality = self.connection.quality
             self["status"].setText(
                 _("Connected to: {essid}\nSignal: {quality} | IP: {ip}").format(
-                    essid=essid, quality=quality, ip=ip_addr))
+                    essid=self.connection.essid,
+                    quality=quality if quality is not None else _('?'),
+                    ip=self.connection.ip or _("No IP")))
         else:
             self["status"].setText(_("Not connected to any network"))
 
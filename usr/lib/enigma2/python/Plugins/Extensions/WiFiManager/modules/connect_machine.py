@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+from .dhcp import getDhcpBackend
+from .interfaces import getIpAddress, hasCarrier, readOperstate
+from .iwlibs import Wireless
+from .link_hints import getLinkHint, rememberLink
+from .nl80211 import frequencyToChannel
+from .tools import run_command
+from .wpa_config import wpaConfigPath
+from .wpa_ctrl import (
+    WpaCtrl,
+    WpaCtrlError,
+    isRunning,
+    waitForSocket,
+    EVENT_CONNECTED,
+    EVENT_SSID_TEMP_DISABLED,
+    EVENT_TERMINATING
+)
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+STATE_IDLE = 'idle'
+STATE_ASSOCIATING = 'associating'
+STATE_AUTHENTICATING = 'authenticating'
+STATE_DHCP = 'dhcp'
+STATE_VERIFYING = 'verifying'
+STATE_CONNECTED = 'connected'
+STATE_FAILED = 'failed'
+
+# seconds each state may take before the attempt fails
+DEADLINES = {
+    STATE_ASSOCIATING: 15.0,
+    STATE_AUTHENTICATING: 10.0,
+    STATE_DHCP: 20.0,
+    STATE_VERIFYING: 3.0,
+}
+
+# how often readiness signals are checked while waiting
+POLL_INTERVAL = 0.05
+
+# association time allowed with the last good link's BSSID/frequency
+# before falling back to a full scan
+HINT_TIMEOUT = 5.0
+
+# states timed as a phase of their own (see phases)
+STATE_PHASES = {
+    STATE_ASSOCIATING: 'associate',
+    STATE_AUTHENTICATING: 'handshake',
+    STATE_VERIFYING: 'verify',
+}
+
+# wpa_state values of STATUS once the station is associated
+ASSOCIATED_STATES = ('ASSOCIATED', '4WAY_HANDSHAKE', 'GROUP_HANDSHAKE',
+                     'COMPLETED')
+
+
+class ConnectFailed(Exception):
+    pass
+
+
+class KeyRejected(ConnectFailed):
+    pass
+
+
+class ConnectMachine(object):
+    """One connection attempt as explicit states
+
+    idle -> associating -> authenticating -> dhcp -> verifying ->
+    connected, or failed from any state. Each state waits for its
+    readiness signal (supplicant state over the control socket, carrier
+    in sysfs, an IPv4 address on the interface) instead of sleeping,
+    and fails when its deadline passes. Blocking, run it in a worker
+    thread; on_state is called there with (machine, state). dhcp is
+    called as dhcp(ifname, timeout, requested_ip, on_attempt),
+    DhcpBackend.obtainLease by default.
+
+    With use_hints the last good link of the ESSID (link_hints) pins
+    the BSSID and scan frequency for hint_timeout seconds and its lease
+    is requested again; hinted tells whether that worked. The pin is
+    lifted once the handshake completes, so wpa_supplicant can still
+    roam to other access points of the ESSID. The link reached is
+    stored for the next attempt.
+
+    timings lists (state, seconds) of every state that was entered;
+    phases has the seconds of the finer steps connect_profile records:
+    supplicant start, associate, handshake, dhcp_<client> per client
+    tried and verify.
+    """
+
+    def __init__(self, ifname, essid, secured=True, deadlines=None,
+                 on_state=None, dhcp=None, use_hints=True,
+                 hint_timeout=HINT_TIMEOUT):
+        self.ifname = ifname
+        self.essid = essid
+        self.secured = secured
+        self.deadlines = dict(DEADLINES)
+        if deadlines:
+            self.deadlines.update(deadlines)
+        self.on_state = on_state
+        self.dhcp = dhcp or getDhcpBackend().obtainLease
+        self.state = STATE_IDLE
+        self.error = None
+        self.timings = []
+        self.phases = {}
+        self.entered = None
+        self.started = None
+        self.ctrl = None
+        self.network_id = None
+        self.hint = getLinkHint(essid) if use_hints else None
+        self.hint_timeout = hint_timeout
+        self.hinted = False
+
+    def run(self):
+        """Runs the attempt; returns True when connected"""
+        self.started = time.time()
+        handlers = (
+            (STATE_ASSOCIATING, self.associate),
+            (STATE_AUTHENTICATING, self.authenticate),
+            (STATE_DHCP, self.obtainAddress),
+            (STATE_VERIFYING, self.verify),
+        )
+        try:
+            for state, handler in handlers:
+                self.enter(state)
+                handler(self.entered + self.deadlines[state])
+            self.enter(STATE_CONNECTED)
+            self.remember()
+        except (ConnectFailed, WpaCtrlError) as e:
+            self.error = str(e)
+            self.enter(STATE_FAILED)
+        finally:
+            if self.ctrl is not None:
+                self.ctrl.close()
+                self.ctrl = None
+        print("[ConnectMachine] {} {}: {} ({})".format(
+            self.ifname, self.essid, self.state, self.summary()))
+        return self.state == STATE_CONNECTED
+
+    def enter(self, state):
+        now = time.time()
+        if self.entered is not None:
+            seconds = now - self.entered
+            self.timings.append((self.state, seconds))
+            if self.state == STATE_ASSOCIATING:
+                seconds -= self.phases.get('kill', 0.0) + \
+                    self.phases.get('supplicant', 0.0)
+            # open networks have no handshake to time
+            if self.state in STATE_PHASES and (
+                    self.secured or self.state != STATE_AUTHENTICATING):
+                self.addPhase(STATE_PHASES[self.state], seconds)
+        self.state = state
+        self.entered = now
+        if self.on_state is not None:
+            self.on_state(self, state)
+
+    def addPhase(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def total(self):
+        return sum(seconds for state, seconds in self.timings)
+
+    def summary(self):
+        parts = ["{} {:.2f}s".format(state, seconds)
+                 for state, seconds in self.timings]
+        if self.hint is not None:
+            parts.append("hints used" if self.hinted else "hints failed")
+        if self.error:
+            parts.append(self.error)
+        return ", ".join(parts)
+
+    def waitFor(self, check, deadline, what):
+        """Polls check() until it returns something true"""
+        while True:
+            value = check()
+            if value:
+                return value
+            if time.time() >= deadline:
+                raise ConnectFailed("timeout waiting for " + what)
+            time.sleep(POLL_INTERVAL)
+
+    # associating: the supplicant (or the driver, for open networks)
+    # reaches the access point
+
+    def associate(self, deadline):
+        if self.hint is not None:
+            try:
+                self.associateWith(
+                    min(deadline, time.time() + self.hint_timeout),
+                    self.hint)
+                self.hinted = True
+                return
+            except KeyRejected:
+                raise
+            except ConnectFailed as e:
+                print("[ConnectMachine] Hints for {} failed ({}), "
+                      "scanning".format(self.essid, e))
+        self.associateWith(deadline, None)
+
+    def associateWith(self, deadline, hint):
+        if not self.secured:
+            command = ['iwconfig', self.ifname, 'essid', self.essid]
+            if hint is not None:
+                command.extend(['ap', hint['bssid']])
+                channel = frequencyToChannel(hint.get('frequency') or 0)
+                if channel:
+                    command.extend(['channel', str(channel)])
+            elif self.hint is not None:
+                # undo the pinned access point of the hinted attempt
+                command.extend(['ap', 'any'])
+            run_command(command, timeout=max(1, deadline - time.time()))
+            self.waitFor(lambda: hasCarrier(self.ifname) or
+                         readOperstate(self.ifname) == 'up',
+                         deadline, "carrier")
+            return
+        if self.ctrl is None:
+            self.openSupplicant(deadline)
+        # re-reading the config also drops the hints of a failed attempt
+        self.ctrl.reconfigure()
+        self.network_id = self.ctrl.findNetwork(self.essid)
+        if self.network_id is None:
+            raise ConnectFailed("{} is not configured".format(self.essid))
+        if hint is not None:
+            self.ctrl.setNetwork(self.network_id, 'bssid', hint['bssid'])
+            if hint.get('frequency'):
+                self.ctrl.setNetwork(self.network_id, 'scan_freq',
+                                     str(hint['frequency']))
+        del self.ctrl.events[:]
+        self.ctrl.selectNetwork(self.network_id)
+        self.waitSupplicant(ASSOCIATED_STATES, deadline, "association")
+
+    def openSupplicant(self, deadline):
+        start = time.time()
+        if not isRunning(self.ifname):
+            run_command(['killall', 'wpa_supplicant'], timeout=5)
+            # stopping the old daemon belongs to the kill phase
+            self.addPhase('kill', time.time() - start)
+            start = time.time()
+            result = run_command(['wpa_supplicant', '-B', '-i', self.ifname,
+                                  '-c', wpaConfigPath(self.ifname)],
+                                 timeout=10)
+            if result.returncode != 0:
+                raise ConnectFailed("wpa_supplicant did not start: " +
+                                    result.stderr.strip())
+            if not waitForSocket(self.ifname, deadline - time.time()):
+                raise ConnectFailed("no wpa_supplicant control socket")
+        self.ctrl = WpaCtrl(self.ifname)
+        self.ctrl.attach()
+        self.addPhase('supplicant', time.time() - start)
+
+    def waitSupplicant(self, states, deadline, what):
+        while True:
+            status = self.ctrl.status()
+            # right after SELECT_NETWORK it may still report the old one
+            if status.get('wpa_state') in states and \
+                    status.get('ssid', self.essid) == self.essid:
+                return status
+            if time.time() >= deadline:
+                raise ConnectFailed("timeout waiting for " + what)
+            # CONNECTED only wakes the loop up to read STATUS again
+            event = self.ctrl.waitEvent(
+                (EVENT_CONNECTED, EVENT_SSID_TEMP_DISABLED, EVENT_TERMINATING),
+                min(POLL_INTERVAL * 4, max(0, deadline - time.time())))
+            if event is None or event.name == EVENT_CONNECTED:
+                continue
+            if event.name == EVENT_SSID_TEMP_DISABLED:
+                raise KeyRejected("key rejected")
+            raise ConnectFailed("wpa_supplicant terminated")
+
+    # authenticating: WPA handshake done
+
+    def authenticate(self, deadline):
+        if self.ctrl is None:
+            return
+        self.waitSupplicant(('COMPLETED',), deadline, "4-way handshake")
+        if self.hinted:
+            self.releaseHint()
+
+    def releaseHint(self):
+        """Undoes the BSSID and scan frequency pinned for the hinted
+        association, in the running wpa_supplicant only (RECONFIGURE
+        would drop them too, but also the connection)"""
+        try:
+            self.ctrl.setNetwork(self.network_id, 'bssid', 'any')
+            if self.hint.get('frequency'):
+                # an empty frequency list scans every channel again
+                self.ctrl.setNetwork(self.network_id, 'scan_freq', '')
+        except WpaCtrlError as e:
+            print("[ConnectMachine] Error releasing the hints of {}: "
+                  "{}".format(self.essid, e))
+
+    # dhcp: an IPv4 address shows up on the interface
+
+    def obtainAddress(self, deadline):
+        if getIpAddress(self.ifname):
+            return
+        requested = self.hint.get('ip') if self.hint is not None else None
+        self.dhcp(self.ifname, max(1, deadline - time.time()), requested,
+                  self.dhcpAttempt)
+        self.waitFor(lambda: getIpAddress(self.ifname), deadline,
+                     "an address")
+
+    def dhcpAttempt(self, name, success, seconds):
+        self.addPhase('dhcp_' + name, seconds)
+
+    # verifying: still associated with the right network
+
+    def verify(self, deadline):
+        def associated():
+            try:
+                snapshot = Wireless(self.ifname).snapshot()
+            except Exception:
+                return hasCarrier(self.ifname)
+            if snapshot.essid is None:
+                return snapshot.isAssociated() or hasCarrier(self.ifname)
+            return snapshot.essid == self.essid
+        self.waitFor(associated, deadline, "association to " + self.essid)
+        self.waitFor(lambda: getIpAddress(self.ifname), deadline,
+                     "an address")
+
+    def remember(self):
+        """Stores the link reached as hints for the next attempt"""
+        try:
+            if self.ctrl is not None:
+                status = self.ctrl.status()
+                bssid = status.get('bssid')
+                frequency = int(status.get('freq') or 0) or None
+                security = status.get('key_mgmt')
+            else:
+                snapshot = Wireless(self.ifname).snapshot()
+                bssid = snapshot.ap_addr if snapshot.isAssociated() else None
+                frequency = snapshot.frequency
+                frequency = int(frequency / 1e6) \
+                    if frequency and frequency >= 1e6 else None
+                security = 'NONE'
+            if bssid:
+                rememberLink(self.essid, bssid, frequency, security,
+                             getIpAddress(self.ifname), self.total(),
+                             self.hinted)
+        except Exception as e:
+            print("[ConnectMachine] Error storing the link of {}: {}".format(
+                self.essid, e))
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+
+import os
+import struct
+import threading
+import time
+
+from .. import _
+from .connect_machine import STATE_CONNECTED
+from .saved_networks import writeJsonAtomic
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+PROFILE_FILE = "/etc/enigma2/wifimanager_connect.ring"
+PROFILE_EXPORT = "/tmp/wifimanager_connect_timing.json"
+
+# records kept; the oldest is overwritten by the next one
+RING_CAPACITY = 256
+
+# phases of a connection attempt, in the order they run; dhcp has one
+# phase per client so a slow or hanging client shows up on its own
+PHASES = (
+    'kill',
+    'supplicant',
+    'associate',
+    'handshake',
+    'dhcp_dhcpcd',
+    'dhcp_udhcpc',
+    'dhcp_dhclient',
+    'verify',
+    'total',
+)
+
+PHASE_LABELS = {
+    'kill': _("Stop old daemons"),
+    'supplicant': _("Start wpa_supplicant"),
+    'associate': _("Association"),
+    'handshake': _("4-way handshake"),
+    'dhcp_dhcpcd': _("DHCP dhcpcd"),
+    'dhcp_udhcpc': _("DHCP udhcpc"),
+    'dhcp_dhclient': _("DHCP dhclient"),
+    'verify': _("Verification"),
+    'total': _("Total"),
+}
+
+# ring file layout, little endian:
+#   header: magic, version, record size, capacity, records written
+#   record: start time, flags (FLAG_*), ESSID (32 bytes, NUL padded),
+#           one uint32 per phase in milliseconds, NOT_RUN if skipped
+MAGIC = b'WMCP'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+RECORD = struct.Struct('<dB32s' + 'I' * len(PHASES))
+NOT_RUN = 0xFFFFFFFF
+
+FLAG_CONNECTED = 0x01
+FLAG_HINTED = 0x02
+FLAG_SECURED = 0x04
+
+
+def packRecord(record):
+    flags = 0
+    if record.get('connected'):
+        flags |= FLAG_CONNECTED
+    if record.get('hinted'):
+        flags |= FLAG_HINTED
+    if record.get('secured'):
+        flags |= FLAG_SECURED
+    phases = record.get('phases', {})
+    millis = []
+    for phase in PHASES:
+        seconds = phases.get(phase)
+        millis.append(NOT_RUN if seconds is None else
+                      min(int(round(seconds * 1000)), NOT_RUN - 1))
+    essid = (record.get('essid') or '').encode('utf-8')[:32]
+    return RECORD.pack(record.get('timestamp', 0.0), flags, essid, *millis)
+
+
+def unpackRecord(data):
+    values = RECORD.unpack(data)
+    timestamp, flags, essid = values[:3]
+    phases = {}
+    for phase, millis in zip(PHASES, values[3:]):
+        if millis != NOT_RUN:
+            phases[phase] = millis / 1000.0
+    return {
+        'timestamp': timestamp,
+        'essid': essid.rstrip(b'\0').decode('utf-8', 'replace'),
+        'connected': bool(flags & FLAG_CONNECTED),
+        'hinted': bool(flags & FLAG_HINTED),
+        'secured': bool(flags & FLAG_SECURED),
+        'phases': phases,
+    }
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return None
+    rank = max(1, int(-(-fraction * len(values) // 1)))
+    return values[min(rank, len(values)) - 1]
+
+
+class ProfileRing(object):
+    """Connection attempt timings in a fixed-size ring file
+
+    Every record has the same size, so append() writes one record and
+    the header in place and the file never grows past capacity records;
+    reading it back is one read() and a struct unpack per record. A file
+    of another layout is started over.
+    """
+
+    def __init__(self, path=PROFILE_FILE, capacity=RING_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        self.lock = threading.Lock()
+
+    def readHeader(self, f):
+        data = f.read(HEADER.size)
+        if len(data) != HEADER.size:
+            return None
+        magic, version, size, capacity, written = HEADER.unpack(data)
+        if magic != MAGIC or version != VERSION or size != RECORD.size or \
+                capacity != self.capacity:
+            return None
+        return written
+
+    def append(self, record):
+        with self.lock:
+            try:
+                f = open(self.path, 'r+b')
+            except IOError:
+                f = open(self.path, 'w+b')
+            with f:
+                written = self.readHeader(f)
+                if written is None:
+                    f.seek(0)
+                    f.truncate()
+                    written = 0
+                f.seek(HEADER.size + (written % self.capacity) * RECORD.size)
+                f.write(packRecord(record))
+                f.seek(0)
+                f.write(HEADER.pack(MAGIC, VERSION, RECORD.size,
+                                    self.capacity, written + 1))
+                f.flush()
+                try:
+                    os.fsync(f.fileno())
+                except OSError:
+                    pass
+
+    def records(self):
+        """Stored records, oldest first"""
+        with self.lock:
+            try:
+                with open(self.path, 'rb') as f:
+                    written = self.readHeader(f)
+                    data = f.read() if written else b''
+            except IOError:
+                return []
+        count = min(written or 0, self.capacity, len(data) // RECORD.size)
+        records = [unpackRecord(data[i * RECORD.size:(i + 1) * RECORD.size])
+                   for i in range(count)]
+        if written and written > self.capacity:
+            first = written % self.capacity
+            records = records[first:] + records[:first]
+        return records
+
+    def phaseStats(self, records=None):
+        """{phase: (count, p50, p95)} in seconds over the phases that ran"""
+        if records is None:
+            records = self.records()
+        stats = {}
+        for phase in PHASES:
+            values = sorted(record['phases'][phase] for record in records
+                            if phase in record['phases'])
+            if values:
+                stats[phase] = (len(values), percentile(values, 0.5),
+                                percentile(values, 0.95))
+        return stats
+
+    def exportJson(self, path=PROFILE_EXPORT):
+        """Writes the records as JSON for analysis elsewhere; returns how
+        many were written"""
+        records = self.records()
+        writeJsonAtomic(path, {'phases': list(PHASES), 'records': records})
+        return len(records)
+
+
+_ring = None
+
+
+def getProfileRing():
+    """Returns the plugin wide ProfileRing"""
+    global _ring
+    if _ring is None:
+        _ring = ProfileRing()
+    return _ring
+
+
+def recordAttempt(machine, kill_seconds=None, ring=None):
+    """Stores the phases of a finished ConnectMachine; kill_seconds is
+    how long stopping the old daemons took before it ran, added to the
+    machine's own kill time"""
+    phases = dict(machine.phases)
+    if kill_seconds is not None:
+        phases['kill'] = phases.get('kill', 0.0) + kill_seconds
+    phases['total'] = machine.total() + (kill_seconds or 0.0)
+    record = {
+        'timestamp': machine.started or time.time(),
+        'essid': machine.essid,
+        'connected': machine.state == STATE_CONNECTED,
+        'hinted': machine.hinted,
+        'secured': machine.secured,
+        'phases': phases,
+    }
+    try:
+        (ring or getProfileRing()).append(record)
+    except (IOError, OSError) as e:
+        print("[ConnectProfile] Error storing timings: {}".format(e))
+    return record
+
+
+def formatPhaseStats(stats, count):
+    """Text table of phaseStats() for the Tools screen"""
+    lines = [_("Attempts: {}").format(count), "",
+             "{:<22}{:>6}{:>10}{:>10}".format(
+                 _("Phase"), _("Runs"), "p50", "p95")]
+    for phase in PHASES:
+        if phase not in stats:
+            continue
+        runs, p50, p95 = stats[phase]
+        lines.append("{:<22}{:>6}{:>9.2f}s{:>9.2f}s".format(
+            PHASE_LABELS[phase], runs, p50, p95))
+    return "\n".join(lines)
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+from twisted.internet import threads
+
+from .. import _
+from .interfaces import getIpAddress
+from .poll_scheduler import getPollScheduler
+from .tools import get_interface_info, format_signal_quality
+from .wireless_events import (
+    getWirelessEvents,
+    EVENT_ASSOCIATED,
+    EVENT_DISASSOCIATED,
+    EVENT_CARRIER_ON,
+    EVENT_CARRIER_OFF,
+    EVENT_ESSID
+)
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+NETWORK_CONF = "/etc/enigma2/network.conf"
+
+# background refresh when no wireless event arrives: the longest
+# interval of the poll task, and how much the signal (dBm) may move
+# before it polls fast again
+CONNECTION_REFRESH = 10.0
+SIGNAL_TOLERANCE = 3
+
+CONNECTION_EVENTS = (EVENT_ASSOCIATED, EVENT_DISASSOCIATED, EVENT_CARRIER_ON,
+                     EVENT_CARRIER_OFF, EVENT_ESSID)
+
+
+def read_network_type(path=NETWORK_CONF):
+    """'static' or 'dhcp', from the connection_type= line of network.conf"""
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                if line.startswith('connection_type='):
+                    return 'static' if 'static' in line else 'dhcp'
+    except IOError:
+        pass
+    return 'dhcp'
+
+
+def read_connection(ifname):
+    """Reads the connection of ifname; runs in a worker thread since
+    get_interface_info may have to fork for drivers without ioctls"""
+    info = get_interface_info(ifname)
+    essid = info.get('essid')
+    if 'error' in info or essid == _("Not connected"):
+        essid = None
+    return {
+        'essid': essid or None,
+        'ap_addr': info.get('ap_addr'),
+        'quality': info.get('quality'),
+        'signal': info.get('signal_dbm'),
+        'ip': getIpAddress(ifname),
+        'network_type': read_network_type(),
+    }
+
+
+def network_status_text(network, state, has_saved_password):
+    """Status line of the connect screen for the selected network; only
+    looks at memory, it runs on every keypress"""
+    essid = network.get('essid')
+    signal_strength = network.get('signal', 0)
+    signal_quality = format_signal_quality(signal_strength)
+
+    # IF CONNECTED TO THIS NETWORK
+    if state.isConnectedTo(essid):
+        if state.network_type == 'static':
+            network_type = _("Static")
+        else:
+            network_type = _("DHCP")
+        return _("CONNECTED to: {essid}\nIP: {ip} | Network: {network_type}\nSignal: {quality} ({strength} dBm)\nPress OK for options").format(
+            essid=essid, ip=state.ip or _("No IP"), network_type=network_type, quality=signal_quality, strength=signal_strength)
+
+    # PROTECTED NETWORK WITH SAVED PASSWORD
+    if network.get('encryption', False) and has_saved_password:
+        return _("{essid} - Password saved\nSignal: {quality} ({strength} dBm)\nPress OK to connect or edit").format(
+            essid=essid, quality=signal_quality, strength=signal_strength)
+
+    # PROTECTED NETWORK WITHOUT PASSWORD
+    if network.get('encryption', False):
+        return _("{essid} - Password required\nSignal: {quality} ({strength} dBm)\nPress OK to enter password").format(
+            essid=essid, quality=signal_quality, strength=signal_strength)
+
+    # OPEN NETWORK
+    return _("{essid} - Open network\nSignal: {quality} ({strength} dBm)\nPress OK to connect").format(
+        essid=essid, quality=signal_quality, strength=signal_strength)
+
+
+class ConnectionState(object):
+    """What a screen needs to know about the current connection, in memory
+
+    The values are read off the main loop when start() is called, when the
+    kernel reports an association or carrier change, on request
+    (refresh()) and from a PollScheduler task, between every 250 ms
+    while things change or a connection is made and CONNECTION_REFRESH
+    seconds while they don't. Screens read
+    the attributes directly, so navigating a list never touches the
+    driver or starts a process. Listeners get called on the main loop
+    with this object after every refresh that changed something.
+    """
+
+    def __init__(self, ifname, interval=CONNECTION_REFRESH):
+        self.ifname = ifname
+        self.interval = interval
+        self.essid = None
+        self.ap_addr = None
+        self.quality = None
+        self.signal = None
+        self.ip = None
+        self.network_type = 'dhcp'
+        self.updated = 0.0
+        self.listeners = []
+        self.event_token = None
+        self.task = None
+        self.reading = False
+        self.pending = False
+        self.running = False
+        self.stats = dict(refreshes=0, changes=0, events=0)
+
+    def start(self, screen=None):
+        """screen: polling pauses while it is hidden"""
+        if self.running or not self.ifname:
+            return
+        self.running = True
+        self.event_token = getWirelessEvents().subscribe(
+            self.on_event, CONNECTION_EVENTS, self.ifname)
+        self.task = getPollScheduler().register(
+            self.refresh, interval=self.interval, max_interval=self.interval,
+            screen=screen, tolerance=SIGNAL_TOLERANCE,
+            name="connection " + self.ifname)
+        self.refresh()
+
+    def stop(self):
+        self.running = False
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.event_token is not None:
+            getWirelessEvents().unsubscribe(self.event_token)
+            self.event_token = None
+        del self.listeners[:]
+
+    def addListener(self, callback):
+        self.listeners.append(callback)
+
+    def isConnected(self):
+        return self.essid is not None
+
+    def isConnectedTo(self, essid):
+        return essid is not None and essid == self.essid
+
+    def on_event(self, event):
+        self.stats['events'] += 1
+        if self.task is not None:
+            self.task.poke()
+        else:
+            self.refresh()
+
+    def refresh(self):
+        """Schedules a read now; calls while one runs are folded into
+        one more read after it"""
+        if not self.running:
+            return
+        if self.reading:
+            self.pending = True
+            return
+        self.reading = True
+        deferred = threads.deferToThread(read_connection, self.ifname)
+        deferred.addCallbacks(self.apply, self.read_failed)
+
+    def apply(self, values):
+        self.reading = False
+        self.stats['refreshes'] += 1
+        self.updated = time.time()
+        changed = False
+        for name, value in values.items():
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                changed = True
+        if changed:
+            self.stats['changes'] += 1
+            for callback in list(self.listeners):
+                callback(self)
+        if self.task is not None:
+            self.task.update((self.essid, self.ap_addr, self.ip, self.signal))
+        self.schedule()
+
+    def read_failed(self, failure):
+        self.reading = False
+        print("[ConnectionState] Reading {} failed: {}".format(
+            self.ifname, failure.getErrorMessage()))
+        self.schedule()
+
+    def schedule(self):
+        # the poll task runs the next regular read
+        if self.running and self.pending:
+            self.pending = False
+            self.refresh()
+
@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 
-import subprocess
 import traceback
 from datetime import datetime
 from os.path import basename, realpath, isdir
@@ -8,12 +7,13 @@ from Screens.Screen import Screen
 from Components.ActionMap import ActionMap
 from Components.Button import Button
 from Components.ScrollLabel import ScrollLabel
+from twisted.internet.defer import CancelledError
 
 from . import _
+from .scan_service import getScanService
 from .tools import (
     get_interface_info,
     is_interface_up,
-    scan_networks,
     format_signal_quality,
     get_wifi_interfaces
 )
@@ -71,6 +71,8 @@ class WiFiDetailedInfo(Screen):
                 "right": self.pageDown,
             }
         )
+        self.scan_deferred = None
+        self.onClose.append(self.cancel_scan)
         self.setTitle(_("Detailed Info - {}").format(ifname))
         # Write initialization to the debug file
         self._write_debug(
@@ -163,9 +165,29 @@ class WiFiDetailedInfo(Screen):
             print("[WiFiDetailedInfo] Scanning for available networks...")
             info_text += _("🌐 AVAILABLE NETWORKS\n")
             info_text += "-" * 40 + "\n"
-            networks_info = self.get_available_networks()
-            info_text += networks_info
+            self["info_output"].setText(
+                info_text + _("Scanning for networks...\n"))
 
+            # The scan result arrives later, the page is shown meanwhile
+            self.cancel_scan()
+            self.scan_deferred = self.get_available_networks()
+            self.scan_deferred.addCallback(
+                lambda networks_info: self.show_info(info_text + networks_info))
+            self.scan_deferred.addErrback(
+                lambda failure: failure.trap(CancelledError))
+
+        except Exception as e:
+            self.show_error(e)
+
+    def cancel_scan(self):
+        if self.scan_deferred is not None:
+            deferred = self.scan_deferred
+            self.scan_deferred = None
+            deferred.cancel()
+
+    def show_info(self, info_text):
+        self.scan_deferred = None
+        try:
             # Also save complete information to the debug file
             self._write_debug(
                 "REFRESH COMPLETED SUCCESSFULLY - Interface: {}".format(self.ifname)
@@ -198,23 +220,26 @@ class WiFiDetailedInfo(Screen):
             self["info_output"].setText(info_text)
 
         except Exception as e:
-            error_msg = _(
-                "❌ Error getting detailed info:\n{}\n\n").format(str(e))
-            stack_trace = traceback.format_exc()
+            self.show_error(e)
 
-            self._write_debug(
-                "CRITICAL ERROR during refresh: {}".format(error_msg),
-                error=True
-            )
+    def show_error(self, e):
+        error_msg = _(
+            "❌ Error getting detailed info:\n{}\n\n").format(str(e))
+        stack_trace = traceback.format_exc()
 
-            self._write_debug(
-                "STACK TRACE: {}".format(stack_trace),
-                error=True
-            )
+        self._write_debug(
+            "CRITICAL ERROR during refresh: {}".format(error_msg),
+            error=True
+        )
 
-            print("[WiFiDetailedInfo] ERROR: {}".format(e))
-            print("Stack trace: {}".format(stack_trace))
-            self["info_output"].setText(error_msg)
+        self._write_debug(
+            "STACK TRACE: {}".format(stack_trace),
+            error=True
+        )
+
+        print("[WiFiDetailedInfo] ERROR: {}".format(e))
+        print("Stack trace: {}".format(stack_trace))
+        self["info_output"].setText(error_msg)
 
     def get_wireless_info(self):
         """Get wireless-specific information using tools.py"""
@@ -392,26 +417,24 @@ class WiFiDetailedInfo(Screen):
             tx_path = f'/sys/class/net/{self.ifname}/statistics/tx_bytes'
 
             self._write_debug(f"Reading RX bytes from: {rx_path}")
-            result = subprocess.run(['cat', rx_path],
-                                    capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                rx_bytes = int(result.stdout.strip())
+            try:
+                with open(rx_path) as f:
+                    rx_bytes = int(f.read().strip())
                 formatted_rx = self.format_bytes(rx_bytes)
                 info += _("⬇️  Received: {}\n").format(formatted_rx)
                 self._write_debug(f"RX bytes: {rx_bytes} ({formatted_rx})")
-            else:
-                self._write_debug(f"Failed to read RX bytes: {result.stderr}")
+            except (IOError, ValueError) as e:
+                self._write_debug(f"Failed to read RX bytes: {e}")
 
             self._write_debug(f"Reading TX bytes from: {tx_path}")
-            result = subprocess.run(['cat', tx_path],
-                                    capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                tx_bytes = int(result.stdout.strip())
+            try:
+                with open(tx_path) as f:
+                    tx_bytes = int(f.read().strip())
                 formatted_tx = self.format_bytes(tx_bytes)
                 info += _("⬆️  Transmitted: {}\n").format(formatted_tx)
                 self._write_debug(f"TX bytes: {tx_bytes} ({formatted_tx})")
-            else:
-                self._write_debug(f"Failed to read TX bytes: {result.stderr}")
+            except (IOError, ValueError) as e:
+                self._write_debug(f"Failed to read TX bytes: {e}")
 
         except Exception as e:
             error_msg = _("Statistics error: {}").format(str(e))
@@ -422,17 +445,28 @@ class WiFiDetailedInfo(Screen):
         return info
 
     def get_available_networks(self):
-        """Get available networks via scan using tools.py"""
-        self._write_debug("Starting network scan using tools.py")
-        info = ""
+        """Scan through the shared ScanService; Deferred firing with text"""
+        self._write_debug("Starting network scan using the scan service")
+        self._write_debug(
+            "Running scan for {}".format(
+                self.ifname))
 
-        try:
-            self._write_debug(
-                "Running scan_networks for {}".format(
-                    self.ifname))
+        deferred = getScanService().scan(self.ifname)
+        deferred.addCallbacks(self.format_available_networks,
+                              self.format_scan_error)
+        return deferred
 
-            networks = scan_networks(self.ifname, detailed=True)
+    def format_scan_error(self, failure):
+        if failure.check(CancelledError):
+            return failure
+        error_msg = _("Scan error: {}").format(failure.getErrorMessage())
+        self._write_debug(error_msg, error=True)
+        return _("{}\n").format(error_msg)
 
+    def format_available_networks(self, networks):
+        info = ""
+
+        try:
             self._write_debug(
                 "Scan completed, found {} networks".format(len(networks))
             )
@@ -442,7 +476,7 @@ class WiFiDetailedInfo(Screen):
                 self._write_debug("Found {} networks".format(len(networks)))
 
                 for i, net in enumerate(networks[:8]):
-                    essid = net.get('essid', _('Unknown'))
+                    essid = net.get('essid') or _('Unknown')
                     signal = net.get('signal', _('N/A'))
                     quality_percent = net.get('quality_percent', 0)
                     channel = net.get('channel', '?')
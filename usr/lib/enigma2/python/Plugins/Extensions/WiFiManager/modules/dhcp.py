@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from json import load
+
+from .saved_networks import writeJsonAtomic
+from .tools import find_executable, run_command
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+DHCP_STATS_FILE = "/etc/enigma2/wifimanager_dhcp.json"
+
+
+def _dhcpcd(ifname, requested=None):
+    args = ['dhcpcd']
+    if requested:
+        args.extend(['-r', requested])
+    return args + [ifname]
+
+
+def _udhcpc(ifname, requested=None):
+    args = ['udhcpc', '-i', ifname, '-t', '5', '-n']
+    if requested:
+        args.extend(['-r', requested])
+    return args
+
+
+def _dhclient(ifname, requested=None):
+    # dhclient asks for the address of its lease file by itself
+    return ['dhclient', ifname, '-v']
+
+
+# the order used until one of them succeeded on this box; the argv
+# builders take the address to request again (INIT-REBOOT) if known
+DHCP_CLIENTS = (
+    ('dhcpcd', _dhcpcd),
+    ('udhcpc', _udhcpc),
+    ('dhclient', _dhclient),
+)
+
+CLIENT_TIMEOUT = 15.0
+
+# upper bounds in seconds of the lease latency histogram; the last
+# bucket counts everything slower
+LATENCY_BUCKETS = (0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0)
+
+
+def _bucket(seconds):
+    for i, limit in enumerate(LATENCY_BUCKETS):
+        if seconds <= limit:
+            return i
+    return len(LATENCY_BUCKETS)
+
+
+def _newStats():
+    return {
+        'successes': 0,
+        'failures': 0,
+        'total_latency': 0.0,
+        'last_latency': None,
+        'histogram': [0] * (len(LATENCY_BUCKETS) + 1),
+    }
+
+
+class DhcpBackend(object):
+    """Picks and runs the DHCP client of this box
+
+    Which clients are installed is looked up once in the PATH index, so
+    missing ones are never forked. Every lease attempt is recorded per
+    client (successes, failures, latency histogram) in a small JSON file;
+    the client that succeeded fastest is tried first next time and
+    clients that never worked here come last.
+    """
+
+    def __init__(self, path=DHCP_STATS_FILE, clients=DHCP_CLIENTS):
+        self.path = path
+        self.clients = clients
+        self.lock = threading.Lock()
+        self.installed = None
+        self.stats = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = load(f)
+        except (IOError, ValueError):
+            data = {}
+        for name, values in data.get('clients', {}).items():
+            stats = _newStats()
+            stats.update(values)
+            if len(stats['histogram']) != len(LATENCY_BUCKETS) + 1:
+                stats['histogram'] = _newStats()['histogram']
+            self.stats[name] = stats
+
+    def save(self):
+        try:
+            writeJsonAtomic(self.path, {'clients': self.stats})
+        except (IOError, OSError) as e:
+            print("[DhcpBackend] Error saving {}: {}".format(self.path, e))
+
+    def probe(self):
+        """Names of the installed clients, in the default order"""
+        if self.installed is None:
+            self.installed = [name for name, make_args in self.clients
+                              if find_executable(name)]
+            print("[DhcpBackend] Installed clients: {}".format(
+                ', '.join(self.installed) or "none"))
+        return self.installed
+
+    def order(self):
+        """Installed clients, the one to try first first"""
+        default = self.probe()
+
+        def key(name):
+            stats = self.stats.get(name)
+            if stats is None or not stats['successes']:
+                # untried before failed ones, both after working ones
+                failed = stats is not None and stats['failures'] > 0
+                return (1 + failed, 0.0, default.index(name))
+            mean = stats['total_latency'] / stats['successes']
+            return (0, mean, default.index(name))
+        return sorted(default, key=key)
+
+    def record(self, name, success, latency):
+        with self.lock:
+            stats = self.stats.setdefault(name, _newStats())
+            if success:
+                stats['successes'] += 1
+                stats['total_latency'] += latency
+                stats['last_latency'] = latency
+                stats['histogram'][_bucket(latency)] += 1
+            else:
+                stats['failures'] += 1
+            self.save()
+
+    def obtainLease(self, ifname, timeout=CLIENT_TIMEOUT * 2, requested=None,
+                    on_attempt=None):
+        """Runs the clients in order() until one gets a lease within
+        timeout seconds; returns its name, None if none did. requested
+        is the previous address, asked for again; on_attempt is called
+        with (name, success, seconds) after every client"""
+        deadline = time.time() + timeout
+        commands = dict(self.clients)
+        for name in self.order():
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            print("[DhcpBackend] Trying DHCP client: " + name)
+            start = time.time()
+            try:
+                result = run_command(commands[name](ifname, requested),
+                                     timeout=min(CLIENT_TIMEOUT, remaining))
+                success = result.returncode == 0
+            except Exception as e:
+                print("[DhcpBackend] {}: {}".format(name, e))
+                success = False
+            latency = time.time() - start
+            self.record(name, success, latency)
+            if on_attempt is not None:
+                on_attempt(name, success, latency)
+            if success:
+                return name
+        return None
+
+    def stopClients(self):
+        """killall for the installed clients"""
+        for name in self.probe():
+            run_command(['killall', name], timeout=5)
+
+    def getStats(self):
+        """{client: stats} copy, with 'mean_latency' added"""
+        with self.lock:
+            result = {}
+            for name, stats in self.stats.items():
+                stats = dict(stats, histogram=list(stats['histogram']))
+                stats['mean_latency'] = (
+                    stats['total_latency'] / stats['successes']
+                    if stats['successes'] else None)
+                result[name] = stats
+            return result
+
+
+_backend = None
+
+
+def getDhcpBackend():
+    """Returns the plugin wide DhcpBackend"""
+    global _backend
+    if _backend is None:
+        _backend = DhcpBackend()
+    return _backend
+
+
+def formatHistogram(histogram):
+    """'<=0.5s:3 <=1s:5 ... >13s:0' for logs and the diagnostics screen"""
+    labels = ["<={:g}s".format(limit) for limit in LATENCY_BUCKETS]
+    labels.append(">{:g}s".format(LATENCY_BUCKETS[-1]))
+    return " ".join("{}:{}".format(label, count)
+                    for label, count in zip(labels, histogram))
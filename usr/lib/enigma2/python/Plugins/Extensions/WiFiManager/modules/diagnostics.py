@@ -7,9 +7,18 @@ from Screens.Screen import Screen
 from Components.ActionMap import ActionMap
 from Components.Button import Button
 from Components.ScrollLabel import ScrollLabel
-from os.path import basename, realpath
-
-from .tools import get_wifi_interfaces
+from os.path import basename, realpath, isdir
+
+from .tools import (
+    get_wifi_interfaces,
+    run_command,
+    command_output,
+    find_executable,
+    grep_lines,
+    STATUS_TTL
+)
+from .dhcp import getDhcpBackend, formatHistogram
+from .link_hints import connectTimeReport, formatConnectTimeReport
 from . import _
 
 """
@@ -206,8 +215,7 @@ class WiFiDiagnostics(Screen):
         """Get all network interfaces"""
         interfaces = []
         try:
-            result = subprocess.run(['ip', 'link', 'show'],
-                                    capture_output=True, text=True)
+            result = run_command(['ip', 'link', 'show'], ttl=STATUS_TTL)
             for line in result.stdout.split('\n'):
                 if ': ' in line and 'LOOPBACK' not in line:
                     parts = line.split(': ')
@@ -224,7 +232,7 @@ class WiFiDiagnostics(Screen):
         """Check loaded WiFi kernel modules"""
         results = []
         try:
-            output = subprocess.check_output(["lsmod"], text=True)
+            output = command_output(["lsmod"])
             wifi_modules = []
             for module in [
                 "rtl",
@@ -256,7 +264,7 @@ class WiFiDiagnostics(Screen):
         """Check for USB WiFi devices"""
         results = []
         try:
-            output = subprocess.check_output(["lsusb"], text=True)
+            output = command_output(["lsusb"])
             wifi_adapters = []
             for vendor in [
                 "Realtek",
@@ -289,11 +297,9 @@ class WiFiDiagnostics(Screen):
         available_cmds = []
         missing_cmds = []
         for cmd in essential_cmds:
-            try:
-                subprocess.run([cmd, "--help"], capture_output=True, timeout=2)
+            if find_executable(cmd):
                 available_cmds.append(cmd)
-            except Exception as e:
-                print(e)
+            else:
                 missing_cmds.append(cmd)
 
         if available_cmds:
@@ -305,6 +311,27 @@ class WiFiDiagnostics(Screen):
                 _("⚠️  Missing commands: {commands}\n").format(
                     commands=', '.join(missing_cmds)))
 
+        backend = getDhcpBackend()
+        results.append(_("DHCP clients: {clients}\n").format(
+            clients=', '.join(backend.order()) or _('None found')))
+        for name, stats in sorted(backend.getStats().items()):
+            if stats['mean_latency'] is None:
+                results.append(
+                    _("   - {name}: {failures} failed, no lease yet\n").format(
+                        name=name, failures=stats['failures']))
+                continue
+            results.append(
+                _("   - {name}: {successes} leases, {failures} failed, "
+                  "mean {mean:.1f}s\n     {histogram}\n").format(
+                    name=name, successes=stats['successes'],
+                    failures=stats['failures'], mean=stats['mean_latency'],
+                    histogram=formatHistogram(stats['histogram'])))
+
+        report = formatConnectTimeReport(connectTimeReport())
+        if report:
+            results.append(
+                _("Time to connect: {report}\n").format(report=report))
+
         return results
 
     def check_interface_status(self, ifname):
@@ -312,8 +339,8 @@ class WiFiDiagnostics(Screen):
         results = []
         try:
             # Check if interface exists and status
-            output = subprocess.check_output(
-                ["ip", "link", "show", ifname], text=True)
+            output = command_output(["ip", "link", "show", ifname],
+                                    ttl=STATUS_TTL)
             if "state UP" in output:
                 results.append(
                     _("✅ Interface {interface}: UP and active\n").format(
@@ -352,8 +379,7 @@ class WiFiDiagnostics(Screen):
         try:
             driver_path = f"/sys/class/net/{ifname}/device/driver"
             # Check if the folder exists
-            if subprocess.run(["test", "-d", driver_path],
-                              capture_output=True).returncode == 0:
+            if isdir(driver_path):
                 # Read the symbolic link to get the real driver name
                 driver_link = realpath(driver_path)
                 driver_name = basename(driver_link)
@@ -376,8 +402,8 @@ class WiFiDiagnostics(Screen):
         # Test ESSID con iwconfig
         try:
             print(f"[WiFiDiagnostics] Running iwconfig for {ifname}...")
-            output = subprocess.check_output(
-                ["iwconfig", ifname], text=True, timeout=5)
+            output = command_output(
+                ["iwconfig", ifname], timeout=5, ttl=STATUS_TTL)
             # Prime 200 caratteri
             print(f"[WiFiDiagnostics] iwconfig output: {output[:200]}...")
 
@@ -397,8 +423,8 @@ class WiFiDiagnostics(Screen):
 
         # Test signal quality con iwconfig
         try:
-            output = subprocess.check_output(
-                ["iwconfig", ifname], text=True, timeout=5)
+            output = command_output(
+                ["iwconfig", ifname], timeout=5, ttl=STATUS_TTL)
             quality_match = search(r'Link Quality=(\d+)/(\d+)', output)
             signal_match = search(r'Signal level=(-?\d+)', output)
 
@@ -418,8 +444,8 @@ class WiFiDiagnostics(Screen):
 
         # Test operation mode con iwconfig
         try:
-            output = subprocess.check_output(
-                ["iwconfig", ifname], text=True, timeout=5)
+            output = command_output(
+                ["iwconfig", ifname], timeout=5, ttl=STATUS_TTL)
             mode_match = search(r'Mode:(\w+)', output)
             if mode_match:
                 results.append(
@@ -438,16 +464,17 @@ class WiFiDiagnostics(Screen):
         results.append(_("\n   🔬 ADVANCED TESTS:\n"))
 
         advanced_tests = [
-            (_("Frequency/Channel"), f"iwconfig {ifname} | grep Frequency"),
-            (_("Bitrate"), f"iwconfig {ifname} | grep BitRate"),
-            (_("Encryption"), f"iwconfig {ifname} | grep Encryption"),
-            (_("Access Point"), f"iwconfig {ifname} | grep 'Access Point'"),
+            (_("Frequency/Channel"), "Frequency"),
+            (_("Bitrate"), "BitRate"),
+            (_("Encryption"), "Encryption"),
+            (_("Access Point"), "Access Point"),
         ]
 
-        for test_name, cmd in advanced_tests:
+        for test_name, pattern in advanced_tests:
             try:
-                output = subprocess.check_output(
-                    cmd, shell=True, text=True, timeout=5)
+                # only the iwconfig lines mentioning pattern
+                output = grep_lines(command_output(
+                    ["iwconfig", ifname], timeout=5, ttl=STATUS_TTL), pattern)
                 if output.strip():
                     results.append(
                         _("   ✅ {test}: {output}\n").format(
@@ -470,9 +497,8 @@ class WiFiDiagnostics(Screen):
 
         # Test scan capability con iwlist
         try:
-            output = subprocess.check_output(["iwlist", ifname, "scan"],
-                                             text=True, timeout=10,
-                                             stderr=subprocess.STDOUT)
+            output = command_output(["iwlist", ifname, "scan"], timeout=10,
+                                    merge_stderr=True)
             cell_count = output.count("Cell ")
             results.append(
                 _("   📡 Scan: Found {count} networks\n").format(
@@ -624,9 +650,10 @@ class WiFiDiagnostics(Screen):
         """Test compatibilità funzioni iwconfig"""
         try:
             from .iwconfig import getBitrate, getTXPower, getEncryption
-            bitrate_info = getBitrate(wireless)
-            txpower_info = getTXPower(wireless)
-            encryption_info = getEncryption(wireless)
+            snapshot = wireless.snapshot()
+            bitrate_info = getBitrate(snapshot)
+            txpower_info = getTXPower(snapshot)
+            encryption_info = getEncryption(snapshot)
 
             result = "iwconfig functions available - "
             if bitrate_info:
@@ -140,6 +140,12 @@ IW_RETRY_RELATIVE = 0x0004  # Value is not in seconds/ms/us
 IW_RETRY_SHORT = 0x0010  # Value is for short packets
 IW_RETRY_LONG = 0x0020  # Value is for long packets
 
+# Transmit Power flags available
+IW_TXPOW_TYPE = 0x00FF  # Type of value
+IW_TXPOW_DBM = 0x0000  # Value is in dBm
+IW_TXPOW_MWATT = 0x0001  # Value is in mW
+IW_TXPOW_RELATIVE = 0x0002  # Value is in arbitrary units
+
 # Modes of operation
 IW_MODE_AUTO = 0  # Let the driver decides
 IW_MODE_ADHOC = 1  # Single cell network
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+
+import os
+import fcntl
+import socket
+import struct
+import threading
+import time
+from collections import namedtuple
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+SYS_CLASS_NET = '/sys/class/net'
+SIOCGIFADDR = 0x8915
+PROC_NET_WIRELESS = '/proc/net/wireless'
+
+# without link events the list is rebuilt at most this often
+REGISTRY_TTL = 30.0
+
+# name: interface name, phy: 'phy0' (None for wext-only drivers),
+# driver: kernel module name, ifindex: from sysfs
+WifiInterface = namedtuple('WifiInterface', 'name ifindex phy driver')
+
+
+def _readlinkName(path):
+    try:
+        return os.path.basename(os.readlink(path))
+    except OSError:
+        return None
+
+
+def _readInt(path):
+    try:
+        with open(path) as f:
+            return int(f.read().strip())
+    except (IOError, ValueError):
+        return None
+
+
+def readSysfsInterfaces(root=SYS_CLASS_NET):
+    """Returns WifiInterface records for every wireless netdev in sysfs"""
+    found = []
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        return found
+    for name in names:
+        base = os.path.join(root, name)
+        phy = _readlinkName(os.path.join(base, 'phy80211'))
+        if phy is None and not os.path.isdir(os.path.join(base, 'wireless')):
+            continue
+        found.append(WifiInterface(
+            name=name,
+            ifindex=_readInt(os.path.join(base, 'ifindex')),
+            phy=phy,
+            driver=_readlinkName(os.path.join(base, 'device', 'driver'))))
+    return found
+
+
+def getDriverName(ifname, root=SYS_CLASS_NET):
+    """Returns the kernel driver bound to ifname, from its sysfs symlink"""
+    return _readlinkName(os.path.join(root, ifname, 'device', 'driver'))
+
+
+def readOperstate(ifname, root=SYS_CLASS_NET):
+    """Returns the RFC 2863 operstate of ifname ('up', 'down', 'dormant',
+    ...), None if it can't be read"""
+    try:
+        with open(os.path.join(root, ifname, 'operstate')) as f:
+            return f.read().strip()
+    except IOError:
+        return None
+
+
+def hasCarrier(ifname, root=SYS_CLASS_NET):
+    """True when the link of ifname is up (associated, for WiFi)"""
+    # reading carrier of a down interface fails with EINVAL
+    return _readInt(os.path.join(root, ifname, 'carrier')) == 1
+
+
+def getIpAddress(ifname):
+    """Returns the IPv4 address of ifname (SIOCGIFADDR), None if unset"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        result = fcntl.ioctl(sock.fileno(), SIOCGIFADDR,
+                             struct.pack('256s', ifname[:15].encode()))
+    except (IOError, OSError):
+        # EADDRNOTAVAIL: no address, ENODEV: no such interface
+        return None
+    finally:
+        sock.close()
+    return socket.inet_ntoa(result[20:24])
+
+
+def readProcWirelessStats(ifname, path=PROC_NET_WIRELESS):
+    """Returns (status, link, level, noise) of ifname from
+    /proc/net/wireless, or None if it is not listed there"""
+    prefix = ifname + ':'
+    try:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line.startswith(prefix):
+                    continue
+                # wlan0: 0000   70.  -40.  -256        0 ...
+                fields = line[len(prefix):].split()
+                return (int(fields[0], 16),
+                        float(fields[1].rstrip('.')),
+                        float(fields[2].rstrip('.')),
+                        float(fields[3].rstrip('.')))
+    except (IOError, ValueError, IndexError):
+        pass
+    return None
+
+
+def readProcWireless(path=PROC_NET_WIRELESS):
+    """Returns the interface names listed in /proc/net/wireless"""
+    names = []
+    try:
+        with open(path) as f:
+            lines = f.readlines()
+    except IOError:
+        return names
+    for line in lines[2:]:  # Skip header lines
+        name = line.split(':', 1)[0].strip()
+        if name:
+            names.append(name)
+    return names
+
+
+class InterfaceRegistry(object):
+    """Cached list of WiFi interfaces built from sysfs
+
+    Lookups return the cached list; it is rebuilt when it is older than
+    the TTL or when a link is added or removed (rtnetlink events, once a
+    lookup has happened on the reactor thread). Rebuilding only reads
+    sysfs and /proc, it never forks. When neither knows any wireless
+    interface, the old subprocess probe can be plugged in as fallback;
+    its result, empty or not, is kept until a link event invalidates
+    the cache, so a box without WiFi doesn't fork on every TTL expiry.
+    """
+
+    def __init__(self, ttl=REGISTRY_TTL, fallback=None):
+        self.ttl = ttl
+        self.fallback = fallback
+        self.interfaces = None
+        self.fallback_names = None
+        self.updated = 0.0
+        self.lock = threading.Lock()
+        self.event_token = None
+        self.stats = dict(lookups=0, refreshes=0, fallbacks=0, events=0)
+
+    def refresh(self):
+        """Rebuilds the cache now and returns the WifiInterface list"""
+        interfaces = readSysfsInterfaces()
+        known = set(iface.name for iface in interfaces)
+        # wext drivers without a sysfs 'wireless' entry still show up here
+        for name in readProcWireless():
+            if name not in known:
+                known.add(name)
+                interfaces.append(WifiInterface(name, None, None, None))
+        if not interfaces and self.fallback is not None:
+            with self.lock:
+                names = self.fallback_names
+            if names is None:
+                self.stats['fallbacks'] += 1
+                names = list(self.fallback())
+            interfaces = [WifiInterface(name, None, None, None)
+                          for name in names]
+        else:
+            names = None
+        with self.lock:
+            self.fallback_names = names
+            self.interfaces = interfaces
+            self.updated = time.time()
+            self.stats['refreshes'] += 1
+        return interfaces
+
+    def invalidate(self):
+        with self.lock:
+            self.interfaces = None
+            self.fallback_names = None
+
+    def getInterfaces(self):
+        """Returns the cached WifiInterface list, rebuilding if stale"""
+        self.stats['lookups'] += 1
+        self._watchLinks()
+        with self.lock:
+            interfaces = self.interfaces
+            fresh = time.time() - self.updated < self.ttl
+        if interfaces is None or not fresh:
+            interfaces = self.refresh()
+        return interfaces
+
+    def getNames(self):
+        return [iface.name for iface in self.getInterfaces()]
+
+    def get(self, name):
+        """Returns the WifiInterface called name, or None"""
+        for iface in self.getInterfaces():
+            if iface.name == name:
+                return iface
+        return None
+
+    def _watchLinks(self):
+        # reactor.addReader must run on the reactor thread
+        if self.event_token is not None or \
+                threading.current_thread() is not threading.main_thread():
+            return
+        from .wireless_events import (
+            getWirelessEvents,
+            EVENT_LINK_ADDED,
+            EVENT_LINK_REMOVED
+        )
+        # False marks a failed attempt, so it is not retried on every call
+        self.event_token = getWirelessEvents().subscribe(
+            self._linkChanged, (EVENT_LINK_ADDED, EVENT_LINK_REMOVED)) or False
+
+    def _linkChanged(self, event):
+        self.stats['events'] += 1
+        self.invalidate()
+
+
+_registry = None
+
+
+def getInterfaceRegistry():
+    """Returns the plugin wide InterfaceRegistry"""
+    global _registry
+    if _registry is None:
+        _registry = InterfaceRegistry()
+    return _registry
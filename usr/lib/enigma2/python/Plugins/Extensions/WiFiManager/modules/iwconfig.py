@@ -25,132 +25,109 @@ from sys import argv
 from .. import _, __version__
 
 try:
-    from .iwlibs import Wireless, Iwrange, getNICnames, getWNICnames
+    from .iwlibs import (
+        Wireless, Iwsnapshot, getRange, getNICnames, getWNICnames,
+        formatBitrate)
     from . import flags as wifi_flags
 except ImportError as e:
     print(f"Error importing pythonwifi: {e}")
 
 
+def _snapshot(wifi):
+    """ Return an Iwsnapshot for a Wireless object, or wifi itself if it
+        already is one, so the helpers below share a single ioctl pass.
+
+    """
+    if isinstance(wifi, Iwsnapshot):
+        return wifi
+    return wifi.snapshot()
+
+
 def getBitrate(wifi):
     """ Return formatted string with Bit Rate info. """
-    try:
-        bitrate = wifi.wireless_info.getBitrate()
-    except IOError as e:
-        errno, strerror = e.args
-
-        print(type(errno), errno)
-        print(type(strerror), strerror)
+    bitrate = _snapshot(wifi).bitrate
+    if bitrate is None:
         return None
+    if bitrate.fixed:
+        fixed = "="
     else:
-        if bitrate.fixed:
-            fixed = "="
-        else:
-            fixed = ":"
-        return "Bit Rate%c%s   " % (fixed, wifi.getBitrate())
+        fixed = ":"
+    return "Bit Rate%c%s   " % (fixed, formatBitrate(bitrate.value))
 
 
 def getTXPower(wifi):
     """ Return formatted string with TXPower info. """
-    try:
-        txpower = wifi.wireless_info.getTXPower()
-    except IOError as e:
-        errno, strerror = e.args
-
-        print(type(errno), errno)
-        print(type(strerror), strerror)
+    txpower = _snapshot(wifi).txpower
+    if txpower is None:
         return None
+    if txpower.fixed:
+        fixed = "="
     else:
-        if txpower.fixed:
-            fixed = "="
-        else:
-            fixed = ":"
-        return "Tx-Power%c%s   " % (fixed, wifi.getTXPower())
+        fixed = ":"
+    return "Tx-Power%c%i dBm   " % (fixed, txpower.value)
 
 
 def getSensitivity(wifi):
     """ Return formatted string with Sensitivity info. """
-    try:
-        sensitivity = wifi.wireless_info.getSensitivity()
-    except IOError as e:
-        errno, strerror = e.args
-
-        print(type(errno), errno)
-        print(type(strerror), strerror)
+    snapshot = _snapshot(wifi)
+    sensitivity = snapshot.sensitivity
+    if sensitivity is None:
         return None
+    if sensitivity.fixed:
+        fixed = "="
     else:
-        if sensitivity.fixed:
-            fixed = "="
-        else:
-            fixed = ":"
-        iwrange = Iwrange(wifi.ifname)
-        return "Sensitivity%c%d/%d  " % (
-            fixed, wifi.getSensitivity(), iwrange.sensitivity)
+        fixed = ":"
+    iwrange = getRange(snapshot.ifname)
+    return "Sensitivity%c%d/%d  " % (
+        fixed, sensitivity.value, iwrange.sensitivity)
 
 
 def getRetrylimit(wifi):
     """ Return formatted string with Retry info. """
-    try:
-        retry = wifi.wireless_info.getRetry()
-    except IOError as e:
-        errno, strerror = e.args
-
-        print(errno)
-        print(strerror)
+    retry = _snapshot(wifi).retry
+    if retry is None:
         return None
-    else:
-        modifier = ""
-        if (retry.flags & wifi_flags.IW_RETRY_MIN):
-            modifier = " min"
-        elif (retry.flags & wifi_flags.IW_RETRY_MAX):
-            modifier = " max"
-        elif (retry.flags & wifi_flags.IW_RETRY_SHORT):
-            modifier = " short"
-        elif (retry.flags & wifi_flags.IW_RETRY_LONG):
-            modifier = "  long"
-        type = " limit"
-        if (retry.flags & wifi_flags.IW_RETRY_LIFETIME):
-            type = " lifetime"
-        return "Retry%s%s:%s   " % (modifier, type, wifi.getRetrylimit())
+    modifier = ""
+    if (retry.flags & wifi_flags.IW_RETRY_MIN):
+        modifier = " min"
+    elif (retry.flags & wifi_flags.IW_RETRY_MAX):
+        modifier = " max"
+    elif (retry.flags & wifi_flags.IW_RETRY_SHORT):
+        modifier = " short"
+    elif (retry.flags & wifi_flags.IW_RETRY_LONG):
+        modifier = "  long"
+    type = " limit"
+    if (retry.flags & wifi_flags.IW_RETRY_LIFETIME):
+        type = " lifetime"
+    return "Retry%s%s:%s   " % (modifier, type, retry.value)
 
 
 def getRTS(wifi):
     """ Return formatted string with RTS info. """
-    try:
-        rts = wifi.wireless_info.getRTS()
-    except IOError as e:
-        errno, strerror = e.args
-
-        print(type(errno), errno)
-        print(type(strerror), strerror)
+    rts = _snapshot(wifi).rts
+    if rts is None:
         return None
+    if rts.disabled:
+        return "RTS thr:off   "
+    if rts.fixed:
+        fixed = "="
     else:
-        if rts.disabled:
-            return "RTS thr:off   "
-        if rts.fixed:
-            fixed = "="
-        else:
-            fixed = ":"
-        return "RTS thr%c%d B   " % (fixed, wifi.getRTS())
+        fixed = ":"
+    return "RTS thr%c%d B   " % (fixed, rts.value)
 
 
 def getFragmentation(wifi):
     """ Return formatted string with Fragmentation info. """
-    try:
-        frag = wifi.wireless_info.getFragmentation()
-    except IOError as e:
-        errno, strerror = e.args
-
-        print(type(strerror), strerror)
-        print(type(errno), errno)
+    frag = _snapshot(wifi).frag
+    if frag is None:
         return None
+    if frag.disabled:
+        return "Fragment thr:off"
+    if frag.fixed:
+        fixed = "="
     else:
-        if frag.disabled:
-            return "Fragment thr:off"
-        if frag.fixed:
-            fixed = "="
-        else:
-            fixed = ":"
-        return "Fragment thr%c%d B   " % (fixed, wifi.getFragmentation())
+        fixed = ":"
+    return "Fragment thr%c%d B   " % (fixed, frag.value)
 
 
 def getEncryption(wifi):
@@ -160,19 +137,22 @@ def getEncryption(wifi):
         to list all keys.
 
     """
-    enc = wifi.wireless_info.getEncryption()
+    snapshot = _snapshot(wifi)
+    flags = snapshot.enc_flags
+    if flags is None:
+        return None
 
-    if (enc.flags & wifi_flags.IW_ENCODE_DISABLED):
+    if (flags & wifi_flags.IW_ENCODE_DISABLED):
         key = "Encryption key:off"
     else:
-        key = "Encryption key:%s" % (wifi.getKey(), )
-    if ((enc.flags & wifi_flags.IW_ENCODE_INDEX) > 1):
-        index = " [%d]" % (enc.flags & wifi_flags.IW_ENCODE_INDEX, )
+        key = "Encryption key:%s" % (snapshot.key_text, )
+    if ((flags & wifi_flags.IW_ENCODE_INDEX) > 1):
+        index = " [%d]" % (flags & wifi_flags.IW_ENCODE_INDEX, )
     else:
         index = ""
-    if ((enc.flags & wifi_flags.IW_ENCODE_RESTRICTED) > 0):
+    if ((flags & wifi_flags.IW_ENCODE_RESTRICTED) > 0):
         mode = "   Security mode:restricted"
-    elif ((enc.flags & wifi_flags.IW_ENCODE_OPEN) > 0):
+    elif ((flags & wifi_flags.IW_ENCODE_OPEN) > 0):
         mode = "   Security mode:open"
     else:
         mode = ""
@@ -181,7 +161,9 @@ def getEncryption(wifi):
 
 def getPowerManagement(wifi):
     """ Return formatted string with Power Management info. """
-    power = wifi.wireless_info.getPower()
+    power = _snapshot(wifi).power
+    if power is None:
+        return None
     status = ""
     if (power.disabled):
         status = ":off"
@@ -220,84 +202,82 @@ def iwconfig(interface):
         print("%-8.16s  no wireless extensions." % (interface, ))
     else:
         wifi = Wireless(interface)
-        line = """%-8.16s  %s  """ % (interface, wifi.getWirelessName())
-        if (wifi.getEssid()):
+        # one pass over the driver for name, ESSID, mode, AP and stats
+        snapshot = wifi.snapshot()
+        line = """%-8.16s  %s  """ % (interface, snapshot.name)
+        if (snapshot.essid):
             line = line + \
-                _("""ESSID:"%s"  \n          """) % (wifi.getEssid(), )
+                _("""ESSID:"%s"  \n          """) % (snapshot.essid, )
         else:
             line = line + _("ESSID:off/any  \n          ")
 
         # Mode, Frequency, and Access Point
-        line = line + _("Mode:") + wifi.getMode()
-        try:
-            line = line + _("  Frequency:") + wifi.getFrequency()
-        except IOError as e:
-            error_number, error_string = e.args
-
-            # Some drivers do not return frequency info if not associated
-            pass
+        line = line + _("Mode:") + str(snapshot.mode_text)
+        # Some drivers do not return frequency info if not associated
+        if snapshot.frequency is not None:
+            line = line + _("  Frequency:") + str(snapshot.frequency_text)
 
-        if (wifi.wireless_info.getMode() == wifi_flags.IW_MODE_ADHOC):
+        if (snapshot.mode == wifi_flags.IW_MODE_ADHOC):
             ap_type = _("Cell")
         else:
             ap_type = _("Access Point")
-        ap_addr = wifi.getAPaddr()
-        if (ap_addr == "00:00:00:00:00:00"):
+        ap_addr = snapshot.ap_addr
+        if (ap_addr is None or ap_addr == "00:00:00:00:00:00"):
             ap_addr = _("Not-Associated")
         line = line + _("  ") + ap_type + _(": ") + ap_addr + _("   ")
         print(line)
 
         # Bit Rate, TXPower, and Sensitivity line
         line = "          "
-        bitrate = getBitrate(wifi)
+        bitrate = getBitrate(snapshot)
         if bitrate:
             line = line + bitrate
-        txpower = getTXPower(wifi)
+        txpower = getTXPower(snapshot)
         if txpower:
             line = line + txpower
-        sensitivity = getSensitivity(wifi)
+        sensitivity = getSensitivity(snapshot)
         if sensitivity:
             line = line + sensitivity
         print(line)
 
         # Retry, RTS, and Fragmentation line
         line = "          "
-        retry = getRetrylimit(wifi)
+        retry = getRetrylimit(snapshot)
         if retry:
             line = line + retry
-        rts = getRTS(wifi)
+        rts = getRTS(snapshot)
         if rts:
             line = line + rts
-        fragment = getFragmentation(wifi)
+        fragment = getFragmentation(snapshot)
         if fragment:
             line = line + fragment
         print(line)
 
         # Encryption line
-        line = "          "
-        line = line + getEncryption(wifi)
-        print(line)
+        encryption = getEncryption(snapshot)
+        if encryption:
+            print("          " + encryption)
 
         # Power Management line
-        line = "          "
-        line = line + getPowerManagement(wifi)
-        print(line)
-
-        try:
-            stat, qual, discard, missed_beacon = wifi.getStatistics()
-        except IOError as e:
-            error_number, error_string = e.args
-
-            print(type(error_number), error_number)
-            print(type(error_string), error_string)
-            # Some drivers do not return statistics info if not associated
-            pass
-        else:
+        power = getPowerManagement(snapshot)
+        if power:
+            print("          " + power)
+
+        # Some drivers do not return statistics info if not associated
+        if snapshot.quality is not None:
+            discard = snapshot.discard
+            missed_beacon = snapshot.missed_beacon
+            level = snapshot.level_dbm
+            if level is None:
+                level = snapshot.level
+            noise = snapshot.noise_dbm
+            if noise is None:
+                noise = snapshot.noise
             # Link Quality, Signal Level and Noise Level line
             line = "          "
-            line = line + _("Link Quality:%s/100  ") % (qual.quality, )
-            line = line + _("Signal level:%sdBm  ") % (qual.signallevel, )
-            line = line + _("Noise level:%sdBm") % (qual.noiselevel, )
+            line = line + _("Link Quality:%s/100  ") % (snapshot.quality, )
+            line = line + _("Signal level:%sdBm  ") % (level, )
+            line = line + _("Noise level:%sdBm") % (noise, )
             print(line)
             # Rx line
             line = "          "
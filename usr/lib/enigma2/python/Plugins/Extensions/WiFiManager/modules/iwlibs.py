@@ -26,13 +26,16 @@ from re import compile, I, M, S
 from os import strerror
 from typing import Tuple
 import ctypes
+from collections import namedtuple
 import struct
 import array
 import math
 import errno
 import fcntl
 import socket
+import threading
 import time
+import weakref
 
 
 from .flags import (
@@ -61,7 +64,13 @@ from .flags import (
     IW_FREQ_AUTO, IW_FREQ_FIXED,
 
     # Mode constants
-    modes,
+    modes, IW_MODE_ADHOC,
+
+    # Quality flags
+    IW_QUAL_DBM,
+
+    # Transmit power flags
+    IW_TXPOW_TYPE, IW_TXPOW_MWATT,
 
     # Altri flags usati
     SIOCGIWNWID, SIOCGIWMODUL
@@ -73,6 +82,22 @@ KILO = 10**3
 MEGA = 10**6
 GIGA = 10**9
 
+# precompiled layouts of the records found in a SIOCGIWSCAN stream
+IW_EV_HEADER = struct.Struct('HH')
+IW_FREQ = struct.Struct('ihbb')
+
+# precompiled layouts used by Wireless.snapshot()
+IW_PARAM = struct.Struct('ibbH')
+IW_POINT = struct.Struct('PHH')
+IW_STATS = struct.Struct('H4B6i')
+IW_MODE = struct.Struct('I')
+
+# scan events carry the pointer-sized padding of struct iw_event
+if ctypes.sizeof(ctypes.c_voidp) == 4:
+    IW_EV_PAYLOAD_OFFSET = IW_EV_LCP_PK_LEN
+else:
+    IW_EV_PAYLOAD_OFFSET = IW_EV_LCP_PK_LEN + 4
+
 
 def getNICnames():
     """ Extract network device names from /proc/net/dev.
@@ -160,6 +185,215 @@ def makedict(**kwargs):
     return kwargs
 
 
+def levelToDbm(level, updated):
+    """ Returns an iw_quality signal or noise level in dBm, or None when
+        the driver does not report dBm (IW_QUAL_DBM unset in updated).
+
+    """
+    if not (updated & IW_QUAL_DBM):
+        return None
+    # as in iwlib: 8 bit values above 63 are negative dBm
+    if level >= 64:
+        return level - 0x100
+    return level
+
+
+def formatBitrate(raw_bitrate):
+    """ Returns formatted bitrate.
+
+        'raw_bitrate' -- long -- The unformatted bitrate as a long integer.
+
+    """
+    if raw_bitrate >= GIGA:
+        return "%g Gb/s" % (float(raw_bitrate) / GIGA)
+    if raw_bitrate >= MEGA:
+        return "%g Mb/s" % (float(raw_bitrate) / MEGA)
+    if raw_bitrate >= KILO:
+        return "%g kb/s" % (float(raw_bitrate) / KILO)
+
+
+def formatFrequency(raw_frequency, ifname=None):
+    """ Returns formatted frequency.
+
+        'raw_frequency' -- long -- The unformatted frequency as a long
+            integer. Small values are channel numbers, which are looked
+            up in the cached range of ifname when it is given.
+
+    """
+    raw_frequency = float(raw_frequency)
+    if raw_frequency >= GIGA:
+        return "%0.3f GHz" % (raw_frequency / GIGA)
+    if raw_frequency >= MEGA:
+        return "%0.3f MHZ" % (raw_frequency / MEGA)
+    if raw_frequency >= KILO:
+        return "%0.3f kHz" % (raw_frequency / KILO)
+    if raw_frequency > 0 and ifname is not None:
+        # This is probably a channel number
+        raw_frequency = int(raw_frequency)
+        try:
+            return formatFrequency(
+                getRange(ifname).frequencies[raw_frequency - 1])
+        except IndexError:
+            # probably auto (i.e. -1 (a.k.a. 255))
+            pass
+    return raw_frequency
+
+
+class IoctlContext(object):
+    """ Per-thread ioctl state shared by every iwlibs object.
+
+        Holds the ifreq and result buffers, keyed by interface and size,
+        so repeated requests reuse the same memory instead of allocating
+        new arrays each time. The datagram socket is the process wide
+        one of getIoctlSocket().
+
+    """
+
+    def __init__(self):
+        self.sockfd = getIoctlSocket()
+        self.ifreqs = {}
+        self.buffers = {}
+        self.stats = makedict(ioctls=0, allocations=0, reuses=0)
+
+    def fileno(self):
+        return self.sockfd.fileno()
+
+    def get_ifreq(self, ifname, data=None):
+        """ Returns the pooled ifreq array for ifname, filled with data.
+
+            The first IFNAMSIZE bytes hold the interface name, the rest
+            is the request payload (16 zero bytes if data is None).
+
+        """
+        size = IFNAMSIZE + (16 if data is None else len(data))
+        key = (ifname, size)
+        entry = self.ifreqs.get(key)
+        if entry is None:
+            if isinstance(ifname, str):
+                name = ifname.encode('utf-8')
+            else:
+                name = ifname
+            ifreq = array.array('B', name[:IFNAMSIZE].ljust(size, b'\0'))
+            entry = self.ifreqs[key] = (
+                ifreq, memoryview(ifreq), bytes(size - IFNAMSIZE))
+            self.stats['allocations'] += 1
+        else:
+            self.stats['reuses'] += 1
+        ifreq, view, zeros = entry
+        view[IFNAMSIZE:] = zeros if data is None else data
+        return ifreq
+
+    def get_buffer(self, buffsize):
+        """ Returns a zeroed pooled buffer of buffsize bytes and the packed
+            (pointer, length) pair the kernel expects for it.
+
+        """
+        entry = self.buffers.get(buffsize)
+        if entry is None:
+            zeros = bytes(buffsize)
+            buff = array.array('B', zeros)
+            caddr_t, length = buff.buffer_info()
+            entry = self.buffers[buffsize] = (
+                buff, struct.pack('Pi', caddr_t, length),
+                memoryview(buff), zeros)
+            self.stats['allocations'] += 1
+        else:
+            entry[2][:] = entry[3]
+            self.stats['reuses'] += 1
+        return entry[0], entry[1]
+
+    def ioctl(self, request, args):
+        self.stats['ioctls'] += 1
+        return fcntl.ioctl(self.sockfd.fileno(), request, args)
+
+
+_ioctl_local = threading.local()
+_ioctl_contexts = weakref.WeakSet()
+_ioctl_lock = threading.Lock()
+_ioctl_socket = None
+_ioctl_sockets = 0
+
+
+def getIoctlSocket():
+    """ Returns the datagram socket every ioctl goes through, opened once.
+
+        An ioctl on a socket is a single syscall that doesn't touch the
+        socket's own state, so all threads can share it.
+
+    """
+    global _ioctl_socket, _ioctl_sockets
+    with _ioctl_lock:
+        if _ioctl_socket is None:
+            _ioctl_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            _ioctl_sockets += 1
+        return _ioctl_socket
+
+
+def getIoctlContext():
+    """ Returns the IoctlContext of the calling thread, creating it once.
+
+        Scans and status reads run both on the reactor thread and in
+        deferToThread workers, so each thread gets its own buffers and
+        no locking is needed on the hot path. The context goes away with
+        its thread.
+
+    """
+    context = getattr(_ioctl_local, 'context', None)
+    if context is None:
+        context = _ioctl_local.context = IoctlContext()
+        with _ioctl_lock:
+            _ioctl_contexts.add(context)
+    return context
+
+
+def getIoctlStats():
+    """ Returns the ioctl counters summed over the live threads. """
+    totals = makedict(ioctls=0, allocations=0, reuses=0)
+    with _ioctl_lock:
+        totals['sockets'] = _ioctl_sockets
+        for context in list(_ioctl_contexts):
+            for key in ('ioctls', 'allocations', 'reuses'):
+                totals[key] += context.stats[key]
+    return totals
+
+
+def benchmark_status_read(ifname, rounds=100):
+    """ Times an iwconfig-style multi-ioctl status read.
+
+        Returns the average time per read in ms together with the
+        number of ioctls, sockets and buffer allocations per read, so
+        the effect of the shared IoctlContext can be checked on a box.
+
+    """
+    def read_status(wifi):
+        info = wifi.wireless_info
+        for getter in (info.getWirelessName, info.getEssid, info.getMode,
+                       info.getFrequency, info.getAPaddr, info.getBitrate,
+                       info.getTXPower, info.getSensitivity, info.getRetry,
+                       info.getRTS, info.getFragmentation,
+                       info.getEncryption, info.getPower):
+            try:
+                getter()
+            except IOError:
+                pass
+        try:
+            Iwstats(ifname)
+        except IOError:
+            pass
+
+    read_status(Wireless(ifname))
+    before = getIoctlStats()
+    start = time.time()
+    for i in range(rounds):
+        read_status(Wireless(ifname))
+    elapsed = time.time() - start
+    after = getIoctlStats()
+    result = makedict(ms_per_read=elapsed * 1000.0 / rounds)
+    for key in before:
+        result[key + '_per_read'] = float(after[key] - before[key]) / rounds
+    return result
+
+
 def hex2int(hexstring):
     """ Convert hex string to integer. """
     return int(hexstring, 16)
@@ -173,7 +407,7 @@ class Wireless(object):
     """
 
     def __init__(self, ifname):
-        self.sockfd = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sockfd = getIoctlContext().sockfd
         self.ifname = ifname
         self.iwstruct = Iwstruct()
         self.wireless_info = WirelessInfo(self.ifname)
@@ -231,12 +465,7 @@ class Wireless(object):
             'raw_bitrate' -- long -- The unformatted bitrate as a long integer.
 
         """
-        if raw_bitrate >= GIGA:
-            return "%g Gb/s" % (float(raw_bitrate) / GIGA)
-        if raw_bitrate >= MEGA:
-            return "%g Mb/s" % (float(raw_bitrate) / MEGA)
-        if raw_bitrate >= KILO:
-            return "%g kb/s" % (float(raw_bitrate) / KILO)
+        return formatBitrate(raw_bitrate)
 
     def getBitrate(self):
         """ Returns the device's currently set bit rate in Mbit.
@@ -271,22 +500,7 @@ class Wireless(object):
             'raw_frequency' -- long -- The unformatted frequency as a long
                 integer.
         """
-        raw_frequency = float(raw_frequency)
-        if raw_frequency >= GIGA:
-            return "%0.3f GHz" % (raw_frequency / GIGA)
-        if raw_frequency >= MEGA:
-            return "%0.3f MHZ" % (raw_frequency / MEGA)
-        if raw_frequency >= KILO:
-            return "%0.3f kHz" % (raw_frequency / KILO)
-        if raw_frequency > 0:
-            # This is probably a channel number
-            raw_frequency = int(raw_frequency)
-            try:
-                return self.getChannelInfo()[1][raw_frequency - 1]
-            except IndexError:
-                # probably auto (i.e. -1 (a.k.a. 255))
-                pass
-        return raw_frequency
+        return formatFrequency(raw_frequency, self.ifname)
 
     def getChannelInfo(self):
         """ Returns the number of channels and available frequencies for
@@ -298,7 +512,7 @@ class Wireless(object):
             True
 
         """
-        iwrange = Iwrange(self.ifname)
+        iwrange = getRange(self.ifname)
         frequencies = []
         for freq in iwrange.frequencies:
             frequencies.append(self._formatFrequency(freq))
@@ -485,7 +699,7 @@ class Wireless(object):
             [(1, '1234-5678-91'), (2, None), (3, 'ABCD-EFAB-CD'), (4, None)]
 
         """
-        iwrange = Iwrange(self.ifname)
+        iwrange = getRange(self.ifname)
         keys = []
         if iwrange.max_encoding_tokens > 0:
             for i in range(1, iwrange.max_encoding_tokens + 1):
@@ -613,7 +827,7 @@ class Wireless(object):
             #'off'
 
         """
-        iwrange = Iwrange(self.ifname)
+        iwrange = getRange(self.ifname)
         iwparam = self.wireless_info.getPower()
         return (iwrange.pm_capa,
                 (iwrange.pmp_flags, iwrange.min_pmp, iwrange.max_pmp),
@@ -631,7 +845,7 @@ class Wireless(object):
             quality: 38 signal: 13 noise: 0
 
         """
-        iwrange = Iwrange(self.ifname)
+        iwrange = getRange(self.ifname)
         if iwrange.errorflag:
             return (iwrange.errorflag, iwrange.error)
         return iwrange.max_qual
@@ -646,7 +860,7 @@ class Wireless(object):
             quality: 38 signal: 13 noise: 0
 
         """
-        iwrange = Iwrange(self.ifname)
+        iwrange = getRange(self.ifname)
         if iwrange.errorflag:
             return (iwrange.errorflag, iwrange.error)
         return iwrange.avg_qual
@@ -741,6 +955,94 @@ class Wireless(object):
         return [iwstats.status, iwstats.qual, iwstats.discard,
                 iwstats.missed_beacon]
 
+    def snapshot(self):
+        """ Reads the whole link state in one pass and returns an
+            Iwsnapshot.
+
+            Every ioctl reuses the pooled ifreq and result buffers of the
+            thread's IoctlContext. A request the driver rejects (e.g.
+            EOPNOTSUPP while not associated) leaves its field as None and
+            records the errno in Iwsnapshot.errors instead of raising.
+
+        """
+        context = self.iwstruct.context
+        ifname = self.ifname
+        errors = {}
+        fields = makedict(ifname=ifname, errors=errors)
+
+        def request(field, ioctl, data=None):
+            try:
+                return self.iwstruct.iw_get_ext(ifname, ioctl, data)[1]
+            except IOError as e:
+                errors[field] = e.args[0]
+                return None
+
+        def point(field, ioctl, buffsize, flags=0):
+            buff, datastr = context.get_buffer(buffsize)
+            caddr_t, length = buff.buffer_info()
+            result = request(field, ioctl,
+                             IW_POINT.pack(caddr_t, length, flags))
+            if result is None:
+                return None, 0, 0
+            pointer, length, flags = IW_POINT.unpack_from(result)
+            return buff, length, flags
+
+        result = request('name', SIOCGIWNAME)
+        if result is not None:
+            fields['name'] = bytes(result).split(b'\0', 1)[0].decode(
+                'unicode-escape')
+
+        buff, length, flags = point('essid', SIOCGIWESSID,
+                                    IW_ESSID_MAX_SIZE + 1)
+        if buff is not None:
+            fields['essid'] = bytes(buff).split(b'\0', 1)[0].decode(
+                'unicode-escape')
+
+        result = request('mode', SIOCGIWMODE)
+        if result is not None:
+            fields['mode'] = IW_MODE.unpack_from(result)[0]
+
+        result = request('frequency', SIOCGIWFREQ)
+        if result is not None:
+            m, e, index, freq_flags = IW_FREQ.unpack_from(result)
+            fields['frequency'] = m if e == 0 else m * 10**e
+
+        result = request('ap_addr', SIOCGIWAP)
+        if result is not None:
+            fields['ap_addr'] = "%02X:%02X:%02X:%02X:%02X:%02X" % tuple(
+                result[2:8])
+
+        for field, ioctl in (('bitrate', SIOCGIWRATE),
+                             ('txpower', SIOCGIWTXPOW),
+                             ('sensitivity', SIOCGIWSENS),
+                             ('retry', SIOCGIWRETRY),
+                             ('rts', SIOCGIWRTS),
+                             ('frag', SIOCGIWFRAG),
+                             ('power', SIOCGIWPOWER)):
+            result = request(field, ioctl)
+            if result is not None:
+                fields[field] = IwparamValue(*IW_PARAM.unpack_from(result))
+
+        buff, length, flags = point('encryption', SIOCGIWENCODE,
+                                    IW_ENCODING_TOKEN_MAX)
+        if buff is not None:
+            fields['enc_flags'] = flags
+            fields['enc_key'] = tuple(buff[:length])
+
+        buff, length, flags = point('stats', SIOCGIWSTATS,
+                                    IW_STATS.size, 1)
+        if buff is not None:
+            stats = IW_STATS.unpack_from(buff)
+            fields['status'] = stats[0]
+            (fields['quality'], fields['level'], fields['noise'],
+             fields['qual_updated']) = stats[1:5]
+            fields['discard'] = makedict(
+                nwid=stats[5], code=stats[6], fragment=stats[7],
+                retries=stats[8], misc=stats[9])
+            fields['missed_beacon'] = stats[10]
+
+        return Iwsnapshot(**fields)
+
     def scan(self):
         """ Returns Iwscanresult objects, after a successful scan. """
         return Iwscan(self.ifname)
@@ -752,6 +1054,138 @@ class Wireless(object):
         return (status, result)
 
 
+IwparamValue = namedtuple('IwparamValue', 'value fixed disabled flags')
+
+
+class Iwsnapshot(object):
+    """ Immutable record of one Wireless.snapshot() pass.
+
+        Fields hold the raw numbers returned by the kernel (None when the
+        driver refused that request, see errors); the *_text properties
+        format them only when asked.
+
+    """
+
+    __slots__ = (
+        'ifname', 'name', 'essid', 'mode', 'frequency', 'ap_addr',
+        'bitrate', 'txpower', 'sensitivity', 'retry', 'rts', 'frag',
+        'power', 'enc_flags', 'enc_key', 'status', 'quality', 'level',
+        'noise', 'qual_updated', 'discard', 'missed_beacon', 'errors',
+        'timestamp'
+    )
+
+    def __init__(self, **fields):
+        fields.setdefault('timestamp', time.time())
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Iwsnapshot is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("Iwsnapshot is read-only")
+
+    def __repr__(self):
+        return "Iwsnapshot(%s, essid=%r, ap=%s, level=%s, errors=%r)" % (
+            self.ifname, self.essid, self.ap_addr, self.level, self.errors)
+
+    def isAssociated(self):
+        """ Returns True if an access point address is set. """
+        return self.ap_addr not in (None, "00:00:00:00:00:00",
+                                    "FF:FF:FF:FF:FF:FF", "44:44:44:44:44:44")
+
+    @property
+    def mode_text(self):
+        if self.mode is None:
+            return None
+        try:
+            return modes[self.mode]
+        except IndexError:
+            return modes[-1]
+
+    @property
+    def ap_text(self):
+        if self.ap_addr is None or self.ap_addr == "00:00:00:00:00:00":
+            return "Not-Associated"
+        return self.ap_addr
+
+    @property
+    def ap_type(self):
+        if self.mode == IW_MODE_ADHOC:
+            return "Cell"
+        return "Access Point"
+
+    @property
+    def frequency_text(self):
+        if self.frequency is None:
+            return None
+        return formatFrequency(self.frequency, self.ifname)
+
+    @property
+    def bitrate_text(self):
+        if self.bitrate is None:
+            return None
+        return formatBitrate(self.bitrate.value)
+
+    @property
+    def txpower_dbm(self):
+        """ Returns the transmit power in dBm, converting mW readings. """
+        if self.txpower is None or self.txpower.disabled:
+            return None
+        if (self.txpower.flags & IW_TXPOW_TYPE) == IW_TXPOW_MWATT:
+            if self.txpower.value <= 0:
+                return 0
+            return int(math.ceil(10.0 * math.log10(self.txpower.value)))
+        return self.txpower.value
+
+    @property
+    def txpower_text(self):
+        dbm = self.txpower_dbm
+        if dbm is None:
+            return None
+        return "%i dBm" % dbm
+
+    @property
+    def key_text(self):
+        """ Returns the current key as 'XXXX-XXXX-..', or 'off'. """
+        if not self.enc_key or sum(self.enc_key) == 0:
+            return "off"
+        key = "%.2X" % self.enc_key[0]
+        for i in range(1, len(self.enc_key)):
+            if (i & 0x1) == 0:
+                key = key + '-'
+            key = key + "%.2X" % self.enc_key[i]
+        return key
+
+    @property
+    def level_dbm(self):
+        """ Returns the signal level in dBm, or None if not reported. """
+        return self._toDbm(self.level)
+
+    @property
+    def noise_dbm(self):
+        """ Returns the noise level in dBm, or None if not reported. """
+        return self._toDbm(self.noise)
+
+    def _toDbm(self, value):
+        if value is None:
+            return None
+        return levelToDbm(value, self.qual_updated)
+
+    @property
+    def quality_percent(self):
+        """ Returns link quality relative to the cached range maximum. """
+        if self.quality is None:
+            return None
+        try:
+            max_quality = getRange(self.ifname).max_qual.quality
+        except IOError:
+            max_quality = 0
+        if max_quality <= 0:
+            max_quality = 100
+        return min(100, int(self.quality * 100 / max_quality))
+
+
 class WirelessConfig(object):
     """ Low level access to wireless information on a device.  This class
         contains only those things absolutely needed to configure a card.
@@ -763,7 +1197,7 @@ class WirelessConfig(object):
     """
 
     def __init__(self, ifname):
-        self.sockfd = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sockfd = getIoctlContext().sockfd
         self.ifname = ifname
         self.iwstruct = Iwstruct()
         # self.nwid = Iwparam
@@ -893,7 +1327,7 @@ class WirelessInfo(WirelessConfig):
     """
 
     def __init__(self, ifname):
-        self.sockfd = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sockfd = getIoctlContext().sockfd
         self.ifname = ifname
         self.iwstruct = Iwstruct()
 
@@ -977,7 +1411,7 @@ class WirelessInfo(WirelessConfig):
             The bit rates in the list are long integer type.
 
         """
-        iwrange = Iwrange(self.ifname)
+        iwrange = getRange(self.ifname)
         return (iwrange.num_bitrates, iwrange.bitrates)
 
     def getRTS(self):
@@ -1045,7 +1479,8 @@ class Iwstruct(object):
 
     def __init__(self):
         self.idx = 0
-        self.sockfd = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.context = getIoctlContext()
+        self.sockfd = self.context.sockfd
 
     def parse_data(self, fmt, data):
         """ Unpacks raw C data. """
@@ -1067,18 +1502,14 @@ class Iwstruct(object):
         return struct.pack(fmt, *args)
 
     def pack_wrq(self, buffsize):
-        """ Packs wireless request data for sending it to the kernel. """
-        try:
-            buff = array.array('B', b'\0' * buffsize)
-            caddr_t, length = buff.buffer_info()
-            print(
-                f"[DEBUG] pack_wrq: caddr_t={caddr_t}, length={length}")  # DEBUG
-            # Due argomenti separati!
-            datastr = struct.pack('Pi', caddr_t, length)
-            return buff, datastr
-        except Exception as e:
-            print(f"[DEBUG] pack_wrq ERROR: {e}")  # DEBUG
-            raise
+        """ Packs wireless request data for sending it to the kernel.
+
+            The buffer comes from the thread's IoctlContext and is reused
+            by the next request of the same size, so read it before
+            issuing another one.
+
+        """
+        return self.context.get_buffer(buffsize)
 
     def pack_test(self, string, buffsize):
         buffsize = buffsize - len(string)
@@ -1093,30 +1524,15 @@ class Iwstruct(object):
         return struct.unpack(fmt, packed_data)
 
     def _fcntl(self, request, args):
-        return fcntl.ioctl(self.sockfd.fileno(), request, args)
+        return self.context.ioctl(request, args)
 
     def iw_get_ext(self, ifname, request, data=None):
         """ Read information from ifname. """
-        print(
-            f"[DEBUG] iw_get_ext called: ifname={ifname}, request={request}, data={data}")  # DEBUG
-
-        buff = IFNAMSIZE - len(ifname)
-        ifreq = array.array('B', ifname.encode('utf-8') + b'\0' * buff)
-
-        # put some additional data behind the interface name
-        if data is not None:
-            print(f"[DEBUG] data type: {type(data)}, data: {data}")  # DEBUG
-            ifreq.extend(data)
-        else:
-            # extend to 32 bytes for ioctl payload
-            ifreq.extend(b'\0' * 16)
-
-        try:
-            result = self._fcntl(request, ifreq)
-            return (result, ifreq[IFNAMSIZE:])
-        except Exception as e:
-            print(f"[DEBUG] iw_get_ext ERROR: {e}")  # DEBUG
-            raise
+        # put some additional data behind the interface name,
+        # or extend to 32 bytes for ioctl payload
+        ifreq = self.context.get_ifreq(ifname, data)
+        result = self._fcntl(request, ifreq)
+        return (result, ifreq[IFNAMSIZE:])
 
     def iw_set_ext(self, ifname, operation, data=None):
         """ Set options on ifname. """
@@ -1176,9 +1592,7 @@ class Iwfreq(object):
 
     def parse(self, data):
         """ Unpacks iw_freq. """
-        size = struct.calcsize(self.fmt)
-        self.m, self.e, self.index, self.flags = struct.unpack(
-            self.fmt, data[:size])
+        self.m, self.e, self.index, self.flags = IW_FREQ.unpack_from(data)
 
     def getFrequency(self):
         """ Returns frequency or channel, depending on the driver. """
@@ -1468,6 +1882,148 @@ class Iwrange(object):
         self.bitrate_capa = result[229]
 
 
+_range_cache = {}
+_range_lock = threading.Lock()
+
+
+def _getIfindex(ifname):
+    """ Returns the kernel ifindex of ifname, or None if it is gone. """
+    if isinstance(ifname, bytes):
+        ifname = ifname.decode('utf-8')
+    try:
+        return socket.if_nametoindex(ifname)
+    except (OSError, ValueError):
+        return None
+
+
+def getRange(ifname, refresh=False):
+    """ Returns the Iwrange of ifname from the per-interface cache.
+
+        Range data only changes when the driver is reloaded or the
+        interface is re-created, which also gives it a new ifindex, so
+        an entry is reused for as long as the ifindex is unchanged.
+        Callers that take the interface down/up should call
+        invalidateRange(); refresh=True forces a new SIOCGIWRANGE.
+
+    """
+    ifindex = _getIfindex(ifname)
+    if not refresh:
+        with _range_lock:
+            entry = _range_cache.get(ifname)
+        if entry is not None and entry[0] == ifindex:
+            return entry[1]
+    iwrange = Iwrange(ifname)
+    with _range_lock:
+        _range_cache[ifname] = (ifindex, iwrange)
+    return iwrange
+
+
+def invalidateRange(ifname=None):
+    """ Drops the cached Iwrange of ifname, or of every interface. """
+    with _range_lock:
+        if ifname is None:
+            _range_cache.clear()
+        else:
+            _range_cache.pop(ifname, None)
+
+
+# iw_point.length is 16 bit, no driver can fill more than this
+IW_SCAN_MAX_BUFFER = 0xffff
+# room left above the last result, and how fast a larger buffer decays
+SCAN_BUFFER_HEADROOM = 1.25
+SCAN_BUFFER_DECAY = 8
+
+_scan_buffers = {}
+_scan_buffer_lock = threading.Lock()
+
+
+def _newScanBufferStats():
+    return makedict(learned=float(IW_SCAN_MAX_DATA), buffer=IW_SCAN_MAX_DATA,
+                    scans=0, ioctls=0, retries=0, busy=0, single=0,
+                    last_length=0)
+
+
+def _scanBufferSize(learned):
+    """ Rounds a learned size up to a power of two, so only a handful of
+        pooled buffers ever exist per thread.
+
+    """
+    size = IW_SCAN_MAX_DATA
+    while size < learned and size < IW_SCAN_MAX_BUFFER:
+        size *= 2
+    return min(size, IW_SCAN_MAX_BUFFER)
+
+
+def getScanBufferSize(ifname):
+    """ Returns the SIOCGIWSCAN buffer size learned for ifname. """
+    with _scan_buffer_lock:
+        entry = _scan_buffers.get(ifname)
+        return entry['buffer'] if entry is not None else IW_SCAN_MAX_DATA
+
+
+def _recordScanRead(ifname, ioctls, reslen, busy=False):
+    """ Updates the counters of ifname after one readScan() attempt and,
+        when results came back, the learned buffer size: it grows at once
+        to the result length plus headroom and shrinks by 1/8 of the gap
+        per scan, so one quiet scan does not undo a busy environment.
+
+    """
+    with _scan_buffer_lock:
+        entry = _scan_buffers.get(ifname)
+        if entry is None:
+            entry = _scan_buffers[ifname] = _newScanBufferStats()
+        entry['ioctls'] += ioctls
+        entry['retries'] += ioctls - 1
+        if busy:
+            entry['busy'] += 1
+            return
+        if reslen is None:
+            return
+        entry['scans'] += 1
+        if ioctls == 1:
+            entry['single'] += 1
+        entry['last_length'] = reslen
+        wanted = max(reslen * SCAN_BUFFER_HEADROOM, IW_SCAN_MAX_DATA)
+        learned = entry['learned']
+        if wanted > learned:
+            learned = wanted
+        else:
+            learned -= (learned - wanted) / SCAN_BUFFER_DECAY
+        entry['learned'] = learned
+        entry['buffer'] = _scanBufferSize(learned)
+
+
+def getScanBufferStats(ifname=None):
+    """ Returns the scan buffer counters of ifname, or of all interfaces
+        as {ifname: counters}.
+
+        scans      -- reads that returned results
+        ioctls     -- SIOCGIWSCAN calls, including EAGAIN polls
+        retries    -- extra calls within one read caused by E2BIG
+        busy       -- polls answered with EAGAIN
+        single     -- scans that needed exactly one ioctl
+        buffer     -- buffer size the next scan starts with
+        last_length -- length of the last result stream
+
+    """
+    with _scan_buffer_lock:
+        if ifname is not None:
+            return dict(_scan_buffers.get(ifname) or _newScanBufferStats())
+        return dict((name, dict(entry))
+                    for name, entry in _scan_buffers.items())
+
+
+def triggerScan(ifname):
+    """ Asks the driver of ifname to start a scan (SIOCSIWSCAN).
+
+        Returns at once; the results are read with Iwscan.readScan().
+
+    """
+    iwstruct = Iwstruct()
+    datastr = iwstruct.pack("Pii", 0, 0, 0)
+    return iwstruct.iw_set_ext(ifname, SIOCSIWSCAN, datastr)
+
+
 class Iwscan(object):
     """ Class to handle AP scanning. """
 
@@ -1480,20 +2036,15 @@ class Iwscan(object):
 
         """
         self.ifname = ifname
-        self.range = Iwrange(ifname)
+        self.range = getRange(ifname)
         self.stream = None
         self.aplist = None
         self.index = -1
+        # E2BIG retries of the last readScan(), see getScanBufferStats()
+        self.retries = 0
 
         if fullscan:
-            # Triggers the scan
-            iwstruct = Iwstruct()
-            datastr = iwstruct.pack("Pii", 0, 0, 0)
-            status, result = iwstruct.iw_set_ext(
-                self.ifname,
-                SIOCSIWSCAN,
-                datastr
-            )
+            triggerScan(self.ifname)
             self.getScan()
 
     def __iter__(self):
@@ -1511,94 +2062,135 @@ class Iwscan(object):
     def getScan(self):
         """ Retrieves results, stored from the most recent scan.
 
+            Blocks until the driver has finished scanning; use readScan()
+            to poll without blocking.
+
+        """
+        while not self.readScan():
+            time.sleep(0.1)
+
+    def readScan(self):
+        """ Makes one attempt to read the results of the most recent scan.
+
+            Returns False while the driver is still scanning (EAGAIN), and
+            True once self.aplist holds the results. Other errors raise.
+
         """
         iwstruct = Iwstruct()
-        bufflen = IW_SCAN_MAX_DATA
+        context = iwstruct.context
+        bufflen = getScanBufferSize(self.ifname)
+        ioctls = 0
 
         # Make repeated requests for scan with various recovery schemes
         while (True):
             buff, datastr = iwstruct.pack_wrq(bufflen)
+            ifreq = context.get_ifreq(self.ifname, datastr)
+            ioctls += 1
             try:
-                status, result = iwstruct.iw_get_ext(
-                    self.ifname,
-                    SIOCGIWSCAN,
-                    data=datastr
-                )
+                iwstruct._fcntl(SIOCGIWSCAN, ifreq)
             except IOError as e:
                 error_number, error_string = e.args
-                print(f"Error Number  {error_number} Strerror {error_string}")
                 if error_number == errno.E2BIG:
                     # Keep resizing the buffer until it's
                     #   large enough to hold the scan
-                    pbuff, newlen = iwstruct.unpack('Pi', datastr)
+                    pbuff, newlen, flags = IW_POINT.unpack_from(
+                        ifreq, IFNAMSIZE)
                     if bufflen < newlen:
                         # the driver told us how big to make the buffer
                         bufflen = newlen
+                    elif bufflen >= IW_SCAN_MAX_BUFFER:
+                        _recordScanRead(self.ifname, ioctls, None)
+                        raise
                     else:
                         # try doubling the buffer size
-                        bufflen = bufflen * 2
+                        bufflen = min(bufflen * 2, IW_SCAN_MAX_BUFFER)
                 elif error_number == errno.EAGAIN:
                     # Permission was NOT denied,
                     #   therefore we must WAIT to get results
-                    time.sleep(0.1)
+                    _recordScanRead(self.ifname, ioctls, None, busy=True)
+                    return False
                 else:
+                    print(f"Error Number  {error_number} "
+                          f"Strerror {error_string}")
                     raise
-            except Exception as e:
-                print(e)
-                raise
             else:
                 break
 
-        # unpack the buffer pointer and length
-        pbuff, reslen = iwstruct.unpack('Pi', datastr)
+        # the driver wrote the real result length back into the iw_point
+        pbuff, reslen, flags = IW_POINT.unpack_from(ifreq, IFNAMSIZE)
+        _recordScanRead(self.ifname, ioctls, reslen)
+        self.retries = ioctls - 1
+        self.aplist = []
         if reslen > 0:
-            # Initialize the stream, and turn it into an enumerator
-            self.aplist = self._parse(buff.tobytes())
+            # Parse the pooled buffer in place, it is reused by the next scan
+            stream = memoryview(buff)[:reslen]
+            try:
+                self.aplist = self._parse(stream)
+            finally:
+                stream.release()
+        return True
 
     def _parse(self, data):
         """ Parse the event stream, and return a list of Iwscanresult
             objects.
 
         """
-        iwstruct = Iwstruct()
-        scanresult = None
-        aplist = []
-
-        # Run through the stream until it is too short to contain a command
-        while (len(data) >= IW_EV_LCP_PK_LEN):
-            # Unpack the header
-            length, cmd = iwstruct.unpack('HH', data[:IW_EV_LCP_PK_LEN])
-            # If the event length is too short to contain valid data,
-            # then break, because we're probably at the end of the cell's data
-            if length < IW_EV_LCP_PK_LEN:
-                break
-            # Put the events into their respective result data
-            if cmd == SIOCGIWAP:
-                if scanresult:
-                    aplist.append(scanresult)
-                if ctypes.sizeof(ctypes.c_voidp) == 4:
-                    # we are on a 32bit system
-                    scanresult_len = IW_EV_LCP_PK_LEN
-                else:
-                    # we are on a 64bit system
-                    scanresult_len = IW_EV_LCP_PK_LEN + 4
-                scanresult = Iwscanresult(
-                    data[scanresult_len:length], self.range)
-            elif scanresult is None:
-                raise RuntimeError(
-                    "Attempting to add an event without AP data.")
-            else:
-                scanresult.addEvent(cmd, data[scanresult_len:length])
-            # We're finished with the previous event
-            data = data[length:]
-
-        # Don't forget the final result
-        if scanresult:
-            if scanresult.bssid != "00:00:00:00:00:00":
-                aplist.append(scanresult)
-            else:
-                raise RuntimeError('Attempting to add an AP without a bssid')
-        return aplist
+        return list(parseScanStream(data, self.range))
+
+
+def parseScanStream(data, iwrange=None, payload_offset=IW_EV_PAYLOAD_OFFSET):
+    """ Decodes a SIOCGIWSCAN event stream, yielding one Iwscanresult per
+        cell as soon as the next cell (or the end) is reached.
+
+        data may be bytes or any buffer; it is walked through a memoryview
+        with a moving offset, so the stream itself is never copied.
+        payload_offset is where the data of an event starts: 8 in the
+        streams of 64 bit kernels, 4 in those of 32 bit ones. An event
+        running past the end of the stream ends it.
+
+    """
+    view = memoryview(data)
+    end = len(view)
+    offset = 0
+    scanresult = None
+
+    # Run through the stream until it is too short to contain a command
+    while end - offset >= IW_EV_LCP_PK_LEN:
+        # Unpack the header
+        length, cmd = IW_EV_HEADER.unpack_from(view, offset)
+        # If the event length is too short to contain valid data,
+        # then break, because we're probably at the end of the cell's data
+        if length < IW_EV_LCP_PK_LEN or length > end - offset:
+            break
+        event = view[offset + payload_offset:offset + length]
+        # Put the events into their respective result data
+        if cmd == SIOCGIWAP:
+            if scanresult:
+                yield scanresult
+            scanresult = Iwscanresult(event, iwrange)
+        elif scanresult is None:
+            raise RuntimeError(
+                "Attempting to add an event without AP data.")
+        else:
+            scanresult.addEvent(cmd, event)
+        # We're finished with the previous event
+        offset += length
+
+    # Don't forget the final result
+    if scanresult:
+        if scanresult.bssid != "00:00:00:00:00:00":
+            yield scanresult
+        else:
+            raise RuntimeError('Attempting to add an AP without a bssid')
+
+
+def pointData(data):
+    """ Returns the bytes of a point event (ESSID, IEs, custom text): its
+        payload is the length and flags of an iw_point, then the data.
+
+    """
+    length = struct.unpack_from('H', data)[0]
+    return bytes(data[4:4 + length])
 
 
 class Iwscanresult(object):
@@ -1619,6 +2211,7 @@ class Iwscanresult(object):
         self.frequency = None
         self.encode = None
         self.custom = []
+        self.ies = []
         self.protocol = None
 
     def addEvent(self, cmd, data):
@@ -1628,7 +2221,6 @@ class Iwscanresult(object):
             If the data is valid but unused, False is returned
 
         """
-        data_string = data.decode("unicode-escape")
         if ((cmd in range(SIOCIWFIRST,
                           SIOCIWLAST + 1)) or
             (cmd in range(IWEVFIRST,
@@ -1641,11 +2233,12 @@ class Iwscanresult(object):
                 raw_mode = struct.unpack('I', data[:4])[0]
                 self.mode = modes[raw_mode]
             elif cmd == SIOCGIWNAME:
+                data_string = bytes(data).decode("unicode-escape")
                 self.protocol = data_string[:len(data_string) - 2]
             elif cmd == SIOCGIWESSID:
-                self.essid = data_string[4:]
+                self.essid = pointData(data).decode("unicode-escape")
             elif cmd == SIOCGIWENCODE:
-                data = struct.unpack("B" * len(data_string), data)
+                data = struct.unpack("B" * len(data), data)
                 self.encode = Iwpoint(b'')
                 self.encode.update(
                     struct.pack(
@@ -1658,24 +2251,22 @@ class Iwscanresult(object):
                 if self.encode.caddr_t is None:
                     self.encode.flags |= IW_ENCODE_NOKEY
             elif cmd == SIOCGIWRATE:
-                freqsize = struct.calcsize("ihbb")
+                usable = len(data) - len(data) % IW_FREQ.size
                 rates = []
-                while len(data) >= freqsize:
-                    m, e, dummy, pad = struct.unpack("ihbb", data[:freqsize])
+                for m, e, dummy, pad in IW_FREQ.iter_unpack(data[:usable]):
                     if e == 0:
                         rates.append(m)
                     else:
                         rates.append(m * 10**e)
-                    data = data[freqsize:]
                 self.rate.append(rates)
             elif cmd == SIOCGIWMODUL:
                 pass
             elif cmd == IWEVQUAL:
                 self.quality.parse(data)
             elif cmd == IWEVGENIE:
-                pass
+                self.ies.append(pointData(data))
             elif cmd == IWEVCUSTOM:
-                self.custom.append(data[1:])
+                self.custom.append(pointData(data))
             else:
                 raise ValueError(
                     "Unknown IW event command received. "
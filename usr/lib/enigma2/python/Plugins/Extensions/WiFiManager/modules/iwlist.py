@@ -34,7 +34,7 @@ from .. import _
 """
 
 try:
-    from .iwlibs import Wireless, Iwrange, getWNICnames, getNICnames, KILO, MEGA
+    from .iwlibs import Wireless, getRange, getWNICnames, getNICnames, KILO, MEGA
     # from .iwlist import get_matching_command
     from . import flags
 except ImportError as e:
@@ -163,7 +163,7 @@ class IWListOutputScreen(Screen):
 def print_scanning_results(wifi, args=None):
     """Print the access points detected nearby."""
     try:
-        iwrange = Iwrange(wifi.ifname)
+        iwrange = getRange(wifi.ifname)
         print("iwrange: {}".format(iwrange))
     except IOError as e:
         error_number, error_string = e.args
@@ -351,7 +351,7 @@ def print_encryption(wifi, args=None):
                     interface=wifi.ifname))
         return
 
-    range_info = Iwrange(wifi.ifname)
+    range_info = getRange(wifi.ifname)
 
     key_sizes = ", ".join(
         str(range_info.encoding_size[i] * 8)
@@ -511,7 +511,7 @@ def print_txpower(wifi, args=None):
 
 def print_retry(wifi, args=None):
     try:
-        range_info = Iwrange(wifi.ifname)
+        range_info = getRange(wifi.ifname)
     except IOError as e:
         error_number, error_string = e.args
         print(f"error_number: {error_number}  error_string: {error_string}")
@@ -581,7 +581,7 @@ def print_aps(wifi, args=None):
     """
     # "Check if the interface could support scanning"
     try:
-        iwrange = Iwrange(wifi.ifname)
+        iwrange = getRange(wifi.ifname)
         print(f"iwrange: {iwrange}")
     except IOError as e:
         error_number, error_string = e.args
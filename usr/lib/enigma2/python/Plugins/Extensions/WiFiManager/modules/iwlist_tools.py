@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 
-import subprocess
 from re import search
 from enigma import eTimer
 
@@ -14,7 +13,19 @@ from Components.Button import Button
 from Components.config import ConfigSubsection, ConfigSelection
 from Components.ConfigList import ConfigListScreen
 
-from .tools import get_wifi_interfaces, scan_networks
+from .tools import (
+    get_wifi_interfaces,
+    scan_networks,
+    grep_lines,
+    run_command as tools_run_command,
+    STATUS_TTL
+)
+from .connect_profile import (
+    formatPhaseStats,
+    getProfileRing,
+    PROFILE_EXPORT
+)
+from .iwlibs import invalidateRange
 from .. import _
 
 """
@@ -77,6 +88,7 @@ class IWListTools(Screen):
             (_("Restart WiFi Interface"), "restart_wifi", _("Restart wireless interface")),
             (_("Reload WiFi Modules"), "reload_modules", _("Reload kernel WiFi modules")),
             (_("Check System Logs"), "check_logs", _("Check system logs for WiFi errors")),
+            (_("Connection Timing"), "connect_timing", _("Time spent in each connection phase")),
         ]
 
         self.current_selection = None
@@ -91,23 +103,39 @@ class IWListTools(Screen):
         if self.tool_name:
             self.start_timer.start(100, True)  # 100ms delay
 
-    def run_command(self, cmd):
-        """Executes a command and returns the output"""
+    def run_command(self, cmd, pattern=None, tail=None):
+        """Executes a command and returns the output, optionally only the
+        lines containing pattern (any case) and of those the last tail"""
         try:
-            result = subprocess.run(
-                cmd,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30)
+            result = tools_run_command(cmd, timeout=30)
             if result.returncode == 0:
-                return result.stdout.strip()
+                return self.filter_lines(result.stdout, pattern, tail)
             else:
                 return None
         except Exception as e:
             print(f"Command error: {e}")
             return None
 
+    def filter_lines(self, text, pattern=None, tail=None):
+        if pattern is not None:
+            text = grep_lines(text, pattern, ignore_case=True)
+        if tail is not None:
+            text = '\n'.join(text.splitlines()[-tail:])
+        return text.strip()
+
+    def read_logs(self, paths, pattern, tail):
+        """Like grep -i pattern paths | tail, missing files are skipped"""
+        lines = []
+        for path in paths:
+            try:
+                with open(path, errors='replace') as f:
+                    lines.extend(path + ':' + line.rstrip('\n')
+                                 for line in f
+                                 if pattern in line.lower())
+            except IOError:
+                continue
+        return '\n'.join(lines[-tail:])
+
     def execute_direct_tool(self):
         """Runs the specified tool directly"""
         if not self.tool_name:
@@ -126,6 +154,7 @@ class IWListTools(Screen):
             "restart_wifi": self.restart_wifi_interface,
             "reload_modules": self.reload_wifi_modules,
             "check_logs": self.check_system_logs,
+            "connect_timing": self.show_connect_timing,
         }
 
         method = tool_methods.get(self.tool_name)
@@ -165,6 +194,7 @@ class IWListTools(Screen):
             "restart_wifi": _("Interface restarted."),
             "reload_modules": _("Modules reloaded."),
             "check_logs": _("Logs checked."),
+            "connect_timing": _("Connection timing displayed."),
         }
 
         message = tool_messages.get(
@@ -213,7 +243,9 @@ class IWListTools(Screen):
             output += _("  MAC: %s\n") % net.get('bssid',
                                                  net.get('mac', _('N/A')))
             output += _("  Channel: %s\n") % net.get('channel', _('N/A'))
-            output += _("  Frequency: %s\n") % net.get('frequency', _('N/A'))
+            frequency = net.get('frequency')
+            output += _("  Frequency: %s\n") % (
+                _("%d MHz") % frequency if frequency else _('N/A'))
             output += _("  Quality: %s\n") % net.get('quality', _('N/A'))
             output += _("  Signal: %s\n") % net.get('signal', _('N/A'))
             output += _("  Encryption: %s\n") % (_('Yes')
@@ -303,8 +335,8 @@ class IWListTools(Screen):
         """About power management"""
         self.show_working_message(_("Getting power management information..."))
         try:
-            cmd = f"iwconfig {self.interface} | grep -i power"
-            power_result = self.run_command(cmd)
+            power_result = self.run_command(
+                ['iwconfig', self.interface], pattern='power')
             output = _("=== POWER MANAGEMENT ===\n\n")
             if power_result:
                 output += power_result
@@ -329,8 +361,8 @@ class IWListTools(Screen):
         """About retry limits"""
         self.show_working_message(_("Getting retry information..."))
         try:
-            cmd = f"iwconfig {self.interface} | grep -i retry"
-            retry_result = self.run_command(cmd)
+            retry_result = self.run_command(
+                ['iwconfig', self.interface], pattern='retry')
             output = _("=== RETRY LIMITS ===\n\n")
             if retry_result:
                 output += retry_result
@@ -417,6 +449,7 @@ class IWListTools(Screen):
             try:
                 self.run_command(f"ifconfig {self.interface} down")
                 self.run_command(f"ifconfig {self.interface} up")
+                invalidateRange(self.interface)
                 self.session.openWithCallback(
                     self.close,
                     MessageBox,
@@ -444,9 +477,10 @@ class IWListTools(Screen):
         self.show_working_message(_("Checking system logs..."))
 
         try:
-            dmesg_result = self.run_command("dmesg | grep -i wifi | tail -20")
-            syslog_result = self.run_command(
-                "grep -i wifi /var/log/messages /var/log/syslog 2>/dev/null | tail -20")
+            dmesg_result = self.run_command(['dmesg'], pattern='wifi',
+                                            tail=20)
+            syslog_result = self.read_logs(
+                ['/var/log/messages', '/var/log/syslog'], 'wifi', 20)
 
             output = _("=== SYSTEM LOGS - WIFI ERRORS ===\n\n")
 
@@ -469,6 +503,40 @@ class IWListTools(Screen):
         except Exception as e:
             print(f"Log check failed: {e}")
 
+    def show_connect_timing(self):
+        """p50/p95 of every connection phase; GREEN exports the records"""
+        self.show_working_message(_("Reading connection timings..."))
+        try:
+            ring = getProfileRing()
+            records = ring.records()
+            output = _("=== CONNECTION TIMING ===\n\n")
+            if records:
+                output += formatPhaseStats(ring.phaseStats(records),
+                                           len(records)) + "\n\n"
+                output += _("Press GREEN to export the records to %s\n") % (
+                    PROFILE_EXPORT)
+                self.session.openWithCallback(
+                    self.close,
+                    ConnectTimingScreen,
+                    output,
+                    ring
+                )
+                return
+            output += _("No connection attempts recorded yet\n")
+            self.session.openWithCallback(
+                self.close,
+                ResultsScreen,
+                _("Connection Timing"),
+                output
+            )
+        except Exception as e:
+            self.session.openWithCallback(
+                self.close,
+                MessageBox,
+                _("Error reading connection timings: {}").format(e),
+                MessageBox.TYPE_ERROR
+            )
+
 
 class AdvancedConfigScreen(ConfigListScreen, Screen):
     skin = """
@@ -546,8 +614,8 @@ class AdvancedConfigScreen(ConfigListScreen, Screen):
         """Load current interface settings"""
         try:
             # Use iwconfig to read current settings
-            result = subprocess.run(
-                ['iwconfig', self.ifname], capture_output=True, text=True)
+            result = tools_run_command(['iwconfig', self.ifname],
+                                       ttl=STATUS_TTL)
             if result.returncode == 0:
                 output = result.stdout
 
@@ -589,7 +657,7 @@ class AdvancedConfigScreen(ConfigListScreen, Screen):
 
             # Execute commands
             for cmd in commands:
-                subprocess.run(cmd, shell=True)
+                tools_run_command(cmd)
 
             self.session.openWithCallback(
                 lambda result: self.close(True),
@@ -682,3 +750,40 @@ class ResultsScreen(Screen):
 
     def pageDown(self):
         self["results"].pageDown()
+
+
+class ConnectTimingScreen(ResultsScreen):
+    skin = """
+    <screen position="center,center" size="800,700" title="Connection Timing">
+        <widget name="results" position="20,20" size="760,600" font="Regular;18" />
+        <widget name="key_red" position="10,635" size="180,40" zPosition="1" font="Regular;20" halign="center" valign="center" backgroundColor="red" transparent="1" />
+        <widget name="key_green" position="210,635" size="180,40" zPosition="1" font="Regular;20" halign="center" valign="center" backgroundColor="green" transparent="1" />
+        <eLabel name="" position="9,677" size="180,8" zPosition="3" backgroundColor="#fe0000" />
+        <eLabel name="" position="209,677" size="180,8" zPosition="3" backgroundColor="#fe00" />
+    </screen>
+    """
+
+    def __init__(self, session, text, ring, path=PROFILE_EXPORT):
+        ResultsScreen.__init__(self, session, _("Connection Timing"), text)
+        self.ring = ring
+        self.path = path
+        self["key_green"] = Button(_("Export"))
+        self["export_actions"] = ActionMap(["ColorActions"],
+                                           {"green": self.export})
+
+    def export(self):
+        """Writes the records as JSON, only on request"""
+        try:
+            count = self.ring.exportJson(self.path)
+        except (IOError, OSError) as e:
+            self.session.open(
+                MessageBox,
+                _("Error exporting connection timings: {}").format(e),
+                MessageBox.TYPE_ERROR
+            )
+            return
+        self.session.open(
+            MessageBox,
+            _("Exported %d records to %s") % (count, self.path),
+            MessageBox.TYPE_INFO
+        )
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+from .saved_networks import getSavedNetworkStore
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+# "last good link" of every ESSID, in a SavedNetworkStore of its own:
+#   bssid, frequency (MHz), security (wpa_supplicant key_mgmt or 'NONE'),
+#   ip (the lease), timestamp, plus connect time counters per mode
+#   (hinted_count/hinted_seconds, full_count/full_seconds)
+LINKS_FILE = "/etc/enigma2/wifimanager_links.json"
+
+# older records are not used as hints any more
+HINT_MAX_AGE = 7 * 24 * 3600.0
+
+
+def getLinkStore():
+    return getSavedNetworkStore(LINKS_FILE)
+
+
+def getLinkHint(essid, max_age=HINT_MAX_AGE):
+    """The last good link of essid, None when unknown or too old"""
+    link = getLinkStore().get(essid)
+    if not link or not link.get('bssid'):
+        return None
+    if time.time() - link.get('timestamp', 0) > max_age:
+        return None
+    return link
+
+
+def rememberLink(essid, bssid, frequency, security, ip, seconds, hinted):
+    """Stores the link a connection ended up on and how long it took;
+    hinted tells whether the hints of the previous link were used"""
+    store = getLinkStore()
+    link = dict(store.get(essid) or {})
+    link.update(bssid=bssid.lower() if bssid else None, frequency=frequency,
+                security=security, ip=ip, timestamp=time.time())
+    mode = 'hinted' if hinted else 'full'
+    link[mode + '_count'] = link.get(mode + '_count', 0) + 1
+    link[mode + '_seconds'] = link.get(mode + '_seconds', 0.0) + seconds
+    store.put(essid, link)
+
+
+def forgetLink(essid):
+    getLinkStore().forget(essid)
+
+
+def connectTimeReport(essid=None):
+    """Mean time-to-connect with and without hints, over every ESSID or
+    just essid: {'hinted': (count, mean seconds), 'full': (...)}"""
+    store = getLinkStore()
+    links = [store.get(essid)] if essid else \
+        [store.get(name) for name in store.essids()]
+    report = {}
+    for mode in ('hinted', 'full'):
+        count = sum(link.get(mode + '_count', 0) for link in links if link)
+        seconds = sum(link.get(mode + '_seconds', 0.0)
+                      for link in links if link)
+        report[mode] = (count, seconds / count if count else None)
+    return report
+
+
+def formatConnectTimeReport(report):
+    parts = []
+    for mode, label in (('hinted', "with hints"), ('full', "full scan")):
+        count, mean = report[mode]
+        if count:
+            parts.append("{}: {:.1f}s ({}x)".format(label, mean, count))
+    return ", ".join(parts)
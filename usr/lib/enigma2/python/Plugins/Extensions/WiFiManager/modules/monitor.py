@@ -1,20 +1,42 @@
 # -*- coding: utf-8 -*-
 
-import subprocess
-from enigma import eTimer
+import time
 from re import sub, search, IGNORECASE
 
 from Screens.Screen import Screen
 from Components.ActionMap import ActionMap
 from Components.Label import Label
 from Components.ProgressBar import ProgressBar
+from Components.Sources.CanvasSource import CanvasSource
 
 from . import _
+from .iwlibs import Wireless
+from .poll_scheduler import getPollScheduler
+from .signal_history import (
+    graphRects,
+    graphScale,
+    GAP_BUCKETS,
+    METRICS,
+    METRIC_LABELS,
+    RANGES
+)
+from .signal_sampler import getSignalSampler, isMissing
+from .wireless_events import (
+    getWirelessEvents,
+    EVENT_ASSOCIATED,
+    EVENT_DISASSOCIATED,
+    EVENT_CARRIER_ON,
+    EVENT_CARRIER_OFF,
+    EVENT_LINK_UP,
+    EVENT_LINK_DOWN
+)
 from .tools import (
     get_wifi_interfaces,
     get_interface_info,
     # is_interface_up,
-    format_signal_quality
+    format_signal_quality,
+    run_command,
+    STATUS_TTL
 )
 
 """
@@ -36,18 +58,40 @@ from .tools import (
 #########################################################
 """
 
+# (shortest, longest) interval in seconds of the poll tasks: the bars
+# and labels are redrawn from the sampler's ring, ESSID, IP and MAC are
+# read; fast while values change, slower while they don't
+RENDER_INTERVALS = (0.25, 2.0)
+DETAILS_INTERVALS = (1.0, 10.0)
+
+# a sample older than this (s) means the interface is not sampled
+SAMPLE_MAX_AGE = 1.0
+
+# history graph: redraw intervals, canvas size as in the skin, colors
+GRAPH_INTERVALS = (1.0, 10.0)
+GRAPH_WIDTH = 580
+GRAPH_HEIGHT = 238
+GRAPH_COLORS = {
+    'background': 0x00101820,
+    'band': 0x00284a60,
+    'line': 0x0049bbff,
+}
+
 
 class WiFiMonitor(Screen):
     skin = """
-    <screen position="center,center" size="800,700" title="WiFi Monitor">
-        <widget name="interface_label" position="10,35" size="780,40" font="Regular;20" />
-        <widget name="essid_label" position="10,100" size="780,40" font="Regular;20" />
-        <widget name="ip_label" position="10,165" size="780,40" font="Regular;20" />
-        <widget name="mac_label" position="10,230" size="780,40" font="Regular;20" />
+    <screen position="center,center" size="1200,700" title="WiFi Monitor">
+        <widget name="interface_label" position="10,35" size="580,40" font="Regular;20" />
+        <widget name="essid_label" position="10,100" size="580,40" font="Regular;20" />
+        <widget name="ip_label" position="10,165" size="580,40" font="Regular;20" />
+        <widget name="mac_label" position="10,230" size="580,40" font="Regular;20" />
+        <widget name="interfaces_label" position="610,35" size="580,235" font="Regular;20" />
         <widget name="quality_label" position="10,325" size="580,30" font="Regular;20" />
         <widget name="signal_label" position="10,457" size="580,30" font="Regular;20" />
         <widget name="quality_bar" position="10,372" size="580,60" />
         <widget name="signal_bar" position="10,503" size="580,60" />
+        <widget name="graph_label" position="610,285" size="580,30" font="Regular;20" />
+        <widget source="graph" render="Canvas" position="610,325" size="580,238" />
         <widget name="key_red" position="10,635" size="180,40" zPosition="1" font="Regular;20" halign="center" valign="center" backgroundColor="red" transparent="1" />
         <widget name="key_green" position="210,635" size="180,40" zPosition="1" font="Regular;20" halign="center" valign="center" backgroundColor="green" transparent="1" />
         <widget name="key_yellow" position="410,635" size="180,40" zPosition="1" font="Regular;20" halign="center" valign="center" backgroundColor="yellow" transparent="1" />
@@ -78,19 +122,36 @@ class WiFiMonitor(Screen):
         self["key_green"] = Label(_("Stop"))
         self["key_yellow"] = Label(_("Refresh"))
         self["key_blue"] = Label(_("Exit"))
+        self["graph_label"] = Label()
+        self["interfaces_label"] = Label()
+        self.interfaces = []
+        self["graph"] = CanvasSource()
+        self.graph_range = 0
+        self.graph_metric = 0
         self["actions"] = ActionMap(
-            ["ColorActions", "OkCancelActions"],
+            ["ColorActions", "OkCancelActions", "DirectionActions"],
             {
                 "red": self.start_monitoring,
                 "green": self.stop_monitoring,
                 "yellow": self.update_status,
                 "blue": self.close,
                 "cancel": self.close,
+                "ok": self.next_interface,
+                "left": lambda: self.change_graph(range_step=-1),
+                "right": lambda: self.change_graph(range_step=1),
+                "up": lambda: self.change_graph(metric_step=-1),
+                "down": lambda: self.change_graph(metric_step=1),
             }
         )
         self.monitoring = False
-        self.monitor_timer = eTimer()
-        self.monitor_timer.callback.append(self.update_status)
+        self.ifname = None
+        self.sampling = False
+        self.tasks = {}
+        self.event_token = None
+        # covered by another screen (a MessageBox): no polling, no sampling
+        self.onHide.append(self.pause_polling)
+        self.onShow.append(self.resume_polling)
+        self.onClose.append(self.stop_monitoring)
         self.setTitle(_("WiFi Signal Monitor"))
         self.start_monitoring()
 
@@ -102,14 +163,182 @@ class WiFiMonitor(Screen):
             return
 
         self.monitoring = True
-        self.monitor_timer.start(2000)
+        self.interfaces = interfaces
+        if self.ifname not in interfaces:
+            self.ifname = interfaces[0]
+        self.start_sampling()
+        if not self.tasks:
+            scheduler = getPollScheduler()
+            for name, callback, (shortest, longest) in (
+                    ('details', self.update_status, DETAILS_INTERVALS),
+                    ('samples', self.render_samples, RENDER_INTERVALS),
+                    ('graph', self.render_graph, GRAPH_INTERVALS)):
+                self.tasks[name] = scheduler.register(
+                    callback, min_interval=shortest, max_interval=longest,
+                    tolerance=1, name="monitor " + name)
+        # Association and link changes are pushed, no need to wait a tick
+        if self.event_token is None:
+            self.event_token = getWirelessEvents().subscribe(
+                self.on_wireless_event,
+                (EVENT_ASSOCIATED, EVENT_DISASSOCIATED, EVENT_CARRIER_ON,
+                 EVENT_CARRIER_OFF, EVENT_LINK_UP, EVENT_LINK_DOWN))
         self["key_red"].setText(_("Pause"))
 
     def stop_monitoring(self):
         self.monitoring = False
-        self.monitor_timer.stop()
+        for task in self.tasks.values():
+            task.cancel()
+        self.tasks = {}
+        self.stop_sampling()
+        if self.event_token is not None:
+            getWirelessEvents().unsubscribe(self.event_token)
+            self.event_token = None
         self["key_red"].setText(_("Start"))
 
+    def on_wireless_event(self, event):
+        print("[WiFiMonitor] Event {} on {}".format(event.kind, event.ifname))
+        if self.monitoring:
+            self.poke('details')
+
+    def start_sampling(self):
+        if not self.sampling:
+            getSignalSampler().acquire()
+            self.sampling = True
+
+    def stop_sampling(self):
+        if self.sampling:
+            getSignalSampler().release()
+            self.sampling = False
+
+    def pause_polling(self):
+        for task in self.tasks.values():
+            task.pause()
+        self.stop_sampling()
+
+    def resume_polling(self):
+        if not self.monitoring:
+            return
+        self.start_sampling()
+        for task in self.tasks.values():
+            task.resume()
+
+    def poke(self, *names):
+        """Runs the named poll tasks now, at their fastest rate"""
+        for name in names:
+            task = self.tasks.get(name)
+            if task is not None:
+                task.poke()
+
+    def fresh_sample(self, ifname=None):
+        """Latest sample of the interface, None if it is not sampled"""
+        ifname = ifname or self.ifname
+        if not ifname or not self.sampling:
+            return None
+        sample = getSignalSampler().ring(ifname).latest()
+        if sample is None or time.time() - sample.timestamp > SAMPLE_MAX_AGE:
+            return None
+        return sample
+
+    def next_interface(self):
+        """OK: shows the next interface; all of them keep being sampled"""
+        if len(self.interfaces) < 2:
+            return
+        i = self.interfaces.index(self.ifname) \
+            if self.ifname in self.interfaces else -1
+        self.ifname = self.interfaces[(i + 1) % len(self.interfaces)]
+        self["quality_bar"].setValue(0)
+        self["signal_bar"].setValue(0)
+        self.poke('details', 'samples', 'graph')
+
+    def render_interfaces(self):
+        """One line per interface from the latest samples, the shown one
+        marked; returns their levels"""
+        lines = []
+        levels = []
+        for ifname in self.interfaces:
+            sample = self.fresh_sample(ifname)
+            if sample is None or isMissing(sample.level):
+                text = _("no signal")
+                levels.append(None)
+            else:
+                levels.append(int(sample.level))
+                text = _("{} dBm, {}%").format(int(sample.level),
+                                               int(sample.quality))
+                if not isMissing(sample.bitrate):
+                    text += _(", {:g} Mb/s").format(sample.bitrate / 1e6)
+            lines.append("{} {}: {}".format(
+                ">" if ifname == self.ifname else " ", ifname, text))
+        if len(self.interfaces) > 1:
+            lines.append(_("OK: next interface"))
+        self["interfaces_label"].setText("\n".join(lines))
+        return levels
+
+    def render_samples(self):
+        """Redraws quality and signal from the sampler, no I/O; returns
+        the levels and quality shown, the poll task's reading"""
+        if not self.monitoring:
+            return None
+        levels = self.render_interfaces()
+        sample = self.fresh_sample()
+        if sample is None:
+            return tuple(levels)
+        if not isMissing(sample.quality):
+            quality = int(sample.quality)
+            self["quality_label"].setText(
+                _("Quality: {}% ({})").format(
+                    quality, format_signal_quality(quality)))
+            self["quality_bar"].setValue(quality)
+        if not isMissing(sample.level):
+            signal = int(sample.level)
+            text = _("Signal: {} dBm").format(signal)
+            if not isMissing(sample.bitrate):
+                text += _(" | {:g} Mb/s").format(sample.bitrate / 1e6)
+            self["signal_label"].setText(text)
+            self["signal_bar"].setValue(
+                int(max(0, min(100, (signal + 90) * 100 / 60))))
+        quality = sample.quality
+        return tuple(levels) + (
+            None if isMissing(quality) else int(quality),)
+
+    def change_graph(self, range_step=0, metric_step=0):
+        """Left/right: time range, up/down: metric"""
+        self.graph_range = (self.graph_range + range_step) % len(RANGES)
+        self.graph_metric = (self.graph_metric + metric_step) % len(METRICS)
+        self.poke('graph')
+
+    def render_graph(self):
+        """Draws the history of the selected metric and range; the rollup
+        and lttb() keep it at most GRAPH_WIDTH / 2 points whatever the
+        range. Returns the newest bucket average as the poll reading"""
+        if not self.ifname:
+            return None
+        label, span, seconds = RANGES[self.graph_range]
+        metric = METRICS[self.graph_metric]
+        now = time.time()
+        points = getSignalSampler().history(self.ifname).points(
+            self.graph_range, metric, now)
+        low, high = graphScale(metric, points)
+
+        canvas = self["graph"]
+        canvas.clear()
+        canvas.fill(0, 0, GRAPH_WIDTH, GRAPH_HEIGHT,
+                    GRAPH_COLORS['background'])
+        for x, y, w, h, kind in graphRects(
+                points, GRAPH_WIDTH, GRAPH_HEIGHT, now - span, now, low, high,
+                seconds * GAP_BUCKETS):
+            canvas.fill(x, y, w, h, GRAPH_COLORS[kind])
+        canvas.flush()
+
+        text = _("{metric}, last {range}").format(
+            metric=_(METRIC_LABELS[metric]), range=_(label))
+        if points:
+            text += _(" (min {:g} / max {:g})").format(
+                round(min(point[1] for point in points), 1),
+                round(max(point[3] for point in points), 1))
+        self["graph_label"].setText(text)
+        return (self.ifname, label, metric,
+                round(points[-1][2], 1) if points else None)
+
     def update_quality_bar(self, quality):
         """Update quality bar with color change using show/hide"""
         try:
@@ -154,8 +383,17 @@ class WiFiMonitor(Screen):
             print(f"[WiFiMonitor] Error in update_signal_bar: {e}")
 
     def update_status(self):
+        """Reads ESSID, IP and MAC (and the signal when not sampled);
+        returns them as the reading of the details poll task"""
         if not self.monitoring:
-            return
+            return None
+
+        # a plugged in dongle shows up here (cached registry, no fork)
+        interfaces = get_wifi_interfaces()
+        if interfaces:
+            self.interfaces = interfaces
+            if self.ifname not in interfaces:
+                self.ifname = interfaces[0]
 
         try:
             wifi_data = self.get_wifi_info_iwconfig()
@@ -203,6 +441,8 @@ class WiFiMonitor(Screen):
                     signal_percent = max(0, min(100, (signal + 90) * 100 / 60))
 
                 self["signal_bar"].setValue(int(signal_percent))
+                return (self.ifname, wifi_data.get('essid'),
+                        wifi_data.get('ip'), signal)
 
             else:
                 self.show_error(_("No WiFi connection data available"))
@@ -210,19 +450,28 @@ class WiFiMonitor(Screen):
         except Exception as e:
             print(f"[WiFiMonitor] Update error: {e}")
             self.show_error(_("Monitoring error: {}").format(str(e)))
+        return None
 
     def get_wifi_info_iwconfig(self):
         """Get WiFi info using tools.py (more reliable)"""
         try:
-            # Find WiFi interfaces using tools.py
-            interfaces = get_wifi_interfaces()
-            if not interfaces:
+            # The interface shown; the others are only sampled, so the
+            # reads below don't multiply with the number of interfaces
+            ifname = self.ifname
+            if not ifname:
                 return None
-
-            # Use the first available interface
-            ifname = interfaces[0]
             wifi_data = {'interface': ifname}
 
+            # Quality and level come from the sampler when it covers the
+            # interface; then only ESSID, IP and MAC are read here
+            sample = self.fresh_sample(ifname)
+            if sample is not None and not isMissing(sample.level):
+                wifi_data['essid'] = self.get_essid(ifname)
+                wifi_data['quality'] = int(sample.quality)
+                wifi_data['signal'] = int(sample.level)
+                self.add_address_info(ifname, wifi_data)
+                return wifi_data
+
             # Get information using get_interface_info from tools.py
             interface_info = get_interface_info(ifname)
             print("[WiFiMonitor] Interface info: {}".format(interface_info))
@@ -274,101 +523,116 @@ class WiFiMonitor(Screen):
                 print("[WiFiMonitor] Quality parsing error: {}".format(e))
                 wifi_data['quality'] = 0
 
-            # Signal level
+            # Signal level, straight from the driver when it reports dBm
             try:
-                result = subprocess.run(
-                    ['iwconfig', ifname],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                output = result.stdout
-
-                print("[WiFiMonitor] iwconfig output: {}".format(output))
-
-                signal_match = search(r'Signal level=(-?\d+) dBm', output)
-
-                if signal_match:
-                    wifi_data['signal'] = int(signal_match.group(1))
-                    print("[WiFiMonitor] Found signal level: {} dBm".format(
-                        wifi_data['signal']
-                    ))
+                level = Wireless(ifname).snapshot().level_dbm
+            except Exception as e:
+                print("[WiFiMonitor] Snapshot failed: {}".format(e))
+                level = None
+            if level is not None:
+                wifi_data['signal'] = level
+                print("[WiFiMonitor] Found signal level: {} dBm".format(level))
+            else:
+                wifi_data['signal'] = self.get_signal_iwconfig(
+                    ifname, wifi_data['quality'])
 
-                else:
-                    signal_match2 = search(r'Signal level=(-?\d+)', output)
+            self.add_address_info(ifname, wifi_data)
+            print("[WiFiMonitor] Final data: {}".format(wifi_data))
+            return wifi_data
 
-                    if signal_match2:
-                        wifi_data['signal'] = int(signal_match2.group(1))
-                        print(
-                            "[WiFiMonitor] Found signal level (alt format): {}".format(
-                                wifi_data['signal']))
+        except Exception as e:
+            print("[WiFiMonitor] Error: {}".format(e))
+            return None
 
-                    else:
-                        quality_percent = wifi_data['quality']
-                        wifi_data['signal'] = int(-100 +
-                                                  (quality_percent * 0.8))
+    def get_essid(self, ifname):
+        try:
+            essid = Wireless(ifname).getEssid()
+        except Exception as e:
+            print("[WiFiMonitor] ESSID read failed: {}".format(e))
+            essid = None
+        return essid or _('Not connected')
 
-                        print("[WiFiMonitor] Estimated signal: {} dBm".format(
-                            wifi_data['signal']
-                        ))
+    def add_address_info(self, ifname, wifi_data):
+        """Sets 'ip' and 'mac' of wifi_data"""
+        try:
+            from Components.Network import iNetwork
 
-            except Exception as e:
-                print("[WiFiMonitor] Error getting signal: {}".format(e))
-                wifi_data['signal'] = -90
+            ip = iNetwork.getAdapterAttribute(ifname, "ip")
+            mac = iNetwork.getAdapterAttribute(ifname, "mac")
 
-            # IP and MAC
-            try:
-                from Components.Network import iNetwork
+            if ip and ip != [0, 0, 0, 0]:
+                wifi_data['ip'] = '.'.join(map(str, ip))
+            else:
+                wifi_data['ip'] = _('Not connected')
 
-                ip = iNetwork.getAdapterAttribute(ifname, "ip")
-                mac = iNetwork.getAdapterAttribute(ifname, "mac")
+            wifi_data['mac'] = mac if mac else _('N/A')
 
-                if ip and ip != [0, 0, 0, 0]:
-                    wifi_data['ip'] = '.'.join(map(str, ip))
-                else:
-                    wifi_data['ip'] = _('Not connected')
+        except Exception as e:
+            print(e)
+
+            try:
+                result = run_command(['ip', 'addr', 'show', ifname],
+                                     ttl=STATUS_TTL)
 
-                wifi_data['mac'] = mac if mac else _('N/A')
+                ip_match = search(
+                    r'inet (\d+\.\d+\.\d+\.\d+)', result.stdout)
+                wifi_data['ip'] = ip_match.group(
+                    1) if ip_match else _('Not connected')
+
+                mac_match = search(
+                    r'link/ether ([0-9a-f:]+)', result.stdout, IGNORECASE)
+                wifi_data['mac'] = mac_match.group(
+                    1) if mac_match else _('N/A')
 
             except Exception as e:
                 print(e)
+                wifi_data['ip'] = _('N/A')
+                wifi_data['mac'] = _('N/A')
 
-                try:
-                    result = subprocess.run(
-                        ['ip', 'addr', 'show', ifname],
-                        capture_output=True,
-                        text=True
-                    )
+    def get_signal_iwconfig(self, ifname, quality):
+        """Signal level parsed from iwconfig, estimated from quality"""
+        try:
+            result = run_command(['iwconfig', ifname], timeout=5,
+                                 ttl=STATUS_TTL)
+            output = result.stdout
 
-                    ip_match = search(
-                        r'inet (\d+\.\d+\.\d+\.\d+)', result.stdout)
-                    wifi_data['ip'] = ip_match.group(
-                        1) if ip_match else _('Not connected')
+            print("[WiFiMonitor] iwconfig output: {}".format(output))
 
-                    mac_match = search(
-                        r'link/ether ([0-9a-f:]+)', result.stdout, IGNORECASE)
-                    wifi_data['mac'] = mac_match.group(
-                        1) if mac_match else _('N/A')
+            signal_match = search(r'Signal level=(-?\d+) dBm', output)
 
-                except Exception as e:
-                    print(e)
-                    wifi_data['ip'] = _('N/A')
-                    wifi_data['mac'] = _('N/A')
+            if signal_match:
+                signal = int(signal_match.group(1))
+                print("[WiFiMonitor] Found signal level: {} dBm".format(
+                    signal
+                ))
 
-            print("[WiFiMonitor] Final data: {}".format(wifi_data))
-            return wifi_data
+            else:
+                signal_match2 = search(r'Signal level=(-?\d+)', output)
+
+                if signal_match2:
+                    signal = int(signal_match2.group(1))
+                    print(
+                        "[WiFiMonitor] Found signal level (alt format): {}".format(
+                            signal))
+
+                else:
+                    quality_percent = quality
+                    signal = int(-100 + (quality_percent * 0.8))
+
+                    print("[WiFiMonitor] Estimated signal: {} dBm".format(
+                        signal
+                    ))
 
         except Exception as e:
-            print("[WiFiMonitor] Error: {}".format(e))
-            return None
+            print("[WiFiMonitor] Error getting signal: {}".format(e))
+            signal = -90
+
+        return signal
 
     def show_error(self, message):
         """Show error status with contextual information"""
-        interfaces = get_wifi_interfaces()
-
         self["interface_label"].setText(
-            _("Interface: {}").format(
-                interfaces[0] if interfaces else _('N/A')))
+            _("Interface: {}").format(self.ifname or _('N/A')))
         self["essid_label"].setText(message)
         self["ip_label"].setText(_("IP: N/A"))
         self["mac_label"].setText(_("MAC: N/A"))
@@ -0,0 +1,705 @@
+# -*- coding: utf-8 -*-
+
+import errno
+import os
+import select
+import socket
+import struct
+import threading
+import time
+from collections import namedtuple
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+""" In-process nl80211 client over generic netlink.
+
+    Covers the requests the plugin used to fork `iw` for: GET_INTERFACE
+    (`iw dev X info`), GET_STATION (`iw dev X link`), TRIGGER_SCAN and
+    GET_SCAN (`iw dev X scan`) and GET_WIPHY (`iw phy`). Replies are
+    parsed into namedtuple records.
+
+    The parsing functions only see bytes and Nl80211 takes the socket
+    to use, so the tests replay recorded replies without any wireless
+    hardware (tests/test_nl80211.py).
+
+"""
+
+# netlink
+NETLINK_GENERIC = 16
+SOL_NETLINK = 270
+NETLINK_ADD_MEMBERSHIP = 1
+
+NLMSG_NOOP = 1
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+
+NLM_F_REQUEST = 0x1
+NLM_F_MULTI = 0x2
+NLM_F_ACK = 0x4
+NLM_F_DUMP = 0x300
+
+NLA_F_NESTED = 0x8000
+NLA_F_NET_BYTEORDER = 0x4000
+NLA_TYPE_MASK = ~(NLA_F_NESTED | NLA_F_NET_BYTEORDER) & 0xffff
+
+# generic netlink controller
+GENL_ID_CTRL = 0x10
+CTRL_CMD_GETFAMILY = 3
+CTRL_ATTR_FAMILY_ID = 1
+CTRL_ATTR_FAMILY_NAME = 2
+CTRL_ATTR_MCAST_GROUPS = 7
+CTRL_ATTR_MCAST_GRP_NAME = 1
+CTRL_ATTR_MCAST_GRP_ID = 2
+
+# nl80211 commands
+NL80211_CMD_GET_WIPHY = 1
+NL80211_CMD_NEW_WIPHY = 3
+NL80211_CMD_GET_INTERFACE = 5
+NL80211_CMD_NEW_INTERFACE = 7
+NL80211_CMD_GET_STATION = 17
+NL80211_CMD_NEW_STATION = 19
+NL80211_CMD_GET_SCAN = 32
+NL80211_CMD_TRIGGER_SCAN = 33
+NL80211_CMD_NEW_SCAN_RESULTS = 34
+NL80211_CMD_SCAN_ABORTED = 35
+
+# nl80211 attributes
+NL80211_ATTR_WIPHY = 1
+NL80211_ATTR_WIPHY_NAME = 2
+NL80211_ATTR_IFINDEX = 3
+NL80211_ATTR_IFNAME = 4
+NL80211_ATTR_IFTYPE = 5
+NL80211_ATTR_MAC = 6
+NL80211_ATTR_STA_INFO = 21
+NL80211_ATTR_WIPHY_BANDS = 22
+NL80211_ATTR_SUPPORTED_IFTYPES = 32
+NL80211_ATTR_WIPHY_FREQ = 38
+NL80211_ATTR_MAX_NUM_SCAN_SSIDS = 43
+NL80211_ATTR_SCAN_FREQUENCIES = 44
+NL80211_ATTR_SCAN_SSIDS = 45
+NL80211_ATTR_BSS = 47
+NL80211_ATTR_SSID = 52
+NL80211_ATTR_WIPHY_TX_POWER_LEVEL = 98
+NL80211_ATTR_WDEV = 153
+NL80211_ATTR_CHANNEL_WIDTH = 159
+NL80211_ATTR_CENTER_FREQ1 = 160
+
+# nested in NL80211_ATTR_STA_INFO
+NL80211_STA_INFO_INACTIVE_TIME = 1
+NL80211_STA_INFO_RX_BYTES = 2
+NL80211_STA_INFO_TX_BYTES = 3
+NL80211_STA_INFO_SIGNAL = 7
+NL80211_STA_INFO_TX_BITRATE = 8
+NL80211_STA_INFO_RX_PACKETS = 9
+NL80211_STA_INFO_TX_PACKETS = 10
+NL80211_STA_INFO_TX_RETRIES = 11
+NL80211_STA_INFO_TX_FAILED = 12
+NL80211_STA_INFO_SIGNAL_AVG = 13
+NL80211_STA_INFO_RX_BITRATE = 14
+NL80211_STA_INFO_CONNECTED_TIME = 16
+
+# nested in NL80211_STA_INFO_*_BITRATE
+NL80211_RATE_INFO_BITRATE = 1
+NL80211_RATE_INFO_BITRATE32 = 5
+
+# nested in NL80211_ATTR_BSS
+NL80211_BSS_BSSID = 1
+NL80211_BSS_FREQUENCY = 2
+NL80211_BSS_TSF = 3
+NL80211_BSS_BEACON_INTERVAL = 4
+NL80211_BSS_CAPABILITY = 5
+NL80211_BSS_INFORMATION_ELEMENTS = 6
+NL80211_BSS_SIGNAL_MBM = 7
+NL80211_BSS_SIGNAL_UNSPEC = 8
+NL80211_BSS_STATUS = 9
+NL80211_BSS_SEEN_MS_AGO = 10
+NL80211_BSS_BEACON_IES = 11
+
+NL80211_BSS_STATUS_AUTHENTICATED = 0
+NL80211_BSS_STATUS_ASSOCIATED = 1
+NL80211_BSS_STATUS_IBSS_JOINED = 2
+
+# nested in NL80211_ATTR_WIPHY_BANDS
+NL80211_BAND_ATTR_FREQS = 1
+NL80211_FREQUENCY_ATTR_FREQ = 1
+NL80211_FREQUENCY_ATTR_DISABLED = 2
+
+WLAN_CAPABILITY_PRIVACY = 0x0010
+
+# information element ids
+WLAN_EID_SSID = 0
+WLAN_EID_DS_PARAMS = 3
+WLAN_EID_RSN = 48
+WLAN_EID_VENDOR_SPECIFIC = 221
+WPA_OUI_TYPE = b'\x00\x50\xf2\x01'
+
+# nl80211_iftype, named as iwconfig prints them
+IFTYPE_NAMES = {
+    0: "Auto",
+    1: "Ad-Hoc",
+    2: "Managed",
+    3: "Master",
+    4: "AP/VLAN",
+    5: "WDS",
+    6: "Monitor",
+    7: "Mesh Point",
+    8: "P2P-client",
+    9: "P2P-GO",
+    10: "P2P-device",
+}
+
+NLMSGHDR = struct.Struct('IHHII')
+GENLMSGHDR = struct.Struct('BBH')
+NLATTR = struct.Struct('HH')
+NLMSGERR = struct.Struct('i')
+U8 = struct.Struct('B')
+S8 = struct.Struct('b')
+U16 = struct.Struct('H')
+U32 = struct.Struct('I')
+S32 = struct.Struct('i')
+U64 = struct.Struct('Q')
+
+RECV_BUFFER_SIZE = 65536
+
+Nl80211Interface = namedtuple('Nl80211Interface', [
+    'ifindex', 'ifname', 'wiphy', 'wdev', 'iftype', 'mac', 'ssid',
+    'frequency', 'channel_width', 'center_freq1', 'txpower'])
+
+Nl80211Station = namedtuple('Nl80211Station', [
+    'mac', 'signal', 'signal_avg', 'tx_bitrate', 'rx_bitrate',
+    'rx_bytes', 'tx_bytes', 'rx_packets', 'tx_packets', 'tx_retries',
+    'tx_failed', 'inactive_time', 'connected_time'])
+
+Nl80211Bss = namedtuple('Nl80211Bss', [
+    'bssid', 'ssid', 'frequency', 'channel', 'signal', 'signal_unspec',
+    'capability', 'beacon_interval', 'seen_ms_ago', 'status', 'privacy',
+    'wpa', 'rsn'])
+
+Nl80211Wiphy = namedtuple('Nl80211Wiphy', [
+    'wiphy', 'name', 'frequencies', 'iftypes', 'max_scan_ssids'])
+
+
+def _align(length):
+    return (length + 3) & ~3
+
+
+def formatMac(data):
+    """ Returns a six byte hardware address as 'aa:bb:cc:dd:ee:ff'. """
+    return "%02x:%02x:%02x:%02x:%02x:%02x" % tuple(bytearray(data[:6]))
+
+
+def frequencyToChannel(freq):
+    """ Returns the IEEE channel number for a centre frequency in MHz. """
+    if freq == 2484:
+        return 14
+    if 2412 <= freq < 2484:
+        return (freq - 2407) // 5
+    if 5000 <= freq < 5950:
+        return (freq - 5000) // 5
+    if 5950 <= freq <= 7115:
+        return (freq - 5950) // 5
+    return 0
+
+
+def packAttr(attr_type, payload):
+    """ Returns one netlink attribute, padded to the 4 byte boundary. """
+    length = NLATTR.size + len(payload)
+    return (NLATTR.pack(length, attr_type) + payload +
+            b'\0' * (_align(length) - length))
+
+
+def packMessage(msg_type, flags, seq, cmd, attrs=b'', version=1):
+    """ Returns a complete generic netlink request. """
+    payload = GENLMSGHDR.pack(cmd, version, 0) + attrs
+    return NLMSGHDR.pack(NLMSGHDR.size + len(payload), msg_type, flags,
+                         seq, 0) + payload
+
+
+def parseMessages(data):
+    """ Yields (type, flags, seq, payload) for each netlink message in
+        data. payload is a memoryview slice, no bytes are copied.
+
+    """
+    view = memoryview(data)
+    offset = 0
+    end = len(view)
+    while offset + NLMSGHDR.size <= end:
+        length, msg_type, flags, seq, pid = NLMSGHDR.unpack_from(view, offset)
+        if length < NLMSGHDR.size:
+            break
+        yield (msg_type, flags, seq,
+               view[offset + NLMSGHDR.size:offset + length])
+        offset += _align(length)
+
+
+def parseAttrs(data):
+    """ Returns {type: memoryview} for a flat run of netlink attributes. """
+    view = memoryview(data)
+    attrs = {}
+    offset = 0
+    end = len(view)
+    while offset + NLATTR.size <= end:
+        length, attr_type = NLATTR.unpack_from(view, offset)
+        if length < NLATTR.size:
+            break
+        attrs[attr_type & NLA_TYPE_MASK] = view[offset + NLATTR.size:
+                                                offset + length]
+        offset += _align(length)
+    return attrs
+
+
+def parseNested(data):
+    """ Returns the list of attribute dicts in an array style nest. """
+    return [parseAttrs(value) for value in parseAttrs(data).values()]
+
+
+def _u8(attrs, key, default=None):
+    value = attrs.get(key)
+    return default if value is None else U8.unpack_from(value)[0]
+
+
+def _s8(attrs, key, default=None):
+    value = attrs.get(key)
+    return default if value is None else S8.unpack_from(value)[0]
+
+
+def _u16(attrs, key, default=None):
+    value = attrs.get(key)
+    return default if value is None else U16.unpack_from(value)[0]
+
+
+def _u32(attrs, key, default=None):
+    value = attrs.get(key)
+    return default if value is None else U32.unpack_from(value)[0]
+
+
+def _s32(attrs, key, default=None):
+    value = attrs.get(key)
+    return default if value is None else S32.unpack_from(value)[0]
+
+
+def _u64(attrs, key, default=None):
+    value = attrs.get(key)
+    if value is None:
+        return default
+    if len(value) >= 8:
+        return U64.unpack_from(value)[0]
+    return U32.unpack_from(value)[0]
+
+
+def _string(attrs, key, default=None):
+    value = attrs.get(key)
+    if value is None:
+        return default
+    return bytes(value).split(b'\0', 1)[0].decode('utf-8', 'replace')
+
+
+def _bitrate(data):
+    """ Returns a nested rate info attribute in Mbit/s. """
+    if data is None:
+        return None
+    rate = parseAttrs(data)
+    value = _u32(rate, NL80211_RATE_INFO_BITRATE32)
+    if value is None:
+        value = _u16(rate, NL80211_RATE_INFO_BITRATE)
+    if value is None:
+        return None
+    return value / 10.0
+
+
+def parseInterface(attrs):
+    """ Returns an Nl80211Interface for a NEW_INTERFACE message. """
+    mac = attrs.get(NL80211_ATTR_MAC)
+    txpower = _u32(attrs, NL80211_ATTR_WIPHY_TX_POWER_LEVEL)
+    return Nl80211Interface(
+        ifindex=_u32(attrs, NL80211_ATTR_IFINDEX),
+        ifname=_string(attrs, NL80211_ATTR_IFNAME),
+        wiphy=_u32(attrs, NL80211_ATTR_WIPHY),
+        wdev=_u64(attrs, NL80211_ATTR_WDEV),
+        iftype=_u32(attrs, NL80211_ATTR_IFTYPE),
+        mac=formatMac(mac) if mac is not None else None,
+        ssid=_string(attrs, NL80211_ATTR_SSID),
+        frequency=_u32(attrs, NL80211_ATTR_WIPHY_FREQ),
+        channel_width=_u32(attrs, NL80211_ATTR_CHANNEL_WIDTH),
+        center_freq1=_u32(attrs, NL80211_ATTR_CENTER_FREQ1),
+        # reported in mBm
+        txpower=txpower / 100.0 if txpower is not None else None)
+
+
+def parseStation(attrs):
+    """ Returns an Nl80211Station for a NEW_STATION message. """
+    mac = attrs.get(NL80211_ATTR_MAC)
+    info = parseAttrs(attrs.get(NL80211_ATTR_STA_INFO, b''))
+    return Nl80211Station(
+        mac=formatMac(mac) if mac is not None else None,
+        signal=_s8(info, NL80211_STA_INFO_SIGNAL),
+        signal_avg=_s8(info, NL80211_STA_INFO_SIGNAL_AVG),
+        tx_bitrate=_bitrate(info.get(NL80211_STA_INFO_TX_BITRATE)),
+        rx_bitrate=_bitrate(info.get(NL80211_STA_INFO_RX_BITRATE)),
+        rx_bytes=_u32(info, NL80211_STA_INFO_RX_BYTES),
+        tx_bytes=_u32(info, NL80211_STA_INFO_TX_BYTES),
+        rx_packets=_u32(info, NL80211_STA_INFO_RX_PACKETS),
+        tx_packets=_u32(info, NL80211_STA_INFO_TX_PACKETS),
+        tx_retries=_u32(info, NL80211_STA_INFO_TX_RETRIES),
+        tx_failed=_u32(info, NL80211_STA_INFO_TX_FAILED),
+        inactive_time=_u32(info, NL80211_STA_INFO_INACTIVE_TIME),
+        connected_time=_u32(info, NL80211_STA_INFO_CONNECTED_TIME))
+
+
+def parseIEs(data):
+    """ Returns (ssid, channel, wpa, rsn) from a run of 802.11 IEs. """
+    ssid = None
+    channel = None
+    wpa = rsn = False
+    view = memoryview(data)
+    offset = 0
+    end = len(view)
+    while offset + 2 <= end:
+        eid = view[offset]
+        length = view[offset + 1]
+        body = view[offset + 2:offset + 2 + length]
+        if eid == WLAN_EID_SSID and ssid is None:
+            ssid = bytes(body).decode('utf-8', 'replace')
+        elif eid == WLAN_EID_DS_PARAMS and length >= 1:
+            channel = body[0]
+        elif eid == WLAN_EID_RSN:
+            rsn = True
+        elif (eid == WLAN_EID_VENDOR_SPECIFIC and
+              bytes(body[:4]) == WPA_OUI_TYPE):
+            wpa = True
+        offset += 2 + length
+    return ssid, channel, wpa, rsn
+
+
+def parseBss(attrs):
+    """ Returns an Nl80211Bss for a NEW_SCAN_RESULTS message, or None. """
+    bss_data = attrs.get(NL80211_ATTR_BSS)
+    if bss_data is None:
+        return None
+    bss = parseAttrs(bss_data)
+    bssid = bss.get(NL80211_BSS_BSSID)
+    ies = bss.get(NL80211_BSS_INFORMATION_ELEMENTS)
+    if ies is None:
+        ies = bss.get(NL80211_BSS_BEACON_IES, b'')
+    ssid, channel, wpa, rsn = parseIEs(ies)
+    frequency = _u32(bss, NL80211_BSS_FREQUENCY)
+    if channel is None and frequency:
+        channel = frequencyToChannel(frequency)
+    signal = _s32(bss, NL80211_BSS_SIGNAL_MBM)
+    capability = _u16(bss, NL80211_BSS_CAPABILITY, 0)
+    return Nl80211Bss(
+        bssid=formatMac(bssid) if bssid is not None else None,
+        ssid=ssid,
+        frequency=frequency,
+        channel=channel,
+        # reported in mBm
+        signal=signal / 100.0 if signal is not None else None,
+        signal_unspec=_u8(bss, NL80211_BSS_SIGNAL_UNSPEC),
+        capability=capability,
+        beacon_interval=_u16(bss, NL80211_BSS_BEACON_INTERVAL),
+        seen_ms_ago=_u32(bss, NL80211_BSS_SEEN_MS_AGO),
+        status=_u32(bss, NL80211_BSS_STATUS),
+        privacy=bool(capability & WLAN_CAPABILITY_PRIVACY),
+        wpa=wpa,
+        rsn=rsn)
+
+
+def parseWiphy(attrs):
+    """ Returns an Nl80211Wiphy for a NEW_WIPHY message. """
+    frequencies = []
+    bands = attrs.get(NL80211_ATTR_WIPHY_BANDS)
+    if bands is not None:
+        for band in parseNested(bands):
+            freqs = band.get(NL80211_BAND_ATTR_FREQS)
+            if freqs is None:
+                continue
+            for freq in parseNested(freqs):
+                if NL80211_FREQUENCY_ATTR_DISABLED in freq:
+                    continue
+                value = _u32(freq, NL80211_FREQUENCY_ATTR_FREQ)
+                if value is not None:
+                    frequencies.append(value)
+    iftypes = attrs.get(NL80211_ATTR_SUPPORTED_IFTYPES)
+    if iftypes is not None:
+        iftypes = sorted(parseAttrs(iftypes))
+    return Nl80211Wiphy(
+        wiphy=_u32(attrs, NL80211_ATTR_WIPHY),
+        name=_string(attrs, NL80211_ATTR_WIPHY_NAME),
+        frequencies=frequencies,
+        iftypes=iftypes,
+        max_scan_ssids=_u8(attrs, NL80211_ATTR_MAX_NUM_SCAN_SSIDS))
+
+
+class Nl80211(object):
+    """ A generic netlink socket bound to the nl80211 family.
+
+        Requests are synchronous. Kernel errors are raised as IOError with
+        the negated netlink errno, like the wireless extension ioctls in
+        iwlibs.
+
+    """
+
+    def __init__(self, sock=None, timeout=5.0):
+        if sock is None:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW,
+                                 NETLINK_GENERIC)
+            sock.bind((0, 0))
+            sock.settimeout(timeout)
+        self.sock = sock
+        self.seq = int(time.time()) & 0xffffff
+        self.buff = bytearray(RECV_BUFFER_SIZE)
+        self.family_id = None
+        self.mcast_groups = {}
+        try:
+            self._resolveFamily()
+        except Exception:
+            sock.close()
+            raise
+
+    def close(self):
+        self.sock.close()
+
+    def _nextSeq(self):
+        self.seq = (self.seq + 1) & 0xffffffff
+        return self.seq
+
+    def _receive(self):
+        nbytes = self.sock.recv_into(self.buff)
+        return parseMessages(self.buff[:nbytes])
+
+    def request(self, msg_type, cmd, attrs=b'', dump=False, version=1):
+        """ Sends one request and returns the attribute dicts of all the
+            reply messages; a dump is read until NLMSG_DONE.
+
+        """
+        # dumps end with NLMSG_DONE, single requests with the ACK
+        if dump:
+            flags = NLM_F_REQUEST | NLM_F_DUMP
+        else:
+            flags = NLM_F_REQUEST | NLM_F_ACK
+        seq = self._nextSeq()
+        self.sock.send(packMessage(msg_type, flags, seq, cmd, attrs,
+                                   version))
+        replies = []
+        while True:
+            for reply_type, reply_flags, reply_seq, payload in \
+                    self._receive():
+                if reply_seq != seq and reply_seq != 0:
+                    # late answer to an earlier, abandoned request
+                    continue
+                if reply_type == NLMSG_DONE:
+                    return replies
+                if reply_type == NLMSG_ERROR:
+                    error = -NLMSGERR.unpack_from(payload)[0]
+                    if error:
+                        raise IOError(error, os.strerror(error))
+                    return replies
+                if reply_type == NLMSG_NOOP:
+                    continue
+                replies.append(parseAttrs(payload[GENLMSGHDR.size:]))
+
+    def _resolveFamily(self):
+        attrs = packAttr(CTRL_ATTR_FAMILY_NAME, b'nl80211\0')
+        for reply in self.request(GENL_ID_CTRL, CTRL_CMD_GETFAMILY, attrs):
+            self.family_id = _u16(reply, CTRL_ATTR_FAMILY_ID)
+            groups = reply.get(CTRL_ATTR_MCAST_GROUPS)
+            if groups is not None:
+                for group in parseNested(groups):
+                    name = _string(group, CTRL_ATTR_MCAST_GRP_NAME)
+                    self.mcast_groups[name] = _u32(group,
+                                                   CTRL_ATTR_MCAST_GRP_ID)
+        if self.family_id is None:
+            raise IOError(errno.ENOENT, "nl80211 family not found")
+
+    def _ifindexAttr(self, ifname):
+        return packAttr(NL80211_ATTR_IFINDEX,
+                        U32.pack(socket.if_nametoindex(ifname)))
+
+    def getInterfaces(self):
+        """ Returns an Nl80211Interface for every wireless interface. """
+        return [parseInterface(reply) for reply in self.request(
+            self.family_id, NL80211_CMD_GET_INTERFACE, dump=True)]
+
+    def getInterface(self, ifname):
+        """ Returns the Nl80211Interface of ifname. """
+        replies = self.request(self.family_id, NL80211_CMD_GET_INTERFACE,
+                               self._ifindexAttr(ifname))
+        if not replies:
+            raise IOError(errno.ENODEV, os.strerror(errno.ENODEV))
+        return parseInterface(replies[0])
+
+    def getStations(self, ifname):
+        """ Returns the Nl80211Station list of ifname; in managed mode
+            that is the access point we are associated with.
+
+        """
+        return [parseStation(reply) for reply in self.request(
+            self.family_id, NL80211_CMD_GET_STATION,
+            self._ifindexAttr(ifname), dump=True)]
+
+    def getScan(self, ifname):
+        """ Returns the cached scan results of ifname as Nl80211Bss. """
+        results = []
+        for reply in self.request(self.family_id, NL80211_CMD_GET_SCAN,
+                                  self._ifindexAttr(ifname), dump=True):
+            bss = parseBss(reply)
+            if bss is not None:
+                results.append(bss)
+        return results
+
+    def triggerScan(self, ifname, ssids=None, frequencies=None):
+        """ Asks the driver to start a scan. ssids lists names to probe
+            for (hidden networks); the wildcard SSID is always included.
+
+        """
+        attrs = self._ifindexAttr(ifname)
+        probe = [packAttr(0, b'')]
+        for index, ssid in enumerate(ssids or (), 1):
+            if not isinstance(ssid, bytes):
+                ssid = ssid.encode('utf-8')
+            probe.append(packAttr(index, ssid))
+        attrs += packAttr(NL80211_ATTR_SCAN_SSIDS | NLA_F_NESTED,
+                          b''.join(probe))
+        if frequencies:
+            attrs += packAttr(
+                NL80211_ATTR_SCAN_FREQUENCIES | NLA_F_NESTED,
+                b''.join(packAttr(index, U32.pack(freq))
+                         for index, freq in enumerate(frequencies)))
+        self.request(self.family_id, NL80211_CMD_TRIGGER_SCAN, attrs)
+
+    def scan(self, ifname, ssids=None, frequencies=None, timeout=15.0):
+        """ Triggers a scan, waits for the kernel to announce its results
+            on the "scan" multicast group and returns them (see getScan).
+
+            EBUSY from the trigger means another scan is already running;
+            its results are awaited the same way.
+
+        """
+        group = self.mcast_groups.get('scan')
+        ifindex = socket.if_nametoindex(ifname)
+        listener = None
+        if group is not None and self.sock.fileno() >= 0:
+            listener = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW,
+                                     NETLINK_GENERIC)
+            listener.bind((0, 0))
+            listener.setsockopt(SOL_NETLINK, NETLINK_ADD_MEMBERSHIP, group)
+        try:
+            try:
+                self.triggerScan(ifname, ssids, frequencies)
+            except IOError as e:
+                if e.args[0] != errno.EBUSY:
+                    raise
+            if listener is not None:
+                self._waitScan(listener, ifindex, timeout)
+        finally:
+            if listener is not None:
+                listener.close()
+        return self.getScan(ifname)
+
+    def _waitScan(self, listener, ifindex, timeout):
+        deadline = time.time() + timeout
+        buff = bytearray(RECV_BUFFER_SIZE)
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise IOError(errno.ETIMEDOUT, "scan timed out")
+            readable = select.select([listener], [], [], remaining)[0]
+            if not readable:
+                continue
+            nbytes = listener.recv_into(buff)
+            for msg_type, flags, seq, payload in parseMessages(buff[:nbytes]):
+                if msg_type != self.family_id:
+                    continue
+                cmd = payload[0]
+                attrs = parseAttrs(payload[GENLMSGHDR.size:])
+                if _u32(attrs, NL80211_ATTR_IFINDEX) != ifindex:
+                    continue
+                if cmd == NL80211_CMD_NEW_SCAN_RESULTS:
+                    return
+                if cmd == NL80211_CMD_SCAN_ABORTED:
+                    raise IOError(errno.ECANCELED, "scan aborted")
+
+    def getWiphys(self):
+        """ Returns an Nl80211Wiphy for every wireless phy. """
+        return [parseWiphy(reply) for reply in self.request(
+            self.family_id, NL80211_CMD_GET_WIPHY, dump=True)]
+
+    def getWiphy(self, wiphy):
+        """ Returns the Nl80211Wiphy with index wiphy. """
+        replies = self.request(self.family_id, NL80211_CMD_GET_WIPHY,
+                               packAttr(NL80211_ATTR_WIPHY, U32.pack(wiphy)))
+        if not replies:
+            raise IOError(errno.ENODEV, os.strerror(errno.ENODEV))
+        return parseWiphy(replies[0])
+
+
+# errors of Nl80211() meaning the kernel has no nl80211 at all: no
+# generic netlink, or no nl80211 family registered
+NL_MISSING_ERRNOS = (errno.EPROTONOSUPPORT, errno.ENOENT)
+
+# seconds before another attempt after any other failure
+NL_RETRY = 30.0
+
+_nl_local = threading.local()
+# [missing, time of the next attempt]
+_nl_unavailable = [False, 0.0]
+
+
+def getNl80211():
+    """ Returns this thread's Nl80211 client, or None where the kernel has
+        no nl80211 (wireless extension only drivers, old kernels). A
+        missing nl80211 is remembered for good so callers go straight to
+        their fallback; other failures are retried after NL_RETRY.
+
+    """
+    client = getattr(_nl_local, 'client', None)
+    if client is None:
+        missing, retry_at = _nl_unavailable
+        if missing or time.time() < retry_at:
+            return None
+        try:
+            client = Nl80211()
+        except AttributeError as e:
+            # no socket.AF_NETLINK on this platform
+            print("[nl80211] Not available: {}".format(e))
+            _nl_unavailable[0] = True
+            return None
+        except (IOError, OSError) as e:
+            if e.errno in NL_MISSING_ERRNOS:
+                print("[nl80211] Not available: {}".format(e))
+                _nl_unavailable[0] = True
+            else:
+                print("[nl80211] Failed, retrying in {:.0f} s: {}".format(
+                    NL_RETRY, e))
+                _nl_unavailable[1] = time.time() + NL_RETRY
+            return None
+        _nl_local.client = client
+    return client
+
+
+def resetNl80211():
+    """ Drops this thread's client, e.g. after its socket failed. """
+    client = getattr(_nl_local, 'client', None)
+    _nl_local.client = None
+    if client is not None:
+        try:
+            client.close()
+        except Exception:
+            pass
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+from twisted.internet import reactor
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+# bounds of a task's interval in seconds
+MIN_INTERVAL = 0.25
+MAX_INTERVAL = 10.0
+
+# an unchanged reading stretches the interval by this factor
+BACKOFF = 1.5
+
+# tasks due this close to each other (s) run in the same wakeup
+COALESCE = 0.05
+
+
+def readingChanged(old, new, tolerance):
+    """Numbers differ by more than tolerance, tuples/lists in any item,
+    anything else when unequal"""
+    if isinstance(new, (int, float)) and isinstance(old, (int, float)):
+        return abs(new - old) > tolerance
+    if isinstance(new, (tuple, list)) and isinstance(old, (tuple, list)) \
+            and len(new) == len(old):
+        return any(readingChanged(a, b, tolerance) for a, b in zip(old, new))
+    return old != new
+
+
+class PollTask(object):
+    """One periodic job of a PollScheduler
+
+    The callback returns a reading of what it polled (None when it has
+    none yet, e.g. because it started a read in a thread; that one calls
+    update() with the reading later). A reading that changed drops the
+    interval to min_interval, an unchanged one stretches it by BACKOFF
+    up to max_interval.
+    """
+
+    def __init__(self, scheduler, callback, interval, min_interval,
+                 max_interval, tolerance, name):
+        self.scheduler = scheduler
+        self.callback = callback
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min(max(interval, min_interval), max_interval)
+        self.tolerance = tolerance
+        self.name = name or getattr(callback, '__name__', 'task')
+        self.reading = None
+        self.due = scheduler.now() + self.interval
+        self.paused = False
+        self.cancelled = False
+        self.runs = 0
+
+    def isActive(self):
+        return not (self.paused or self.cancelled)
+
+    def currentInterval(self):
+        if self.scheduler.isBusy():
+            return self.min_interval
+        return self.interval
+
+    def run(self, now):
+        self.runs += 1
+        try:
+            reading = self.callback()
+        except Exception as e:
+            print("[PollScheduler] {} failed: {}".format(self.name, e))
+            reading = None
+        self.adapt(reading)
+        self.due = now + self.currentInterval()
+
+    def adapt(self, reading):
+        if reading is None:
+            return
+        if self.reading is not None:
+            if readingChanged(self.reading, reading, self.tolerance):
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * BACKOFF,
+                                    self.max_interval)
+        self.reading = reading
+
+    def update(self, reading):
+        """Reading of a poll that finished after the callback returned"""
+        if self.cancelled:
+            return
+        self.adapt(reading)
+        self.due = self.scheduler.now() + self.currentInterval()
+        self.scheduler.reschedule()
+
+    def poke(self):
+        """Something happened: run now and poll fast again"""
+        if self.cancelled:
+            return
+        self.interval = self.min_interval
+        self.due = self.scheduler.now()
+        self.scheduler.reschedule()
+
+    def pause(self):
+        self.paused = True
+        self.scheduler.reschedule()
+
+    def resume(self):
+        """Runs at once, the screen shows stale values otherwise"""
+        if self.cancelled or not self.paused:
+            return
+        self.paused = False
+        self.due = self.scheduler.now()
+        self.scheduler.reschedule()
+
+    def cancel(self):
+        self.cancelled = True
+        self.scheduler.remove(self)
+
+
+class PollScheduler(object):
+    """Runs the periodic refresh work of every screen from one
+    reactor.callLater, set for the task due first
+
+    Intervals adapt per task (PollTask). Tasks registered with a screen
+    pause when it is hidden, e.g. under a MessageBox, resume when it is
+    shown again and go away when it closes, so with nothing on screen
+    there is no wakeup at all. While busy (a connection attempt), every
+    task polls at its min_interval. clock is the IReactorTime timing the
+    tasks, the reactor by default.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or reactor
+        self.tasks = []
+        self.call = None
+        self.busy = 0
+        self.stats = dict(wakeups=0, runs=0)
+
+    def register(self, callback, interval=None, min_interval=MIN_INTERVAL,
+                 max_interval=MAX_INTERVAL, screen=None, tolerance=0,
+                 name=None):
+        task = PollTask(self, callback,
+                        min_interval if interval is None else interval,
+                        min_interval, max_interval, tolerance, name)
+        if screen is not None:
+            screen.onShow.append(task.resume)
+            screen.onHide.append(task.pause)
+            screen.onClose.append(task.cancel)
+        self.tasks.append(task)
+        self.reschedule()
+        return task
+
+    def remove(self, task):
+        if task in self.tasks:
+            self.tasks.remove(task)
+        self.reschedule()
+
+    def now(self):
+        return self.clock.seconds()
+
+    def isBusy(self):
+        return self.busy > 0
+
+    def setBusy(self, busy):
+        """Counted: every setBusy(True) needs its setBusy(False)"""
+        self.busy = max(0, self.busy + (1 if busy else -1))
+        if self.busy:
+            now = self.now()
+            for task in self.tasks:
+                task.due = min(task.due, now + task.min_interval)
+        self.reschedule()
+
+    def reschedule(self):
+        active = [task.due for task in self.tasks if task.isActive()]
+        due = min(active) if active else None
+        if self.call is not None and self.call.active():
+            if due is not None and \
+                    abs(self.call.getTime() - due) < COALESCE / 2:
+                return
+            self.call.cancel()
+        self.call = None
+        if due is not None:
+            self.call = self.clock.callLater(max(0.0, due - self.now()),
+                                             self.wakeup)
+
+    def wakeup(self):
+        self.call = None
+        self.stats['wakeups'] += 1
+        now = self.now()
+        for task in list(self.tasks):
+            if task.isActive() and task.due <= now + COALESCE:
+                self.stats['runs'] += 1
+                task.run(now)
+        self.reschedule()
+
+
+_scheduler = None
+
+
+def getPollScheduler():
+    """Returns the plugin wide PollScheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PollScheduler()
+    return _scheduler
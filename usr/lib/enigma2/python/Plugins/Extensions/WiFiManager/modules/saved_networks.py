@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import time
+from json import dumps, load, loads
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+SAVED_NETWORKS_FILE = "/etc/wifi_saved_networks.json"
+JOURNAL_SUFFIX = ".journal"
+
+# journal lines replayed on load before they are folded into the file
+COMPACT_AFTER = 32
+
+# The file keeps the format older versions wrote, a JSON object
+# {essid: {'password', 'encryption', 'timestamp', 'interface', ...}}.
+# Changes made since the last compaction are appended to <file>.journal,
+# one JSON object per line:
+#   {"op": "put", "essid": "x", "entry": {...}}
+#   {"op": "forget", "essid": "x"}
+
+
+def _fsync(f):
+    f.flush()
+    try:
+        os.fsync(f.fileno())
+    except OSError:
+        pass
+
+
+def writeFileAtomic(path, text):
+    """Writes text to path through a temporary file and rename(), so a
+    power cut leaves either the old or the new file; keeps the mode of
+    the file it replaces"""
+    temp = path + ".tmp"
+    with open(temp, 'w') as f:
+        f.write(text)
+        _fsync(f)
+    try:
+        os.chmod(temp, os.stat(path).st_mode & 0o7777)
+    except OSError:
+        pass
+    os.rename(temp, path)
+
+
+def writeJsonAtomic(path, data, indent=2):
+    writeFileAtomic(path, dumps(data, indent=indent))
+
+
+class SavedNetworkStore(object):
+    """Saved networks, indexed in memory by ESSID and BSSID
+
+    The file is parsed once; lookups are dict accesses. put() and
+    forget() append one line to the journal instead of rewriting the
+    file, which is replaced atomically once COMPACT_AFTER changes piled
+    up. One store per file is shared by every screen (getSavedNetworkStore),
+    and a lock makes it usable from the connect worker threads.
+    """
+
+    def __init__(self, path=SAVED_NETWORKS_FILE, compact_after=COMPACT_AFTER):
+        self.path = path
+        self.journal = path + JOURNAL_SUFFIX
+        self.compact_after = compact_after
+        self.lock = threading.RLock()
+        self.networks = {}
+        self.bssids = {}
+        self.journal_lines = 0
+        self.stats = dict(loads=0, writes=0, compactions=0)
+        self.load()
+
+    def load(self):
+        """(Re)reads the file and replays the journal"""
+        with self.lock:
+            networks = {}
+            try:
+                with open(self.path, 'r') as f:
+                    networks = load(f) or {}
+            except (IOError, ValueError) as e:
+                if os.path.exists(self.path):
+                    print("[SavedNetworks] Error reading {}: {}".format(
+                        self.path, e))
+            self.networks = dict((essid, dict(entry))
+                                 for essid, entry in networks.items()
+                                 if isinstance(entry, dict))
+            self.journal_lines, torn = self._replay()
+            self._reindex()
+            self.stats['loads'] += 1
+            if torn:
+                # the next append would continue the torn line
+                try:
+                    self.compact()
+                except (IOError, OSError) as e:
+                    print("[SavedNetworks] Error compacting {}: {}".format(
+                        self.path, e))
+
+    def _replay(self):
+        count = 0
+        torn = False
+        try:
+            with open(self.journal, 'r') as f:
+                for line in f:
+                    try:
+                        record = loads(line)
+                    except ValueError:
+                        # torn last line of an interrupted append
+                        torn = True
+                        continue
+                    self._apply(record)
+                    count += 1
+        except IOError:
+            pass
+        return count, torn
+
+    def _apply(self, record):
+        essid = record.get('essid')
+        if record.get('op') == 'put':
+            self.networks[essid] = record.get('entry', {})
+        elif record.get('op') == 'forget':
+            self.networks.pop(essid, None)
+
+    def _reindex(self):
+        self.bssids = {}
+        for essid, entry in self.networks.items():
+            bssid = entry.get('bssid')
+            if bssid:
+                self.bssids[bssid.lower()] = essid
+
+    def _append(self, record):
+        with open(self.journal, 'a') as f:
+            f.write(dumps(record, separators=(',', ':')) + '\n')
+            _fsync(f)
+        self.journal_lines += 1
+        self.stats['writes'] += 1
+        if self.journal_lines >= self.compact_after:
+            self.compact()
+
+    def compact(self):
+        """Folds the journal into the file"""
+        with self.lock:
+            writeJsonAtomic(self.path, self.networks)
+            try:
+                os.remove(self.journal)
+            except OSError:
+                pass
+            self.journal_lines = 0
+            self.stats['compactions'] += 1
+
+    def put(self, essid, entry):
+        """Stores entry (a dict) for essid, replacing the old one"""
+        entry = dict(entry)
+        entry.setdefault('timestamp', time.time())
+        with self.lock:
+            old = self.networks.get(essid)
+            if old is not None and old.get('bssid'):
+                self.bssids.pop(old['bssid'].lower(), None)
+            self.networks[essid] = entry
+            if entry.get('bssid'):
+                self.bssids[entry['bssid'].lower()] = essid
+            self._append({'op': 'put', 'essid': essid, 'entry': entry})
+
+    def forget(self, essid):
+        """Removes essid; returns False if it was not saved"""
+        with self.lock:
+            entry = self.networks.pop(essid, None)
+            if entry is None:
+                return False
+            if entry.get('bssid'):
+                self.bssids.pop(entry['bssid'].lower(), None)
+            self._append({'op': 'forget', 'essid': essid})
+            return True
+
+    def update(self, networks):
+        """Stores several {essid: entry} at once"""
+        with self.lock:
+            for essid, entry in networks.items():
+                self.put(essid, entry)
+
+    def get(self, essid, default=None):
+        return self.networks.get(essid, default)
+
+    def getByBssid(self, bssid):
+        """Returns (essid, entry) saved for bssid, or (None, None)"""
+        essid = self.bssids.get(bssid.lower()) if bssid else None
+        if essid is None:
+            return None, None
+        return essid, self.networks.get(essid)
+
+    def getPassword(self, essid):
+        return self.networks.get(essid, {}).get('password', "")
+
+    def essids(self):
+        return list(self.networks)
+
+    def asDict(self):
+        """A copy of all entries, {essid: entry}"""
+        with self.lock:
+            return dict((essid, dict(entry))
+                        for essid, entry in self.networks.items())
+
+    def __contains__(self, essid):
+        return essid in self.networks
+
+    def __len__(self):
+        return len(self.networks)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def getSavedNetworkStore(path=SAVED_NETWORKS_FILE):
+    """Returns the shared SavedNetworkStore of path"""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = SavedNetworkStore(path)
+        return store
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+import re
+
+from .nl80211 import frequencyToChannel
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+# Every parser returns the same record, a plain dict with only the keys
+# that were seen in the output:
+#   bssid        'aa:bb:cc:dd:ee:ff' (lower case)
+#   essid        network name, '' for hidden networks
+#   mode         'Master', 'Ad-Hoc', ...
+#   frequency    MHz (int)
+#   channel      int
+#   signal       dBm (int)
+#   quality      percent (float), from the driver or derived from signal
+#   quality_percent  same value, the name the screens read
+#   encryption   bool
+#   security     'WPA2', 'WPA', 'WEP' when known
+
+FORMAT_IW = 'iw'
+FORMAT_IWLIST = 'iwlist'
+
+_MAC = re.compile(r'([0-9A-Fa-f]{2}(?::[0-9A-Fa-f]{2}){5})')
+_NUMBER = re.compile(r'(-?\d+(?:\.\d+)?)')
+_IWLIST_ESSID = re.compile(r'ESSID:\s*"(.*)"')
+_IWLIST_QUALITY = re.compile(r'Quality[=:](\d+)/(\d+)')
+_IWLIST_LEVEL = re.compile(r'Signal level[=:](-?\d+)\s*(dBm|/\d+)?')
+_IWLIST_FREQUENCY = re.compile(r'Frequency[=:]\s*([\d.]+)\s*(GHz|MHz)?'
+                               r'(?:.*?Channel\s*(\d+))?')
+
+
+def _setSignal(network, dbm):
+    network['signal'] = dbm
+    if 'quality' not in network:
+        # iw reports no quality, use the usual -100..-50 dBm mapping
+        percentage = float(min(100, max(0, 2 * (dbm + 100))))
+        network['quality'] = percentage
+        network['quality_percent'] = percentage
+
+
+def _essid(text):
+    # hidden networks show up as "\x00\x00.." (escaped by iw and iwlist)
+    return text.replace('\\x00', '').strip()
+
+
+def _setFrequency(network, mhz):
+    network['frequency'] = mhz
+    if 'channel' not in network:
+        channel = frequencyToChannel(mhz)
+        if channel:
+            network['channel'] = channel
+
+
+def makeNetwork(bssid, essid=None, signal=None, frequency=None):
+    """Builds a record from values read elsewhere (nl80211, ioctls);
+    signal in dBm, frequency in MHz"""
+    network = {'bssid': bssid.lower()}
+    if essid is not None:
+        network['essid'] = _essid(essid)
+    if frequency:
+        _setFrequency(network, int(frequency))
+    if signal is not None:
+        _setSignal(network, int(round(signal)))
+    return network
+
+
+# iwlist: "Cell 01 - Address: ..", 'ESSID:"x"', "Quality=40/70  Signal
+# level=-70 dBm", "Signal level=-70 dBm", "Frequency:2.437 GHz (Channel 6)"
+
+def _iwlistEssid(network, line):
+    match = _IWLIST_ESSID.search(line)
+    if match:
+        network['essid'] = _essid(match.group(1))
+
+
+def _iwlistMode(network, line):
+    network['mode'] = line[5:].strip().split(None, 1)[0] \
+        if len(line) > 5 else ''
+
+
+def _iwlistQuality(network, line):
+    match = _IWLIST_QUALITY.search(line)
+    if match:
+        quality, maximum = int(match.group(1)), int(match.group(2))
+        # 0/100 from drivers that only fill the level, derive it from that
+        if quality and maximum:
+            percentage = min(100.0, quality * 100.0 / maximum)
+            network['quality'] = percentage
+            network['quality_percent'] = percentage
+    _iwlistLevel(network, line)
+
+
+def _iwlistLevel(network, line):
+    match = _IWLIST_LEVEL.search(line)
+    if match is None:
+        return
+    level = int(match.group(1))
+    # "Signal level=60/100" is relative, and a bare 0 means no reading
+    if match.group(2) == 'dBm' or level < 0:
+        _setSignal(network, level)
+
+
+def _iwlistFrequency(network, line):
+    match = _IWLIST_FREQUENCY.search(line)
+    if not match:
+        return
+    if match.group(3):
+        network['channel'] = int(match.group(3))
+    value = float(match.group(1))
+    if match.group(2) == 'GHz':
+        _setFrequency(network, int(round(value * 1000)))
+    elif match.group(2) == 'MHz' or value > 1000:
+        _setFrequency(network, int(value))
+    elif 'channel' not in network:
+        # some drivers print the channel as the frequency
+        network['channel'] = int(value)
+
+
+def _iwlistChannel(network, line):
+    match = _NUMBER.search(line)
+    if match:
+        network['channel'] = int(float(match.group(1)))
+
+
+def _iwlistEncryption(network, line):
+    network['encryption'] = line.rstrip().endswith('on')
+
+
+def _iwlistIE(network, line):
+    if 'WPA2' in line or '802.11i' in line:
+        network['security'] = 'WPA2'
+    elif 'WPA' in line and network.get('security') != 'WPA2':
+        network['security'] = 'WPA'
+
+
+# iw: "BSS aa:..(on wlan0)", "SSID: x", "signal: -70.00 dBm", "freq: 2437",
+# "DS Parameter set: channel 6", "capability: ESS Privacy ..", "RSN:"
+
+def _iwSsid(network, line):
+    network['essid'] = _essid(line[5:])
+
+
+def _iwSignal(network, line):
+    match = _NUMBER.search(line)
+    if match:
+        _setSignal(network, int(round(float(match.group(1)))))
+
+
+def _iwFrequency(network, line):
+    match = _NUMBER.search(line)
+    if match:
+        _setFrequency(network, int(float(match.group(1))))
+
+
+def _iwChannel(network, line):
+    # "DS Parameter set: channel 6" and "* primary channel: 36"
+    match = _NUMBER.search(line)
+    if match:
+        network['channel'] = int(match.group(1))
+
+
+def _iwCapability(network, line):
+    network['encryption'] = 'Privacy' in line
+    if 'IBSS' in line:
+        network['mode'] = 'Ad-Hoc'
+    elif 'ESS' in line:
+        network['mode'] = 'Master'
+    if network['encryption'] and 'security' not in network:
+        network['security'] = 'WEP'
+
+
+def _iwRsn(network, line):
+    network['security'] = 'WPA2'
+    network['encryption'] = True
+
+
+def _iwWpa(network, line):
+    if network.get('security') != 'WPA2':
+        network['security'] = 'WPA'
+    network['encryption'] = True
+
+
+# first word of the line -> handler; None marks the line that opens a
+# new record (it has to carry the BSSID, iw also prints "BSS Load:")
+IWLIST_HANDLERS = {
+    'Cell': None,
+    'ESSID': _iwlistEssid,
+    'Mode': _iwlistMode,
+    'Quality': _iwlistQuality,
+    'Signal': _iwlistLevel,
+    'Frequency': _iwlistFrequency,
+    'Channel': _iwlistChannel,
+    'Encryption': _iwlistEncryption,
+    'IE': _iwlistIE,
+}
+
+IW_HANDLERS = {
+    'BSS': None,
+    'SSID': _iwSsid,
+    'signal': _iwSignal,
+    'freq': _iwFrequency,
+    'DS': _iwChannel,
+    'primary': _iwChannel,
+    'capability': _iwCapability,
+    'RSN': _iwRsn,
+    'WPA': _iwWpa,
+}
+
+_HANDLERS = {FORMAT_IW: IW_HANDLERS, FORMAT_IWLIST: IWLIST_HANDLERS}
+_TOKEN = re.compile(r'\s*\*?\s*([A-Za-z]+)')
+
+
+def detectFormat(output):
+    """Returns FORMAT_IW or FORMAT_IWLIST for scan text, None if unknown"""
+    for line in output.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('BSS '):
+            return FORMAT_IW
+        if line.startswith('Cell ') or 'Scan completed' in line or \
+                'No scan results' in line:
+            return FORMAT_IWLIST
+    return None
+
+
+class ScanParser(object):
+    """Incremental parser for `iw dev X scan` and `iwlist X scan` text
+
+    Lines are dispatched on their first token, so each line costs one
+    dict lookup and at most one precompiled pattern. feed() accepts
+    chunks or single lines and returns the records completed so far;
+    close() returns the last one.
+    """
+
+    def __init__(self, output_format=None):
+        self.format = output_format
+        self.handlers = _HANDLERS.get(output_format)
+        self.network = None
+        self.pending = ''
+        self.count = 0
+
+    def feed(self, data):
+        lines = (self.pending + data).split('\n')
+        self.pending = lines.pop()
+        done = []
+        for line in lines:
+            network = self.feedLine(line)
+            if network is not None:
+                done.append(network)
+        return done
+
+    def feedLine(self, line):
+        """Parses one line; returns the record it closed, if any"""
+        match = _TOKEN.match(line)
+        if match is None:
+            return None
+        token = match.group(1)
+        if self.handlers is None:
+            if token == 'BSS':
+                self.format = FORMAT_IW
+            elif token == 'Cell':
+                self.format = FORMAT_IWLIST
+            else:
+                return None
+            self.handlers = _HANDLERS[self.format]
+        if token not in self.handlers:
+            return None
+        handler = self.handlers[token]
+        if handler is None:
+            mac = _MAC.search(line)
+            if mac is None:
+                return None
+            finished = self.network
+            self.network = {'bssid': mac.group(1).lower()}
+            if finished is not None:
+                self.count += 1
+            return finished
+        if self.network is not None:
+            handler(self.network, line.strip())
+        return None
+
+    def close(self):
+        done = []
+        if self.pending:
+            network = self.feedLine(self.pending)
+            self.pending = ''
+            if network is not None:
+                done.append(network)
+        if self.network is not None:
+            done.append(self.network)
+            self.count += 1
+            self.network = None
+        return done
+
+
+def parseScan(output, output_format=None):
+    """Parses scan text into network records; output_format defaults to
+    detectFormat(output)"""
+    if output_format is None:
+        output_format = detectFormat(output)
+    parser = ScanParser(output_format)
+    networks = parser.feed(output)
+    networks.extend(parser.close())
+    return networks
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+
+import errno
+import time
+
+from twisted.internet import reactor, threads
+from twisted.internet.defer import Deferred
+
+from .iwlibs import (
+    Iwscan,
+    triggerScan,
+    levelToDbm,
+    IW_ENCODE_DISABLED
+)
+from .scan_parser import makeNetwork
+from .wireless_events import getWirelessEvents, EVENT_SCAN_DONE
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+# first readiness poll after the trigger, and the backoff ceiling (seconds)
+POLL_FIRST = 0.25
+POLL_MAX = 1.0
+POLL_BACKOFF = 1.5
+SCAN_TIMEOUT = 15.0
+# partial results of a streamed scan are handed out at most this often
+PROGRESS_INTERVAL = 0.25
+
+# trigger errors that still leave results worth reading
+TRIGGER_SOFT_ERRORS = (errno.EBUSY, errno.EPERM, errno.EACCES)
+
+
+def cellToNetwork(cell):
+    """Convert an Iwscanresult into a scan_parser network record, the
+    same record the iwlist/iw fallback gives"""
+    quality = cell.quality
+    frequency = channel = None
+    if cell.frequency is not None:
+        value = cell.frequency.getFrequency()
+        if value >= 1000000:
+            # Hz, records carry MHz and the derived channel
+            frequency = value // 1000000
+        elif value > 0:
+            # the driver sent a channel number
+            channel = value
+    network = makeNetwork(cell.bssid, (cell.essid or '').strip('\x00'),
+                          levelToDbm(quality.siglevel, quality.updated),
+                          frequency)
+    if channel is not None:
+        network['channel'] = channel
+    network['mode'] = cell.mode
+    network['encryption'] = bool(
+        cell.encode is not None and
+        not (cell.encode.flags & IW_ENCODE_DISABLED))
+
+    max_quality = 0
+    try:
+        max_quality = cell.range.max_qual.quality
+    except AttributeError:
+        pass
+    if max_quality > 0:
+        percentage = min(100.0, quality.quality * 100.0 / max_quality)
+    else:
+        percentage = float(quality.quality)
+    # the driver's quality wins over the one derived from the signal
+    network['quality'] = percentage
+    network['quality_percent'] = percentage
+    return network
+
+
+class ScanJob(object):
+    """One in-flight scan of an interface, shared by all its waiters"""
+
+    def __init__(self, service, ifname, timeout):
+        self.service = service
+        self.ifname = ifname
+        self.timeout = timeout
+        self.waiters = []
+        self.progress = {}
+        self.partial = []
+        self.progress_call = None
+        self.reported = False
+        self.call = None
+        self.delay = POLL_FIRST
+        self.started = time.time()
+        self.scan = None
+        self.done = False
+        self.event_token = None
+
+    def start(self):
+        try:
+            triggerScan(self.ifname)
+        except IOError as e:
+            if e.args[0] not in TRIGGER_SOFT_ERRORS:
+                # no wireless extensions scanning here, use the tools path
+                print("[ScanService] Trigger failed on {}: {}".format(
+                    self.ifname, e))
+                self.fallback()
+                return
+            # EBUSY: a scan is already running, EPERM: read cached results
+        try:
+            self.scan = Iwscan(self.ifname, fullscan=False)
+        except IOError as e:
+            print("[ScanService] No range for {}: {}".format(self.ifname, e))
+            self.fallback()
+            return
+        self.call = reactor.callLater(self.delay, self.poll)
+        # the driver announces completion, read right then
+        self.event_token = getWirelessEvents().subscribe(
+            self.scan_done, (EVENT_SCAN_DONE,), self.ifname)
+
+    def scan_done(self, event):
+        if self.call is not None and self.call.active():
+            self.call.cancel()
+            self.call = None
+            self.poll()
+
+    def poll(self):
+        self.call = None
+        if self.done:
+            return
+        try:
+            ready = self.scan.readScan()
+        except IOError as e:
+            print("[ScanService] Reading scan failed on {}: {}".format(
+                self.ifname, e))
+            self.fallback()
+            return
+        except Exception as e:
+            self.fail(e)
+            return
+
+        if ready:
+            self.finish([cellToNetwork(cell) for cell in self.scan.aplist])
+        elif time.time() - self.started > self.timeout:
+            self.fail(IOError(errno.ETIMEDOUT, "Scan timeout on {}".format(
+                self.ifname)))
+        else:
+            self.delay = min(self.delay * POLL_BACKOFF, POLL_MAX)
+            self.call = reactor.callLater(self.delay, self.poll)
+
+    def fallback(self):
+        """Scan with the subprocess based tools, off the main thread"""
+        deferred = threads.deferToThread(self._streamScan)
+        deferred.addCallbacks(self.finish, self.fail)
+
+    def _streamScan(self):
+        # worker thread: hand every network to the reactor as iwlist
+        # prints it, and stop reading (killing iwlist) once abandoned
+        from .tools import scan_networks_stream
+        networks = []
+        for network in scan_networks_stream(self.ifname):
+            if self.done:
+                break
+            networks.append(network)
+            reactor.callFromThread(self.streamed, network)
+        return networks
+
+    def streamed(self, network):
+        if self.done or not self.progress:
+            return
+        self.partial.append(network)
+        if self.progress_call is None:
+            # the first network is shown right away, later ones batched
+            delay = PROGRESS_INTERVAL if self.reported else 0
+            self.progress_call = reactor.callLater(delay, self.report)
+
+    def report(self):
+        self.progress_call = None
+        self.reported = True
+        networks = list(self.partial)
+        for callback in list(self.progress.values()):
+            callback(networks)
+
+    def stop(self):
+        self.done = True
+        if self.call is not None and self.call.active():
+            self.call.cancel()
+        self.call = None
+        if self.progress_call is not None and self.progress_call.active():
+            self.progress_call.cancel()
+        self.progress_call = None
+        if self.event_token is not None:
+            getWirelessEvents().unsubscribe(self.event_token)
+            self.event_token = None
+        self.service.jobs.pop(self.ifname, None)
+
+    def finish(self, networks):
+        if self.done:
+            return
+        waiters = self.waiters
+        self.waiters = []
+        self.stop()
+        self.service.stats['completed'] += 1
+        self.service.stats['last_duration'] = time.time() - self.started
+        for deferred in waiters:
+            deferred.callback(list(networks))
+
+    def fail(self, failure):
+        if self.done:
+            return
+        waiters = self.waiters
+        self.waiters = []
+        self.stop()
+        self.service.stats['failed'] += 1
+        for deferred in waiters:
+            deferred.errback(failure)
+
+
+class ScanService(object):
+    """Runs WiFi scans from the reactor and hands results out as Deferreds
+
+    scan(ifname) triggers SIOCSIWSCAN, then polls SIOCGIWSCAN with a
+    backoff from reactor.callLater, so the main loop never blocks. Callers
+    asking for the same interface while a scan runs share that scan.
+    Cancelling a caller's Deferred only detaches that caller; the scan
+    itself stops when nobody is waiting any more. When the scan has to go
+    through iwlist, progress(networks) callbacks get the networks found so
+    far while it runs.
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self.stats = {
+            'started': 0,
+            'shared': 0,
+            'cancelled': 0,
+            'completed': 0,
+            'failed': 0,
+            'last_duration': 0.0,
+        }
+
+    def scan(self, ifname, timeout=SCAN_TIMEOUT, progress=None):
+        """Returns a Deferred firing with a list of network dicts"""
+        job = self.jobs.get(ifname)
+        if job is None:
+            job = ScanJob(self, ifname, timeout)
+            self.jobs[ifname] = job
+            self.stats['started'] += 1
+            start = True
+        else:
+            self.stats['shared'] += 1
+            start = False
+
+        deferred = Deferred(lambda d: self._cancel(job, d))
+        job.waiters.append(deferred)
+        if progress is not None:
+            job.progress[deferred] = progress
+        if start:
+            job.start()
+        return deferred
+
+    def isScanning(self, ifname):
+        return ifname in self.jobs
+
+    def _cancel(self, job, deferred):
+        self.stats['cancelled'] += 1
+        if deferred in job.waiters:
+            job.waiters.remove(deferred)
+        job.progress.pop(deferred, None)
+        if not job.waiters:
+            job.stop()
+
+
+_scan_service = None
+
+
+def getScanService():
+    """Returns the plugin wide ScanService"""
+    global _scan_service
+    if _scan_service is None:
+        _scan_service = ScanService()
+    return _scan_service
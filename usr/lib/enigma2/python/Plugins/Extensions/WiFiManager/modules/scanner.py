@@ -3,6 +3,8 @@
 import subprocess
 from re import search
 from enigma import eTimer
+from twisted.internet import threads
+from twisted.internet.defer import CancelledError
 
 from Screens.Screen import Screen
 from Components.ActionMap import ActionMap
@@ -11,13 +13,16 @@ from Components.ScrollLabel import ScrollLabel
 
 from . import _
 # from .iwlibs import getWNICnames, Wireless
+from .scan_service import getScanService
+from .scan_parser import parseScan, FORMAT_IWLIST
 from .tools import (
     get_wifi_interfaces,
     is_interface_up,
     ensure_interface_up,
     parse_iwlist_detailed,
     format_signal_quality,
-    get_interface_info
+    get_interface_info,
+    command_output
 )
 
 """
@@ -106,6 +111,8 @@ class WiFiScanner(Screen):
 
         self.detailed_view = False
         self.last_scan_results = []
+        self.scan_deferred = None
+        self.onClose.append(self.cancel_scan)
         self.setTitle(_("WiFi Scanner"))
         self.start_scan()
 
@@ -127,43 +134,117 @@ class WiFiScanner(Screen):
 
     def perform_scan(self):
         try:
-            networks = []
             print("[WiFiScanner] Starting scan process...")
 
             wifi_ifaces = get_wifi_interfaces()
             if not wifi_ifaces:
-                networks.append(_("No WiFi interfaces found\n"))
+                networks = [_("No WiFi interfaces found\n")]
                 networks.extend(self.get_detailed_network_status())
                 self.last_scan_results = networks
                 self.display_networks(networks)
                 return
 
-            # FIRST ATTEMPT: use pythonwifi if available
-            if PYTHONWIFI_AVAILABLE:
-                networks.extend(self.scan_with_pythonwifi(wifi_ifaces))
-            else:
-                networks.append(
-                    _("\n[INFO] pythonwifi not available, using iwlist\n"))
-
-            # SECOND ATTEMPT: use iwlist as fallback
-            if not networks or len(networks) <= 2:
-                networks.extend(self.scan_with_iwlist(wifi_ifaces))
-
-            # THIRD ATTEMPT: if everything fails, show diagnostics
-
-            # If no scan worked, show diagnostic info
-            if len(networks) <= 3:  # Only headers and few results
-                print("[WiFiScanner] Scan failed, showing diagnostics")
-                networks.extend(self.get_detailed_network_status())
-
-            self.last_scan_results = networks
-            self.display_networks(networks)
+            # Scan without blocking the main loop, see ScanService
+            self.cancel_scan()
+            self.scan_deferred = getScanService().scan(
+                wifi_ifaces[0], progress=self.scan_progress)
+            self.scan_deferred.addCallback(self.scan_finished)
+            self.scan_deferred.addErrback(self.scan_failed, wifi_ifaces)
 
         except Exception as e:
             error_msg = _("Scan error: {}\n").format(str(e))
             print(f"[WiFiScanner] {error_msg}")
             self["scan_output"].setText(_("Scan error: ") + str(e))
 
+    def cancel_scan(self):
+        if self.scan_deferred is not None:
+            deferred = self.scan_deferred
+            self.scan_deferred = None
+            deferred.cancel()
+
+    def scan_progress(self, parsed_networks):
+        networks = [_("\n=== SCAN ===\n")]
+        networks.extend(self.format_networks(parsed_networks))
+        networks.append(_("   Scanning...\n"))
+        self.display_networks(networks)
+
+    def scan_finished(self, parsed_networks):
+        self.scan_deferred = None
+        print("[WiFiScanner] Scan service found {} networks".format(
+            len(parsed_networks)))
+        networks = [_("\n=== SCAN ===\n")]
+        networks.extend(self.format_networks(parsed_networks))
+        if not parsed_networks:
+            networks.append(_("   No networks found\n"))
+            networks.extend(self.get_detailed_network_status())
+        self.last_scan_results = networks
+        self.display_networks(networks)
+
+    def scan_failed(self, failure, wifi_ifaces):
+        if failure.check(CancelledError):
+            return
+        self.scan_deferred = None
+        print("[WiFiScanner] Scan service failed: {}".format(
+            failure.getErrorMessage()))
+
+        # Old pythonwifi/iwlist chain, still kept off the main loop
+        deferred = threads.deferToThread(self.scan_legacy, wifi_ifaces)
+        deferred.addCallback(self.scan_legacy_finished)
+        deferred.addErrback(self.scan_legacy_failed)
+
+    def scan_legacy(self, wifi_ifaces):
+        networks = []
+
+        # FIRST ATTEMPT: use pythonwifi if available
+        if PYTHONWIFI_AVAILABLE:
+            networks.extend(self.scan_with_pythonwifi(wifi_ifaces))
+        else:
+            networks.append(
+                _("\n[INFO] pythonwifi not available, using iwlist\n"))
+
+        # SECOND ATTEMPT: use iwlist as fallback
+        if not networks or len(networks) <= 2:
+            networks.extend(self.scan_with_iwlist(wifi_ifaces))
+
+        # If no scan worked, show diagnostic info
+        if len(networks) <= 3:  # Only headers and few results
+            print("[WiFiScanner] Scan failed, showing diagnostics")
+            networks.extend(self.get_detailed_network_status())
+        return networks
+
+    def scan_legacy_finished(self, networks):
+        self.last_scan_results = networks
+        self.display_networks(networks)
+
+    def scan_legacy_failed(self, failure):
+        print("[WiFiScanner] Scan error: {}".format(failure.getErrorMessage()))
+        self["scan_output"].setText(
+            _("Scan error: ") + failure.getErrorMessage())
+
+    def format_networks(self, parsed_networks):
+        """Format parse_iwlist_detailed style dicts, one line each"""
+        networks = []
+        for i, net in enumerate(parsed_networks):
+            essid = net.get('essid') or _('Unknown')
+            signal = net.get('signal', 0)
+            quality_percent = int(net.get('quality_percent', 0))
+            channel = net.get('channel', '?')
+            encrypted = _("Yes") if net.get('encryption') else _("No")
+
+            signal_quality = format_signal_quality(quality_percent)
+
+            networks.append(
+                _("{index:2d}. {essid:20} | Quality: {quality:3}% ({signal_quality}) | Signal: {signal:4} dBm | Channel: {channel} | Encrypted: {encrypted}\n").format(
+                    index=i +
+                    1,
+                    essid=essid,
+                    quality=quality_percent,
+                    signal_quality=signal_quality,
+                    signal=signal,
+                    channel=channel,
+                    encrypted=encrypted))
+        return networks
+
     def scan_with_iwlist(self, wifi_ifaces):
         """Scan using iwlist as fallback"""
         print("[WiFiScanner] Starting iwlist fallback scan")
@@ -175,36 +256,13 @@ class WiFiScanner(Screen):
             try:
                 print("[WiFiScanner] iwlist scan on {}".format(iface))
 
-                result = subprocess.check_output(
-                    ['iwlist', iface, 'scan'],
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    timeout=15
-                )
+                result = command_output(['iwlist', iface, 'scan'],
+                                        timeout=15, merge_stderr=True)
 
                 parsed_networks = parse_iwlist_detailed(result)
 
                 if parsed_networks:
-                    for i, net in enumerate(parsed_networks):
-                        essid = net.get('essid', _('Unknown'))
-                        signal = net.get('signal', 0)
-                        quality_percent = net.get('quality_percent', 0)
-                        channel = net.get('channel', '?')
-                        encrypted = _("Yes") if net.get(
-                            'encryption') else _("No")
-
-                        signal_quality = format_signal_quality(quality_percent)
-
-                        networks.append(
-                            _("{index:2d}. {essid:20} | Quality: {quality:3}% ({signal_quality}) | Signal: {signal:4} dBm | Channel: {channel} | Encrypted: {encrypted}\n").format(
-                                index=i +
-                                1,
-                                essid=essid,
-                                quality=quality_percent,
-                                signal_quality=signal_quality,
-                                signal=signal,
-                                channel=channel,
-                                encrypted=encrypted))
+                    networks.extend(self.format_networks(parsed_networks))
 
                     print("[WiFiScanner] iwlist found {} networks".format(
                         len(parsed_networks)
@@ -358,104 +416,13 @@ class WiFiScanner(Screen):
         return signal
 
     def parse_iwlist_output(self, output):
-        """Parse iwlist output with debug"""
-        print("[WiFiScanner] Parsing iwlist output...")
-
-        networks = []
-
+        """Parse iwlist output into display lines"""
         if "Cell" not in output:
             print("[WiFiScanner] No 'Cell' found in iwlist output")
             return [_("iwlist: No networks found or interface busy\n")]
 
-        lines = output.split('\n')
-        current_net = {}
-        cell_count = 0
-
-        for line in lines:
-            line = line.strip()
-            print("[WiFiScanner] iwlist line: {}".format(line))
-
-            # New cell
-            if 'Cell' in line and 'Address' in line:
-                cell_count += 1
-
-                if current_net:
-                    formatted = self.format_network(current_net)
-                    networks.append(formatted)
-                    print(
-                        "[WiFiScanner] Added network: {}".format(
-                            formatted.strip()))
-
-                parts = line.split('Address: ')
-                current_net = {'bssid': parts[1] if len(parts) > 1 else ''}
-                print("[WiFiScanner] New cell #{}".format(cell_count))
-
-            # ESSID
-            elif 'ESSID:' in line:
-                essid = line.split('ESSID:"')[1].rstrip(
-                    '"') if 'ESSID:"' in line else _('Hidden')
-                current_net['essid'] = essid
-                print("[WiFiScanner] Found ESSID: {}".format(essid))
-
-            # Quality
-            elif 'Quality=' in line:
-                match = search(r'Quality=(\d+)/(\d+)', line)
-
-                if match:
-                    try:
-                        current_qual = int(match.group(1))
-                        max_qual = int(match.group(2))
-
-                        if max_qual > 0:
-                            quality = (current_qual / max_qual) * 100
-                            current_net['quality'] = int(quality)
-                            print("[WiFiScanner] Quality: {}/{} = {}%".format(
-                                current_qual, max_qual, quality
-                            ))
-                        else:
-                            current_net['quality'] = 0
-                            print("[WiFiScanner] Quality: {}/{} = 0% (max is 0)".format(
-                                current_qual, max_qual
-                            ))
-
-                    except (ValueError, ZeroDivisionError) as e:
-                        current_net['quality'] = 0
-                        print(
-                            "[WiFiScanner] Error parsing quality: {}".format(e))
-
-                signal_match = search(r'Signal level=(-?\d+)', line)
-
-                if signal_match:
-                    current_net['signal'] = int(signal_match.group(1))
-                    print(
-                        "[WiFiScanner] Signal: {} dBm".format(
-                            signal_match.group(1)))
-
-                else:
-                    alt_signal_match = search(
-                        r'signal[=:](-?\d+)', line, search.IGNORECASE)
-
-                    if alt_signal_match:
-                        current_net['signal'] = int(alt_signal_match.group(1))
-                        print("[WiFiScanner] Signal (alt): {} dBm".format(
-                            alt_signal_match.group(1)
-                        ))
-
-            # Signal level (separate line)
-            elif 'Signal level=' in line and 'quality' not in line.lower():
-                match = search(r'Signal level=(-?\d+)', line)
-
-                if match:
-                    current_net['signal'] = int(match.group(1))
-                    print(
-                        "[WiFiScanner] Signal level: {} dBm".format(
-                            match.group(1)))
-
-        if current_net:
-            formatted = self.format_network(current_net)
-            networks.append(formatted)
-            print("[WiFiScanner] Final network: {}".format(formatted.strip()))
-
+        networks = [self.format_network(net)
+                    for net in parseScan(output, FORMAT_IWLIST)]
         print("[WiFiScanner] Total networks parsed: {}".format(len(networks)))
 
         return networks if networks else [_("iwlist: No networks found\n")]
@@ -472,10 +439,8 @@ class WiFiScanner(Screen):
             for iface in wifi_ifaces:
                 try:
                     print(f"[WiFiScanner] iwlist scan on {iface}")
-                    result = subprocess.check_output(['iwlist', iface, 'scan'],
-                                                     stderr=subprocess.STDOUT,
-                                                     text=True,
-                                                     timeout=15)
+                    result = command_output(['iwlist', iface, 'scan'],
+                                            timeout=15, merge_stderr=True)
                     print(f"[WiFiScanner] iwlist output length: {len(result)}")
 
                     # DEBUG: Show sample of iwlist output for signal parsing
@@ -555,8 +520,8 @@ class WiFiScanner(Screen):
 
     def format_network(self, net):
         """Format a network for display"""
-        essid = net.get('essid', _('Unknown'))
-        quality = net.get('quality', 0)
+        essid = net.get('essid') or _('Hidden')
+        quality = int(net.get('quality', 0))
         signal = net.get('signal', 0)
         bssid = net.get('bssid', '')[:8]
         return _("{essid:20} | Quality: {quality:3}% | Signal: {signal:4} dBm | {bssid}...\n").format(
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+import math
+import time
+from array import array
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+# Sample fields kept in the history
+METRICS = ('level', 'quality', 'noise', 'bitrate')
+
+METRIC_LABELS = {
+    'level': "Signal (dBm)",
+    'quality': "Quality (%)",
+    'noise': "Noise (dBm)",
+    'bitrate': "Bit rate (Mb/s)",
+}
+
+# fixed graph scale per metric, None scales to the values shown
+METRIC_SCALES = {
+    'level': (-100.0, -20.0),
+    'quality': (0.0, 100.0),
+    'noise': (-110.0, -50.0),
+    'bitrate': None,
+}
+
+# label, seconds shown, seconds per bucket; every range is a rollup of
+# its own with span / bucket buckets
+RANGES = (
+    ("5 min", 300, 1.0),
+    ("1 h", 3600, 10.0),
+    ("24 h", 86400, 240.0),
+)
+
+# buckets further apart than this many bucket widths are not joined in
+# the graph (the sampler was not running in between)
+GAP_BUCKETS = 3
+
+NAN = float('nan')
+
+
+class RollupSeries(object):
+    """min/avg/max per metric over fixed time buckets, in a ring of
+    preallocated arrays
+
+    The bucket being filled is the newest slot; a sample of a later
+    bucket starts the next slot, overwriting the oldest. Samples without
+    a value (NaN) are not counted.
+    """
+
+    def __init__(self, seconds, capacity, metrics=METRICS):
+        self.seconds = seconds
+        self.capacity = capacity
+        self.metrics = metrics
+        self.start = array('d', [0.0]) * capacity
+        self.mins = dict((m, array('f', [0.0]) * capacity) for m in metrics)
+        self.maxs = dict((m, array('f', [0.0]) * capacity) for m in metrics)
+        self.sums = dict((m, array('d', [0.0]) * capacity) for m in metrics)
+        self.counts = dict((m, array('H', [0]) * capacity) for m in metrics)
+        self.bucket = None
+        self.slot = -1
+        self.filled = 0
+
+    def add(self, timestamp, values):
+        """values is a {metric: value} mapping"""
+        bucket = int(timestamp // self.seconds)
+        if bucket != self.bucket:
+            self.bucket = bucket
+            self.slot = (self.slot + 1) % self.capacity
+            self.filled = min(self.filled + 1, self.capacity)
+            self.start[self.slot] = bucket * self.seconds
+            for m in self.metrics:
+                self.counts[m][self.slot] = 0
+                self.sums[m][self.slot] = 0.0
+        slot = self.slot
+        for m in self.metrics:
+            value = values.get(m, NAN)
+            if math.isnan(value):
+                continue
+            count = self.counts[m][slot]
+            if count == 0:
+                self.mins[m][slot] = self.maxs[m][slot] = value
+            else:
+                if value < self.mins[m][slot]:
+                    self.mins[m][slot] = value
+                if value > self.maxs[m][slot]:
+                    self.maxs[m][slot] = value
+            self.sums[m][slot] += value
+            self.counts[m][slot] = min(count + 1, 0xFFFF)
+
+    def slots(self):
+        first = (self.slot - self.filled + 1) % self.capacity
+        return [(first + i) % self.capacity for i in range(self.filled)]
+
+    def points(self, metric, since=None):
+        """(bucket middle time, min, avg, max) of the buckets that have
+        values of metric, oldest first"""
+        half = self.seconds / 2.0
+        counts = self.counts[metric]
+        result = []
+        for slot in self.slots():
+            count = counts[slot]
+            start = self.start[slot]
+            if not count or (since is not None and start < since):
+                continue
+            result.append((start + half, self.mins[metric][slot],
+                           self.sums[metric][slot] / count,
+                           self.maxs[metric][slot]))
+        return result
+
+    def memoryBytes(self):
+        arrays = [self.start]
+        for table in (self.mins, self.maxs, self.sums, self.counts):
+            arrays.extend(table.values())
+        return sum(a.itemsize * len(a) for a in arrays)
+
+
+class SignalHistory(object):
+    """Rolling history of one interface at every resolution of RANGES,
+    fed with signal_sampler Samples"""
+
+    def __init__(self, ranges=RANGES, metrics=METRICS):
+        self.ranges = ranges
+        self.series = [RollupSeries(seconds, int(span // seconds), metrics)
+                       for label, span, seconds in ranges]
+
+    def add(self, sample):
+        values = sample._asdict()
+        values['bitrate'] = sample.bitrate / 1e6
+        for series in self.series:
+            series.add(sample.timestamp, values)
+
+    def points(self, range_index, metric, now=None):
+        label, span, seconds = self.ranges[range_index]
+        now = time.time() if now is None else now
+        return self.series[range_index].points(metric, now - span)
+
+    def memoryBytes(self):
+        return sum(series.memoryBytes() for series in self.series)
+
+
+def lttb(points, threshold, key=lambda point: point[2]):
+    """Largest-Triangle-Three-Buckets downsampling of points sorted by
+    point[0] to threshold points; key gives the y value"""
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(points)
+    sampled = [points[0]]
+    every = (count - 2) / float(threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # average of the next bucket is the third triangle corner
+        start = int((i + 1) * every) + 1
+        end = min(int((i + 2) * every) + 1, count)
+        span = end - start or 1
+        avg_x = sum(points[j][0] for j in range(start, end)) / span
+        avg_y = sum(key(points[j]) for j in range(start, end)) / span
+
+        ax, ay = points[a][0], key(points[a])
+        best, best_area = None, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((ax - avg_x) * (key(points[j]) - ay) -
+                       (ax - points[j][0]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def graphScale(metric, points):
+    """(low, high) of the y axis for the points of metric"""
+    scale = METRIC_SCALES.get(metric)
+    if scale is not None:
+        return scale
+    if not points:
+        return 0.0, 1.0
+    low = min(point[1] for point in points)
+    high = max(point[3] for point in points)
+    if high - low < 1e-6:
+        return low - 1.0, high + 1.0
+    return low, high
+
+
+def graphRects(points, width, height, start, end, low, high, gap):
+    """Fill rectangles (x, y, w, h, kind) drawing points as a min..max
+    band ('band') under an avg line ('line'); at most width / 2 points
+    are drawn, chosen with lttb(). Points further than gap seconds apart
+    are not joined."""
+    points = lttb(points, max(3, width // 2))
+    if not points or end <= start:
+        return []
+    xscale = (width - 1) / float(end - start)
+    yscale = (height - 1) / float(high - low)
+
+    def px(t):
+        return int(round((t - start) * xscale))
+
+    def py(value):
+        value = min(max(value, low), high)
+        return int(round((high - value) * yscale))
+
+    rects = []
+    previous = None
+    for t, vmin, vavg, vmax in points:
+        x = px(t)
+        if x < 0 or x >= width:
+            continue
+        top, bottom = py(vmax), py(vmin)
+        rects.append((x, top, 2, bottom - top + 1, 'band'))
+        y = py(vavg)
+        if previous is not None and t - previous[0] <= gap:
+            # vertical step from the previous point joins the line
+            px0, py0 = previous[1], previous[2]
+            rects.append((px0, y, max(2, x - px0), 2, 'line'))
+            rects.append((px0, min(py0, y), 2, abs(py0 - y) + 2, 'line'))
+        else:
+            rects.append((x, y, 2, 2, 'line'))
+        previous = (t, x, y)
+    return rects
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+
+import math
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+from .flags import SIOCGIWRATE
+from .interfaces import PROC_NET_WIRELESS
+from .iwlibs import Iwparam, getRange
+from .signal_history import SignalHistory
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+# 10 Hz, and one minute of it per interface
+SAMPLE_INTERVAL = 0.1
+RING_CAPACITY = 600
+
+# the bit rate only changes with rate control, its ioctl is repeated at
+# most this often
+BITRATE_TTL = 1.0
+
+NAN = float('nan')
+
+# quality in percent of the range maximum, level/noise in dBm, bitrate in
+# bit/s; NAN where the driver reported nothing
+Sample = namedtuple('Sample', 'timestamp quality level noise bitrate')
+
+
+def isMissing(value):
+    return math.isnan(value)
+
+
+def parseProcWireless(text):
+    """{ifname: (status, link, level, noise)} of /proc/net/wireless text"""
+    stats = {}
+    for line in text.splitlines()[2:]:
+        name, sep, rest = line.partition(':')
+        if not sep:
+            continue
+        # wlan0: 0000   70.  -40.  -256        0 ...
+        fields = rest.split(None, 4)
+        try:
+            stats[name.strip()] = (int(fields[0], 16),
+                                   float(fields[1].rstrip('.')),
+                                   float(fields[2].rstrip('.')),
+                                   float(fields[3].rstrip('.')))
+        except (ValueError, IndexError):
+            continue
+    return stats
+
+
+def procLevelToDbm(value):
+    """Level or noise column in dBm; drivers reporting an unsigned 8 bit
+    value print it above 63, as in levelToDbm(); -256 means no value"""
+    if value == -256:
+        return NAN
+    if value > 63:
+        return value - 256
+    return value
+
+
+class ProcWirelessReader(object):
+    """Keeps /proc/net/wireless open; read() is a seek(0) and one read()
+    of every interface's stats, reopening the file once if it went away"""
+
+    def __init__(self, path=PROC_NET_WIRELESS):
+        self.path = path
+        self.handle = None
+
+    def read(self):
+        for attempt in (0, 1):
+            try:
+                if self.handle is None:
+                    self.handle = open(self.path, 'r')
+                self.handle.seek(0)
+                return parseProcWireless(self.handle.read())
+            except (IOError, OSError):
+                self.close()
+        return {}
+
+    def close(self):
+        if self.handle is not None:
+            try:
+                self.handle.close()
+            except (IOError, OSError):
+                pass
+            self.handle = None
+
+
+class BitrateReader(object):
+    """SIOCGIWRATE of one interface, asked again after BITRATE_TTL"""
+
+    def __init__(self, ifname, ttl=BITRATE_TTL):
+        self.ifname = ifname
+        self.ttl = ttl
+        self.param = None
+        self.value = NAN
+        self.read_at = 0.0
+
+    def read(self, now):
+        if now - self.read_at < self.ttl:
+            return self.value
+        self.read_at = now
+        try:
+            if self.param is None:
+                self.param = Iwparam(self.ifname, SIOCGIWRATE)
+            else:
+                self.param.update()
+            self.value = float(self.param.value) if self.param.value > 0 \
+                else NAN
+        except (IOError, OSError):
+            # not associated (EOPNOTSUPP/ENOTCONN) or no wireless extensions
+            self.value = NAN
+        return self.value
+
+
+class SampleRing(object):
+    """Fixed number of Samples in one array per field
+
+    The arrays are allocated once and overwritten in place, so a minute
+    of 10 Hz samples is about 14 kB and appending never allocates.
+    """
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.capacity = capacity
+        self.columns = dict(
+            (field, array('d' if field == 'timestamp' else 'f',
+                          [NAN]) * capacity)
+            for field in Sample._fields)
+        self.count = 0
+        self.next = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def append(self, sample):
+        with self.lock:
+            for field, value in zip(Sample._fields, sample):
+                self.columns[field][self.next] = value
+            self.next = (self.next + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def _indexes(self, count):
+        count = self.count if count is None else min(count, self.count)
+        first = (self.next - count) % self.capacity
+        return [(first + i) % self.capacity for i in range(count)]
+
+    def latest(self):
+        with self.lock:
+            if not self.count:
+                return None
+            i = (self.next - 1) % self.capacity
+            return Sample(*[self.columns[field][i]
+                            for field in Sample._fields])
+
+    def column(self, field, count=None):
+        """The last count values of field, oldest first"""
+        with self.lock:
+            values = self.columns[field]
+            return [values[i] for i in self._indexes(count)]
+
+    def samples(self, count=None):
+        """The last count Samples, oldest first"""
+        with self.lock:
+            columns = [self.columns[field] for field in Sample._fields]
+            return [Sample(*[values[i] for values in columns])
+                    for i in self._indexes(count)]
+
+    def clear(self):
+        with self.lock:
+            self.count = 0
+            self.next = 0
+
+
+class SignalSampler(object):
+    """Samples quality, level, noise and bit rate of every interface at
+    a fixed rate into a SampleRing per interface
+
+    One thread does all the sampling: a single read of the already open
+    /proc/net/wireless covers every interface, the bit rate comes from
+    an ioctl repeated at most every BITRATE_TTL. Screens don't sample,
+    they read ring(ifname) at whatever rate they redraw. Every sample
+    also goes into the SignalHistory of the interface, history(ifname),
+    which outlives the screens. acquire() and release() count the
+    users; the thread samples while there are any and is parked on an
+    Event otherwise, so opening and closing screens never starts a new
+    one.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL, capacity=RING_CAPACITY,
+                 path=PROC_NET_WIRELESS, bitrate=True):
+        self.interval = interval
+        self.capacity = capacity
+        self.bitrate = bitrate
+        self.reader = ProcWirelessReader(path)
+        self.rings = {}
+        self.histories = {}
+        self.bitrates = {}
+        self.max_quality = {}
+        self.users = 0
+        self.lock = threading.Lock()
+        self.active = threading.Event()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.stopping = False
+        self.samples = 0
+
+    def ring(self, ifname):
+        """SampleRing of ifname, created empty when not sampled yet"""
+        with self.lock:
+            ring = self.rings.get(ifname)
+            if ring is None:
+                ring = self.rings[ifname] = SampleRing(self.capacity)
+            return ring
+
+    def history(self, ifname):
+        """SignalHistory of ifname, created empty when not sampled yet"""
+        with self.lock:
+            history = self.histories.get(ifname)
+            if history is None:
+                history = self.histories[ifname] = SignalHistory()
+            return history
+
+    def acquire(self):
+        with self.lock:
+            self.users += 1
+            self.active.set()
+            if self.thread is None:
+                self.stopping = False
+                self.thread = threading.Thread(target=self.run,
+                                               name="SignalSampler")
+                self.thread.daemon = True
+                self.thread.start()
+
+    def release(self):
+        with self.lock:
+            self.users = max(0, self.users - 1)
+            if self.users:
+                return
+            self.active.clear()
+        self.wakeup.set()
+
+    def stop(self):
+        """Ends the thread for good, the next acquire() starts another"""
+        with self.lock:
+            thread, self.thread = self.thread, None
+            self.stopping = True
+            self.active.set()
+        self.wakeup.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(1.0)
+
+    def run(self):
+        while True:
+            self.active.wait()
+            if self.stopping:
+                break
+            deadline = time.time()
+            while self.active.is_set() and not self.stopping:
+                self.sampleOnce()
+                # fixed rate: a slow pass shortens the next wait, it
+                # doesn't shift every later sample
+                deadline += self.interval
+                delay = deadline - time.time()
+                if delay < 0:
+                    deadline = time.time()
+                    delay = 0
+                self.wakeup.wait(delay)
+                self.wakeup.clear()
+            # parked: nothing keeps /proc/net/wireless open meanwhile
+            self.reader.close()
+        self.reader.close()
+
+    def sampleOnce(self, now=None):
+        now = time.time() if now is None else now
+        for ifname, (status, link, level, noise) in self.reader.read().items():
+            quality = link * 100.0 / self.maxQuality(ifname)
+            bitrate = NAN
+            if self.bitrate:
+                reader = self.bitrates.get(ifname)
+                if reader is None:
+                    reader = self.bitrates[ifname] = BitrateReader(ifname)
+                bitrate = reader.read(now)
+            sample = Sample(now, min(quality, 100.0), procLevelToDbm(level),
+                            procLevelToDbm(noise), bitrate)
+            self.ring(ifname).append(sample)
+            self.history(ifname).add(sample)
+        self.samples += 1
+
+    def maxQuality(self, ifname):
+        value = self.max_quality.get(ifname)
+        if value is None:
+            try:
+                value = getRange(ifname).max_qual.quality
+            except (IOError, OSError):
+                value = 0
+            value = self.max_quality[ifname] = value if value > 0 else 100
+        return value
+
+
+_sampler = None
+
+
+def getSignalSampler():
+    """Returns the plugin wide SignalSampler"""
+    global _sampler
+    if _sampler is None:
+        _sampler = SignalSampler()
+    return _sampler
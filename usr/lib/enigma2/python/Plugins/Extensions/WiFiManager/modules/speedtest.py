@@ -3,10 +3,12 @@
 import time
 import subprocess
 from re import search
+from os import remove
 from json import loads
 from urllib.request import urlopen
 
 from .. import _
+from .tools import run_command, STATUS_TTL
 
 """
 #########################################################
@@ -39,15 +41,8 @@ def test_download_speed(interface=None, timeout=10):
 
         # Quick connectivity check first
         try:
-            ping_result = subprocess.run(['ping',
-                                          '-c',
-                                          '1',
-                                          '-W',
-                                          '2',
-                                          '8.8.8.8'],
-                                         capture_output=True,
-                                         text=True,
-                                         timeout=5)
+            ping_result = run_command(['ping', '-c', '1', '-W', '2', '8.8.8.8'],
+                                      timeout=5)
             if ping_result.returncode != 0:
                 return _("No internet connection")
         except subprocess.TimeoutExpired:
@@ -59,10 +54,10 @@ def test_download_speed(interface=None, timeout=10):
                 start_time = time.time()
 
                 # Usa timeout più aggressivo
-                result = subprocess.run([
+                result = run_command([
                     'wget', '-O', '/dev/null',
                     '--timeout=8', '--tries=1', test_url
-                ], capture_output=True, text=True, timeout=timeout)
+                ], timeout=timeout)
 
                 end_time = time.time()
 
@@ -102,14 +97,17 @@ def test_upload_speed(interface=None, timeout=10):
             f.write(test_data)
 
         start_time = time.time()
-        result = subprocess.run([
+        result = run_command([
             'curl', '-X', 'POST', '--data-binary', f'@{test_file}',
             'http://httpbin.org/post', '--max-time', '10'
-        ], capture_output=True, text=True, timeout=timeout)
+        ], timeout=timeout)
         end_time = time.time()
 
         # Pulisci
-        subprocess.run(['rm', '-f', test_file], capture_output=True)
+        try:
+            remove(test_file)
+        except OSError:
+            pass
 
         if result.returncode == 0:
             duration = end_time - start_time
@@ -126,10 +124,8 @@ def test_upload_speed(interface=None, timeout=10):
 def test_ping(host="8.8.8.8", count=3):
     """Test latency/ping using the Enigma2Speedtest method"""
     try:
-        result = subprocess.run(
-            ["ping", "-c", str(count), "-W", "3", host],
-            capture_output=True, text=True, timeout=10
-        )
+        result = run_command(
+            ["ping", "-c", str(count), "-W", "3", host], timeout=10)
 
         if result.returncode == 0:
             for line in result.stdout.split('\n'):
@@ -190,8 +186,7 @@ def get_public_ip_info():
 def get_network_interfaces():
     """Get network interface information"""
     try:
-        result = subprocess.run(['ip', 'addr', 'show'],
-                                capture_output=True, text=True)
+        result = run_command(['ip', 'addr', 'show'], ttl=STATUS_TTL)
         interfaces = []
         current_interface = None
 
@@ -219,8 +214,8 @@ def multi_server_download_test(interface=None):
     for name, url in servers:
         try:
             start_time = time.time()
-            result = subprocess.run(['wget', '-O', '/dev/null', url],
-                                    capture_output=True, text=True, timeout=15)
+            result = run_command(['wget', '-O', '/dev/null', url],
+                                 timeout=15)
             end_time = time.time()
 
             if result.returncode == 0:
@@ -264,15 +259,8 @@ def connection_stability_test(interface=None, duration=5):
 
         while time.time() - start_time < duration and packets_sent < max_packets:
             try:
-                result = subprocess.run(['ping',
-                                         '-c',
-                                         '1',
-                                         '-W',
-                                         '2',
-                                         '8.8.8.8'],
-                                        capture_output=True,
-                                        text=True,
-                                        timeout=5)
+                result = run_command(['ping', '-c', '1', '-W', '2', '8.8.8.8'],
+                                     timeout=5)
                 packets_sent += 1
                 if result.returncode != 0:
                     packets_lost += 1
@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 
-import subprocess
 from threading import Thread
 
 from Screens.Screen import Screen
@@ -17,7 +16,7 @@ except ImportError as e:
     print(f"SpeedtestSimple import error: {e}")
     Enigma2Speedtest = None
 
-from .tools import get_wifi_interfaces
+from .tools import get_wifi_interfaces, run_command, STATUS_TTL
 from . import speedtest
 from .. import _
 
@@ -247,8 +246,7 @@ class WiFiSpeedtestManager(Screen):
 
             # Gateway
             try:
-                result = subprocess.run(
-                    ['ip', 'route'], capture_output=True, text=True)
+                result = run_command(['ip', 'route'], ttl=STATUS_TTL)
                 for line in result.stdout.split('\n'):
                     if 'default' in line:
                         gateway = line.split()[2]
@@ -10,6 +10,7 @@ from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 
 from .. import _
+from .tools import run_command
 
 
 """
@@ -95,10 +96,8 @@ class Enigma2Speedtest:
         """Test ping to a specific host"""
         try:
             print(f"Pinging {host}...")
-            result = subprocess.run(
-                ["ping", "-c", "2", "-W", "3", host],
-                capture_output=True, text=True, timeout=10
-            )
+            result = run_command(
+                ["ping", "-c", "2", "-W", "3", host], timeout=10)
 
             if result.returncode == 0:
                 for line in result.stdout.split('\n'):
@@ -1,12 +1,30 @@
 # -*- coding: utf-8 -*-
 
+import os
 import time
+import shlex
+import threading
 import subprocess
-from json import load, dump
-from re import search, findall, DOTALL
+from collections import namedtuple
+from re import search, findall
 from os.path import exists
 
 from .. import _
+from .iwlibs import Wireless, invalidateRange, getRange
+from .nl80211 import getNl80211, resetNl80211
+from .scan_parser import (
+    ScanParser,
+    parseScan,
+    FORMAT_IW,
+    FORMAT_IWLIST
+)
+from .saved_networks import getSavedNetworkStore, SAVED_NETWORKS_FILE
+from .wpa_config import readNetworks
+from .interfaces import (
+    getInterfaceRegistry,
+    getDriverName,
+    readProcWirelessStats
+)
 
 """
 #########################################################
@@ -27,21 +45,192 @@ from .. import _
 #########################################################
 """
 
+# how long status queries (iwconfig X, ip addr show X, ...) are reused
+STATUS_TTL = 0.5
+MAX_CONCURRENT_COMMANDS = 4
+
+CommandResult = namedtuple(
+    'CommandResult', 'args returncode stdout stderr duration')
+
+
+class CommandRunner(object):
+    """Runs external commands for the whole plugin
+
+    Commands are exec'd from an argv list, never through /bin/sh. Identical
+    commands running at the same time share one child process, results of
+    status queries can be reused for ttl seconds, and at most
+    MAX_CONCURRENT_COMMANDS children run at once. A command run without
+    ttl is taken as changing state and drops every cached result.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_COMMANDS):
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.lock = threading.Lock()
+        self.cache = {}
+        self.inflight = {}
+        self.stats = {}
+
+    def run(self, args, timeout=None, ttl=0, merge_stderr=False):
+        """Returns a CommandResult; raises OSError if args[0] cannot be
+        run and subprocess.TimeoutExpired like subprocess.run"""
+        if isinstance(args, str):
+            args = shlex.split(args)
+        key = (tuple(args), merge_stderr)
+
+        with self.lock:
+            stats = self._stats(args[0])
+            stats['calls'] += 1
+            if ttl > 0:
+                entry = self.cache.get(key)
+                if entry is not None and entry[0] > time.time():
+                    stats['cached'] += 1
+                    return entry[1]
+            else:
+                self.cache.clear()
+            pending = self.inflight.get(key)
+            if pending is None:
+                pending = self.inflight[key] = [threading.Event(), None, None]
+                owner = True
+            else:
+                stats['coalesced'] += 1
+                owner = False
+
+        if not owner:
+            pending[0].wait()
+            if pending[2] is not None:
+                raise pending[2]
+            return pending[1]
+
+        try:
+            result = self._spawn(args, timeout, merge_stderr)
+            pending[1] = result
+        except Exception as e:
+            pending[2] = e
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[key]
+                if ttl > 0 and pending[1] is not None:
+                    self.cache[key] = (time.time() + ttl, pending[1])
+            pending[0].set()
+        return result
+
+    def _spawn(self, args, timeout, merge_stderr):
+        with self.slots:
+            start = time.time()
+            try:
+                completed = subprocess.run(
+                    args,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT if merge_stderr
+                    else subprocess.PIPE,
+                    universal_newlines=True,
+                    timeout=timeout)
+            finally:
+                duration = time.time() - start
+                self.record(args[0], duration)
+        return CommandResult(args, completed.returncode, completed.stdout,
+                             completed.stderr or '', duration)
+
+    def record(self, program, duration):
+        """Accounts one child process that ran for duration seconds"""
+        with self.lock:
+            stats = self._stats(program)
+            stats['spawned'] += 1
+            stats['total_time'] += duration
+            stats['max_time'] = max(stats['max_time'], duration)
+
+    def _stats(self, program):
+        # called with self.lock held
+        stats = self.stats.get(program)
+        if stats is None:
+            stats = self.stats[program] = dict(
+                calls=0, spawned=0, cached=0, coalesced=0,
+                total_time=0.0, max_time=0.0)
+        return stats
+
+    def invalidate(self):
+        with self.lock:
+            self.cache.clear()
+
+
+_command_runner = CommandRunner()
+
+
+def run_command(args, timeout=None, ttl=0, merge_stderr=False):
+    """Runs args (argv list, or a string split like a shell would) through
+    the shared CommandRunner, see CommandRunner.run"""
+    return _command_runner.run(args, timeout, ttl, merge_stderr)
+
+
+def command_output(args, timeout=None, ttl=0, merge_stderr=False):
+    """Like subprocess.check_output on the shared CommandRunner"""
+    result = _command_runner.run(args, timeout, ttl, merge_stderr)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(
+            result.returncode, result.args, result.stdout, result.stderr)
+    return result.stdout
+
+
+def get_command_stats():
+    """Per program: calls, spawned children, cache hits, coalesced calls,
+    total and longest run time in seconds"""
+    with _command_runner.lock:
+        return dict((program, dict(stats))
+                    for program, stats in _command_runner.stats.items())
+
+
+def grep_lines(text, pattern, ignore_case=False):
+    """The lines of text containing pattern, like `cmd | grep pattern`"""
+    if ignore_case:
+        pattern = pattern.lower()
+        return '\n'.join(line for line in text.splitlines()
+                         if pattern in line.lower())
+    return '\n'.join(line for line in text.splitlines() if pattern in line)
+
+
+_executables = {}
+_executables_lock = threading.Lock()
+
+
+def find_executable(name, path=None):
+    """Full path of the program name in PATH, None if it isn't installed;
+    the directories are listed once and the index is kept"""
+    if os.sep in name:
+        return name if os.access(name, os.X_OK) else None
+    path = path if path is not None else os.environ.get(
+        'PATH', '/usr/sbin:/usr/bin:/sbin:/bin')
+    with _executables_lock:
+        index = _executables.get(path)
+        if index is None:
+            index = {}
+            for directory in reversed(path.split(os.pathsep)):
+                try:
+                    names = os.listdir(directory)
+                except OSError:
+                    continue
+                for entry in names:
+                    index[entry] = os.path.join(directory, entry)
+            _executables[path] = index
+    found = index.get(name)
+    if found is not None and os.access(found, os.X_OK):
+        return found
+    return None
+
+
+def forget_executables():
+    """Drops the PATH index, after installing packages"""
+    with _executables_lock:
+        _executables.clear()
+
 
 def verify_connection(interface, essid):
     """Verify connection to network"""
     try:
-        result = subprocess.run(
-            f"iwconfig {interface}",
-            shell=True,
-            capture_output=True,
-            text=True)
+        result = run_command(['iwconfig', interface], ttl=STATUS_TTL)
         if f'ESSID:"{essid}"' in result.stdout:
-            ip_result = subprocess.run(
-                f"ip addr show {interface}",
-                shell=True,
-                capture_output=True,
-                text=True)
+            ip_result = run_command(['ip', 'addr', 'show', interface],
+                                    ttl=STATUS_TTL)
             return 'inet ' in ip_result.stdout
         return False
     except Exception as e:
@@ -52,8 +241,8 @@ def verify_connection(interface, essid):
 def is_interface_up(interface):
     """Check if interface is up"""
     try:
-        result = subprocess.run(
-            ['ip', 'link', 'show', interface], capture_output=True, text=True)
+        result = run_command(['ip', 'link', 'show', interface],
+                             ttl=STATUS_TTL)
         return 'state UP' in result.stdout
     except Exception as e:
         print(e)
@@ -67,33 +256,26 @@ def ensure_interface_up(interface):
 
     try:
         # Check if interface exists
-        result = subprocess.run(f"ip link show {interface}",
-                                shell=True, capture_output=True, text=True)
+        result = run_command(['ip', 'link', 'show', interface],
+                             ttl=STATUS_TTL)
         if result.returncode != 0:
             print(f"[DEBUG] Interface {interface} not found")
             return False
 
         # Try to bring interface up
-        result = subprocess.run(
-            f"ip link set {interface} up",
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=10)
+        result = run_command(['ip', 'link', 'set', interface, 'up'],
+                             timeout=10)
 
         if result.returncode == 0:
             print(f"[DEBUG] Interface {interface} brought up successfully")
+            invalidateRange(interface)
             time.sleep(1)  # Wait for interface to initialize
             return True
         else:
             print(f"[DEBUG] Failed to bring interface up: {result.stderr}")
             # Try alternative command
-            result2 = subprocess.run(
-                f"ifconfig {interface} up",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10)
+            result2 = run_command(['ifconfig', interface, 'up'], timeout=10)
+            invalidateRange(interface)
             return result2.returncode == 0
 
     except Exception as e:
@@ -101,11 +283,56 @@ def ensure_interface_up(interface):
         return False
 
 
+def get_nl80211_interfaces():
+    """Returns the interface names nl80211 knows, or None without nl80211"""
+    client = getNl80211()
+    if client is None:
+        return None
+    try:
+        return [iface.ifname for iface in client.getInterfaces()
+                if iface.ifname]
+    except Exception as e:
+        print(f"[get_nl80211_interfaces] nl80211 error: {e}")
+        resetNl80211()
+        return None
+
+
+def is_nl80211_interface(ifname, nl_interfaces=None):
+    """Checks ifname is wireless, in-process if possible, else via iw"""
+    if nl_interfaces is None:
+        nl_interfaces = get_nl80211_interfaces()
+    if nl_interfaces is not None:
+        return ifname in nl_interfaces
+    iw_result = run_command(['iw', 'dev', ifname, 'info'], timeout=5,
+                            ttl=STATUS_TTL)
+    return iw_result.returncode == 0
+
+
 def get_wifi_interfaces():
+    """Returns the WiFi interfaces from the cached sysfs registry
+
+    The registry is rebuilt on link add/remove events or after its TTL and
+    never forks; probe_wifi_interfaces() is only used when sysfs and
+    /proc/net/wireless show no wireless interface at all.
+    """
+    registry = getInterfaceRegistry()
+    if registry.fallback is None:
+        registry.fallback = probe_wifi_interfaces
+    return registry.getNames()
+
+
+def probe_wifi_interfaces():
     """Returns all available WiFi interfaces using multiple detection methods"""
     wifi_interfaces = []
 
     try:
+        # METHOD 0: Ask nl80211 directly (no fork)
+        nl_interfaces = get_nl80211_interfaces()
+        if nl_interfaces:
+            for ifname in nl_interfaces:
+                if ifname not in wifi_interfaces:
+                    wifi_interfaces.append(ifname)
+
         # METHOD 1: Check /proc/net/wireless (most reliable)
         try:
             with open('/proc/net/wireless', 'r') as f:
@@ -122,11 +349,7 @@ def get_wifi_interfaces():
 
         # METHOD 2: Check iwconfig output
         try:
-            result = subprocess.run(
-                ['iwconfig'],
-                capture_output=True,
-                text=True,
-                timeout=10)
+            result = run_command(['iwconfig'], timeout=10, ttl=STATUS_TTL)
             if result.returncode == 0:
                 for line in result.stdout.split('\n'):
                     if 'IEEE 802.11' in line or 'ESSID:' in line:
@@ -141,8 +364,8 @@ def get_wifi_interfaces():
 
         # METHOD 3: Check ip link show with iw verification
         try:
-            result = subprocess.run(
-                ['ip', 'link', 'show'], capture_output=True, text=True, timeout=10)
+            result = run_command(['ip', 'link', 'show'], timeout=10,
+                                 ttl=STATUS_TTL)
             if result.returncode == 0:
                 for line in result.stdout.split('\n'):
                     if any(
@@ -158,9 +381,8 @@ def get_wifi_interfaces():
                             if ifname and ifname not in wifi_interfaces:
                                 # Verify it's actually a WiFi interface
                                 try:
-                                    iw_result = subprocess.run(['iw', 'dev', ifname, 'info'],
-                                                               capture_output=True, text=True, timeout=5)
-                                    if iw_result.returncode == 0:
+                                    if is_nl80211_interface(
+                                            ifname, nl_interfaces):
                                         wifi_interfaces.append(ifname)
                                 except Exception as e:
                                     print(e)
@@ -180,13 +402,12 @@ def get_wifi_interfaces():
             'ra0']
         for ifname in common_names:
             try:
-                result = subprocess.run(['ip', 'link', 'show', ifname],
-                                        capture_output=True, text=True, timeout=5)
+                result = run_command(['ip', 'link', 'show', ifname],
+                                     timeout=5, ttl=STATUS_TTL)
                 if result.returncode == 0:
                     # Verify it's a WiFi interface
-                    iw_result = subprocess.run(['iw', 'dev', ifname, 'info'],
-                                               capture_output=True, text=True, timeout=5)
-                    if iw_result.returncode == 0 and ifname not in wifi_interfaces:
+                    if ifname not in wifi_interfaces and \
+                            is_nl80211_interface(ifname, nl_interfaces):
                         wifi_interfaces.append(ifname)
             except Exception as e:
                 print(e)
@@ -213,11 +434,7 @@ def get_wifi_interfaces():
 def get_current_connected_essid(interface):
     """Get currently connected ESSID"""
     try:
-        result = subprocess.run(
-            f"iwconfig {interface}",
-            shell=True,
-            capture_output=True,
-            text=True)
+        result = run_command(['iwconfig', interface], ttl=STATUS_TTL)
         if result.returncode == 0:
             essid_match = search(r'ESSID:"([^"]*)"', result.stdout)
             if essid_match and essid_match.group(1):
@@ -231,11 +448,8 @@ def get_current_connected_essid(interface):
 def get_ip_address(interface):
     """Get assigned IP address"""
     try:
-        result = subprocess.run(
-            f"ip addr show {interface}",
-            shell=True,
-            capture_output=True,
-            text=True)
+        result = run_command(['ip', 'addr', 'show', interface],
+                             ttl=STATUS_TTL)
         ip_match = search(r'inet (\d+\.\d+\.\d+\.\d+)', result.stdout)
         return ip_match.group(1) if ip_match else None
     except Exception as e:
@@ -243,14 +457,115 @@ def get_ip_address(interface):
         return None
 
 
+def get_nl80211_signal(ifname):
+    """Returns the signal of the associated AP in dBm via nl80211, or None"""
+    client = getNl80211()
+    if client is None:
+        return None
+    try:
+        for station in client.getStations(ifname):
+            if station.signal is not None:
+                return station.signal
+    except Exception as e:
+        print(f"[get_nl80211_signal] nl80211 error: {e}")
+        resetNl80211()
+    return None
+
+
 def get_interface_info(ifname):
+    """Returns detailed information about an interface
+
+    Read in-process from the driver (ioctls), /proc/net/wireless and sysfs;
+    drivers without wireless extensions go through the iwconfig/ethtool
+    subprocess path. Both return the same keys.
+    """
+    info = get_interface_info_fast(ifname)
+    if info is not None:
+        return info
+    return get_interface_info_subprocess(ifname)
+
+
+def get_interface_info_fast(ifname):
+    """get_interface_info from one Wireless.snapshot(), None if unusable"""
+    try:
+        snapshot = Wireless(ifname).snapshot()
+    except Exception as e:
+        print("[get_interface_info_fast] snapshot failed: {}".format(e))
+        return None
+    if snapshot.name is None:
+        # no wireless extensions at all, let iwconfig/iw have a go
+        return None
+
+    info = {'name': ifname}
+    info['essid'] = snapshot.essid or _("Not connected")
+
+    if snapshot.isAssociated():
+        info['ap_addr'] = snapshot.ap_addr
+    else:
+        info['ap_addr'] = _("Unknown")
+
+    info['mode'] = snapshot.mode_text or _("Unknown")
+
+    frequency = snapshot.frequency
+    if frequency is not None and frequency >= 1000000:
+        info['frequency'] = _("{} GHz").format("%g" % (frequency / 1e9))
+    elif frequency:
+        info['frequency'] = _("Channel {}").format(frequency)
+    else:
+        info['frequency'] = _("Unknown")
+
+    if snapshot.bitrate is not None and snapshot.bitrate.value > 0:
+        info['bitrate'] = _("{} Mb/s").format(
+            "%g" % (snapshot.bitrate.value / 1e6))
+    else:
+        info['bitrate'] = _("Unknown")
+
+    # link quality, from the stats ioctl or /proc/net/wireless
+    quality = snapshot.quality
+    signal_dbm = snapshot.level_dbm
+    if quality is None:
+        stats = readProcWirelessStats(ifname)
+        if stats is not None:
+            quality = stats[1]
+            if stats[2] < 0:
+                signal_dbm = int(stats[2])
+    max_quality = 0
+    if quality is not None:
+        try:
+            max_quality = getRange(ifname).max_qual.quality
+        except IOError:
+            pass
+
+    if quality is not None and max_quality > 0:
+        info['quality'] = _("{:.1f}%").format(quality * 100.0 / max_quality)
+    elif signal_dbm is not None:
+        info['quality'] = _("{} dBm").format(signal_dbm)
+    else:
+        info['quality'] = _("Unknown")
+
+    if signal_dbm is None:
+        signal_dbm = get_nl80211_signal(ifname)
+    if signal_dbm is not None:
+        info['signal_dbm'] = signal_dbm
+        info['signal'] = signal_dbm
+
+    txpower = snapshot.txpower_dbm
+    if txpower is not None:
+        info['txpower'] = _("{} dBm").format(txpower)
+    else:
+        info['txpower'] = _("Unknown")
+
+    info['protocol'] = getDriverName(ifname) or _("Unknown")
+    return info
+
+
+def get_interface_info_subprocess(ifname):
     """Returns detailed information about an interface using system commands"""
     try:
         info = {'name': ifname}
 
         # Get basic interface info using iwconfig
-        result = subprocess.run(['iwconfig', ifname],
-                                capture_output=True, text=True)
+        result = run_command(['iwconfig', ifname], ttl=STATUS_TTL)
 
         if result.returncode != 0:
             info['error'] = _("Interface {} not available").format(ifname)
@@ -296,15 +611,17 @@ def get_interface_info(ifname):
         if not signal_match:
             signal_match = search(r'Signal[=\s:]*(-?\d+)', output)
 
-        # If still not found, try iw
+        # If still not found, ask nl80211 for the AP station entry
         if not signal_match:
+            signal_dbm = get_nl80211_signal(ifname)
+            if signal_dbm is not None:
+                info['signal_dbm'] = signal_dbm
+
+        # Last resort, fork iw
+        if not signal_match and 'signal_dbm' not in info:
             try:
-                iw_result = subprocess.run(
-                    ['iw', 'dev', ifname, 'link'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
+                iw_result = run_command(['iw', 'dev', ifname, 'link'],
+                                        timeout=5, ttl=STATUS_TTL)
 
                 if iw_result.returncode == 0:
                     iw_signal_match = search(
@@ -346,12 +663,8 @@ def get_interface_info(ifname):
 
         # Get protocol (driver) information using ethtool
         try:
-            ethtool_result = subprocess.run(
-                ['ethtool', '-i', ifname],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
+            ethtool_result = run_command(['ethtool', '-i', ifname],
+                                         timeout=5, ttl=STATUS_TTL)
 
             if ethtool_result.returncode == 0:
                 ethtool_output = ethtool_result.stdout
@@ -402,249 +715,82 @@ def get_interface_info(ifname):
 
 def parse_wpa_supplicant(wpa_file, interface):
     """Parse wpa_supplicant config file"""
-    networks = {}
     try:
-        with open(wpa_file, 'r') as f:
-            content = f.read()
-
-        network_blocks = findall(r'network=\{([^}]+)\}', content, DOTALL)
-
-        for block in network_blocks:
-            ssid_match = search(r'ssid="([^"]+)"', block)
-            psk_match = search(r'psk="([^"]+)"', block)
-
-            if ssid_match and psk_match:
-                essid = ssid_match.group(1)
-                password = psk_match.group(1)
-                networks[essid] = {
-                    'password': password,
-                    'encryption': 'WPA/WPA2',
-                    'timestamp': time.time(),
-                    'interface': interface
-                }
+        return readNetworks(wpa_file, interface)
     except Exception as e:
         print(f"Error parsing wpa_supplicant: {e}")
-
-    return networks
+    return {}
 
 
 def parse_iw_scan(scan_output):
     """Parse iw scan output"""
-    networks = []
-    current_bss = {}
-
-    for line in scan_output.split('\n'):
-        line = line.strip()
-
-        if line.startswith('BSS'):
-            if current_bss:
-                networks.append(current_bss)
-            current_bss = {}
-            bss_match = search(r'BSS ([0-9a-f:]{17})', line)
-            if bss_match:
-                current_bss['bssid'] = bss_match.group(1).lower()
-
-        elif 'SSID:' in line:
-            ssid_match = search(r'SSID: (.+)', line)
-            if ssid_match:
-                current_bss['essid'] = ssid_match.group(1).strip()
-
-        elif 'signal:' in line:
-            signal_match = search(r'signal: (-?\d+\.\d+) dBm', line)
-            if signal_match:
-                current_bss['signal'] = float(signal_match.group(1))
-
-        elif 'freq:' in line:
-            freq_match = search(r'freq: (\d+)', line)
-            if freq_match:
-                current_bss['frequency'] = int(freq_match.group(1))
-
-    if current_bss:
-        networks.append(current_bss)
-
-    return networks
+    return parseScan(scan_output, FORMAT_IW)
 
 
 def parse_iwlist_scan(scan_output):
     """Parse iwlist scan output into network list"""
-    networks = []
-    current_network = {}
-
-    for line in scan_output.split('\n'):
-        line = line.strip()
-
-        # New cell block
-        if 'Cell' in line and 'Address' in line:
-            if current_network:
-                networks.append(current_network)
-            current_network = {}
-            mac_match = search(r'Address: ([0-9A-Fa-f:]{17})', line)
-            if mac_match:
-                current_network['bssid'] = mac_match.group(1)
-
-        # ESSID
-        elif 'ESSID:' in line:
-            essid_match = search(r'ESSID:"([^"]*)"', line)
-            if essid_match:
-                current_network['essid'] = essid_match.group(1)
-
-        # Signal Quality
-        elif 'Quality=' in line:
-            quality_match = search(r'Quality=(\d+)/(\d+)', line)
-            signal_match = search(r'Signal level=(-?\d+) dBm', line)
-
-            if quality_match:
-                quality = int(quality_match.group(1))
-                max_quality = int(quality_match.group(2))
-                if max_quality > 0:
-                    percentage = (quality / max_quality) * 100
-                    current_network['quality'] = percentage
-                else:
-                    current_network['quality'] = 0
-            if signal_match:
-                current_network['signal'] = int(signal_match.group(1))
-
-        # Channel/Frequency
-        elif 'Channel:' in line or 'Frequency:' in line:
-            channel_match = search(r'Channel:(\d+)', line)
-            freq_match = search(r'Frequency:([0-9.]+) GHz', line)
-
-            if channel_match:
-                current_network['channel'] = int(channel_match.group(1))
-            if freq_match:
-                current_network['frequency'] = float(freq_match.group(1))
-
-        # Encryption
-        elif 'Encryption key:' in line:
-            encrypt_match = search(r'Encryption key:(\w+)', line)
-            if encrypt_match:
-                current_network['encryption'] = encrypt_match.group(1) == 'on'
-
-        # Mode
-        elif 'Mode:' in line:
-            mode_match = search(r'Mode:(\w+)', line)
-            if mode_match:
-                current_network['mode'] = mode_match.group(1)
-
-    # Add the last network
-    if current_network:
-        networks.append(current_network)
-
-    return networks
+    return parseScan(scan_output, FORMAT_IWLIST)
 
 
 def parse_iwlist_detailed(scan_output):
-    """More detailed parser for iwlist scan output"""
-    networks = []
-    current_net = {}
-
-    for line in scan_output.split('\n'):
-        line = line.strip()
-
-        # New cell
-        if 'Cell' in line and 'Address' in line:
-            if current_net and current_net.get('essid'):
-                networks.append(current_net)
-            current_net = {'encryption': False}
-
-            # Extract MAC address
-            mac_match = search(r'Address: ([0-9A-Fa-f:]{17})', line)
-            if mac_match:
-                current_net['bssid'] = mac_match.group(1)
-
-        # ESSID
-        elif 'ESSID:' in line:
-            essid_match = search(r'ESSID:\s*"([^"]*)"', line)
-            if essid_match:
-                current_net['essid'] = essid_match.group(1).strip()
-
-        # Encryption with type detection
-        elif 'Encryption key:' in line:
-            current_net['encryption'] = 'on' in line.lower()
-
-        # Signal level - CORRETTO: cerca Signal level= in qualsiasi punto della
-        # linea
-        elif 'Signal level=' in line:
-            # Pattern migliorato per Signal level
-            signal_match = search(r'Signal level=(-?\d+)\s*dBm?', line)
-            if signal_match:
-                current_net['signal'] = int(signal_match.group(1))
-            else:
-                # Pattern alternativo
-                signal_match2 = search(r'Signal[=\s:]*(-?\d+)', line)
-                if signal_match2:
-                    current_net['signal'] = int(signal_match2.group(1))
-
-        # Quality - FIXED: DIVISION BY ZERO PROTECTION
-        elif 'Quality=' in line:
-            quality_match = search(r'Quality=(\d+)/(\d+)', line)
-            if quality_match:
-                quality = int(quality_match.group(1))
-                max_quality = int(quality_match.group(2))
-                # FIX: Check for zero division
-                if max_quality > 0:
-                    percentage = (quality / max_quality) * 100
-                    current_net['quality_percent'] = percentage
-                else:
-                    current_net['quality_percent'] = 0
-
-        # Channel/Frequency
-        elif 'Channel:' in line:
-            channel_match = search(r'Channel:(\d+)', line)
-            if channel_match:
-                current_net['channel'] = int(channel_match.group(1))
+    """Like parse_iwlist_scan, skipping hidden networks"""
+    return [network for network in parseScan(scan_output, FORMAT_IWLIST)
+            if network.get('essid')]
 
-        # Mode
-        elif 'Mode:' in line:
-            mode_match = search(r'Mode:(\w+)', line)
-            if mode_match:
-                current_net['mode'] = mode_match.group(1)
 
-    # Add last network
-    if current_net and current_net.get('essid'):
-        networks.append(current_net)
+def scan_networks_stream(ifname, callback=None, timeout=30):
+    """Runs iwlist scan and yields each network as soon as its Cell block
+    is complete, instead of waiting for the whole output
 
-    return networks
-
-
-def scan_networks_simple(ifname):
-    """Simple network scan using iw dev scan"""
+    callback, if given, is called with every record as well. Closing the
+    generator early kills iwlist.
+    """
+    _command_runner.slots.acquire()
+    start = time.time()
     try:
-        result = subprocess.run(['iw', 'dev', ifname, 'scan'],
-                                capture_output=True, text=True, timeout=20)
-
-        if result.returncode != 0:
-            raise Exception(f"iw scan failed: {result.stderr.strip()}")
-
-        return parse_iw_scan(result.stdout)
-
-    except subprocess.TimeoutExpired:
-        raise Exception(f"Scan timeout on {ifname}")
-    except Exception as e:
+        process = subprocess.Popen(['iwlist', ifname, 'scan'],
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   universal_newlines=True)
+    except OSError as e:
+        _command_runner.slots.release()
         raise Exception(f"Scan failed on {ifname}: {str(e)}")
 
-
-def scan_networks(ifname, detailed=False):
-    """Scan available networks using iwlist - VERSIONE SICURA"""
+    timer = threading.Timer(timeout, process.kill)
+    timer.start()
+    parser = ScanParser(FORMAT_IWLIST)
     try:
-        cmd = f"iwlist {ifname} scan"
-        result = subprocess.run(
-            cmd,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=30)
-
-        if result.returncode != 0:
-            raise Exception(f"Scan failed: {result.stderr.strip()}")
-
-        networks = parse_iwlist_scan(result.stdout)
-        return networks
-
-    except subprocess.TimeoutExpired:
-        raise Exception(f"Scan timeout on {ifname}")
-    except Exception as e:
-        raise Exception(f"Scan failed on {ifname}: {str(e)}")
+        for line in process.stdout:
+            network = parser.feedLine(line)
+            if network is not None:
+                if callback is not None:
+                    callback(network)
+                yield network
+        for network in parser.close():
+            if callback is not None:
+                callback(network)
+            yield network
+
+        process.wait()
+        if not timer.is_alive():
+            raise Exception(f"Scan timeout on {ifname}")
+        if process.returncode != 0:
+            raise Exception(
+                f"Scan failed on {ifname}: {process.stderr.read().strip()}")
+    finally:
+        timer.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+        _command_runner.slots.release()
+        _command_runner.record('iwlist', time.time() - start)
+
+
+def scan_networks(ifname, detailed=False, callback=None):
+    """Scan available networks using iwlist, see scan_networks_stream"""
+    return list(scan_networks_stream(ifname, callback))
 
 
 def format_signal_quality(quality_data):
@@ -676,30 +822,20 @@ def format_signal_quality(quality_data):
 
 
 def load_saved_networks(config_file=None, interface=None):
-    """Load saved networks from file"""
+    """Returns the shared SavedNetworkStore of config_file, importing the
+    networks of wpa_supplicant.<interface>.conf when it is empty"""
+    store = getSavedNetworkStore(config_file or SAVED_NETWORKS_FILE)
     try:
-        # If config_file is not specified, use the default one
-        if config_file is None:
-            config_file = "/etc/wifi_saved_networks.json"
-
-        if exists(config_file):
-            with open(config_file, 'r') as f:
-                networks = load(f)
-                if networks:
-                    return networks
-
-        # Fallback to wpa_supplicant if interface is provided
-        if interface:
+        if not store and interface:
             wpa_file = f"/etc/wpa_supplicant.{interface}.conf"
             if exists(wpa_file):
                 networks = parse_wpa_supplicant(wpa_file, interface)
                 if networks:
-                    with open(config_file, 'w') as f:
-                        dump(networks, f, indent=2)
-                    return networks
+                    store.update(networks)
+                    store.compact()
     except Exception as e:
         print(f"Error loading saved networks: {e}")
-    return {}
+    return store
 
 
 def test_ping(host="8.8.8.8", count=3, timeout=5, debug=False):
@@ -725,12 +861,7 @@ def test_ping(host="8.8.8.8", count=3, timeout=5, debug=False):
                 if debug:
                     print("[PING] Trying command: {}".format(' '.join(cmd)))
 
-                ping_result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout + 5
-                )
+                ping_result = run_command(cmd, timeout=timeout + 5)
 
                 if ping_result.returncode == 0:
                     used_command = ' '.join(cmd)
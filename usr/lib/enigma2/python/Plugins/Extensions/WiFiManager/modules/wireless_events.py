@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+
+import socket
+import struct
+import time
+from collections import namedtuple
+
+from .flags import (
+    SIOCGIWAP,
+    SIOCGIWSCAN,
+    SIOCGIWESSID,
+    IWEVCUSTOM,
+    IWEVREGISTERED,
+    IWEVEXPIRED
+)
+from .iwlibs import IW_EV_HEADER, IW_EV_PAYLOAD_OFFSET
+from .nl80211 import parseAttrs, parseMessages
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+""" Wireless and link events from the kernel, pushed instead of polled.
+
+    A NETLINK_ROUTE socket joined to RTNLGRP_LINK receives RTM_NEWLINK /
+    RTM_DELLINK for every interface; wireless drivers attach their
+    wireless extension events (IFLA_WIRELESS) to those messages.
+    LinkEventDecoder turns the raw frames into WirelessEvent records and
+    WirelessEvents hands them to subscribers from the reactor.
+
+"""
+
+NETLINK_ROUTE = 0
+RTMGRP_LINK = 0x1
+
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+
+IFLA_IFNAME = 3
+IFLA_WIRELESS = 11
+IFLA_OPERSTATE = 16
+IFLA_CARRIER = 33
+
+IFF_UP = 0x1
+IFF_RUNNING = 0x40
+IFF_LOWER_UP = 0x10000
+
+IFINFOMSG = struct.Struct('BxHiII')
+SOCKADDR_MAC = struct.Struct('H6B')
+
+# iw_point events carry no pointer on netlink: length and flags sit where
+# the union starts and the data follows the rest of the struct iw_point
+IW_EV_POINT = struct.Struct('HH')
+IW_EV_POINT_DATA_OFFSET = (IW_EV_PAYLOAD_OFFSET + struct.calcsize('PHH0P') -
+                           struct.calcsize('P'))
+
+# event kinds
+EVENT_ASSOCIATED = 'associated'
+EVENT_DISASSOCIATED = 'disassociated'
+EVENT_SCAN_DONE = 'scan_done'
+EVENT_ESSID = 'essid'
+EVENT_CUSTOM = 'custom'
+EVENT_STATION_ADDED = 'station_added'
+EVENT_STATION_REMOVED = 'station_removed'
+EVENT_LINK_UP = 'link_up'
+EVENT_LINK_DOWN = 'link_down'
+EVENT_CARRIER_ON = 'carrier_on'
+EVENT_CARRIER_OFF = 'carrier_off'
+EVENT_LINK_ADDED = 'link_added'
+EVENT_LINK_REMOVED = 'link_removed'
+
+EVENT_KINDS = (
+    EVENT_ASSOCIATED, EVENT_DISASSOCIATED, EVENT_SCAN_DONE, EVENT_ESSID,
+    EVENT_CUSTOM, EVENT_STATION_ADDED, EVENT_STATION_REMOVED, EVENT_LINK_UP,
+    EVENT_LINK_DOWN, EVENT_CARRIER_ON, EVENT_CARRIER_OFF, EVENT_LINK_ADDED,
+    EVENT_LINK_REMOVED
+)
+
+# data: bssid for (dis)associated and station events, the ESSID or the
+# driver string for essid/custom, None otherwise
+WirelessEvent = namedtuple('WirelessEvent',
+                           'kind ifindex ifname data timestamp')
+
+
+def _formatMac(octets):
+    return "%02X:%02X:%02X:%02X:%02X:%02X" % octets
+
+
+class LinkEventDecoder(object):
+    """ Decodes rtnetlink link frames into WirelessEvent records.
+
+        Link flags are remembered per ifindex, so only edges (up -> down,
+        carrier on -> off) produce events, not every RTM_NEWLINK.
+
+    """
+
+    def __init__(self):
+        self.links = {}
+
+    def feed(self, data, timestamp=None):
+        """ Returns the events contained in one received datagram. """
+        if timestamp is None:
+            timestamp = time.time()
+        events = []
+        for msg_type, flags, seq, payload in parseMessages(data):
+            if msg_type in (RTM_NEWLINK, RTM_DELLINK):
+                self._link(msg_type, payload, timestamp, events)
+        return events
+
+    def _link(self, msg_type, payload, timestamp, events):
+        if len(payload) < IFINFOMSG.size:
+            return
+        family, iftype, ifindex, ifflags, change = IFINFOMSG.unpack_from(
+            payload)
+        attrs = parseAttrs(payload[IFINFOMSG.size:])
+
+        ifname = attrs.get(IFLA_IFNAME)
+        if ifname is not None:
+            ifname = bytes(ifname).split(b'\0', 1)[0].decode('utf-8')
+        previous = self.links.get(ifindex)
+
+        if msg_type == RTM_DELLINK:
+            if previous is not None:
+                del self.links[ifindex]
+            events.append(WirelessEvent(EVENT_LINK_REMOVED, ifindex, ifname,
+                                        None, timestamp))
+            return
+
+        carrier = attrs.get(IFLA_CARRIER)
+        if carrier is not None:
+            carrier = bool(carrier[0])
+        else:
+            carrier = bool(ifflags & IFF_LOWER_UP)
+        up = bool(ifflags & IFF_UP)
+
+        if previous is None:
+            self.links[ifindex] = (ifname, up, carrier)
+            # first sight after we started listening is not an edge,
+            # except for a link the kernel says just appeared
+            if change == 0xffffffff:
+                events.append(WirelessEvent(EVENT_LINK_ADDED, ifindex,
+                                            ifname, None, timestamp))
+        else:
+            old_name, old_up, old_carrier = previous
+            if ifname is None:
+                ifname = old_name
+            self.links[ifindex] = (ifname, up, carrier)
+            if up != old_up:
+                events.append(WirelessEvent(
+                    EVENT_LINK_UP if up else EVENT_LINK_DOWN,
+                    ifindex, ifname, None, timestamp))
+            if carrier != old_carrier:
+                events.append(WirelessEvent(
+                    EVENT_CARRIER_ON if carrier else EVENT_CARRIER_OFF,
+                    ifindex, ifname, None, timestamp))
+
+        wireless = attrs.get(IFLA_WIRELESS)
+        if wireless is not None:
+            self._wireless(wireless, ifindex, ifname, timestamp, events)
+
+    def _wireless(self, data, ifindex, ifname, timestamp, events):
+        """ Walks the iw_event stream of one IFLA_WIRELESS attribute. """
+        offset = 0
+        end = len(data)
+        while end - offset >= IW_EV_HEADER.size:
+            length, cmd = IW_EV_HEADER.unpack_from(data, offset)
+            if length < IW_EV_HEADER.size or offset + length > end:
+                break
+            event = data[offset:offset + length]
+            offset += length
+
+            if cmd == SIOCGIWAP or cmd in (IWEVREGISTERED, IWEVEXPIRED):
+                if len(event) < IW_EV_PAYLOAD_OFFSET + SOCKADDR_MAC.size:
+                    continue
+                octets = SOCKADDR_MAC.unpack_from(
+                    event, IW_EV_PAYLOAD_OFFSET)[1:]
+                bssid = _formatMac(octets)
+                if cmd == IWEVREGISTERED:
+                    kind = EVENT_STATION_ADDED
+                elif cmd == IWEVEXPIRED:
+                    kind = EVENT_STATION_REMOVED
+                elif any(octets):
+                    kind = EVENT_ASSOCIATED
+                else:
+                    kind = EVENT_DISASSOCIATED
+                events.append(WirelessEvent(kind, ifindex, ifname, bssid,
+                                            timestamp))
+            elif cmd == SIOCGIWSCAN:
+                events.append(WirelessEvent(EVENT_SCAN_DONE, ifindex, ifname,
+                                            None, timestamp))
+            elif cmd in (SIOCGIWESSID, IWEVCUSTOM):
+                text = None
+                if len(event) >= IW_EV_PAYLOAD_OFFSET + IW_EV_POINT.size:
+                    size = IW_EV_POINT.unpack_from(
+                        event, IW_EV_PAYLOAD_OFFSET)[0]
+                    text = bytes(event[IW_EV_POINT_DATA_OFFSET:
+                                       IW_EV_POINT_DATA_OFFSET + size])
+                    text = text.split(b'\0', 1)[0].decode('utf-8', 'replace')
+                events.append(WirelessEvent(
+                    EVENT_ESSID if cmd == SIOCGIWESSID else EVENT_CUSTOM,
+                    ifindex, ifname, text, timestamp))
+
+
+class _NetlinkReader(object):
+    """ Read descriptor handed to reactor.addReader(). """
+
+    def __init__(self, owner, sock):
+        self.owner = owner
+        self.sock = sock
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def doRead(self):
+        self.owner.readEvents()
+
+    def connectionLost(self, reason):
+        self.owner.stop()
+
+    def logPrefix(self):
+        return 'WirelessEvents'
+
+
+class WirelessEvents(object):
+    """ Publishes kernel link and wireless events to plugin subscribers.
+
+        The netlink socket is opened with the first subscriber and closed
+        with the last one; while it is open the reactor calls back as soon
+        as a frame arrives, so nobody has to poll for association changes.
+
+    """
+
+    def __init__(self):
+        self.sock = None
+        self.reader = None
+        self.decoder = LinkEventDecoder()
+        self.subscribers = {}
+        self.next_token = 1
+        self.stats = dict(frames=0, events=0, errors=0)
+
+    def subscribe(self, callback, kinds=None, ifname=None):
+        """ Calls callback(event) for every WirelessEvent whose kind is in
+            kinds (all if None) and, if given, whose interface is ifname.
+            Returns a token for unsubscribe(), or None when the kernel
+            listener could not be opened (the caller keeps polling).
+
+        """
+        if self.sock is None and not self.start():
+            return None
+        token = self.next_token
+        self.next_token += 1
+        self.subscribers[token] = (
+            callback, frozenset(kinds) if kinds else None, ifname)
+        return token
+
+    def unsubscribe(self, token):
+        self.subscribers.pop(token, None)
+        if not self.subscribers:
+            self.stop()
+
+    def start(self):
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW,
+                                 NETLINK_ROUTE)
+            sock.bind((0, RTMGRP_LINK))
+            sock.setblocking(False)
+        except (IOError, OSError, AttributeError) as e:
+            print("[WirelessEvents] Cannot listen for link events: {}".format(
+                e))
+            return False
+        from twisted.internet import reactor
+        self.sock = sock
+        self.reader = _NetlinkReader(self, sock)
+        reactor.addReader(self.reader)
+        return True
+
+    def stop(self):
+        if self.sock is None:
+            return
+        from twisted.internet import reactor
+        reactor.removeReader(self.reader)
+        self.sock.close()
+        self.sock = None
+        self.reader = None
+        self.decoder = LinkEventDecoder()
+
+    def readEvents(self):
+        while self.sock is not None:
+            try:
+                data = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            except (IOError, OSError) as e:
+                # ENOBUFS: we fell behind, link state may be stale
+                print("[WirelessEvents] Receive error: {}".format(e))
+                self.stats['errors'] += 1
+                return
+            self.stats['frames'] += 1
+            for event in self.decoder.feed(data):
+                self.publish(event)
+
+    def publish(self, event):
+        self.stats['events'] += 1
+        for callback, kinds, ifname in list(self.subscribers.values()):
+            if kinds is not None and event.kind not in kinds:
+                continue
+            if ifname is not None and event.ifname != ifname:
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                print("[WirelessEvents] Subscriber error: {}".format(e))
+
+
+_wireless_events = None
+
+
+def getWirelessEvents():
+    """ Returns the plugin wide WirelessEvents publisher. """
+    global _wireless_events
+    if _wireless_events is None:
+        _wireless_events = WirelessEvents()
+    return _wireless_events
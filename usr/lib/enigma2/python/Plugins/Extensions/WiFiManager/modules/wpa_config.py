@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+
+import binascii
+import hashlib
+import time
+
+from .saved_networks import writeFileAtomic
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+WPA_CONF = "/etc/wpa_supplicant.%s.conf"
+
+DEFAULT_GLOBALS = (
+    ('ctrl_interface', '/var/run/wpa_supplicant'),
+    ('update_config', '1'),
+)
+
+# key derivation wpa_supplicant does for psk="passphrase" (IEEE 802.11i)
+PSK_ITERATIONS = 4096
+
+
+def wpaConfigPath(ifname):
+    return WPA_CONF % ifname
+
+
+def isHexPsk(value):
+    if len(value) != 64:
+        return False
+    try:
+        int(value, 16)
+    except ValueError:
+        return False
+    return True
+
+
+def computePsk(ssid, passphrase):
+    """Returns the 256-bit PSK of passphrase on ssid as 64 hex digits,
+    the value wpa_supplicant accepts unquoted in psk="""
+    if isHexPsk(passphrase):
+        return passphrase.lower()
+    # IEEE 802.11i: 8..63 printable ASCII characters, as wpa_supplicant
+    # checks psk="..."
+    if not all(32 <= ord(c) < 127 for c in passphrase):
+        raise ValueError("WPA passphrase must be printable ASCII")
+    if not 8 <= len(passphrase.encode('utf-8')) <= 63:
+        raise ValueError("WPA passphrase must be 8..63 characters")
+    key = hashlib.pbkdf2_hmac('sha1', passphrase.encode('utf-8'),
+                              ssid.encode('utf-8'), PSK_ITERATIONS, 32)
+    return binascii.hexlify(key).decode('ascii')
+
+
+def cachedPsk(store, essid, passphrase):
+    """computePsk() through the saved-network store: the PSK saved with
+    essid is used while the passphrase matches, a new one is stored
+    along with the entry"""
+    entry = store.get(essid) if store is not None else None
+    if entry and entry.get('password') == passphrase and entry.get('psk'):
+        return entry['psk']
+    psk = computePsk(essid, passphrase)
+    if entry and entry.get('password') == passphrase:
+        entry = dict(entry, psk=psk)
+        store.put(essid, entry)
+    return psk
+
+
+def quote(value):
+    return '"{}"'.format(value)
+
+
+def unquote(value):
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def ssidValue(ssid):
+    """ssid= value: quoted text, or hex for names a quoted string can't
+    hold"""
+    if ssid and '"' not in ssid and all(32 <= ord(c) < 127 for c in ssid):
+        return quote(ssid)
+    return binascii.hexlify(ssid.encode('utf-8')).decode('ascii')
+
+
+def networkFields(ssid, encryption, password='', hidden=False,
+                  wep_hex=False, psk=None):
+    """Returns the (key, value) lines of a network block as the plugin
+    writes it; psk is the precomputed key used instead of the passphrase"""
+    fields = [('ssid', ssidValue(ssid)),
+              ('scan_ssid', '1' if hidden else '0')]
+    if encryption in ("WPA", "WPA2", "WPA/WPA2"):
+        fields.append(('key_mgmt', 'WPA-PSK'))
+        if encryption == "WPA":
+            fields.extend([('proto', 'WPA'), ('pairwise', 'TKIP'),
+                           ('group', 'TKIP')])
+        elif encryption == "WPA2":
+            fields.extend([('proto', 'RSN'), ('pairwise', 'CCMP'),
+                           ('group', 'CCMP')])
+        else:
+            fields.extend([('proto', 'WPA RSN'), ('pairwise', 'CCMP TKIP'),
+                           ('group', 'CCMP TKIP')])
+        fields.append(('psk', psk if psk else quote(password)))
+    elif encryption == "WEP":
+        fields.append(('key_mgmt', 'NONE'))
+        fields.append(('wep_key0', password if wep_hex else quote(password)))
+    else:
+        fields.append(('key_mgmt', 'NONE'))
+    return fields
+
+
+class WpaNetwork(object):
+    """One network={...} block; lines keep their order and raw values,
+    comments inside the block have the key None"""
+
+    def __init__(self, lines=None):
+        self.lines = list(lines or [])
+
+    @property
+    def ssid(self):
+        value = self.getRaw('ssid')
+        if value is None:
+            return None
+        if value.startswith('"'):
+            return unquote(value)
+        try:
+            return binascii.unhexlify(value).decode('utf-8', 'replace')
+        except (TypeError, ValueError):
+            return value
+
+    def getRaw(self, key):
+        for name, value in self.lines:
+            if name == key:
+                return value
+        return None
+
+    def get(self, key, default=None):
+        """Value of key without quotes"""
+        value = self.getRaw(key)
+        return default if value is None else unquote(value)
+
+    def set(self, key, value):
+        """Sets the raw value of key, in place when it exists"""
+        for i, (name, old) in enumerate(self.lines):
+            if name == key:
+                self.lines[i] = (key, value)
+                return
+        self.lines.append((key, value))
+
+    def remove(self, key):
+        self.lines = [(name, value) for name, value in self.lines
+                      if name != key]
+
+    def setFields(self, fields):
+        """Replaces the plugin managed keys with fields, keeping the
+        others (priority, bssid, ...) and comments"""
+        managed = ('ssid', 'scan_ssid', 'key_mgmt', 'proto', 'pairwise',
+                   'group', 'psk', 'wep_key0')
+        keys = set(key for key, value in fields)
+        self.lines = [(name, value) for name, value in self.lines
+                      if name is None or name in keys or name not in managed]
+        for key, value in fields:
+            self.set(key, value)
+
+    def toText(self):
+        out = ["network={"]
+        for name, value in self.lines:
+            if name is None:
+                out.append("\t" + value)
+            else:
+                out.append("\t{}={}".format(name, value))
+        out.append("}")
+        return "\n".join(out)
+
+
+class WpaConfig(object):
+    """Parsed wpa_supplicant.conf: global lines plus network blocks
+
+    Edits work on the parsed blocks, so unrelated networks and lines are
+    written back as they were read; save() replaces the file atomically.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.globals = []
+        self.networks = []
+
+    @classmethod
+    def forInterface(cls, ifname):
+        config = cls(wpaConfigPath(ifname))
+        config.load()
+        return config
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                self.parse(f.read())
+        except IOError:
+            self.globals = []
+            self.networks = []
+        return self
+
+    def parse(self, text):
+        self.globals = []
+        self.networks = []
+        block = None
+        for line in text.splitlines():
+            stripped = line.strip()
+            if block is None:
+                if stripped.replace(' ', '').startswith('network={'):
+                    block = WpaNetwork()
+                elif not stripped:
+                    continue
+                elif stripped.startswith('#') or '=' not in stripped:
+                    self.globals.append((None, stripped))
+                else:
+                    key, value = stripped.split('=', 1)
+                    self.globals.append((key.strip(), value.strip()))
+            elif stripped == '}':
+                self.networks.append(block)
+                block = None
+            elif stripped.startswith('#'):
+                block.lines.append((None, stripped))
+            elif '=' in stripped:
+                key, value = stripped.split('=', 1)
+                block.lines.append((key.strip(), value.strip()))
+        if block is not None:
+            # unterminated last block, keep what was read
+            self.networks.append(block)
+        return self
+
+    def getGlobal(self, key, default=None):
+        for name, value in self.globals:
+            if name == key:
+                return value
+        return default
+
+    def setGlobal(self, key, value):
+        for i, (name, old) in enumerate(self.globals):
+            if name == key:
+                self.globals[i] = (key, value)
+                return
+        self.globals.append((key, value))
+
+    def ensureDefaults(self):
+        for key, value in DEFAULT_GLOBALS:
+            if self.getGlobal(key) is None:
+                self.setGlobal(key, value)
+
+    def index(self, ssid):
+        for i, network in enumerate(self.networks):
+            if network.ssid == ssid:
+                return i
+        return -1
+
+    def find(self, ssid):
+        i = self.index(ssid)
+        return self.networks[i] if i >= 0 else None
+
+    def ssids(self):
+        return [network.ssid for network in self.networks]
+
+    def setNetwork(self, ssid, fields):
+        """Adds the network or updates its block in place"""
+        network = self.find(ssid)
+        if network is None:
+            network = WpaNetwork()
+            self.networks.append(network)
+        network.setFields(fields)
+        return network
+
+    def removeNetwork(self, ssid):
+        i = self.index(ssid)
+        if i < 0:
+            return False
+        del self.networks[i]
+        return True
+
+    def moveNetwork(self, ssid, position):
+        """Moves the block to position (0 is tried first by the plugin's
+        configs, wpa_supplicant itself orders by priority=)"""
+        i = self.index(ssid)
+        if i < 0:
+            return False
+        network = self.networks.pop(i)
+        self.networks.insert(max(0, min(position, len(self.networks))),
+                             network)
+        return True
+
+    def toText(self):
+        out = []
+        for name, value in self.globals:
+            out.append(value if name is None else "{}={}".format(name, value))
+        for network in self.networks:
+            out.append("")
+            out.append(network.toText())
+        return "\n".join(out) + "\n"
+
+    def save(self, path=None):
+        writeFileAtomic(path or self.path, self.toText())
+
+
+def saveNetwork(ifname, ssid, encryption, password='', hidden=False,
+                wep_hex=False, store=None, hash_psk=True, first=False):
+    """Adds or updates ssid in wpa_supplicant.<ifname>.conf; with
+    hash_psk a WPA passphrase is written as its precomputed PSK (taken
+    from or cached in store), so wpa_supplicant skips PBKDF2 on start"""
+    psk = None
+    if hash_psk and encryption in ("WPA", "WPA2", "WPA/WPA2") and password:
+        try:
+            psk = cachedPsk(store, ssid, password)
+        except ValueError as e:
+            print("[WpaConfig] Keeping passphrase for {}: {}".format(ssid, e))
+    config = WpaConfig.forInterface(ifname)
+    config.ensureDefaults()
+    config.setNetwork(ssid, networkFields(ssid, encryption, password,
+                                          hidden, wep_hex, psk))
+    if first:
+        config.moveNetwork(ssid, 0)
+    config.save()
+    return config
+
+
+def readNetworks(path, interface=None):
+    """Returns {ssid: entry} for the networks of a wpa_supplicant config
+    that carry a passphrase, in the saved-network store format"""
+    networks = {}
+    config = WpaConfig(path).load()
+    for network in config.networks:
+        psk = network.getRaw('psk')
+        if network.ssid and psk and psk.startswith('"'):
+            networks[network.ssid] = {
+                'password': unquote(psk),
+                'encryption': 'WPA/WPA2',
+                'timestamp': time.time(),
+                'interface': interface
+            }
+    return networks
@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+
+import os
+import select
+import socket
+import threading
+import time
+from collections import namedtuple
+
+from .scan_parser import makeNetwork
+
+"""
+#########################################################
+#                                                       #
+#  WiFi Manager Plugin                                  #
+#  Version: 1.0                                         #
+#  Created by Lululla (https://github.com/Belfagor2005) #
+#  License: Gnu Gpl v2                                  #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0    #
+#  Last Modified: "00:00 - 20250101"                    #
+#                                                       #
+#  Credits:                                             #
+#  - Original concept by Lululla                        #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+
+# ctrl_interface= of the configs the plugin writes
+WPA_CTRL_DIR = "/var/run/wpa_supplicant"
+CLIENT_DIR = "/tmp"
+
+REQUEST_TIMEOUT = 5.0
+CONNECT_TIMEOUT = 20.0
+
+EVENT_CONNECTED = "CTRL-EVENT-CONNECTED"
+EVENT_DISCONNECTED = "CTRL-EVENT-DISCONNECTED"
+EVENT_SCAN_RESULTS = "CTRL-EVENT-SCAN-RESULTS"
+EVENT_SSID_TEMP_DISABLED = "CTRL-EVENT-SSID-TEMP-DISABLED"
+EVENT_TERMINATING = "CTRL-EVENT-TERMINATING"
+
+# level: wpa_debug level of "<3>CTRL-EVENT-..", name: first word,
+# text: the whole message without the level
+WpaEvent = namedtuple('WpaEvent', 'level name text timestamp')
+
+_counter = [0]
+_counter_lock = threading.Lock()
+
+
+class WpaCtrlError(Exception):
+    pass
+
+
+def ctrlPath(ifname, ctrl_dir=WPA_CTRL_DIR):
+    return os.path.join(ctrl_dir, ifname)
+
+
+def parseEvent(message, timestamp=None):
+    """Returns a WpaEvent for "<level>TEXT", None for plain replies"""
+    if not message.startswith('<'):
+        return None
+    end = message.find('>')
+    if end < 0:
+        return None
+    try:
+        level = int(message[1:end])
+    except ValueError:
+        return None
+    text = message[end + 1:].strip()
+    name = text.split(None, 1)[0] if text else ''
+    return WpaEvent(level, name, text,
+                    timestamp if timestamp is not None else time.time())
+
+
+def parseKeyValues(reply):
+    values = {}
+    for line in reply.splitlines():
+        if '=' in line:
+            key, value = line.split('=', 1)
+            values[key] = value
+    return values
+
+
+def parseTable(reply, columns):
+    """Rows of a "a / b / c" headed, tab separated reply as dicts"""
+    rows = []
+    for line in reply.splitlines()[1:]:
+        if not line:
+            continue
+        fields = line.split('\t')
+        fields.extend([''] * (len(columns) - len(fields)))
+        rows.append(dict(zip(columns, fields)))
+    return rows
+
+
+class WpaCtrl(object):
+    """Client for the wpa_supplicant control socket of one interface
+
+    Requests are datagrams on a socket bound to a private path, the way
+    wpa_cli talks to the daemon. After attach() the same socket receives
+    unsolicited "<level>CTRL-EVENT-.." messages; they are queued while a
+    request waits for its reply and handed out by nextEvent() and
+    waitEvent(). Blocking calls, meant for worker threads.
+    """
+
+    def __init__(self, ifname=None, ctrl_dir=WPA_CTRL_DIR, path=None,
+                 timeout=REQUEST_TIMEOUT):
+        self.ifname = ifname
+        self.path = path or ctrlPath(ifname, ctrl_dir)
+        self.timeout = timeout
+        self.sock = None
+        self.local = None
+        self.attached = False
+        self.events = []
+        self.lock = threading.RLock()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def available(self):
+        return os.path.exists(self.path)
+
+    def open(self):
+        if self.sock is not None:
+            return
+        with _counter_lock:
+            _counter[0] += 1
+            local = os.path.join(CLIENT_DIR, "wpa_ctrl_{}-{}".format(
+                os.getpid(), _counter[0]))
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            if os.path.exists(local):
+                os.remove(local)
+            sock.bind(local)
+            sock.connect(self.path)
+        except (IOError, OSError) as e:
+            sock.close()
+            try:
+                os.remove(local)
+            except OSError:
+                pass
+            raise WpaCtrlError("Cannot open {}: {}".format(self.path, e))
+        self.sock = sock
+        self.local = local
+
+    def close(self):
+        if self.sock is None:
+            return
+        if self.attached:
+            try:
+                self.detach()
+            except WpaCtrlError:
+                pass
+        self.sock.close()
+        self.sock = None
+        try:
+            os.remove(self.local)
+        except OSError:
+            pass
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def _receive(self, timeout):
+        ready = select.select([self.sock], [], [], max(0.0, timeout))[0]
+        if not ready:
+            return None
+        return self.sock.recv(4096).decode('utf-8', 'replace')
+
+    def request(self, command, timeout=None):
+        """Sends command and returns the reply text"""
+        self.open()
+        timeout = self.timeout if timeout is None else timeout
+        with self.lock:
+            try:
+                self.sock.send(command.encode('utf-8'))
+                deadline = time.time() + timeout
+                while True:
+                    reply = self._receive(deadline - time.time())
+                    if reply is None:
+                        raise WpaCtrlError("{}: no reply to {}".format(
+                            self.path, command.split(' ', 1)[0]))
+                    event = parseEvent(reply)
+                    if event is None:
+                        return reply
+                    self.events.append(event)
+            except (IOError, OSError) as e:
+                raise WpaCtrlError("{}: {}".format(self.path, e))
+
+    def command(self, command, timeout=None):
+        """request() for commands answering OK; raises on FAIL"""
+        reply = self.request(command, timeout)
+        if not reply.startswith('OK'):
+            raise WpaCtrlError("{} failed: {}".format(
+                command.split(' ', 1)[0], reply.strip()))
+        return reply
+
+    def attach(self):
+        self.command("ATTACH")
+        self.attached = True
+
+    def detach(self):
+        self.attached = False
+        self.command("DETACH")
+
+    def nextEvent(self, timeout=0.0):
+        """Returns the next queued or arriving event, None on timeout"""
+        with self.lock:
+            if self.events:
+                return self.events.pop(0)
+            deadline = time.time() + timeout
+            while True:
+                try:
+                    message = self._receive(deadline - time.time())
+                except (IOError, OSError) as e:
+                    raise WpaCtrlError("{}: {}".format(self.path, e))
+                if message is None:
+                    return None
+                event = parseEvent(message)
+                if event is not None:
+                    return event
+
+    def waitEvent(self, names, timeout):
+        """Returns the first event whose name is in names, None when
+        timeout passes first"""
+        deadline = time.time() + timeout
+        while True:
+            event = self.nextEvent(deadline - time.time())
+            if event is None or event.name in names:
+                return event
+
+    def ping(self):
+        try:
+            return self.request("PING").startswith("PONG")
+        except WpaCtrlError:
+            return False
+
+    def status(self):
+        return parseKeyValues(self.request("STATUS"))
+
+    def scan(self):
+        self.command("SCAN")
+
+    def scanResults(self):
+        """Scan results as network records (see scan_parser)"""
+        networks = []
+        for row in parseTable(self.request("SCAN_RESULTS"),
+                              ('bssid', 'frequency', 'signal', 'flags',
+                               'ssid')):
+            try:
+                network = makeNetwork(row['bssid'], row['ssid'],
+                                      int(row['signal']),
+                                      int(row['frequency']))
+            except ValueError:
+                continue
+            flags = row['flags']
+            network['encryption'] = 'WPA' in flags or 'WEP' in flags
+            if 'WPA2' in flags or 'RSN' in flags:
+                network['security'] = 'WPA2'
+            elif 'WPA' in flags:
+                network['security'] = 'WPA'
+            elif 'WEP' in flags:
+                network['security'] = 'WEP'
+            network['mode'] = 'Ad-Hoc' if 'IBSS' in flags else 'Master'
+            networks.append(network)
+        return networks
+
+    def listNetworks(self):
+        """Configured networks: dicts with id (int), ssid, bssid, flags"""
+        rows = parseTable(self.request("LIST_NETWORKS"),
+                          ('id', 'ssid', 'bssid', 'flags'))
+        for row in rows:
+            row['id'] = int(row['id'])
+        return rows
+
+    def findNetwork(self, ssid):
+        """Returns the network id configured for ssid, None if there is none"""
+        for row in self.listNetworks():
+            if row['ssid'] == ssid:
+                return row['id']
+        return None
+
+    def addNetwork(self):
+        reply = self.request("ADD_NETWORK").strip()
+        try:
+            return int(reply)
+        except ValueError:
+            raise WpaCtrlError("ADD_NETWORK failed: {}".format(reply))
+
+    def setNetwork(self, network_id, key, value):
+        """value is raw: strings quoted, hex keys and numbers not"""
+        self.command("SET_NETWORK {} {} {}".format(network_id, key, value))
+
+    def setNetworkFields(self, network_id, fields):
+        for key, value in fields:
+            self.setNetwork(network_id, key, value)
+
+    def selectNetwork(self, network_id):
+        self.command("SELECT_NETWORK {}".format(network_id))
+
+    def enableNetwork(self, network_id):
+        self.command("ENABLE_NETWORK {}".format(network_id))
+
+    def removeNetwork(self, network_id):
+        self.command("REMOVE_NETWORK {}".format(network_id))
+
+    def reconfigure(self):
+        self.command("RECONFIGURE")
+
+    def saveConfig(self):
+        self.command("SAVE_CONFIG")
+
+    def disconnect(self):
+        self.command("DISCONNECT")
+
+    def reconnect(self):
+        self.command("RECONNECT")
+
+    def isConnected(self):
+        return self.status().get('wpa_state') == 'COMPLETED'
+
+
+def waitForSocket(ifname, timeout, ctrl_dir=WPA_CTRL_DIR):
+    """Waits for a just started wpa_supplicant to answer PING"""
+    deadline = time.time() + timeout
+    ctrl = WpaCtrl(ifname, ctrl_dir, timeout=1.0)
+    try:
+        while time.time() < deadline:
+            if ctrl.available():
+                try:
+                    if ctrl.ping():
+                        return True
+                except WpaCtrlError:
+                    pass
+                ctrl.close()
+            time.sleep(0.05)
+        return False
+    finally:
+        ctrl.close()
+
+
+def waitConnected(ctrl, timeout=CONNECT_TIMEOUT):
+    """With ctrl attached: True once the interface completed association,
+    False on timeout or when the key got rejected"""
+    if ctrl.isConnected():
+        return True
+    event = ctrl.waitEvent((EVENT_CONNECTED, EVENT_SSID_TEMP_DISABLED,
+                            EVENT_TERMINATING), timeout)
+    return event is not None and event.name == EVENT_CONNECTED
+
+
+def connectNetwork(ifname, ssid, fields=None, timeout=CONNECT_TIMEOUT,
+                   ctrl_dir=WPA_CTRL_DIR, path=None):
+    """Switches the running wpa_supplicant of ifname to ssid and waits
+    for CTRL-EVENT-CONNECTED
+
+    With fields (wpa_config.networkFields) the network is added or
+    updated over the socket; without, the daemon re-reads its config
+    file first. Raises WpaCtrlError when the daemon can't be used.
+    """
+    with WpaCtrl(ifname, ctrl_dir, path) as ctrl:
+        ctrl.attach()
+        network_id = ctrl.findNetwork(ssid)
+        if fields:
+            if network_id is None:
+                network_id = ctrl.addNetwork()
+            ctrl.setNetworkFields(network_id, fields)
+        else:
+            ctrl.reconfigure()
+            network_id = ctrl.findNetwork(ssid)
+        if network_id is None:
+            raise WpaCtrlError("{} is not configured".format(ssid))
+        # drop events from before the switch
+        del ctrl.events[:]
+        ctrl.selectNetwork(network_id)
+        return waitConnected(ctrl, timeout)
+
+
+def isRunning(ifname, ctrl_dir=WPA_CTRL_DIR):
+    """True when a wpa_supplicant answers on the socket of ifname"""
+    ctrl = WpaCtrl(ifname, ctrl_dir, timeout=1.0)
+    try:
+        return ctrl.available() and ctrl.ping()
+    finally:
+        ctrl.close()
+
+
+def associate(ifname, ssid, timeout=CONNECT_TIMEOUT):
+    """connectNetwork() on the running daemon; None when there is none
+    (or it stopped answering), so the caller can start one"""
+    if not isRunning(ifname):
+        return None
+    try:
+        return connectNetwork(ifname, ssid, timeout=timeout)
+    except WpaCtrlError as e:
+        print("[WpaCtrl] {}: {}".format(ifname, e))
+        return None
+
+
+def waitAssociated(ifname, start_timeout=10.0, timeout=CONNECT_TIMEOUT):
+    """After `wpa_supplicant -B`: waits for its socket, then for the
+    association; replaces sleeping a fixed time"""
+    if not waitForSocket(ifname, start_timeout):
+        return False
+    try:
+        with WpaCtrl(ifname) as ctrl:
+            ctrl.attach()
+            return waitConnected(ctrl, timeout)
+    except WpaCtrlError as e:
+        print("[WpaCtrl] {}: {}".format(ifname, e))
+        return False
+
+
+def disconnectNetwork(ifname, ctrl_dir=WPA_CTRL_DIR):
+    with WpaCtrl(ifname, ctrl_dir) as ctrl:
+        ctrl.disconnect()